@@ -19,6 +19,7 @@ configurations. See main.py.
 """
 
 import os
+import tempfile
 from typing import List
 import dataclasses
 
@@ -29,6 +30,18 @@ def _production():
     return 'EXECUTOR_PRODUCTION' in os.environ
 
 
+def _cache_dir(name):
+    """Returns the default directory of a cache.
+
+    The caches are kept in the directory set by the EXECUTOR_CACHE_DIR
+    environment variable, or in the temporary directory otherwise. The
+    executor creates its working directories in the temporary directory, so
+    that cached files can be hardlinked into them.
+    """
+    return os.path.join(
+        os.environ.get('EXECUTOR_CACHE_DIR', tempfile.gettempdir()), name)
+
+
 @dataclasses.dataclass
 class ExecutorConfig:
     """Configurations for the executor."""
@@ -101,14 +114,39 @@ class ExecutorConfig:
     requirements_filename: str = 'requirements.txt'
     # ID of the location where Cloud Scheduler is hosted.
     scheduler_location: str = 'us-central1'
+    # Maximum number of imports executed at the same time. Imports that
+    # depend on each other through 'depends_on' in the manifest are still
+    # executed in order.
+    max_concurrent_imports: int = 4
     # Maximum time a user script can run for in seconds.
     user_script_timeout: float = 600
     # Maximum time venv creation can take in seconds.
     venv_create_timeout: float = 600
+    # Directory to cache the virtual environments for running user scripts in,
+    # keyed by the contents of the requirement files and the Python version,
+    # along with pip's wheel cache. Empty to create a fresh virtual environment
+    # for every import. Defaults to a directory under EXECUTOR_CACHE_DIR, see
+    # _cache_dir.
+    venv_cache_dir: str = dataclasses.field(
+        default_factory=lambda: _cache_dir('import-executor-venvs'))
+    # Maximum number of cached virtual environments. Least recently used
+    # environments beyond this number are deleted.
+    venv_cache_max_entries: int = 8
     # Maximum time downloading a file can take in seconds.
     file_download_timeout: float = 600
+    # Maximum number of generated files to upload at the same time.
+    max_concurrent_uploads: int = 4
     # Maximum time downloading the repo can take in seconds.
     repo_download_timeout: float = 600
+    # Directory to cache snapshots of the repo in, keyed by commit. A snapshot
+    # is built from the most recently used one by fetching only the changed
+    # files. Empty to download the whole repo every time. Defaults to a
+    # directory under EXECUTOR_CACHE_DIR, see _cache_dir.
+    repo_snapshot_cache_dir: str = dataclasses.field(
+        default_factory=lambda: _cache_dir('import-executor-repos'))
+    # Maximum number of cached repo snapshots. Least recently used snapshots
+    # beyond this number are deleted.
+    repo_snapshot_cache_max_entries: int = 4
     # Email account used to send notification emails about import progress
     email_account: str = ''
     # The corresponding password, app password, or access token.
@@ -0,0 +1,407 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Parallel, resumable file downloads.
+
+If the server advertises 'Accept-Ranges: bytes' and the size of the file, the
+file is split into parts that are fetched concurrently with HTTP range
+requests into <path>.part. Completed parts are recorded in a sidecar state
+file <path>.part.json, so a download that failed partway resumes from the
+completed parts when retried, as long as the size, ETag and Last-Modified
+of the file have not changed. Otherwise, the file is streamed in one request.
+If the stream fails, it is resumed with a range request from the last byte
+received when the server supports it, or fetched again from the start.
+
+The downloaded file is verified against the expected size and, if provided,
+a checksum of the form '<hashlib algorithm>:<hex digest>',
+e.g., 'sha256:9f86d08...'.
+"""
+
+import concurrent.futures
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Optional
+
+import requests
+
+# 9.05 is the connect timeout and 27 is the read timeout. See
+# https://requests.readthedocs.io/en/master/user/advanced/#timeouts.
+_REQUEST_TIMEOUT = (9.05, 27)
+_CHUNK_SIZE = 1024 * 1024
+_PART_SUFFIX = '.part'
+_STATE_SUFFIX = '.part.json'
+# Errors of a request that are retried. requests.Timeout is not retried
+# since it is also raised when the whole download takes too long.
+_RETRIED_ERRORS = (requests.ConnectionError, requests.HTTPError,
+                   requests.exceptions.ChunkedEncodingError,
+                   requests.exceptions.ReadTimeout)
+
+
+@dataclasses.dataclass
+class DownloadStats:
+    """Describes a completed download."""
+    # Path to the downloaded file
+    path: str
+    # Size of the file in bytes
+    size: int = 0
+    # Bytes fetched over the network by this call, excluding resumed parts
+    bytes_downloaded: int = 0
+    # Bytes reused from a previous partial download
+    bytes_resumed: int = 0
+    # Number of parts the file was fetched in, 0 if not using range requests
+    parts: int = 0
+    # Number of failed requests that were retried
+    retries: int = 0
+    # Wall time of the download in seconds
+    seconds: float = 0
+
+    @property
+    def bytes_per_second(self) -> float:
+        """Throughput of this call in bytes per second."""
+        if self.seconds <= 0:
+            return 0.0
+        return self.bytes_downloaded / self.seconds
+
+
+def _get_filename(response: requests.Response) -> str:
+    """Parses the filename of a downloaded file from a requests.Response object.
+
+    The filename is the value associated with the 'filename' key in the
+    Content-Disposition header. If the header does not exist, the base name
+    of the url is returned.
+
+    Args:
+        response: requests.Response object containing the HTTP response for
+            the downloaded file.
+
+    Returns:
+        The filename of the downloaded file as a string.
+
+    Raises:
+        ValueError: The Content-Disposition header exists but 'filename' key
+            does not exist.
+    """
+    header = response.headers.get('Content-Disposition')
+    if not header:
+        return os.path.basename(response.url)
+    name_list = re.findall(r'filename=(.+)', header)
+    if not name_list or not name_list[0]:
+        raise ValueError('filename not found in Content-Disposition header')
+    return name_list[0]
+
+
+class _Deadline:
+    """Raises requests.Timeout once the download has taken too long."""
+
+    def __init__(self, url: str, timeout: Optional[float]):
+        self.url = url
+        self.timeout = timeout
+        self.start = time.time()
+
+    def check(self):
+        if self.timeout is not None and time.time() - self.start > self.timeout:
+            raise requests.Timeout(f'Downloading {self.url} timed out')
+
+
+def _parse_checksum(checksum: str):
+    algorithm, _, expected = checksum.partition(':')
+    if not expected:
+        raise ValueError(f'Checksum {checksum} is not of the form '
+                         '<algorithm>:<hex digest>')
+    return hashlib.new(algorithm), expected.lower()
+
+
+def _verify(path: str, size: Optional[int], checksum: Optional[str]) -> None:
+    """Verifies the size and checksum of a downloaded file.
+
+    Raises:
+        ValueError: The file does not match the expected size or checksum.
+    """
+    actual_size = os.path.getsize(path)
+    if size is not None and actual_size != size:
+        raise ValueError(f'Downloaded {actual_size} bytes but expected {size}')
+    if checksum:
+        digest, expected = _parse_checksum(checksum)
+        with open(path, 'rb') as file:
+            for data in iter(lambda: file.read(_CHUNK_SIZE), b''):
+                digest.update(data)
+        if digest.hexdigest() != expected:
+            raise ValueError(f'Checksum mismatch: got {digest.name}:'
+                             f'{digest.hexdigest()}, expected {checksum}')
+
+
+class _RangedDownload:
+    """Downloads a file in parts using HTTP range requests."""
+
+    def __init__(self, url, path, size, validators, part_size, max_retries,
+                 deadline, stats):
+        self.url = url
+        self.part_path = path + _PART_SUFFIX
+        self.state_path = path + _STATE_SUFFIX
+        self.size = size
+        self.part_size = part_size
+        self.max_retries = max_retries
+        self.deadline = deadline
+        self.stats = stats
+        self.num_parts = (size + part_size - 1) // part_size
+        self.state = {
+            'url': url,
+            'size': size,
+            'part_size': part_size,
+            'validators': validators,
+            'completed': []
+        }
+        self._lock = threading.Lock()
+
+    def _load_state(self) -> set:
+        """Returns the completed parts of a previous matching download."""
+        if not os.path.exists(self.state_path) or not os.path.exists(
+                self.part_path):
+            return set()
+        try:
+            with open(self.state_path) as file:
+                state = json.load(file)
+        except ValueError:
+            return set()
+        for key in ('url', 'size', 'part_size', 'validators'):
+            if state.get(key) != self.state[key]:
+                return set()
+        return set(state.get('completed', []))
+
+    def _save_state(self):
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(self.state, file)
+        os.replace(tmp_path, self.state_path)
+
+    def _fetch_part(self, index: int):
+        start = index * self.part_size
+        end = min(start + self.part_size, self.size)
+        offset = start
+        retries = 0
+        while True:
+            try:
+                headers = {'Range': f'bytes={offset}-{end - 1}'}
+                with requests.get(self.url,
+                                  headers=headers,
+                                  stream=True,
+                                  timeout=_REQUEST_TIMEOUT) as response:
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        raise requests.HTTPError(
+                            f'Expected 206 for range request, got '
+                            f'{response.status_code}')
+                    with open(self.part_path, 'r+b') as out:
+                        out.seek(offset)
+                        for data in response.iter_content(
+                                chunk_size=_CHUNK_SIZE):
+                            data = data[:end - offset]
+                            out.write(data)
+                            offset += len(data)
+                            with self._lock:
+                                self.stats.bytes_downloaded += len(data)
+                            self.deadline.check()
+                if offset != end:
+                    raise requests.ConnectionError(
+                        f'Part {index} ended at {offset}, expected {end}')
+                break
+            except _RETRIED_ERRORS as exc:
+                if retries >= self.max_retries:
+                    raise
+                retries += 1
+                with self._lock:
+                    self.stats.retries += 1
+                logging.warning('Retrying part %d of %s: %s', index, self.url,
+                                exc)
+                _sleep_before_retry(retries)
+                self.deadline.check()
+        with self._lock:
+            self.state['completed'].append(index)
+            self._save_state()
+
+    def run(self, num_workers: int):
+        completed = self._load_state()
+        if not completed:
+            with open(self.part_path, 'wb') as out:
+                out.truncate(self.size)
+        self.state['completed'] = sorted(completed)
+        self._save_state()
+        for index in completed:
+            start = index * self.part_size
+            self.stats.bytes_resumed += min(self.part_size, self.size - start)
+        self.stats.parts = self.num_parts
+        pending = [i for i in range(self.num_parts) if i not in completed]
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, num_workers)) as pool:
+            futures = [pool.submit(self._fetch_part, i) for i in pending]
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    future.result()
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
+
+def _stream(url: str, response: requests.Response, part_path: str,
+            size: Optional[int], if_range: Optional[str], max_retries: int,
+            deadline: _Deadline, stats: DownloadStats) -> None:
+    """Streams the body of a response into a file.
+
+    A failed stream is retried up to max_retries times. If if_range is set,
+    the retry requests the rest of the file with a range request that is
+    only served if the file still matches if_range. Otherwise, or if the
+    server returns the whole file, the file is fetched again from the start.
+
+    Args:
+        size: Expected size of the body in bytes. A shorter body is retried.
+        if_range: ETag or Last-Modified of the file, or None if the file
+            cannot be fetched in ranges.
+    """
+    offset = 0
+    retries = 0
+    with open(part_path, 'wb') as out:
+        while True:
+            try:
+                if response is None:
+                    headers = {}
+                    if if_range and offset:
+                        headers = {
+                            'Range': f'bytes={offset}-',
+                            'If-Range': if_range
+                        }
+                    response = requests.get(url,
+                                            headers=headers,
+                                            stream=True,
+                                            timeout=_REQUEST_TIMEOUT)
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        out.seek(0)
+                        out.truncate()
+                        offset = 0
+                with response:
+                    for data in response.iter_content(chunk_size=_CHUNK_SIZE):
+                        out.write(data)
+                        offset += len(data)
+                        stats.bytes_downloaded += len(data)
+                        deadline.check()
+                if size is not None and offset < size:
+                    raise requests.ConnectionError(
+                        f'Download ended at {offset}, expected {size}')
+                return
+            except _RETRIED_ERRORS as exc:
+                if retries >= max_retries:
+                    raise
+                retries += 1
+                stats.retries += 1
+                response = None
+                logging.warning('Retrying %s from byte %d: %s', url,
+                                offset if if_range else 0, exc)
+                _sleep_before_retry(retries)
+                deadline.check()
+
+
+def _sleep_before_retry(retries: int) -> None:
+    """Sleeps with exponential backoff before a retry."""
+    time.sleep(min(2**retries, 30) * 0.1)
+
+
+def download(url: str,
+             dest_dir: str,
+             timeout: float = None,
+             checksum: str = None,
+             num_workers: int = 4,
+             part_size: int = 16 * 1024 * 1024,
+             max_retries: int = 3) -> DownloadStats:
+    """Downloads a file from a web URL to a directory.
+
+    Args:
+        url: File url as a string.
+        dest_dir: Directory to download the file into, as a string.
+        timeout: Maximum time in seconds downloading the file can take,
+            as a float. The actual timeout will be a rough approximation to
+            this, likely several seconds larger.
+        checksum: Expected checksum of the file of the form
+            '<hashlib algorithm>:<hex digest>'. Not checked if not provided.
+        num_workers: Maximum number of parts to fetch at the same time.
+        part_size: Size of each part in bytes.
+        max_retries: Maximum number of retries of each part, or of the
+            whole file if it is not fetched in parts.
+
+    Returns:
+        DownloadStats object describing the download. The file is at
+        <dest_dir>/<basename of the downloaded file>.
+
+    Raises:
+        requests.Timeout: Downloading timed out.
+        requests.HTTPError: The server returned an error.
+        ValueError: The downloaded file does not match the expected size
+            or checksum.
+    """
+    deadline = _Deadline(url, timeout)
+    with requests.get(url, stream=True, timeout=_REQUEST_TIMEOUT) as response:
+        response.raise_for_status()
+        path = os.path.join(dest_dir, _get_filename(response))
+        stats = DownloadStats(path=path)
+        size = response.headers.get('Content-Length')
+        size = int(size) if size and size.isdigit() else None
+        # requests decodes the body, so the size does not match the
+        # Content-Length and ranges of the body cannot be requested.
+        encoded = bool(response.headers.get('Content-Encoding'))
+        if encoded:
+            size = None
+        accepts_ranges = (response.headers.get('Accept-Ranges') == 'bytes' and
+                          not encoded)
+        ranged = size and accepts_ranges
+        validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+        if not ranged:
+            if_range = None
+            if accepts_ranges:
+                if_range = validators['etag'] or validators['last_modified']
+            _stream(url, response, path + _PART_SUFFIX, size, if_range,
+                    max_retries, deadline, stats)
+    if ranged:
+        _RangedDownload(url, path, size, validators, part_size, max_retries,
+                        deadline, stats).run(num_workers)
+
+    part_path = path + _PART_SUFFIX
+    try:
+        _verify(part_path, size, checksum)
+    except ValueError:
+        # Start over on the next attempt.
+        os.remove(part_path)
+        if os.path.exists(path + _STATE_SUFFIX):
+            os.remove(path + _STATE_SUFFIX)
+        raise
+    os.replace(part_path, path)
+    if os.path.exists(path + _STATE_SUFFIX):
+        os.remove(path + _STATE_SUFFIX)
+
+    stats.size = os.path.getsize(path)
+    stats.seconds = time.time() - deadline.start
+    logging.info(
+        'Downloaded %s to %s: %d bytes (%d resumed) in %.2fs, '
+        '%.2f MB/s, %d parts, %d retries', url, path, stats.size,
+        stats.bytes_resumed, stats.seconds, stats.bytes_per_second / 1e6,
+        stats.parts, stats.retries)
+    return stats
@@ -16,8 +16,10 @@ Import executor that downloads GitHub repositories and executes data imports
 based on manifests.
 """
 
+import contextlib
 import json
 import os
+import shutil
 import subprocess
 import tempfile
 import logging
@@ -27,12 +29,16 @@ import dataclasses
 
 from app import utils
 from app import configs
+from app import downloader
 from app.service import dashboard_api
+from app.executor import import_graph
 from app.executor import import_target
+from app.executor import venv_cache
 from app.service import github_api
 from app.service import file_uploader
 from app.service import email_notifier
 from app.service import import_service
+from app.service import repo_snapshot
 
 _SYSTEM_RUN_INIT_FAILED_MESSAGE = ('Failed to initialize the system run '
                                    'with the import progress dashboard')
@@ -41,6 +47,14 @@ _SEE_DASHBOARD_MESSAGE = (
     'See dashboard for logs: '
     'https://dashboard-frontend-dot-datcom-data.uc.r.appspot.com/')
 
+# Environment variable holding the path where a user script can write its
+# JSON run report. Keep in sync with util/counters.py.
+_RUN_REPORT_ENV = 'DC_IMPORT_RUN_REPORT'
+_RUN_REPORTS_FILENAME = 'run_reports.json'
+
+# Name of the manifest of the uploaded files written next to them.
+_UPLOAD_MANIFEST_FILENAME = 'upload_manifest.json'
+
 
 @dataclasses.dataclass
 class ExecutionResult:
@@ -83,6 +97,8 @@ class ImportExecutor:
         notifier: EmailNotifier object for sending notificaiton emails.
         importer: ImportServiceClient object for invoking the
             Data Commons importer.
+        venv_cache: VenvCache object for reusing virtual environments across
+            imports. None if config.venv_cache_dir is empty.
     """
 
     def __init__(self,
@@ -98,6 +114,11 @@ class ImportExecutor:
         self.dashboard = dashboard
         self.notifier = notifier
         self.importer = importer
+        self.venv_cache = None
+        if config.venv_cache_dir:
+            self.venv_cache = venv_cache.VenvCache(
+                config.venv_cache_dir, config.venv_cache_max_entries,
+                _create_venv)
 
     def execute_imports_on_commit(self,
                                   commit_sha: str,
@@ -188,8 +209,6 @@ class ImportExecutor:
                 self.dashboard.info(f'Downloaded repo: {repo_dir}',
                                     run_id=run_id)
 
-            executed_imports = []
-
             # An example import_dir is 'scripts/us_fed/treasury'
             import_dir, import_name = import_target.split_absolute_import_name(
                 absolute_import_name)
@@ -200,26 +219,15 @@ class ImportExecutor:
             logging.info('%s: loaded manifest %s', absolute_import_name,
                          manifest_path)
 
-            for spec in manifest['import_specifications']:
-                import_name_in_spec = spec['import_name']
-                if import_name in ('all', import_name_in_spec):
-                    try:
-                        self._import_one(
-                            repo_dir=repo_dir,
-                            relative_import_dir=import_dir,
-                            absolute_import_dir=absolute_import_dir,
-                            import_spec=spec,
-                            run_id=run_id)
-                    except Exception:
-                        raise ExecutionError(
-                            ExecutionResult('failed', executed_imports,
-                                            traceback.format_exc()))
-                    executed_imports.append(
-                        import_target.get_absolute_import_name(
-                            import_dir, import_name_in_spec))
+            imports_to_execute = [(import_dir, spec)
+                                  for spec in manifest['import_specifications']
+                                  if import_name in ('all', spec['import_name'])
+                                 ]
+            result = self._execute_import_graph(repo_dir, imports_to_execute,
+                                                run_id)
 
         logging.info('%s: END', absolute_import_name)
-        return ExecutionResult('succeeded', executed_imports, 'No issues')
+        return result
 
     def _execute_imports_on_commit_helper(self,
                                           commit_sha: str,
@@ -264,32 +272,95 @@ class ImportExecutor:
                 manifest_filename=self.config.manifest_filename,
                 repo_dir=repo_dir)
 
-            executed_imports = []
-            for relative_dir, spec in imports_to_execute:
-                try:
-                    self._import_one(repo_dir=repo_dir,
-                                     relative_import_dir=relative_dir,
-                                     absolute_import_dir=os.path.join(
-                                         repo_dir, relative_dir),
-                                     import_spec=spec,
-                                     run_id=run_id)
-
-                except Exception:
-                    raise ExecutionError(
-                        ExecutionResult('failed', executed_imports,
-                                        traceback.format_exc()))
-                absolute_name = import_target.get_absolute_import_name(
-                    relative_dir, spec['import_name'])
-                executed_imports.append(absolute_name)
+            return self._execute_import_graph(repo_dir, imports_to_execute,
+                                              run_id)
 
-            if self.dashboard:
-                self.dashboard.update_run(
-                    {
-                        'status': 'succeeded',
-                        'time_completed': utils.utctime()
-                    }, run_id)
+    def _execute_import_graph(self,
+                              repo_dir: str,
+                              imports_to_execute: List[Tuple[str, Dict]],
+                              run_id: str = None) -> ExecutionResult:
+        """Executes imports concurrently respecting their dependencies.
+
+        Independent imports are run in a pool of at most
+        config.max_concurrent_imports workers. Each import runs in its own
+        copy of the repository so that the files generated by one import are
+        not seen by the others, and the files of the repository, which may be
+        hardlinked to a cached snapshot, are not modified. See
+        _copy_repo_for_import for how the repository is copied. See
+        import_graph for how dependencies are specified and handled.
+
+        Args:
+            repo_dir: Absolute path to the downloaded repository, as a string.
+            imports_to_execute: List of tuples each consisting of 1) the path
+                to the directory containing the manifest, relative to the root
+                directory of the repository and 2) the import specification.
+            run_id: ID of the system run as a string. This is only used to
+                communicate with the import progress dashboard.
+
+        Returns:
+            ExecutionResult object describing the results of the executions.
+
+        Raises:
+            ExecutionError: Some of the imports failed or were skipped because
+                their dependencies failed.
+        """
+        graph = import_graph.build_graph(imports_to_execute)
+
+        def run(node: import_graph.ImportNode) -> None:
+            with tempfile.TemporaryDirectory() as work_dir:
+                import_repo_dir = os.path.join(work_dir, 'repo')
+                _copy_repo_for_import(repo_dir, node.relative_dir,
+                                      import_repo_dir)
+                self._import_one(repo_dir=import_repo_dir,
+                                 relative_import_dir=node.relative_dir,
+                                 absolute_import_dir=os.path.join(
+                                     import_repo_dir, node.relative_dir),
+                                 import_spec=node.spec,
+                                 run_id=run_id)
+
+        result = import_graph.run_graph(graph, run,
+                                        self.config.max_concurrent_imports)
+        for name, failed_dependency in result.skipped.items():
+            self._report_skipped_import(graph[name], failed_dependency, run_id)
+
+        if result.failed or result.skipped:
+            raise ExecutionError(
+                ExecutionResult('failed', result.succeeded,
+                                _construct_graph_failure_message(result)))
+
+        if self.dashboard:
+            self.dashboard.update_run(
+                {
+                    'status': 'succeeded',
+                    'time_completed': utils.utctime()
+                }, run_id)
+        return ExecutionResult('succeeded', result.succeeded, 'No issues')
 
-            return ExecutionResult('succeeded', executed_imports, 'No issues')
+    def _report_skipped_import(self,
+                               node: import_graph.ImportNode,
+                               failed_dependency: str,
+                               run_id: str = None) -> None:
+        """Reports an import skipped because one of its dependencies failed.
+
+        Args:
+            node: ImportNode of the skipped import.
+            failed_dependency: Absolute import name of the failed dependency.
+            run_id: ID of the system run as a string. This is only used to
+                communicate with the import progress dashboard.
+        """
+        message = f'{node.name}: skipped because {failed_dependency} failed'
+        logging.error(message)
+        if self.dashboard:
+            attempt = _init_attempt_helper(
+                dashboard=self.dashboard,
+                run_id=run_id,
+                import_name=node.spec['import_name'],
+                absolute_import_name=node.name,
+                provenance_url=node.spec['provenance_url'],
+                provenance_description=node.spec['provenance_description'])
+            _mark_import_attempt_failed(attempt_id=attempt['attempt_id'],
+                                        message=message,
+                                        dashboard=self.dashboard)
 
     def _import_one(self,
                     repo_dir: str,
@@ -367,48 +438,81 @@ class ImportExecutor:
         """
         urls = import_spec.get('data_download_url')
         if urls:
+            checksums = import_spec.get('data_download_checksums', {})
             for url in urls:
-                utils.download_file(url, absolute_import_dir,
-                                    self.config.file_download_timeout)
+                stats = downloader.download(url,
+                                            absolute_import_dir,
+                                            self.config.file_download_timeout,
+                                            checksum=checksums.get(url))
                 if self.dashboard:
-                    self.dashboard.info(f'Downloaded: {url}',
-                                        attempt_id=attempt_id,
-                                        run_id=run_id)
-
-        with tempfile.TemporaryDirectory() as tmpdir:
+                    self.dashboard.info(
+                        f'Downloaded: {url} ({stats.size} bytes in '
+                        f'{stats.seconds:.1f}s, '
+                        f'{stats.bytes_per_second / 1e6:.2f} MB/s, '
+                        f'{stats.retries} retries)',
+                        attempt_id=attempt_id,
+                        run_id=run_id)
+
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                contextlib.ExitStack() as stack:
             requirements_path = os.path.join(absolute_import_dir,
                                              self.config.requirements_filename)
             central_requirements_path = os.path.join(
                 repo_dir, self.config.requirements_filename)
-            interpreter_path, process = _create_venv(
-                (central_requirements_path, requirements_path),
-                tmpdir,
-                timeout=self.config.venv_create_timeout)
-
-            _log_process(process=process,
-                         dashboard=self.dashboard,
-                         attempt_id=attempt_id,
-                         run_id=run_id)
-            process.check_returncode()
+            requirements_paths = (central_requirements_path, requirements_path)
+            if self.venv_cache:
+                interpreter_path, process = stack.enter_context(
+                    self.venv_cache.venv(
+                        requirements_paths,
+                        timeout=self.config.venv_create_timeout))
+            else:
+                interpreter_path, process = _create_venv(
+                    requirements_paths,
+                    os.path.join(tmpdir, 'venv'),
+                    timeout=self.config.venv_create_timeout)
+
+            if process:
+                _log_process(process=process,
+                             dashboard=self.dashboard,
+                             attempt_id=attempt_id,
+                             run_id=run_id)
+                process.check_returncode()
+            elif self.dashboard:
+                self.dashboard.info(
+                    f'Reusing cached virtual environment {interpreter_path}',
+                    attempt_id=attempt_id,
+                    run_id=run_id)
 
+            run_reports = {}
             script_paths = import_spec.get('scripts')
-            for path in script_paths:
+            for index, path in enumerate(script_paths):
+                report_path = os.path.join(tmpdir, f'run_report_{index}.json')
                 process = _run_user_script(
                     interpreter_path=interpreter_path,
                     script_path=os.path.join(absolute_import_dir, path),
                     timeout=self.config.user_script_timeout,
-                    cwd=absolute_import_dir)
+                    cwd=absolute_import_dir,
+                    env={_RUN_REPORT_ENV: report_path})
                 _log_process(process=process,
                              dashboard=self.dashboard,
                              attempt_id=attempt_id,
                              run_id=run_id)
                 process.check_returncode()
+                report = _read_run_report(report_path)
+                if report:
+                    run_reports[path] = report
+                    _log_run_report(path=path,
+                                    report=report,
+                                    dashboard=self.dashboard,
+                                    attempt_id=attempt_id,
+                                    run_id=run_id)
 
         inputs = self._upload_import_inputs(
             import_dir=absolute_import_dir,
             output_dir=f'{relative_import_dir}/{import_spec["import_name"]}',
             import_inputs=import_spec.get('import_inputs', []),
-            attempt_id=attempt_id)
+            attempt_id=attempt_id,
+            run_reports=run_reports)
 
         if self.importer:
             self.importer.delete_previous_output(relative_import_dir,
@@ -459,12 +563,20 @@ class ImportExecutor:
             import_dir: str,
             output_dir: str,
             import_inputs: List[Dict[str, str]],
-            attempt_id: str = None) -> 'import_service.ImportInputs':
+            attempt_id: str = None,
+            run_reports: Dict[str,
+                              dict] = None) -> 'import_service.ImportInputs':
         """Uploads the generated import data files.
 
         Data files are uploaded to <output_dir>/<version>/, where <version> is a
         time string and is written to <output_dir>/<storage_version_filename>
-        after the uploads are complete.
+        after the uploads are complete. The files are uploaded concurrently,
+        reusing files identical to those of the previous version, and listed
+        with their sizes and checksums in
+        <output_dir>/<version>/upload_manifest.json. Run reports of the user
+        scripts, if any, are uploaded to
+        <output_dir>/<version>/run_reports.json so that they can be compared
+        across versions.
 
         Args:
             import_dir: Absolute path to the directory with the manifest,
@@ -476,45 +588,55 @@ class ImportExecutor:
             attempt_id: ID of the import attempt executed by the system run
                 with the run_id, as a string. This is only used to communicate
                 with the import progress dashboard.
+            run_reports: Dict mapping paths of the user scripts to the run
+                reports they wrote.
 
         Returns:
             ImportInputs object containing the paths to the uploaded inputs.
         """
         uploaded = import_service.ImportInputs()
         version = _clean_time(utils.pacific_time())
+        uploads = []
         for import_input in import_inputs:
             for input_type in self.config.import_input_types:
                 path = import_input.get(input_type)
                 if path:
                     dest = f'{output_dir}/{version}/{os.path.basename(path)}'
-                    self._upload_file_helper(src=os.path.join(import_dir, path),
-                                             dest=dest,
-                                             attempt_id=attempt_id)
+                    uploads.append((os.path.join(import_dir, path), dest))
                     setattr(uploaded, input_type, dest)
-        self.uploader.upload_string(
-            version,
-            os.path.join(output_dir, self.config.storage_version_filename))
-        return uploaded
-
-    def _upload_file_helper(self,
-                            src: str,
-                            dest: str,
-                            attempt_id: str = None) -> None:
-        """Uploads a file from src to dest.
 
-        Args:
-            src: Path to the file to upload, as a string.
-            dest: Path to where the file is to be uploaded to, as a string.
-            attempt_id: ID of the import attempt executed by the system run
-                with the run_id, as a string. This is only used to communicate
-                with the import progress dashboard.
-        """
+        # Files identical to those of the previous version are copied within
+        # the storage instead of uploaded again.
+        previous_version = self.uploader.read_string(
+            os.path.join(output_dir, self.config.storage_version_filename))
+        reuse_dir = None
+        if previous_version and previous_version.strip() != version:
+            reuse_dir = f'{output_dir}/{previous_version.strip()}'
+        results = self.uploader.upload_files(
+            uploads,
+            reuse_dir=reuse_dir,
+            max_workers=self.config.max_concurrent_uploads)
         if self.dashboard:
-            with open(src) as file:
+            for result in results:
                 self.dashboard.info(
-                    f'Uploaded {src}: {file.readline().strip()}',
+                    f'Uploaded {result.src} to {result.dest} '
+                    f'({result.action}): {result.size} bytes, '
+                    f'md5 {result.checksums["md5"]}, '
+                    f'{result.seconds:.2f}s',
                     attempt_id=attempt_id)
-        self.uploader.upload_file(src, dest)
+        self.uploader.upload_string(
+            json.dumps([dataclasses.asdict(result) for result in results],
+                       indent=2),
+            f'{output_dir}/{version}/{_UPLOAD_MANIFEST_FILENAME}')
+
+        if run_reports:
+            self.uploader.upload_string(
+                json.dumps(run_reports, indent=2),
+                f'{output_dir}/{version}/{_RUN_REPORTS_FILENAME}')
+        self.uploader.upload_string(
+            version,
+            os.path.join(output_dir, self.config.storage_version_filename))
+        return uploaded
 
 
 def parse_manifest(path: str) -> dict:
@@ -567,15 +689,19 @@ def run_and_handle_exception(run_id: Optional[str],
         return ExecutionResult('failed', [], message)
 
 
-def _run_with_timeout(args: List[str],
-                      timeout: float,
-                      cwd: str = None) -> subprocess.CompletedProcess:
+def _run_with_timeout(
+        args: List[str],
+        timeout: float,
+        cwd: str = None,
+        env: Dict[str, str] = None) -> subprocess.CompletedProcess:
     """Runs a command in a subprocess.
 
     Args:
         args: Command to run as a list. Each element is a string.
         timeout: Maximum time the command can run for in seconds as a float.
         cwd: Current working directory of the process as a string.
+        env: Dict of environment variables to set for the process, in
+            addition to the environment of this process.
 
     Returns:
         subprocess.CompletedProcess object used to run the command.
@@ -583,15 +709,21 @@ def _run_with_timeout(args: List[str],
     Raises:
         Same exceptions as subprocess.run.
     """
+    if env:
+        env = dict(os.environ, **env)
     return subprocess.run(args,
                           capture_output=True,
                           text=True,
                           timeout=timeout,
-                          cwd=cwd)
+                          cwd=cwd,
+                          env=env)
 
 
-def _create_venv(requirements_path: Iterable[str], venv_dir: str,
-                 timeout: float) -> Tuple[str, subprocess.CompletedProcess]:
+def _create_venv(
+        requirements_path: Iterable[str],
+        venv_dir: str,
+        timeout: float,
+        pip_cache_dir: str = None) -> Tuple[str, subprocess.CompletedProcess]:
     """Creates a Python virtual environment.
 
     The virtual environment is created with --system-site-packages set,
@@ -606,6 +738,8 @@ def _create_venv(requirements_path: Iterable[str], venv_dir: str,
             as a string.
         timeout: Maximum time the creation script can run for in seconds
             as a float.
+        pip_cache_dir: Path to the directory pip caches downloaded and built
+            wheels in, as a string. If not provided, pip does not cache.
 
     Returns:
         A tuple consisting of the path to the created interpreter as a string
@@ -614,12 +748,16 @@ def _create_venv(requirements_path: Iterable[str], venv_dir: str,
     Raises:
         Same exceptions as subprocess.run.
     """
+    cache_option = '--no-cache-dir'
+    if pip_cache_dir:
+        cache_option = f'--cache-dir {pip_cache_dir}'
     with tempfile.NamedTemporaryFile(mode='w', suffix='.sh') as script:
+        script.write('set -e\n')
         script.write(f'python3 -m venv --system-site-packages {venv_dir}\n')
         script.write(f'. {venv_dir}/bin/activate\n')
         for path in requirements_path:
             if os.path.exists(path):
-                script.write('python3 -m pip install --no-cache-dir '
+                script.write(f'python3 -m pip install {cache_option} '
                              f'--requirement {path}\n')
         script.flush()
 
@@ -631,7 +769,8 @@ def _run_user_script(interpreter_path: str,
                      script_path: str,
                      timeout: float,
                      args: list = None,
-                     cwd: str = None) -> subprocess.CompletedProcess:
+                     cwd: str = None,
+                     env: Dict[str, str] = None) -> subprocess.CompletedProcess:
     """Runs a user Python script.
 
     Args:
@@ -643,6 +782,7 @@ def _run_user_script(interpreter_path: str,
         args: A list of arguments each as a string to pass to the
             user script on the command line.
         cwd: Current working directory of the process as a string.
+        env: Dict of additional environment variables for the process.
 
     Returns:
         subprocess.CompletedProcess object used to run the script.
@@ -654,7 +794,48 @@ def _run_user_script(interpreter_path: str,
     if args is None:
         args = []
     return _run_with_timeout([interpreter_path, script_path] + list(args),
-                             timeout, cwd)
+                             timeout, cwd, env)
+
+
+def _read_run_report(path: str) -> Optional[dict]:
+    """Reads the JSON run report written by a user script.
+
+    Args:
+        path: Path to the run report as a string.
+
+    Returns:
+        The parsed report as a dict, or None if the script did not write a
+        report or the report is malformed.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except ValueError:
+        logging.warning('Ignoring malformed run report %s', path)
+        return None
+
+
+def _log_run_report(path: str,
+                    report: dict,
+                    dashboard: dashboard_api.DashboardAPI = None,
+                    attempt_id: str = None,
+                    run_id: str = None) -> None:
+    """Logs the run report of a user script.
+
+    Args:
+        path: Path to the user script as a string.
+        report: Run report written by the user script as a dict.
+        dashboard: DashboardAPI object to communicate with the
+            import progress dashboard.
+        attempt_id: ID of the import attempt as a string.
+        run_id: ID of the system run as a string.
+    """
+    message = f'Run report for {path}:\n{json.dumps(report, indent=2)}'
+    logging.info(message)
+    if dashboard:
+        dashboard.info(message, attempt_id=attempt_id, run_id=run_id)
 
 
 def _init_run_helper(dashboard: dashboard_api.DashboardAPI,
@@ -733,6 +914,47 @@ def _mark_import_attempt_failed(attempt_id: str, message: str,
         }, attempt_id)
 
 
+def _copy_repo_for_import(repo_dir: str, relative_import_dir: str,
+                          dest_dir: str) -> None:
+    """Copies a repository for the execution of one of its imports.
+
+    The files in the directory of the import are copied since the import may
+    modify them in place. The other files are hardlinked, or copied if they
+    cannot be linked, and made read-only, see repo_snapshot.link_tree.
+
+    Args:
+        repo_dir: Absolute path to the repository, as a string.
+        relative_import_dir: Path to the directory of the import, relative
+            to the root directory of the repository, as a string.
+        dest_dir: Path to the directory to create, as a string.
+    """
+    import_dir = os.path.normpath(os.path.join(repo_dir, relative_import_dir))
+    if import_dir == os.path.normpath(repo_dir):
+        repo_snapshot.copy_tree(repo_dir, dest_dir)
+        return
+
+    def ignore_import_dir(dir_path, names):
+        return [
+            name for name in names
+            if os.path.join(os.path.normpath(dir_path), name) == import_dir
+        ]
+
+    repo_snapshot.link_tree(repo_dir, dest_dir, ignore=ignore_import_dir)
+    repo_snapshot.copy_tree(
+        import_dir, os.path.join(dest_dir,
+                                 os.path.relpath(import_dir, repo_dir)))
+
+
+def _construct_graph_failure_message(result: import_graph.GraphResult) -> str:
+    """Constructs a message describing the failed and skipped imports."""
+    lines = []
+    for name, trace in result.failed.items():
+        lines.append(f'[Failed]: {name}\n{trace}')
+    for name, failed_dependency in result.skipped.items():
+        lines.append(f'[Skipped]: {name} (depends on {failed_dependency})')
+    return '\n'.join(lines)
+
+
 def _create_system_run_init_failed_result(trace):
     """Creates an ExecutionResult indicating failures."""
     return ExecutionResult('failed', [],
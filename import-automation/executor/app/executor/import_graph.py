@@ -0,0 +1,197 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Dependency graph of the imports to execute.
+
+An import specification can list the imports it depends on in an optional
+'depends_on' field, e.g.,
+    "depends_on": ["USBLS_CPIAllItemsAverage", "scripts/us_bls/jolts:BLS_JOLTS"]
+Relative import names refer to imports in the same manifest. Dependencies that
+are not executed in the same run are assumed to be already imported and
+are ignored.
+
+Imports are run in a bounded pool of worker threads. An import starts as soon
+as all of its dependencies have succeeded. If an import fails, the imports
+depending on it, directly or indirectly, are skipped while independent imports
+keep running.
+"""
+
+import concurrent.futures
+import dataclasses
+import traceback
+from typing import Callable, Dict, List, Set, Tuple
+
+from app.executor import import_target
+
+
+@dataclasses.dataclass
+class ImportNode:
+    """An import to execute and the imports it depends on."""
+    # Absolute import name, e.g., 'scripts/us_fed/treasury:constant_maturity'
+    name: str
+    # Path to the directory containing the manifest, relative to the root
+    # directory of the repository
+    relative_dir: str
+    # Import specification from the manifest
+    spec: dict
+    # Absolute import names of the imports in the graph this import depends on
+    depends_on: Set[str] = dataclasses.field(default_factory=set)
+
+
+@dataclasses.dataclass
+class GraphResult:
+    """Describes the result of running an import graph."""
+    # Absolute import names of the imports that succeeded, in completion order
+    succeeded: List[str] = dataclasses.field(default_factory=list)
+    # Absolute import names of the imports that failed mapped to the tracebacks
+    failed: Dict[str, str] = dataclasses.field(default_factory=dict)
+    # Absolute import names of the imports skipped because a dependency failed
+    # mapped to the name of the failed dependency
+    skipped: Dict[str, str] = dataclasses.field(default_factory=dict)
+
+
+def _resolve_dependency(relative_dir: str, name: str) -> str:
+    """Returns the absolute import name of a dependency."""
+    if import_target.is_absolute_import_name(name):
+        return name
+    return import_target.get_absolute_import_name(relative_dir, name)
+
+
+def build_graph(imports: List[Tuple[str, Dict]]) -> Dict[str, ImportNode]:
+    """Builds the dependency graph of the imports to execute.
+
+    Args:
+        imports: List of tuples each consisting of 1) the path to the directory
+            containing the manifest, relative to the root directory of the
+            repository and 2) the import specification as a dict. This is the
+            format returned by import_target.find_imports_to_execute.
+
+    Returns:
+        Dict mapping absolute import names to ImportNode objects, in the order
+        of the imports.
+
+    Raises:
+        ValueError: The dependencies form a cycle.
+    """
+    graph = {}
+    for relative_dir, spec in imports:
+        name = import_target.get_absolute_import_name(relative_dir,
+                                                      spec['import_name'])
+        graph[name] = ImportNode(name=name,
+                                 relative_dir=relative_dir,
+                                 spec=spec)
+    for node in graph.values():
+        for dependency in node.spec.get('depends_on', []):
+            dependency = _resolve_dependency(node.relative_dir, dependency)
+            if dependency in graph and dependency != node.name:
+                node.depends_on.add(dependency)
+    topological_order(graph)
+    return graph
+
+
+def topological_order(graph: Dict[str, ImportNode]) -> List[str]:
+    """Orders the imports so that every import comes after its dependencies.
+
+    Ties are broken by the order of the imports in the graph.
+
+    Args:
+        graph: Dict mapping absolute import names to ImportNode objects.
+
+    Returns:
+        List of absolute import names.
+
+    Raises:
+        ValueError: The dependencies form a cycle.
+    """
+    remaining = {name: set(node.depends_on) for name, node in graph.items()}
+    order = []
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError('Import dependencies form a cycle among '
+                             f'{sorted(remaining)}')
+        for name in ready:
+            del remaining[name]
+            order.append(name)
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return order
+
+
+def _dependents(graph: Dict[str, ImportNode]) -> Dict[str, List[str]]:
+    dependents = {name: [] for name in graph}
+    for node in graph.values():
+        for dependency in node.depends_on:
+            dependents[dependency].append(node.name)
+    return dependents
+
+
+def run_graph(graph: Dict[str, ImportNode],
+              run_func: Callable[[ImportNode], None],
+              max_workers: int = 1) -> GraphResult:
+    """Runs the imports in the graph respecting their dependencies.
+
+    Args:
+        graph: Dict mapping absolute import names to ImportNode objects.
+        run_func: Function that executes an import given its ImportNode.
+            An import fails if the function raises an exception.
+        max_workers: Maximum number of imports to run at the same time.
+
+    Returns:
+        GraphResult object describing the results of the imports.
+    """
+    order = topological_order(graph)
+    dependents = _dependents(graph)
+    remaining = {name: set(node.depends_on) for name, node in graph.items()}
+    started = set()
+    result = GraphResult()
+
+    def skip_dependents(name):
+        stack = list(dependents[name])
+        while stack:
+            dependent = stack.pop()
+            if dependent in started:
+                continue
+            started.add(dependent)
+            result.skipped[dependent] = name
+            stack.extend(dependents[dependent])
+
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, max_workers)) as pool:
+        futures = {}
+
+        def submit_ready():
+            for name in order:
+                if name not in started and not remaining[name]:
+                    started.add(name)
+                    futures[pool.submit(run_func, graph[name])] = name
+
+        submit_ready()
+        while futures:
+            done, _ = concurrent.futures.wait(
+                futures, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                name = futures.pop(future)
+                exc = future.exception()
+                if exc:
+                    result.failed[name] = ''.join(
+                        traceback.format_exception(type(exc), exc,
+                                                   exc.__traceback__))
+                    skip_dependents(name)
+                else:
+                    result.succeeded.append(name)
+                    for dependent in dependents[name]:
+                        remaining[dependent].discard(name)
+            submit_ready()
+    return result
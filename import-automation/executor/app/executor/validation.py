@@ -178,6 +178,7 @@ def _is_import_spec_valid(import_spec, repo_dir, import_dir):
     Checks that:
         1) Required fields are present.
         2) Script paths exist.
+        3) Dependencies in 'depends_on', if any, are valid import names.
 
     Args:
         import_spec: The import specification to check as a dict.
@@ -203,6 +204,17 @@ def _is_import_spec_valid(import_spec, repo_dir, import_dir):
     if missing_paths:
         raise ValueError(f'{utils.list_to_str(missing_paths)} not found')
 
+    depends_on = import_spec.get('depends_on', [])
+    if not isinstance(depends_on, list):
+        raise ValueError(f'depends_on must be a list in import specification '
+                         f'({import_spec})')
+    for dependency in depends_on:
+        if (not isinstance(dependency, str) or
+            (not import_target.is_absolute_import_name(dependency) and
+             not import_target.is_relative_import_name(dependency))):
+            raise ValueError(f'Dependency "{dependency}" is not a valid '
+                             f'import name')
+
 
 def _filter_missing_paths(paths: typing.List[str]) -> typing.List[str]:
     """Given a list of paths, returns the paths that point to files and
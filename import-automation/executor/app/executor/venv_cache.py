@@ -0,0 +1,182 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Cache of Python virtual environments for running user scripts.
+
+Environments are keyed by a hash of the contents of the requirement files and
+the version of the python3 that creates them, and stored under
+<cache_dir>/venvs/<key>. pip shares a wheel cache under <cache_dir>/wheels so
+that environments for different requirements still reuse downloaded and built
+wheels.
+
+A per-key lock file serializes the creation of an environment, which holds it
+exclusively. Environments are held with a shared lock while in use and least
+recently used environments beyond max_entries are deleted when they are not in
+use.
+"""
+
+import contextlib
+import fcntl
+import functools
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+_COMPLETE_MARKER = '.complete'
+
+# Function that creates a virtual environment, see import_executor._create_venv.
+CreateVenvFunc = Callable[[Iterable[str], str, float, str],
+                          Tuple[str, subprocess.CompletedProcess]]
+
+
+@functools.lru_cache(maxsize=None)
+def _python_version() -> str:
+    """Returns the version of the python3 that creates the environments."""
+    process = subprocess.run(['python3', '--version'],
+                             capture_output=True,
+                             text=True,
+                             check=True)
+    return process.stdout + process.stderr
+
+
+def requirements_key(requirements_paths: Iterable[str]) -> str:
+    """Computes the cache key of a virtual environment.
+
+    Args:
+        requirements_paths: List of paths to pip requirement files, each as
+            a string. Paths that do not exist are skipped, as when creating
+            the environment.
+
+    Returns:
+        Hex digest of the hash of the version of python3, which creates the
+        environment, and the contents of the requirement files.
+    """
+    digest = hashlib.sha256()
+    digest.update(_python_version().encode())
+    for path in requirements_paths:
+        if not os.path.exists(path):
+            continue
+        digest.update(b'\0')
+        with open(path, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+class VenvCache:
+    """Content-addressed cache of virtual environments.
+
+    Attributes:
+        cache_dir: Path to the cache directory as a string.
+        max_entries: Maximum number of environments to keep.
+        create_venv: Function used to create an environment.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int,
+                 create_venv: CreateVenvFunc):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.create_venv = create_venv
+        self._venvs_dir = os.path.join(cache_dir, 'venvs')
+        self.wheel_dir = os.path.join(cache_dir, 'wheels')
+        os.makedirs(self._venvs_dir, exist_ok=True)
+        os.makedirs(self.wheel_dir, exist_ok=True)
+
+    def _lock_path(self, key: str) -> str:
+        return os.path.join(self._venvs_dir, f'{key}.lock')
+
+    @contextlib.contextmanager
+    def venv(
+        self, requirements_paths: Iterable[str], timeout: float
+    ) -> Iterator[Tuple[str, Optional[subprocess.CompletedProcess]]]:
+        """Context manager that provides a virtual environment.
+
+        The environment is created if it is not in the cache and is protected
+        from garbage collection until the context exits.
+
+        Args:
+            requirements_paths: List of paths to pip requirement files, each as
+                a string.
+            timeout: Maximum time the creation can take in seconds.
+
+        Yields:
+            A tuple consisting of the path to the interpreter of the
+            environment as a string and the subprocess.CompletedProcess object
+            used to create the environment, or None if it was in the cache.
+        """
+        requirements_paths = list(requirements_paths)
+        key = requirements_key(requirements_paths)
+        venv_dir = os.path.join(self._venvs_dir, key)
+        marker = os.path.join(venv_dir, _COMPLETE_MARKER)
+        interpreter_path = os.path.join(venv_dir, 'bin/python3')
+        with open(self._lock_path(key), 'a') as lock:
+            process = None
+            # Imports with the same requirements use the environment
+            # concurrently under a shared lock.
+            fcntl.flock(lock, fcntl.LOCK_SH)
+            try:
+                if not os.path.exists(marker):
+                    # Creating the environment needs an exclusive lock. A
+                    # shared lock cannot be upgraded atomically, so the marker
+                    # is checked again once the exclusive lock is held.
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                    try:
+                        if not os.path.exists(marker):
+                            shutil.rmtree(venv_dir, ignore_errors=True)
+                            interpreter_path, process = self.create_venv(
+                                requirements_paths, venv_dir, timeout,
+                                self.wheel_dir)
+                            if not process.returncode:
+                                with open(marker, 'w'):
+                                    pass
+                    finally:
+                        fcntl.flock(lock, fcntl.LOCK_SH)
+                if process is None:
+                    logging.info('Reusing cached virtual environment %s',
+                                 venv_dir)
+                if os.path.exists(marker):
+                    os.utime(marker)
+                yield interpreter_path, process
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        self.collect_garbage()
+
+    def collect_garbage(self) -> None:
+        """Deletes least recently used environments beyond max_entries.
+
+        Environments in use are kept.
+        """
+        entries = []
+        for key in os.listdir(self._venvs_dir):
+            venv_dir = os.path.join(self._venvs_dir, key)
+            if not os.path.isdir(venv_dir):
+                continue
+            marker = os.path.join(venv_dir, _COMPLETE_MARKER)
+            last_used = os.path.getmtime(marker) if os.path.exists(
+                marker) else 0
+            entries.append((last_used, key))
+        entries.sort(reverse=True)
+        for _, key in entries[self.max_entries:]:
+            with open(self._lock_path(key), 'a') as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                logging.info('Deleting cached virtual environment %s', key)
+                shutil.rmtree(os.path.join(self._venvs_dir, key),
+                              ignore_errors=True)
+                fcntl.flock(lock, fcntl.LOCK_UN)
@@ -67,7 +67,9 @@ def execute_imports():
             repo_owner_username=config.github_repo_owner_username,
             repo_name=config.github_repo_name,
             auth_username=config.github_auth_username,
-            auth_access_token=config.github_auth_access_token),
+            auth_access_token=config.github_auth_access_token,
+            snapshot_cache_dir=config.repo_snapshot_cache_dir,
+            snapshot_cache_max_entries=config.repo_snapshot_cache_max_entries),
         config=config,
         dashboard=dashboard_api.DashboardAPI(config.dashboard_oauth_client_id),
         notifier=email_notifier.EmailNotifier(config.email_account,
@@ -102,7 +104,9 @@ def scheduled_updates():
             repo_owner_username=config.github_repo_owner_username,
             repo_name=config.github_repo_name,
             auth_username=config.github_auth_username,
-            auth_access_token=config.github_auth_access_token),
+            auth_access_token=config.github_auth_access_token,
+            snapshot_cache_dir=config.repo_snapshot_cache_dir,
+            snapshot_cache_max_entries=config.repo_snapshot_cache_max_entries),
         dashboard=dashboard_api.DashboardAPI(config.dashboard_oauth_client_id),
         config=config)
     result = executor.execute_imports_on_update(
@@ -125,7 +129,9 @@ def schedule_crons():
             repo_owner_username=config.github_repo_owner_username,
             repo_name=config.github_repo_name,
             auth_username=config.github_auth_username,
-            auth_access_token=config.github_auth_access_token),
+            auth_access_token=config.github_auth_access_token,
+            snapshot_cache_dir=config.repo_snapshot_cache_dir,
+            snapshot_cache_max_entries=config.repo_snapshot_cache_max_entries),
         config=config)
     return dataclasses.asdict(
         import_scheduler.schedule_on_commit(task_info['COMMIT_SHA']))
@@ -13,14 +13,89 @@
 # limitations under the License.
 """
 File uploaders for uploading generated data files.
+
+FileUploader.upload_files uploads a batch of files concurrently. A file is not
+uploaded again if the destination already has the same contents, and is copied
+within the destination storage instead of uploaded if an identical file exists
+in reuse_dir, e.g., the previous version of the import. Contents are compared
+by the MD5 and CRC32C checksums. The returned list of UploadResult objects
+serves as a manifest of the batch.
 """
 
+import base64
+import concurrent.futures
+import dataclasses
+import hashlib
+import math
 import os
 import logging
 import shutil
+import time
+from typing import Dict, List, Optional, Tuple
 
+import google_crc32c
 from google.cloud import storage
 
+_CHUNK_SIZE = 1024 * 1024
+
+# Files larger than this are uploaded in chunks with resumable uploads so that
+# a failed request only retries a chunk.
+_RESUMABLE_CHUNK_SIZE = 16 * 1024 * 1024
+
+# Files at least this large are uploaded as parallel composite uploads.
+_COMPOSITE_THRESHOLD = 256 * 1024 * 1024
+
+# Minimum size of each part of a composite upload.
+_COMPOSITE_PART_SIZE = 64 * 1024 * 1024
+
+# Maximum number of objects Cloud Storage can compose in one request.
+_MAX_COMPOSE_PARTS = 32
+
+
+@dataclasses.dataclass
+class UploadResult:
+    """Describes a file handled by FileUploader.upload_files."""
+    # Path to the local file
+    src: str
+    # Destination of the file as passed to upload_files
+    dest: str
+    # Size of the file in bytes
+    size: int
+    # Hex digests of the file keyed by algorithm, 'md5' and 'crc32c'
+    checksums: Dict[str, str]
+    # 'uploaded', 'skipped' if dest already had the same contents, or
+    # 'copied' if an identical file in reuse_dir was copied to dest
+    action: str
+    # Wall time spent on the file in seconds
+    seconds: float
+
+
+def file_checksums(path: str) -> Dict[str, str]:
+    """Computes the MD5 and CRC32C checksums of a file.
+
+    Args:
+        path: Path to the file as a string.
+
+    Returns:
+        Dict mapping 'md5' and 'crc32c' to the hex digests.
+    """
+    md5 = hashlib.md5()
+    crc32c = google_crc32c.Checksum()
+    with open(path, 'rb') as file:
+        for data in iter(lambda: file.read(_CHUNK_SIZE), b''):
+            md5.update(data)
+            crc32c.update(data)
+    return {'md5': md5.hexdigest(), 'crc32c': crc32c.digest().hex()}
+
+
+def _checksums_match(local: Dict[str, str],
+                     remote: Optional[Dict[str, str]]) -> bool:
+    """Returns whether all the checksums the two dicts have in common match."""
+    if not remote:
+        return False
+    common = set(local) & set(remote)
+    return bool(common) and all(local[key] == remote[key] for key in common)
+
 
 class FileUploader:
     """Base class for all file uploaders."""
@@ -33,6 +108,82 @@ class FileUploader:
         """Uploads the string to a file at dest."""
         raise NotImplementedError
 
+    def read_string(self, dest: str) -> Optional[str]:
+        """Returns the contents of the file at dest, or None if it does not
+        exist."""
+        raise NotImplementedError
+
+    def get_checksums(self, dest: str) -> Optional[Dict[str, str]]:
+        """Returns the hex digests of the file at dest keyed by algorithm,
+        or None if it does not exist."""
+        raise NotImplementedError
+
+    def copy_file(self, src: str, dest: str) -> None:
+        """Copies the uploaded file at src to a file at dest."""
+        raise NotImplementedError
+
+    def upload_files(self,
+                     uploads: List[Tuple[str, str]],
+                     reuse_dir: str = None,
+                     max_workers: int = 4) -> List[UploadResult]:
+        """Uploads files concurrently, skipping files already uploaded.
+
+        Args:
+            uploads: List of tuples each consisting of the path to a local
+                file and its destination, each as a string.
+            reuse_dir: Destination directory to look for identical files in,
+                by the base names of the destinations, as a string. Identical
+                files are copied from there instead of uploaded.
+            max_workers: Maximum number of files to upload at the same time.
+
+        Returns:
+            List of UploadResult objects in the order of the uploads.
+
+        Raises:
+            Same exceptions as upload_file. The remaining uploads are
+            cancelled.
+        """
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, max_workers)) as pool:
+            futures = [
+                pool.submit(self._upload_if_changed, src, dest, reuse_dir)
+                for src, dest in uploads
+            ]
+            try:
+                return [future.result() for future in futures]
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def _upload_if_changed(self, src: str, dest: str,
+                           reuse_dir: Optional[str]) -> UploadResult:
+        """Uploads a file unless an identical one can be used instead."""
+        start = time.time()
+        checksums = file_checksums(src)
+        if _checksums_match(checksums, self.get_checksums(dest)):
+            action = 'skipped'
+        else:
+            reuse_path = None
+            if reuse_dir:
+                reuse_path = f'{reuse_dir}/{os.path.basename(dest)}'
+            if reuse_path and reuse_path != dest and _checksums_match(
+                    checksums, self.get_checksums(reuse_path)):
+                self.copy_file(reuse_path, dest)
+                action = 'copied'
+            else:
+                self.upload_file(src, dest)
+                action = 'uploaded'
+        result = UploadResult(src=src,
+                              dest=dest,
+                              size=os.path.getsize(src),
+                              checksums=checksums,
+                              action=action,
+                              seconds=time.time() - start)
+        logging.info('FileUploader.upload_files: %s %s to %s in %.2fs', action,
+                     src, dest, result.seconds)
+        return result
+
 
 class GCSFileUploader(FileUploader):
     """Class for uploading files to a Google Storage Bucket.
@@ -84,11 +235,64 @@ class GCSFileUploader(FileUploader):
         dest = self._fix_path(dest)
         logging.info('GCSFileUploader.upload_file: Uploading %s to %s', src,
                      dest)
-        blob = self.bucket.blob(dest)
-        blob.upload_from_filename(src)
+        size = os.path.getsize(src)
+        if size >= _COMPOSITE_THRESHOLD:
+            self._upload_composite(src, dest, size)
+        else:
+            blob = self.bucket.blob(dest)
+            if size > _RESUMABLE_CHUNK_SIZE:
+                blob.chunk_size = _RESUMABLE_CHUNK_SIZE
+            blob.upload_from_filename(src)
         logging.info('GCSFileUploader.upload_file: Uploaded %s to %s', src,
                      dest)
 
+    def _upload_composite(self, src: str, dest: str, size: int) -> None:
+        """Uploads a large file as parts in parallel and composes them.
+
+        Composite objects do not have an MD5 checksum, so only their CRC32C
+        checksums are compared by upload_files.
+
+        Args:
+            src: Path to the file to upload, as a string.
+            dest: Destination in the bucket as a string, including
+                path_prefix.
+            size: Size of the file in bytes.
+        """
+        num_parts = min(_MAX_COMPOSE_PARTS,
+                        math.ceil(size / _COMPOSITE_PART_SIZE))
+        part_size = math.ceil(size / num_parts)
+        parts = [
+            self.bucket.blob(f'{dest}.part-{i:02d}') for i in range(num_parts)
+        ]
+
+        def upload_part(index):
+            start = index * part_size
+            with open(src, 'rb') as file:
+                file.seek(start)
+                parts[index].chunk_size = _RESUMABLE_CHUNK_SIZE
+                parts[index].upload_from_file(file,
+                                              size=min(part_size, size - start))
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=num_parts) as pool:
+                for future in [
+                        pool.submit(upload_part, i) for i in range(num_parts)
+                ]:
+                    future.result()
+            self.bucket.blob(dest).compose(parts)
+        finally:
+            for part in parts:
+                try:
+                    part.delete()
+                except Exception:  # pylint: disable=broad-except
+                    logging.warning(
+                        'GCSFileUploader._upload_composite: '
+                        'Failed to delete %s', part.name)
+        logging.info(
+            'GCSFileUploader._upload_composite: Uploaded %s to %s in %d parts',
+            src, dest, num_parts)
+
     def upload_string(self, string: str, dest: str) -> None:
         """Uploads a string to a file in the bucket, overwriting it.
 
@@ -109,6 +313,60 @@ class GCSFileUploader(FileUploader):
         logging.info('GCSFileUploader.upload_string: Uploaded %s to %s', string,
                      dest)
 
+    def read_string(self, dest: str) -> Optional[str]:
+        """Downloads a file in the bucket as a string.
+
+        Args:
+            dest: Relative destination in the bucket as a string. The actual
+                destination would be {self.path_prefix}/{dest}.
+
+        Returns:
+            Contents of the file as a string, or None if it does not exist.
+        """
+        _strings_not_empty(dest)
+        blob = self.bucket.get_blob(self._fix_path(dest))
+        if not blob:
+            return None
+        return blob.download_as_text()
+
+    def get_checksums(self, dest: str) -> Optional[Dict[str, str]]:
+        """Gets the checksums of a file in the bucket.
+
+        Args:
+            dest: Relative destination in the bucket as a string. The actual
+                destination would be {self.path_prefix}/{dest}.
+
+        Returns:
+            Dict mapping 'md5', unless the file is a composite object, and
+            'crc32c' to the hex digests, or None if the file does not exist.
+        """
+        _strings_not_empty(dest)
+        blob = self.bucket.get_blob(self._fix_path(dest))
+        if not blob:
+            return None
+        checksums = {}
+        if blob.md5_hash:
+            checksums['md5'] = base64.b64decode(blob.md5_hash).hex()
+        if blob.crc32c:
+            checksums['crc32c'] = base64.b64decode(blob.crc32c).hex()
+        return checksums
+
+    def copy_file(self, src: str, dest: str) -> None:
+        """Copies a file within the bucket without downloading it.
+
+        Args:
+            src: Relative path of the file to copy in the bucket as a string.
+            dest: Relative destination in the bucket as a string.
+
+        Raises:
+            ValueError: src or dest is None, empty, or all spaces.
+        """
+        _strings_not_empty(src, dest)
+        src = self._fix_path(src)
+        dest = self._fix_path(dest)
+        self.bucket.copy_blob(self.bucket.blob(src), self.bucket, dest)
+        logging.info('GCSFileUploader.copy_file: Copied %s to %s', src, dest)
+
     def _fix_path(self, path):
         """Returns {self.path_prefix}/{path}."""
         return os.path.join(self.path_prefix, path)
@@ -163,6 +421,51 @@ class LocalFileUploader(FileUploader):
         logging.info('LocalFileUploader.upload_string: Uploaded %s to %s',
                      string, dest)
 
+    def read_string(self, dest: str) -> Optional[str]:
+        """Reads the file at <output_dir>/<dest>.
+
+        Returns:
+            Contents of the file as a string, or None if it does not exist.
+
+        Raises:
+            ValueError: dest is None, empty, or all spaces.
+        """
+        _strings_not_empty(dest)
+        dest = os.path.join(self.output_dir, dest)
+        if not os.path.exists(dest):
+            return None
+        with open(dest) as file:
+            return file.read()
+
+    def get_checksums(self, dest: str) -> Optional[Dict[str, str]]:
+        """Computes the checksums of the file at <output_dir>/<dest>.
+
+        Returns:
+            See file_checksums, or None if the file does not exist.
+
+        Raises:
+            ValueError: dest is None, empty, or all spaces.
+        """
+        _strings_not_empty(dest)
+        dest = os.path.join(self.output_dir, dest)
+        if not os.path.exists(dest):
+            return None
+        return file_checksums(dest)
+
+    def copy_file(self, src: str, dest: str) -> None:
+        """Copies the file at <output_dir>/<src> to <output_dir>/<dest>.
+
+        Raises:
+            Same exceptions as shutil.copyfile.
+            ValueError: src or dest is None, empty, or all spaces.
+        """
+        _strings_not_empty(src, dest)
+        src = os.path.join(self.output_dir, src)
+        dest = os.path.join(self.output_dir, dest)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.copyfile(src, dest)
+        logging.info('LocalFileUploader.copy_file: Copied %s to %s', src, dest)
+
 
 def _strings_not_empty(*args: str):
     """Ensures that the strings are not None, empty, or all spaces.
@@ -15,16 +15,19 @@
 GitHub API client for querying information about a repository.
 """
 
+import concurrent.futures
 import os
 import logging
+import shutil
 import tarfile
 import tempfile
 import http
-from typing import Dict, Set, List, Tuple
+from typing import Dict, Set, List, Optional, Tuple
 
 import requests
 
 from app import utils
+from app.service import repo_snapshot
 
 _GITHUB_API_HOST = 'https://api.github.com'
 
@@ -42,6 +45,24 @@ _GITHUB_DOWNLOAD_API = (
     _GITHUB_API_HOST +
     '/repos/{owner_username}/{repo_name}/tarball/{commit_sha}')
 
+_GITHUB_COMPARE_API = (
+    _GITHUB_API_HOST +
+    '/repos/{owner_username}/{repo_name}/compare/{base_sha}...{head_sha}')
+
+_GITHUB_TREE_API = (
+    _GITHUB_API_HOST +
+    '/repos/{owner_username}/{repo_name}/git/trees/{commit_sha}?recursive=1')
+
+# Permission bits of the regular files in a snapshot, by their git mode.
+_FILE_MODES = {'100644': 0o644, '100755': 0o755}
+
+# The compare API lists at most this many changed files.
+_COMPARE_MAX_FILES = 300
+
+# Maximum number of changed files to fetch at the same time when building
+# a snapshot incrementally.
+_FETCH_WORKERS = 8
+
 
 class GitHubRepoAPI:
     """GitHub API client for querying information about a repository.
@@ -54,13 +75,18 @@ class GitHubRepoAPI:
         repo: Name of the repository as a string.
         auth: Tuple consisting of the username of the account to authenticate
             with GitHub and the access token.
+        snapshot_cache: RepoSnapshotCache object for reusing downloaded
+            repositories across calls to download_repo. None if
+            snapshot_cache_dir is empty.
     """
 
     def __init__(self,
                  repo_owner_username: str,
                  repo_name: str,
                  auth_username: str = '',
-                 auth_access_token: str = ''):
+                 auth_access_token: str = '',
+                 snapshot_cache_dir: str = '',
+                 snapshot_cache_max_entries: int = 4):
         """Constructs a GitHubRepoAPI.
 
         Args:
@@ -69,10 +95,18 @@ class GitHubRepoAPI:
             auth_username: The username of the account to authenticate
                 with GitHub, as a string.
             auth_access_token: The corresponding access token as a string.
+            snapshot_cache_dir: Directory to cache the downloaded repository
+                in, keyed by commit, as a string. Empty to download the whole
+                repository every time.
+            snapshot_cache_max_entries: Maximum number of cached snapshots.
         """
         self.owner = repo_owner_username
         self.repo = repo_name
         self.auth = (auth_username, auth_access_token)
+        self.snapshot_cache = None
+        if snapshot_cache_dir:
+            self.snapshot_cache = repo_snapshot.RepoSnapshotCache(
+                snapshot_cache_dir, snapshot_cache_max_entries)
         logging.info('GitHubRepoAPI.__init__: Initialized with repository %s',
                      self._format_repo_name())
 
@@ -152,6 +186,14 @@ class GitHubRepoAPI:
                 download_repo('download_dir', '12ef23231a')
             returns 'download_dir/intrepiditee-data-demo-12ef23231a'.
 
+        If snapshot_cache is set, the repository is hardlinked to the snapshot
+        of the commit in the cache if there is one, so its files must be
+        replaced and not modified in place, see repo_snapshot.replace_file.
+        Otherwise, the snapshot is built from the most recently used snapshot
+        by fetching only the files changed between the two commits, falling
+        back to downloading the whole repository if that fails, and added to
+        the cache.
+
         Args:
             dest_dir: Directory to download the repository into as a string.
             commit_sha: Commit ID that defines the version of the repository
@@ -173,6 +215,57 @@ class GitHubRepoAPI:
             'GitHubRepoAPI.download_repo: '
             'Downloading repository %s at commit %s to %s',
             f'{self._format_repo_name()}', commit_sha, dest_dir)
+        if not self.snapshot_cache:
+            return self._download_tarball(dest_dir, commit_sha, timeout)
+
+        if not commit_sha:
+            commit_sha = self.query_commit('HEAD')['sha']
+        repo_dir = self.snapshot_cache.checkout(commit_sha, dest_dir)
+        if repo_dir:
+            logging.info(
+                'GitHubRepoAPI.download_repo: '
+                'Copied cached snapshot of commit %s', commit_sha)
+            return repo_dir
+
+        base_sha = self.snapshot_cache.latest()
+        with self.snapshot_cache.create(commit_sha) as staging_dir:
+            built = False
+            if base_sha:
+                try:
+                    built = self._build_snapshot_from(base_sha, commit_sha,
+                                                      staging_dir)
+                except (requests.RequestException, OSError):
+                    logging.exception(
+                        'GitHubRepoAPI.download_repo: Failed to build '
+                        'snapshot of commit %s from commit %s', commit_sha,
+                        base_sha)
+                if not built:
+                    for name in os.listdir(staging_dir):
+                        shutil.rmtree(os.path.join(staging_dir, name))
+            if not built:
+                self._download_tarball(staging_dir, commit_sha, timeout)
+        repo_dir = self.snapshot_cache.checkout(commit_sha, dest_dir)
+        if not repo_dir:
+            raise FileNotFoundError(
+                f'Snapshot of commit {commit_sha} was deleted from the cache')
+        return repo_dir
+
+    def _download_tarball(self,
+                          dest_dir: str,
+                          commit_sha: str = None,
+                          timeout: float = None) -> str:
+        """Downloads and extracts the tarball of the repository.
+
+        Args:
+            See download_repo.
+
+        Returns:
+            See download_repo.
+
+        Raises:
+            requests.Timeout: Downloading timed out.
+            FileNotFoundError: The tarball is empty.
+        """
         if not commit_sha:
             commit_sha = ''
         download_query = _GITHUB_DOWNLOAD_API.format_map({
@@ -198,6 +291,173 @@ class GitHubRepoAPI:
                     'Extracted repository %s', repo_dir)
                 return repo_dir
 
+    def _build_snapshot_from(self, base_sha: str, head_sha: str,
+                             staging_dir: str) -> bool:
+        """Builds the snapshot of a commit from the snapshot of another.
+
+        Unchanged files are hardlinked from the base snapshot and the files
+        changed between the two commits are fetched, with the permissions of
+        their mode in the head commit. Files whose only change is their mode
+        are copied from the base snapshot with the new mode.
+
+        Args:
+            base_sha: ID of the commit of the snapshot to build from,
+                as a string.
+            head_sha: ID of the commit to build the snapshot of, as a string.
+            staging_dir: Directory to build the snapshot in, as a string.
+
+        Returns:
+            True if the snapshot was built. False if the changes between the
+            commits cannot be listed completely, or if a changed file is not
+            a regular file, e.g., a symbolic link.
+        """
+        changed_files = self._query_changed_files_between(base_sha, head_sha)
+        if changed_files is None:
+            logging.info(
+                'GitHubRepoAPI._build_snapshot_from: Cannot list the changes '
+                'between commits %s and %s', base_sha, head_sha)
+            return False
+        git_modes = self._query_file_modes(head_sha)
+        if git_modes is None:
+            logging.info(
+                'GitHubRepoAPI._build_snapshot_from: Cannot list the files of '
+                'commit %s', head_sha)
+            return False
+        file_modes = {}
+        for entry in changed_files:
+            if entry['status'] == 'removed':
+                continue
+            git_mode = git_modes.get(entry['filename'])
+            if git_mode not in _FILE_MODES:
+                logging.info(
+                    'GitHubRepoAPI._build_snapshot_from: Cannot get the mode '
+                    'of %s at commit %s', entry['filename'], head_sha)
+                return False
+            file_modes[entry['filename']] = _FILE_MODES[git_mode]
+        with self.snapshot_cache.snapshot(base_sha) as base_dir:
+            if not base_dir:
+                return False
+            repo_dir = os.path.join(staging_dir,
+                                    f'{self.owner}-{self.repo}-{head_sha[:7]}')
+            repo_snapshot.link_tree(base_dir, repo_dir)
+
+        to_fetch = []
+        for entry in changed_files:
+            filename = entry['filename']
+            path = os.path.join(repo_dir, filename)
+            if entry['status'] == 'renamed':
+                repo_snapshot.move_file(
+                    os.path.join(repo_dir, entry['previous_filename']), path,
+                    repo_dir)
+            if entry['status'] == 'removed':
+                repo_snapshot.remove_file(path, repo_dir)
+            elif (entry['status'] not in ('renamed', 'changed') or
+                  entry.get('changes') or not os.path.exists(path)):
+                to_fetch.append(filename)
+            elif (os.stat(path).st_mode & 0o111
+                  != file_modes[filename] & 0o111):
+                # Only the mode changed. The file is replaced since it is
+                # shared with the base snapshot.
+                with open(path, 'rb') as file:
+                    content = file.read()
+                repo_snapshot.replace_file(path, content, file_modes[filename])
+
+        def fetch(filename):
+            repo_snapshot.replace_file(os.path.join(repo_dir, filename),
+                                       self._fetch_file(head_sha, filename),
+                                       file_modes[filename])
+
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=_FETCH_WORKERS) as pool:
+            for future in [pool.submit(fetch, f) for f in to_fetch]:
+                future.result()
+        logging.info(
+            'GitHubRepoAPI._build_snapshot_from: Built snapshot of commit %s '
+            'from commit %s, fetching %d of %d changed files', head_sha,
+            base_sha, len(to_fetch), len(changed_files))
+        return True
+
+    def _query_changed_files_between(self, base_sha: str,
+                                     head_sha: str) -> Optional[List[Dict]]:
+        """Queries the files changed between two commits.
+
+        Args:
+            base_sha: ID of the base commit as a string.
+            head_sha: ID of the head commit as a string.
+
+        Returns:
+            List of dicts each describing a changed file with keys 'filename',
+            'status', and, for renamed files, 'previous_filename'. None if
+            the head commit is not a descendant of the base commit, in which
+            case the changes are relative to their merge base, or if the list
+            may be incomplete.
+        """
+        compare_query = _GITHUB_COMPARE_API.format_map({
+            'owner_username': self.owner,
+            'repo_name': self.repo,
+            'base_sha': base_sha,
+            'head_sha': head_sha
+        })
+        logging.info('GitHubRepoAPI._query_changed_files_between: Querying %s',
+                     compare_query)
+        response = requests.get(compare_query, auth=self.auth)
+        response.raise_for_status()
+        comparison = response.json()
+        if comparison.get('status') not in ('ahead', 'identical'):
+            return None
+        files = comparison.get('files', [])
+        if len(files) >= _COMPARE_MAX_FILES:
+            return None
+        return files
+
+    def _query_file_modes(self, commit_sha: str) -> Optional[Dict[str, str]]:
+        """Queries the git modes of the files at the state of a commit.
+
+        Args:
+            commit_sha: ID of the commit as a string.
+
+        Returns:
+            Dict mapping the path of each file, relative to the root directory
+            of the repository, to its git mode as a string, e.g., '100755'
+            for an executable file. None if the tree of the commit is too
+            large to be listed completely.
+        """
+        tree_query = _GITHUB_TREE_API.format_map({
+            'owner_username': self.owner,
+            'repo_name': self.repo,
+            'commit_sha': commit_sha
+        })
+        logging.info('GitHubRepoAPI._query_file_modes: Querying %s', tree_query)
+        response = requests.get(tree_query, auth=self.auth)
+        response.raise_for_status()
+        tree = response.json()
+        if tree.get('truncated'):
+            return None
+        return {
+            entry['path']: entry['mode']
+            for entry in tree.get('tree', [])
+            if entry.get('type') == 'blob'
+        }
+
+    def _fetch_file(self, commit_sha: str, path: str) -> bytes:
+        """Fetches the contents of a file at the state of a commit.
+
+        Args:
+            commit_sha: ID of the commit as a string.
+            path: Path to the file as a string, relative to the root
+                directory of the repository.
+
+        Returns:
+            Contents of the file as bytes.
+        """
+        content_query = self._build_content_query(commit_sha, path)
+        response = requests.get(
+            content_query,
+            auth=self.auth,
+            headers={'Accept': 'application/vnd.github.v3.raw'})
+        response.raise_for_status()
+        return response.content
+
     def _build_content_query(self, commit_sha: str, path: str) -> str:
         """Formats the URL for querying the contents of a directory at the
         state of a commit.
@@ -16,10 +16,12 @@ Data Commons importer client.
 """
 
 import os
+import random
 import time
 import logging
 import dataclasses
-from typing import Dict, Iterable
+import http
+from typing import Dict, Iterable, Optional
 
 import requests
 from google.cloud import storage
@@ -99,9 +101,41 @@ class ImportFailedError(Exception):
         self.log = log
 
 
+class ImportTimeoutError(TimeoutError):
+    """Exception thrown if an import has not finished before the deadline
+    of blocking on it.
+
+    Attributes:
+        import_name: Import name submitted to the importer as a string.
+        curator_email: Email submitted to the importer as a string.
+        import_id: ID assigned by the importer as a string.
+        timeout: Maximum time to block in seconds, as a float.
+        elapsed: Time spent blocking in seconds, as a float.
+        polls: Number of times the import logs were fetched, as an int.
+        log: Last log entry seen for the import.
+    """
+
+    def __init__(self, import_name: str, curator_email: str, import_id: str,
+                 timeout: float, elapsed: float, polls: int, log: Dict):
+        import_info = _format_import_info(import_name, curator_email, import_id)
+        super().__init__(f'Timeout expired blocking on <{import_info}> '
+                         f'after {elapsed:.0f}s and {polls} polls, last state '
+                         f'{log.get("state")}')
+        self.import_name = import_name
+        self.curator_email = curator_email
+        self.import_id = import_id
+        self.timeout = timeout
+        self.elapsed = elapsed
+        self.polls = polls
+        self.log = log
+
+
 class ImportServiceClient:
     """Data Commons importer client."""
-    # Number of seconds between each get_import_log call for
+    # Initial number of seconds between get_import_log calls for blocking on
+    # imports. The interval doubles after each call up to _SLEEP_DURATION.
+    _INITIAL_SLEEP_DURATION: float = 5
+    # Maximum number of seconds between get_import_log calls for
     # blocking on imports.
     _SLEEP_DURATION: float = 60
     # Enum value for ImportLogEntry.BIGQUERY
@@ -138,6 +172,10 @@ class ImportServiceClient:
         self.importer_output_prefix = importer_output_prefix
         self.executor_output_prefix = executor_output_prefix
         self.iap = iap_request.IAPRequest(client_id)
+        # Whether the importer accepts the importName and pageToken fields
+        # in import log requests. Set to False once it rejects them, see
+        # get_import_log.
+        self._log_filters_supported = True
 
     def smart_import(self,
                      import_dir: str,
@@ -177,7 +215,7 @@ class ImportServiceClient:
             requests.HTTPError: The importer returns a status code that is
                 larger than or equal to 400.
             ImportFailedError: Import fails on the importer's side.
-            TimeoutError: Timeout expired.
+            ImportTimeoutError: Timeout expired.
         """
         if import_inputs.cleaned_csv and import_inputs.template_mcf:
             return self.import_table(import_dir, import_inputs, import_spec,
@@ -309,11 +347,26 @@ class ImportServiceClient:
             for blob in blobs:
                 blob.delete()
 
-    def get_import_log(self, curator_email: str) -> Dict:
+    def get_import_log(self,
+                       curator_email: str,
+                       import_name: str = None,
+                       page_token: str = None) -> Dict:
         """Gets import logs.
 
+        The importer may ignore import_name and page_token, in which case all
+        the logs of the curator_email are returned. An importer that does not
+        know the importName or pageToken fields rejects the request with a
+        400 status code and an error message naming the field. The fields are
+        then dropped from this and all subsequent requests. Other errors are
+        raised.
+
         Args:
             curator_email: Email submitted to the importer.
+            import_name: If set, asks the importer to return only the logs of
+                imports with this name.
+            page_token: If set, asks the importer to return only the logs
+                created or updated since the response that returned this
+                token in 'nextPageToken'.
 
         Returns:
             The response from the importer as a dict.
@@ -323,16 +376,29 @@ class ImportServiceClient:
                 larger than or equal to 400.
         """
         request = {'userEmail': curator_email}
+        if self._log_filters_supported:
+            if import_name:
+                request['importName'] = import_name
+            if page_token:
+                request['pageToken'] = page_token
         logging.info(
             'ImportServiceClient.get_import_log: '
             'Sending request %s to %s', request, _PROXY_GET_IMPORT_LOG)
         response = self.iap.post(_PROXY_GET_IMPORT_LOG, json=request)
+        if len(request) > 1 and _rejects_log_filters(response):
+            logging.warning(
+                'ImportServiceClient.get_import_log: '
+                'Filters rejected by %s, requesting all logs',
+                _PROXY_GET_IMPORT_LOG)
+            self._log_filters_supported = False
+            return self.get_import_log(curator_email)
+        response.raise_for_status()
+        logs = response.json()
         logging.info(
             'ImportServiceClient.get_import_log: '
-            'Received response %s from %s', response.text,
+            'Received %d entries from %s', len(logs.get('entry', [])),
             _PROXY_GET_IMPORT_LOG)
-        response.raise_for_status()
-        return response.json()
+        return logs
 
     def _import_helper(self,
                        url: str,
@@ -407,6 +473,12 @@ class ImportServiceClient:
                          timeout: float = None) -> Dict:
         """Blocks the calling thread until the import fails or succeeds.
 
+        The import logs are polled with exponential backoff and equal jitter,
+        see _backoff, starting at _INITIAL_SLEEP_DURATION and capped at
+        _SLEEP_DURATION seconds. Only the logs of the import name are requested, and once the
+        importer returns a cursor in 'nextPageToken', only the logs updated
+        since the previous poll.
+
         Args:
             import_id: ID of the import request assigned by the importer.
             import_name: Import name submitted to the importer.
@@ -418,24 +490,60 @@ class ImportServiceClient:
 
         Raises:
             Same exceptions as ImportServiceClient.get_import_log.
+            ImportNotFoundError: Import not found in the import logs.
             ImportFailedError: Import fails on the importer's side.
-            TimeoutError: Timeout expired.
+            ImportTimeoutError: Timeout expired.
         """
         logging.info(
             'ImportServiceClient._block_on_import: Blocking on %s',
             f'<{_format_import_info(import_name, curator_email, import_id)}>')
         start = time.time()
+        log = None
+        cursor = None
+        polls = 0
         while True:
-            log = _get_log(import_id, import_name, curator_email,
-                           self.get_import_log(curator_email)['entry'])
+            response = self.get_import_log(curator_email,
+                                           import_name=import_name,
+                                           page_token=cursor)
+            polls += 1
+            log = _find_log(import_id, response.get('entry', [])) or log
+            if not log:
+                raise ImportNotFoundError(import_name, curator_email, import_id)
+            cursor = response.get('nextPageToken') or cursor
             if _is_import_finished(log):
                 if log['state'] != 'SUCCESSFUL':
                     raise ImportFailedError(log)
                 return log
-            if timeout is not None and time.time() - start > timeout:
-                raise TimeoutError('Timeout expired blocking on '
-                                   f'{import_name} ({curator_email})')
-            time.sleep(ImportServiceClient._SLEEP_DURATION)
+
+            elapsed = time.time() - start
+            if timeout is not None and elapsed >= timeout:
+                raise ImportTimeoutError(import_name, curator_email, import_id,
+                                         timeout, elapsed, polls, log)
+            sleep = _backoff(polls, ImportServiceClient._INITIAL_SLEEP_DURATION,
+                             ImportServiceClient._SLEEP_DURATION)
+            if timeout is not None:
+                sleep = min(sleep, timeout - elapsed)
+            time.sleep(sleep)
+
+
+def _backoff(attempt: int, initial: float, maximum: float) -> float:
+    """Returns the time to sleep before the next attempt, with equal jitter.
+
+    Half of the window initial * 2^(attempt - 1), capped at maximum, is
+    always slept and the other half is drawn uniformly, so that polls are
+    spread out but never immediate.
+    """
+    window = min(maximum, initial * 2**(attempt - 1))
+    return window / 2 + random.uniform(0, window / 2)
+
+
+def _rejects_log_filters(response: requests.Response) -> bool:
+    """Returns whether an import log request was rejected because the
+    importer does not know the importName or pageToken fields."""
+    if response.status_code != http.HTTPStatus.BAD_REQUEST:
+        return False
+    message = response.text or ''
+    return 'importName' in message or 'pageToken' in message
 
 
 def _get_fixed_absolute_import_name(import_dir: str, import_name: str) -> str:
@@ -487,10 +595,18 @@ def _get_import_id(import_name: str, curator_email: str,
 def _get_log(import_id: str, import_name, curator_email,
              logs: Iterable[Dict]) -> Dict:
     """Finds the log entry with the import_id in the logs."""
+    log = _find_log(import_id, logs)
+    if not log:
+        raise ImportNotFoundError(import_name, curator_email, import_id)
+    return log
+
+
+def _find_log(import_id: str, logs: Iterable[Dict]) -> Optional[Dict]:
+    """Returns the log entry with the import_id in the logs, or None."""
     for log in logs:
         if log['id'] == import_id:
             return log
-    raise ImportNotFoundError(import_name, curator_email, import_id)
+    return None
 
 
 def _are_imports_finished(logs: Iterable[Dict], import_name: str,
@@ -0,0 +1,338 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Local cache of extracted repository snapshots keyed by commit.
+
+A snapshot is stored under <cache_dir>/snapshots/<commit_sha>/<repo_dir_name>,
+where <repo_dir_name> is the name of the top-level directory in the tarball
+downloaded from GitHub, e.g., 'datacommonsorg-data-12ef232'. A snapshot can be
+built from a previous one by hardlinking the unchanged files, so that only the
+files changed between the two commits need to be fetched and stored.
+
+Files in a snapshot are shared with other snapshots and with the checkouts of
+the snapshot, and must never be modified in place. They are made read-only
+when they are linked, see link_tree, and changed files are written to a
+temporary file that replaces the link, see replace_file.
+
+Snapshots are held with a shared lock while being copied and least recently
+used snapshots beyond max_entries are deleted when they are not in use.
+"""
+
+import contextlib
+import fcntl
+import logging
+import os
+import shutil
+import stat
+import tempfile
+from typing import Callable, Iterator, Optional
+
+_COMPLETE_MARKER = '.complete'
+
+# Permission bits of the files created by replace_file when no mode is given,
+# as for a file created with open(). The umask is read once since reading it
+# means setting it, which is not thread-safe.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+_DEFAULT_FILE_MODE = 0o666 & ~_UMASK
+
+_WRITE_BITS = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+
+
+def _link_file(src: str, dst: str) -> None:
+    """Hardlinks a file and makes it read-only.
+
+    The file is copied if it cannot be linked, e.g., across filesystems.
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+    mode = stat.S_IMODE(os.stat(dst).st_mode)
+    if mode & _WRITE_BITS:
+        os.chmod(dst, mode & ~_WRITE_BITS)
+
+
+def _copy_writable_file(src: str, dst: str) -> None:
+    """Copies a file and makes the copy writable by its owner."""
+    shutil.copy2(src, dst)
+    os.chmod(dst, stat.S_IMODE(os.stat(dst).st_mode) | stat.S_IWUSR)
+
+
+def link_tree(src: str, dst: str, ignore: Optional[Callable] = None) -> None:
+    """Recreates a directory tree, hardlinking the files in it.
+
+    Files that cannot be hardlinked are copied. The files are made read-only,
+    which also applies to the files in src they are linked to, so that a
+    file shared by both trees cannot be modified in place by mistake.
+
+    Args:
+        src: Path to the directory to link from, as a string.
+        dst: Path to the directory to create, as a string.
+        ignore: See shutil.copytree.
+    """
+    shutil.copytree(src,
+                    dst,
+                    symlinks=True,
+                    copy_function=_link_file,
+                    ignore=ignore)
+
+
+def copy_tree(src: str, dst: str) -> None:
+    """Copies a directory tree, making the files writable by their owner.
+
+    Args:
+        src: Path to the directory to copy, as a string.
+        dst: Path to the directory to create, as a string.
+    """
+    shutil.copytree(src, dst, symlinks=True, copy_function=_copy_writable_file)
+
+
+def replace_file(path: str, content: bytes, mode: Optional[int] = None) -> None:
+    """Writes a file without modifying a file it may be hardlinked to.
+
+    Args:
+        path: Path to the file as a string. Missing parent directories are
+            created.
+        content: New contents of the file as bytes.
+        mode: Permission bits of the file. If not provided, the permissions
+            of a new file created with open() are used.
+    """
+    dir_path = os.path.dirname(path)
+    os.makedirs(dir_path, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dir_path, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(content)
+        os.chmod(tmp_path, _DEFAULT_FILE_MODE if mode is None else mode)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _remove_empty_dirs(dir_path: str, root: str) -> None:
+    """Removes a directory and its parents up to root while they are empty."""
+    root = os.path.abspath(root)
+    dir_path = os.path.abspath(dir_path)
+    while dir_path.startswith(root + os.sep) and not os.listdir(dir_path):
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
+
+
+def remove_file(path: str, root: str) -> None:
+    """Removes a file and the parent directories left empty by the removal.
+
+    Args:
+        path: Path to the file as a string. Nothing is done if the file
+            does not exist.
+        root: Path to the directory containing the file, as a string.
+            Directories are removed up to but excluding this directory.
+    """
+    if not os.path.lexists(path):
+        return
+    os.remove(path)
+    _remove_empty_dirs(os.path.dirname(path), root)
+
+
+def move_file(src: str, dst: str, root: str) -> None:
+    """Moves a file and removes the directories left empty by the move.
+
+    Args:
+        src: Path to the file as a string. Nothing is done if the file
+            does not exist.
+        dst: Path to move the file to as a string. Missing parent directories
+            are created.
+        root: See remove_file.
+    """
+    if not os.path.lexists(src):
+        return
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    os.replace(src, dst)
+    _remove_empty_dirs(os.path.dirname(src), root)
+
+
+class RepoSnapshotCache:
+    """Cache of extracted repository snapshots keyed by commit.
+
+    Attributes:
+        cache_dir: Path to the cache directory as a string.
+        max_entries: Maximum number of snapshots to keep.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._snapshots_dir = os.path.join(cache_dir, 'snapshots')
+        os.makedirs(self._snapshots_dir, exist_ok=True)
+
+    def _snapshot_dir(self, commit_sha: str) -> str:
+        return os.path.join(self._snapshots_dir, commit_sha)
+
+    def _lock_path(self, commit_sha: str) -> str:
+        return os.path.join(self._snapshots_dir, f'{commit_sha}.lock')
+
+    def _complete(self, commit_sha: str) -> bool:
+        return os.path.exists(
+            os.path.join(self._snapshot_dir(commit_sha), _COMPLETE_MARKER))
+
+    def _repo_dir_name(self, commit_sha: str) -> str:
+        names = [
+            name for name in os.listdir(self._snapshot_dir(commit_sha))
+            if name != _COMPLETE_MARKER
+        ]
+        if len(names) != 1:
+            raise FileNotFoundError(
+                f'Snapshot of commit {commit_sha} is not a single directory')
+        return names[0]
+
+    def latest(self) -> Optional[str]:
+        """Returns the commit of the most recently used snapshot.
+
+        Returns:
+            The commit ID as a string, or None if the cache is empty.
+        """
+        entries = self._list_entries()
+        if not entries:
+            return None
+        return entries[0][1]
+
+    @contextlib.contextmanager
+    def snapshot(self, commit_sha: str) -> Iterator[Optional[str]]:
+        """Context manager that provides a snapshot in the cache.
+
+        The snapshot is protected from garbage collection until the context
+        exits. Its files must not be modified.
+
+        Args:
+            commit_sha: ID of the commit as a string.
+
+        Yields:
+            Path to the repository directory of the snapshot as a string,
+            or None if the commit is not in the cache.
+        """
+        with open(self._lock_path(commit_sha), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_SH)
+            try:
+                if not self._complete(commit_sha):
+                    yield None
+                    return
+                os.utime(
+                    os.path.join(self._snapshot_dir(commit_sha),
+                                 _COMPLETE_MARKER))
+                yield os.path.join(self._snapshot_dir(commit_sha),
+                                   self._repo_dir_name(commit_sha))
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def checkout(self, commit_sha: str, dest_dir: str) -> Optional[str]:
+        """Copies a snapshot in the cache into a directory.
+
+        The files of the copy are hardlinked to the snapshot, so they must be
+        replaced and not modified in place, see replace_file.
+
+        Args:
+            commit_sha: ID of the commit as a string.
+            dest_dir: Directory to copy the repository into as a string.
+
+        Returns:
+            Path to the copied repository directory as a string,
+            or None if the commit is not in the cache.
+        """
+        with self.snapshot(commit_sha) as snapshot_dir:
+            if not snapshot_dir:
+                return None
+            repo_dir = os.path.join(dest_dir, os.path.basename(snapshot_dir))
+            link_tree(snapshot_dir, repo_dir)
+        logging.info('RepoSnapshotCache.checkout: Linked snapshot %s to %s',
+                     commit_sha, repo_dir)
+        return repo_dir
+
+    @contextlib.contextmanager
+    def create(self, commit_sha: str) -> Iterator[str]:
+        """Context manager for adding a snapshot to the cache.
+
+        The snapshot is built in a staging directory that is moved into the
+        cache when the context exits without an exception, and deleted
+        otherwise. If another snapshot of the same commit was added in the
+        meantime, the staged one is discarded.
+
+        Args:
+            commit_sha: ID of the commit as a string.
+
+        Yields:
+            Path to the staging directory as a string. The repository must be
+            placed in a single directory directly under it.
+        """
+        staging_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix='staging-')
+        try:
+            yield staging_dir
+            self._repo_dir_name_in(staging_dir)
+            with open(os.path.join(staging_dir, _COMPLETE_MARKER), 'w'):
+                pass
+            with open(self._lock_path(commit_sha), 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    if not self._complete(commit_sha):
+                        shutil.rmtree(self._snapshot_dir(commit_sha),
+                                      ignore_errors=True)
+                        os.rename(staging_dir, self._snapshot_dir(commit_sha))
+                        logging.info(
+                            'RepoSnapshotCache.create: Added snapshot %s',
+                            commit_sha)
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        self.collect_garbage()
+
+    @staticmethod
+    def _repo_dir_name_in(staging_dir: str) -> str:
+        names = os.listdir(staging_dir)
+        if len(names) != 1 or not os.path.isdir(
+                os.path.join(staging_dir, names[0])):
+            raise FileNotFoundError(
+                f'Staged snapshot {staging_dir} is not a single directory')
+        return names[0]
+
+    def _list_entries(self):
+        """Returns (last used time, commit) of the snapshots, most recent
+        first."""
+        entries = []
+        for commit_sha in os.listdir(self._snapshots_dir):
+            marker = os.path.join(self._snapshot_dir(commit_sha),
+                                  _COMPLETE_MARKER)
+            if os.path.exists(marker):
+                entries.append((os.path.getmtime(marker), commit_sha))
+        entries.sort(reverse=True)
+        return entries
+
+    def collect_garbage(self) -> None:
+        """Deletes least recently used snapshots beyond max_entries.
+
+        Snapshots in use are kept.
+        """
+        for _, commit_sha in self._list_entries()[self.max_entries:]:
+            with open(self._lock_path(commit_sha), 'a') as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                logging.info(
+                    'RepoSnapshotCache.collect_garbage: '
+                    'Deleting snapshot %s', commit_sha)
+                shutil.rmtree(self._snapshot_dir(commit_sha),
+                              ignore_errors=True)
+                fcntl.flock(lock, fcntl.LOCK_UN)
@@ -15,14 +15,13 @@
 Utility functions.
 """
 
-import time
-import os
 import re
 import datetime
 from typing import List
 
 import pytz
-import requests
+
+from app import downloader
 
 
 def utctime():
@@ -51,36 +50,11 @@ def list_to_str(a_list: List, sep: str = ', ') -> str:
     return sep.join(a_list)
 
 
-def _get_filename(response):
-    """Parses the filename of a downloaded file from a requests.Response object.
-
-    The filename is the value associated with the 'filename' key in the
-    Content-Disposition header. If the header does not exist, the base name
-    of the url is returned.
-
-    Args:
-        response: requests.Response object containing the HTTP response for
-            the downloaded file.
-
-    Returns:
-        The filename of the downloaded file as a string.
-
-    Raises:
-        ValueError: The Content-Disposition header exists but 'filename' key
-            does not exist.
-    """
-    header = response.headers.get('Content-Disposition')
-    if not header:
-        return os.path.basename(response.url)
-    name_list = re.findall(r'filename=(.+)', header)
-    if not name_list or not name_list[0]:
-        raise ValueError('filename not found in Content-Disposition header')
-    return name_list[0]
-
-
 def download_file(url: str, dest_dir: str, timeout: float = None) -> str:
     """Downloads a file from a web URL to a directory.
 
+    See downloader.download for how the file is downloaded.
+
     Args:
         url: File url as a string.
         dest_dir: Directory to download the file into, as a string.
@@ -95,19 +69,7 @@ def download_file(url: str, dest_dir: str, timeout: float = None) -> str:
     Raises:
         requests.Timeout: Downloading timed out.
     """
-    # 9.05 is the connect timeout and 27 is the read timeout. See
-    # https://requests.readthedocs.io/en/master/user/advanced/#timeouts.
-    with requests.get(url, stream=True, timeout=(9.05, 27)) as response:
-        response.raise_for_status()
-        filename = _get_filename(response)
-        path = os.path.join(dest_dir, filename)
-        with open(path, 'wb') as out:
-            start = time.time()
-            for data in response.iter_content(chunk_size=4096):
-                out.write(data)
-                if timeout is not None and time.time() - start > timeout:
-                    raise requests.Timeout(f'Downloading {url} timed out')
-        return path
+    return downloader.download(url, dest_dir, timeout).path
 
 
 def parse_tag_list(message: str, tag: str, allowed_chars: str) -> List[str]:
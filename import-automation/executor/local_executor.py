@@ -88,8 +88,11 @@ def main(_):
         github_auth_access_token=FLAGS.access_token)
     executor = import_executor.ImportExecutor(
         uploader=file_uploader.LocalFileUploader(output_dir=FLAGS.output_dir),
-        github=github_api.GitHubRepoAPI(config.github_repo_owner_username,
-                                        config.github_repo_name),
+        github=github_api.GitHubRepoAPI(
+            config.github_repo_owner_username,
+            config.github_repo_name,
+            snapshot_cache_dir=config.repo_snapshot_cache_dir,
+            snapshot_cache_max_entries=config.repo_snapshot_cache_max_entries),
         config=config)
     results = executor.execute_imports_on_update(FLAGS.import_name)
     print(results)
@@ -0,0 +1,225 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Tests for downloader.py.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from app import downloader
+from test import utils
+
+_CONTENT = bytes(range(256)) * 400
+
+
+class DownloaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dest_dir = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _read(self, path):
+        with open(path, 'rb') as file:
+            return file.read()
+
+    def test_ranged_download(self):
+        with utils.LocalFileServer(_CONTENT, filename='data.bin') as server:
+            stats = downloader.download(server.url,
+                                        self.dest_dir,
+                                        num_workers=3,
+                                        part_size=10000)
+            # One probe and 11 parts.
+            self.assertEqual(12, len(server.requests))
+        self.assertEqual(os.path.join(self.dest_dir, 'data.bin'), stats.path)
+        self.assertEqual(_CONTENT, self._read(stats.path))
+        self.assertEqual(11, stats.parts)
+        self.assertEqual(len(_CONTENT), stats.size)
+        self.assertEqual(len(_CONTENT), stats.bytes_downloaded)
+        self.assertGreater(stats.bytes_per_second, 0)
+        self.assertEqual(['data.bin'], os.listdir(self.dest_dir))
+
+    def test_serial_download_without_ranges(self):
+        with utils.LocalFileServer(_CONTENT, accept_ranges=False) as server:
+            stats = downloader.download(server.url,
+                                        self.dest_dir,
+                                        part_size=10000)
+            self.assertEqual([None], server.requests)
+        self.assertEqual(0, stats.parts)
+        self.assertEqual(_CONTENT, self._read(stats.path))
+
+    @mock.patch('time.sleep')
+    def test_serial_download_retried_from_start(self, _):
+        with utils.LocalFileServer(_CONTENT, accept_ranges=False) as server:
+            server.fail_requests = 1
+            stats = downloader.download(server.url, self.dest_dir)
+            self.assertEqual([None, None], server.requests)
+        self.assertEqual(1, stats.retries)
+        self.assertEqual(_CONTENT, self._read(stats.path))
+
+    @mock.patch('time.sleep')
+    def test_serial_download_resumed(self, _):
+        with utils.LocalFileServer(_CONTENT, send_length=False) as server:
+            server.fail_requests = 1
+            stats = downloader.download(server.url, self.dest_dir)
+            # The retry resumes from the last byte written.
+            self.assertEqual(2, len(server.requests))
+            self.assertIsNone(server.requests[0])
+            self.assertRegex(server.requests[1], r'bytes=[1-9]\d*-$')
+        self.assertEqual(0, stats.parts)
+        self.assertEqual(1, stats.retries)
+        self.assertEqual(_CONTENT, self._read(stats.path))
+
+    @mock.patch('time.sleep')
+    def test_serial_download_restarted_when_file_changed(self, sleep):
+        with utils.LocalFileServer(_CONTENT, send_length=False) as server:
+            server.fail_requests = 1
+            # The file changes before the retry, so the server ignores the
+            # range and sends the whole file.
+            sleep.side_effect = lambda _: setattr(server, 'etag', '"v2"')
+            stats = downloader.download(server.url, self.dest_dir)
+            self.assertEqual(2, len(server.requests))
+        self.assertEqual(1, stats.retries)
+        self.assertEqual(_CONTENT, self._read(stats.path))
+
+    @mock.patch('time.sleep')
+    def test_retries_read_timeout(self, _):
+        get = downloader.requests.get
+        calls = []
+
+        def get_with_timeout(*args, **kwargs):
+            calls.append(kwargs.get('headers'))
+            if len(calls) == 2:
+                raise downloader.requests.exceptions.ReadTimeout('timed out')
+            return get(*args, **kwargs)
+
+        with utils.LocalFileServer(_CONTENT) as server, \
+                mock.patch('requests.get', get_with_timeout):
+            stats = downloader.download(server.url,
+                                        self.dest_dir,
+                                        num_workers=1,
+                                        part_size=40000)
+        self.assertEqual(1, stats.retries)
+        self.assertEqual(_CONTENT, self._read(stats.path))
+
+    @mock.patch('time.sleep')
+    def test_retries_failed_part(self, _):
+        with utils.LocalFileServer(_CONTENT) as server:
+            # The probe only reads the headers, so the first part fails.
+            server.fail_requests = 2
+            stats = downloader.download(server.url,
+                                        self.dest_dir,
+                                        num_workers=1,
+                                        part_size=40000)
+            # The retry resumes part 0 from the last byte written.
+            self.assertEqual([None, 'bytes=0-39999'], server.requests[:2])
+            self.assertRegex(server.requests[2], r'bytes=\d+-39999')
+        self.assertEqual(1, stats.retries)
+        self.assertEqual(_CONTENT, self._read(stats.path))
+
+    def test_resumes_from_state_file(self):
+        with utils.LocalFileServer(_CONTENT) as server:
+            # Every range request fails, so only the state is kept.
+            server.fail_requests = 100
+            with self.assertRaises(downloader.requests.RequestException):
+                downloader.download(server.url,
+                                    self.dest_dir,
+                                    num_workers=1,
+                                    part_size=40000,
+                                    max_retries=0)
+            part_path = os.path.join(self.dest_dir, 'file.bin.part')
+            state_path = os.path.join(self.dest_dir, 'file.bin.part.json')
+            self.assertTrue(os.path.exists(state_path))
+
+            # Simulate a download that completed parts 0 and 1 before failing.
+            with open(part_path, 'r+b') as file:
+                file.write(_CONTENT[:80000])
+            with open(state_path) as file:
+                state = json.load(file)
+            state['completed'] = [0, 1]
+            with open(state_path, 'w') as file:
+                json.dump(state, file)
+
+            server.fail_requests = 0
+            server.requests.clear()
+            stats = downloader.download(server.url,
+                                        self.dest_dir,
+                                        part_size=40000)
+            # The probe and the last part only.
+            self.assertEqual([None, 'bytes=80000-102399'], server.requests)
+        self.assertEqual(80000, stats.bytes_resumed)
+        self.assertEqual(len(_CONTENT) - 80000, stats.bytes_downloaded)
+        self.assertEqual(_CONTENT, self._read(stats.path))
+        self.assertEqual(['file.bin'], os.listdir(self.dest_dir))
+
+    def test_state_ignored_when_file_changed(self):
+        with utils.LocalFileServer(_CONTENT) as server:
+            downloader.download(server.url, self.dest_dir, part_size=40000)
+            path = os.path.join(self.dest_dir, 'file.bin')
+            with open(path + '.part.json', 'w') as file:
+                json.dump(
+                    {
+                        'url': server.url,
+                        'size': len(_CONTENT),
+                        'part_size': 40000,
+                        'validators': {
+                            'etag': '"v0"',
+                            'last_modified': None
+                        },
+                        'completed': [0, 1, 2]
+                    }, file)
+            with open(path + '.part', 'wb') as file:
+                file.write(b'\0' * len(_CONTENT))
+            stats = downloader.download(server.url,
+                                        self.dest_dir,
+                                        part_size=40000)
+        self.assertEqual(0, stats.bytes_resumed)
+        self.assertEqual(_CONTENT, self._read(path))
+
+    def test_checksum(self):
+        checksum = 'sha256:' + hashlib.sha256(_CONTENT).hexdigest()
+        with utils.LocalFileServer(_CONTENT) as server:
+            stats = downloader.download(server.url,
+                                        self.dest_dir,
+                                        checksum=checksum)
+            self.assertEqual(_CONTENT, self._read(stats.path))
+            with self.assertRaises(ValueError) as context:
+                downloader.download(server.url,
+                                    self.dest_dir,
+                                    checksum='sha256:0000')
+            self.assertIn('Checksum mismatch', str(context.exception))
+        self.assertEqual(['file.bin'], os.listdir(self.dest_dir))
+
+    @mock.patch('requests.Response')
+    def test_get_filename(self, response):
+        response.headers.get.return_value = 'attachment; filename=FRB_H15.csv'
+        self.assertEqual('FRB_H15.csv', downloader._get_filename(response))
+        response.headers.get.assert_called_once_with('Content-Disposition')
+
+    @mock.patch('requests.Response')
+    def test_get_filename_raise(self, response):
+        response.headers.get.return_value = 'attachment'
+        self.assertRaises(ValueError, downloader._get_filename, response)
+        response.headers.get.assert_called_once_with('Content-Disposition')
+
+
+if __name__ == '__main__':
+    unittest.main()
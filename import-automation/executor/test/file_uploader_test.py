@@ -30,12 +30,62 @@ class GCSFileUploaderTest(unittest.TestCase):
                                                 bucket_name='bucket-name')
 
     def test_upload_file(self):
-        src = 'a/b/c/file.csv'
-        dest = 'd/e/file.csv'
-        self.io.upload_file(src, dest)
-        self.io.bucket.blob.assert_has_calls(
-            [mock.call(dest),
-             mock.call().upload_from_filename(src)])
+        with tempfile.NamedTemporaryFile() as file:
+            src = file.name
+            dest = 'd/e/file.csv'
+            self.io.upload_file(src, dest)
+            self.io.bucket.blob.assert_has_calls(
+                [mock.call(dest),
+                 mock.call().upload_from_filename(src)])
+
+    @mock.patch('app.service.file_uploader._COMPOSITE_THRESHOLD', 100)
+    @mock.patch('app.service.file_uploader._COMPOSITE_PART_SIZE', 40)
+    def test_upload_file_composite(self):
+        parts = {}
+
+        def blob(name):
+            if name not in parts:
+                parts[name] = mock.MagicMock()
+                parts[name].name = name
+                parts[name].upload_from_file.side_effect = (
+                    lambda file, size, name=name: parts[name].data.append(
+                        file.read(size)))
+                parts[name].data = []
+            return parts[name]
+
+        self.io.bucket.blob.side_effect = blob
+        with tempfile.NamedTemporaryFile() as file:
+            file.write(bytes(range(100)))
+            file.flush()
+            self.io.upload_file(file.name, 'd/e/file.csv')
+
+        part_names = [f'd/e/file.csv.part-0{i}' for i in range(3)]
+        self.assertEqual(bytes(range(100)),
+                         b''.join(parts[name].data[0] for name in part_names))
+        parts['d/e/file.csv'].compose.assert_called_once_with(
+            [parts[name] for name in part_names])
+        for name in part_names:
+            parts[name].delete.assert_called_once()
+
+    def test_get_checksums(self):
+        self.io.bucket.get_blob.return_value = None
+        self.assertIsNone(self.io.get_checksums('a/file.csv'))
+
+        blob = mock.MagicMock()
+        blob.md5_hash = 'XUFAKrxLKna5cZ2REBfFkg=='
+        blob.crc32c = 'mnG7TA=='
+        self.io.bucket.get_blob.return_value = blob
+        self.assertEqual(
+            {
+                'md5': '5d41402abc4b2a76b9719d911017c592',
+                'crc32c': '9a71bb4c'
+            }, self.io.get_checksums('a/file.csv'))
+        self.io.bucket.get_blob.assert_called_with('a/file.csv')
+
+    def test_copy_file(self):
+        self.io.copy_file('a/file.csv', 'b/file.csv')
+        self.io.bucket.copy_blob.assert_called_once_with(
+            self.io.bucket.blob('a/file.csv'), self.io.bucket, 'b/file.csv')
 
     def test_upload_string(self):
         version = '2020-1-20 123:20'
@@ -75,6 +125,55 @@ class LocalFileUploaderTest(unittest.TestCase):
             with open(os.path.join(tmp_dir, 'foo/bar/file')) as file:
                 self.assertEqual('12345', file.read())
 
+    def test_upload_files(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            uploader = file_uploader.LocalFileUploader(
+                os.path.join(tmp_dir, 'out'))
+            srcs = []
+            for name in ('a.csv', 'b.csv', 'c.csv'):
+                srcs.append(os.path.join(tmp_dir, name))
+                with open(srcs[-1], 'w') as file:
+                    file.write(name)
+            uploader.upload_string('b.csv', 'v2/b.csv')
+            uploader.upload_string('c.csv', 'v1/c.csv')
+
+            results = uploader.upload_files(
+                [(src, f'v2/{os.path.basename(src)}') for src in srcs],
+                reuse_dir='v1',
+                max_workers=2)
+            self.assertEqual(['uploaded', 'skipped', 'copied'],
+                             [result.action for result in results])
+            self.assertEqual(['v2/a.csv', 'v2/b.csv', 'v2/c.csv'],
+                             [result.dest for result in results])
+            self.assertEqual(5, results[0].size)
+            self.assertEqual(file_uploader.file_checksums(srcs[0]),
+                             results[0].checksums)
+            for name in ('a.csv', 'b.csv', 'c.csv'):
+                self.assertEqual(name, uploader.read_string(f'v2/{name}'))
+
+            # Changed files are uploaded again.
+            with open(srcs[1], 'w') as file:
+                file.write('changed')
+            results = uploader.upload_files([(srcs[1], 'v2/b.csv')])
+            self.assertEqual('uploaded', results[0].action)
+            self.assertEqual('changed', uploader.read_string('v2/b.csv'))
+
+    def test_file_checksums(self):
+        with tempfile.NamedTemporaryFile() as file:
+            file.write(b'hello')
+            file.flush()
+            self.assertEqual(
+                {
+                    'md5': '5d41402abc4b2a76b9719d911017c592',
+                    'crc32c': '9a71bb4c'
+                }, file_uploader.file_checksums(file.name))
+
+    def test_read_string_missing(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            uploader = file_uploader.LocalFileUploader(tmp_dir)
+            self.assertIsNone(uploader.read_string('foo/bar/file'))
+            self.assertIsNone(uploader.get_checksums('foo/bar/file'))
+
     def test_invalid_string_args(self):
         uploader = file_uploader.LocalFileUploader()
         self.assertRaises(ValueError, uploader.upload_file, 'src', '')
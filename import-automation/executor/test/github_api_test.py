@@ -24,6 +24,7 @@ from requests import exceptions
 
 import test.utils
 from app.service import github_api
+from app.service import repo_snapshot
 from test import utils
 from test import integration_test
 
@@ -354,6 +355,33 @@ class GitHubAPITest(unittest.TestCase):
                                   self.github.download_repo, dir_path,
                                   'commit-sha')
 
+    @mock.patch('requests.get')
+    def test_query_changed_files_between(self, get):
+        files = [{'filename': 'a/b.txt', 'status': 'modified'}]
+        get.return_value = utils.ResponseMock(200, {
+            'status': 'ahead',
+            'files': files
+        })
+        self.assertEqual(
+            files, self.github._query_changed_files_between('base', 'head'))
+        get.assert_called_with(
+            'https://api.github.com/repos/ownerA/repoB/compare/base...head',
+            auth=('authusernameC', 'authacesstokenD'))
+
+        get.return_value = utils.ResponseMock(200, {
+            'status': 'diverged',
+            'files': files
+        })
+        self.assertIsNone(
+            self.github._query_changed_files_between('base', 'head'))
+
+        get.return_value = utils.ResponseMock(200, {
+            'status': 'ahead',
+            'files': files * 300
+        })
+        self.assertIsNone(
+            self.github._query_changed_files_between('base', 'head'))
+
     def test_get_path_first_component(self):
         self.assertEqual(
             'data',
@@ -362,3 +390,176 @@ class GitHubAPITest(unittest.TestCase):
             '', github_api._get_path_first_component('/data/foo/bar/README.md'))
         self.assertEqual('data', github_api._get_path_first_component('data'))
         self.assertEqual('', github_api._get_path_first_component(''))
+
+
+def _fake_download_tarball(dest_dir, commit_sha=None, timeout=None):
+    """Extracts a fake repository instead of downloading the tarball."""
+    del timeout
+    repo_dir = os.path.join(dest_dir, f'ownerA-repoB-{commit_sha[:7]}')
+    for path in ('a/x.txt', 'a/y.txt', 'b/z.txt', 'b/v.txt'):
+        os.makedirs(os.path.join(repo_dir, os.path.dirname(path)),
+                    exist_ok=True)
+        with open(os.path.join(repo_dir, path), 'w') as file:
+            file.write(f'{path} at {commit_sha}')
+    return repo_dir
+
+
+def _read(path):
+    with open(path) as file:
+        return file.read()
+
+
+class GitHubAPISnapshotCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.github = github_api.GitHubRepoAPI('ownerA',
+                                               'repoB',
+                                               snapshot_cache_dir=os.path.join(
+                                                   self.tmp_dir.name, 'cache'))
+        self.download_tarball = mock.patch.object(
+            self.github,
+            '_download_tarball',
+            side_effect=_fake_download_tarball).start()
+        # Git modes of the files of every commit.
+        self.file_modes = {
+            path: '100644' for path in ('a/x.txt', 'a/y.txt', 'b/z.txt',
+                                        'b/v.txt', 'c/z.txt', 'd/w.txt')
+        }
+        mock.patch.object(self.github,
+                          '_query_file_modes',
+                          return_value=self.file_modes).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _download(self, commit_sha):
+        dest_dir = tempfile.mkdtemp(dir=self.tmp_dir.name)
+        return self.github.download_repo(dest_dir, commit_sha)
+
+    def test_download_repo_cached(self):
+        repo_dir = self._download('commit1abc')
+        self.assertEqual('ownerA-repoB-commit1', os.path.basename(repo_dir))
+        repo_snapshot.replace_file(os.path.join(repo_dir, 'a/x.txt'),
+                                   b'modified by a script')
+        repo_dir = self._download('commit1abc')
+        self.assertEqual('a/x.txt at commit1abc',
+                         _read(os.path.join(repo_dir, 'a/x.txt')))
+        self.download_tarball.assert_called_once()
+
+    @mock.patch('app.service.github_api.GitHubRepoAPI.query_commit')
+    def test_download_repo_head(self, query_commit):
+        query_commit.return_value = {'sha': 'commit1abc'}
+        self._download('commit1abc')
+        repo_dir = self._download(None)
+        query_commit.assert_called_once_with('HEAD')
+        self.assertEqual('a/x.txt at commit1abc',
+                         _read(os.path.join(repo_dir, 'a/x.txt')))
+        self.download_tarball.assert_called_once()
+
+    @mock.patch('app.service.github_api.GitHubRepoAPI._fetch_file')
+    @mock.patch(
+        'app.service.github_api.GitHubRepoAPI._query_changed_files_between')
+    def test_download_repo_incremental(self, changed_files, fetch_file):
+        changed_files.return_value = [
+            {
+                'filename': 'a/x.txt',
+                'status': 'modified'
+            },
+            {
+                'filename': 'c/z.txt',
+                'status': 'renamed',
+                'previous_filename': 'b/z.txt',
+                'changes': 0
+            },
+            {
+                'filename': 'a/y.txt',
+                'status': 'removed'
+            },
+            {
+                'filename': 'd/w.txt',
+                'status': 'added'
+            },
+            {
+                'filename': 'b/v.txt',
+                'status': 'changed',
+                'changes': 0
+            },
+        ]
+        fetch_file.side_effect = lambda sha, path: f'{path} at {sha}'.encode()
+        self.file_modes.update({'d/w.txt': '100755', 'b/v.txt': '100755'})
+        self._download('commit1abc')
+        repo_dir = self._download('commit2abc')
+
+        self.assertEqual('ownerA-repoB-commit2', os.path.basename(repo_dir))
+        changed_files.assert_called_once_with('commit1abc', 'commit2abc')
+        self.assertCountEqual([
+            mock.call('commit2abc', 'a/x.txt'),
+            mock.call('commit2abc', 'd/w.txt')
+        ], fetch_file.call_args_list)
+        self.download_tarball.assert_called_once()
+        self.assertCountEqual(['a', 'b', 'c', 'd'], os.listdir(repo_dir))
+        self.assertEqual(['x.txt'], os.listdir(os.path.join(repo_dir, 'a')))
+        self.assertEqual('a/x.txt at commit2abc',
+                         _read(os.path.join(repo_dir, 'a/x.txt')))
+        self.assertEqual('b/z.txt at commit1abc',
+                         _read(os.path.join(repo_dir, 'c/z.txt')))
+        self.assertEqual('d/w.txt at commit2abc',
+                         _read(os.path.join(repo_dir, 'd/w.txt')))
+
+        # The files get the modes of the commit, including the file whose
+        # only change is its mode, which is not fetched.
+        def mode(path):
+            return os.stat(os.path.join(repo_dir, path)).st_mode & 0o111
+
+        self.assertEqual(0o111, mode('d/w.txt'))
+        self.assertEqual(0o111, mode('b/v.txt'))
+        self.assertEqual(0, mode('a/x.txt'))
+        self.assertEqual('b/v.txt at commit1abc',
+                         _read(os.path.join(repo_dir, 'b/v.txt')))
+
+        # The unchanged file is shared by the snapshots, the changed file is
+        # not.
+        cache = self.github.snapshot_cache
+        with cache.snapshot('commit1abc') as base_dir:
+            with cache.snapshot('commit2abc') as head_dir:
+                self.assertEqual(
+                    os.stat(os.path.join(base_dir, 'b/z.txt')).st_ino,
+                    os.stat(os.path.join(head_dir, 'c/z.txt')).st_ino)
+                self.assertEqual('a/x.txt at commit1abc',
+                                 _read(os.path.join(base_dir, 'a/x.txt')))
+                self.assertEqual(
+                    0,
+                    os.stat(os.path.join(base_dir, 'b/v.txt')).st_mode & 0o111)
+
+    @mock.patch('app.service.github_api.GitHubRepoAPI._fetch_file')
+    @mock.patch(
+        'app.service.github_api.GitHubRepoAPI._query_changed_files_between')
+    def test_download_repo_incremental_fallback(self, changed_files,
+                                                fetch_file):
+        self._download('commit1abc')
+
+        changed_files.return_value = None
+        repo_dir = self._download('commit2abc')
+        self.assertEqual('a/x.txt at commit2abc',
+                         _read(os.path.join(repo_dir, 'a/x.txt')))
+        self.assertEqual(2, self.download_tarball.call_count)
+
+        changed_files.return_value = [{
+            'filename': 'a/x.txt',
+            'status': 'modified'
+        }]
+        fetch_file.side_effect = exceptions.HTTPError
+        repo_dir = self._download('commit3abc')
+        self.assertEqual('ownerA-repoB-commit3', os.path.basename(repo_dir))
+        self.assertEqual('a/y.txt at commit3abc',
+                         _read(os.path.join(repo_dir, 'a/y.txt')))
+        self.assertEqual(3, self.download_tarball.call_count)
+
+        # A changed symbolic link is not built incrementally.
+        fetch_file.reset_mock(side_effect=True)
+        self.file_modes['a/x.txt'] = '120000'
+        self._download('commit4abc')
+        fetch_file.assert_not_called()
+        self.assertEqual(4, self.download_tarball.call_count)
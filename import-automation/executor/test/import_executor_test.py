@@ -15,12 +15,17 @@
 Tests for import_executor.py.
 """
 
+import json
+import os
+import sys
 import unittest
 from unittest import mock
 import subprocess
 import tempfile
 
+from app import configs
 from app.executor import import_executor
+from app.service import file_uploader
 
 
 class ImportExecutorTest(unittest.TestCase):
@@ -105,3 +110,163 @@ class ImportExecutorTest(unittest.TestCase):
                     '[Subprocess command]: exit 0\n'
                     '[Subprocess return code]: 0')
         self.assertEqual(expected, message)
+
+    def test_run_user_script_run_report(self):
+        """Tests that a user script can write a run report to the path
+        in the environment."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            script_path = os.path.join(tmp_dir, 'script.py')
+            report_path = os.path.join(tmp_dir, 'report.json')
+            with open(script_path, 'w') as script:
+                script.write('import json, os\n'
+                             'with open(os.environ["DC_IMPORT_RUN_REPORT"], '
+                             '"w") as f:\n'
+                             '    json.dump({"counters": {"rows": 3}}, f)\n')
+            process = import_executor._run_user_script(
+                interpreter_path=sys.executable,
+                script_path=script_path,
+                timeout=10,
+                env={import_executor._RUN_REPORT_ENV: report_path})
+            self.assertEqual(0, process.returncode)
+            self.assertEqual({'counters': {
+                'rows': 3
+            }}, import_executor._read_run_report(report_path))
+
+    def test_read_run_report_missing_or_malformed(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            report_path = os.path.join(tmp_dir, 'report.json')
+            self.assertIsNone(import_executor._read_run_report(report_path))
+            with open(report_path, 'w') as report:
+                report.write('{not json')
+            self.assertIsNone(import_executor._read_run_report(report_path))
+
+    @mock.patch('app.executor.import_executor.ImportExecutor._import_one')
+    def test_execute_import_graph(self, import_one):
+        """Tests that each import runs in its own copy of the repository and
+        that dependents of failed imports are skipped."""
+        with tempfile.TemporaryDirectory() as repo_dir:
+            os.makedirs(os.path.join(repo_dir, 'scripts/a'))
+            repo_dirs = []
+
+            def fake_import_one(repo_dir, relative_import_dir,
+                                absolute_import_dir, import_spec, run_id):
+                repo_dirs.append(repo_dir)
+                self.assertTrue(os.path.isdir(absolute_import_dir))
+                if import_spec['import_name'] == 'a1':
+                    raise ValueError('a1 failed')
+
+            import_one.side_effect = fake_import_one
+            executor = import_executor.ImportExecutor(
+                uploader=None,
+                github=None,
+                config=configs.ExecutorConfig(max_concurrent_imports=2,
+                                              venv_cache_dir=''))
+            with self.assertRaises(import_executor.ExecutionError) as context:
+                executor._execute_import_graph(repo_dir, [
+                    ('scripts/a', {
+                        'import_name': 'a1'
+                    }),
+                    ('scripts/a', {
+                        'import_name': 'a2',
+                        'depends_on': ['a1']
+                    }),
+                    ('scripts/a', {
+                        'import_name': 'a3'
+                    }),
+                ])
+            result = context.exception.result
+            self.assertEqual('failed', result.status)
+            self.assertEqual(['scripts/a:a3'], result.imports_executed)
+            self.assertIn('[Failed]: scripts/a:a1', result.message)
+            self.assertIn('[Skipped]: scripts/a:a2 (depends on scripts/a:a1)',
+                          result.message)
+            self.assertEqual(2, len(set(repo_dirs)))
+            self.assertNotIn(repo_dir, repo_dirs)
+
+    def test_copy_repo_for_import(self):
+        """Tests that the files of the import directory are copied and the
+        other files are hardlinked."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            repo_dir = os.path.join(tmp_dir, 'repo')
+            for path in ('util/helper.py', 'scripts/a/process.py',
+                         'scripts/ab/process.py'):
+                os.makedirs(os.path.dirname(os.path.join(repo_dir, path)),
+                            exist_ok=True)
+                with open(os.path.join(repo_dir, path), 'w') as file:
+                    file.write(path)
+            dest_dir = os.path.join(tmp_dir, 'copy')
+            import_executor._copy_repo_for_import(repo_dir, 'scripts/a',
+                                                  dest_dir)
+
+            def same_file(path):
+                return os.path.samefile(os.path.join(repo_dir, path),
+                                        os.path.join(dest_dir, path))
+
+            self.assertTrue(same_file('util/helper.py'))
+            self.assertTrue(same_file('scripts/ab/process.py'))
+            self.assertFalse(same_file('scripts/a/process.py'))
+            with open(os.path.join(dest_dir, 'scripts/a/process.py')) as file:
+                self.assertEqual('scripts/a/process.py', file.read())
+            # The shared files are read-only, the copied ones are writable.
+            def mode(path):
+                return os.stat(os.path.join(dest_dir, path)).st_mode & 0o222
+
+            self.assertEqual(0, mode('util/helper.py'))
+            self.assertNotEqual(0, mode('scripts/a/process.py'))
+
+    def test_copy_repo_for_import_across_filesystems(self):
+        """Tests that files are copied when they cannot be hardlinked."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            repo_dir = os.path.join(tmp_dir, 'repo')
+            os.makedirs(os.path.join(repo_dir, 'scripts/a'))
+            with open(os.path.join(repo_dir, 'util.py'), 'w') as file:
+                file.write('util')
+            dest_dir = os.path.join(tmp_dir, 'copy')
+            with mock.patch('os.link', side_effect=OSError(18, 'EXDEV')):
+                import_executor._copy_repo_for_import(repo_dir, 'scripts/a',
+                                                      dest_dir)
+            self.assertFalse(
+                os.path.samefile(os.path.join(repo_dir, 'util.py'),
+                                 os.path.join(dest_dir, 'util.py')))
+            with open(os.path.join(dest_dir, 'util.py')) as file:
+                self.assertEqual('util', file.read())
+
+    def test_upload_import_inputs(self):
+        """Tests that unchanged files are copied from the previous version and
+        that a manifest of the uploads is written."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            import_dir = os.path.join(tmp_dir, 'import')
+            os.makedirs(import_dir)
+            for name in ('data.csv', 'data.tmcf'):
+                with open(os.path.join(import_dir, name), 'w') as file:
+                    file.write(name)
+            executor = import_executor.ImportExecutor(
+                uploader=file_uploader.LocalFileUploader(
+                    os.path.join(tmp_dir, 'out')),
+                github=None,
+                config=configs.ExecutorConfig(venv_cache_dir=''))
+            import_inputs = [{
+                'cleaned_csv': 'data.csv',
+                'template_mcf': 'data.tmcf'
+            }]
+
+            with mock.patch('app.utils.pacific_time', lambda: 'v1'):
+                executor._upload_import_inputs(import_dir, 'scripts/a',
+                                               import_inputs)
+            with open(os.path.join(import_dir, 'data.csv'), 'w') as file:
+                file.write('changed')
+            with mock.patch('app.utils.pacific_time', lambda: 'v2'):
+                uploaded = executor._upload_import_inputs(
+                    import_dir, 'scripts/a', import_inputs)
+
+            self.assertEqual('scripts/a/v2/data.csv', uploaded.cleaned_csv)
+            with open(
+                    os.path.join(tmp_dir, 'out/scripts/a/v2',
+                                 'upload_manifest.json')) as file:
+                manifest = json.load(file)
+            self.assertCountEqual(
+                [('scripts/a/v2/data.csv', 'uploaded'),
+                 ('scripts/a/v2/data.tmcf', 'copied')],
+                [(entry['dest'], entry['action']) for entry in manifest])
+            with open(os.path.join(tmp_dir, 'out/scripts/a/v2/data.csv')) as f:
+                self.assertEqual('changed', f.read())
@@ -0,0 +1,105 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Tests for import_graph.py.
+"""
+
+import threading
+import time
+import unittest
+
+from app.executor import import_graph
+
+
+def _spec(name, depends_on=None):
+    spec = {'import_name': name}
+    if depends_on is not None:
+        spec['depends_on'] = depends_on
+    return spec
+
+
+class ImportGraphTest(unittest.TestCase):
+
+    def test_build_graph(self):
+        graph = import_graph.build_graph([
+            ('scripts/a', _spec('a1')),
+            ('scripts/a', _spec('a2', ['a1', 'scripts/b:b1'])),
+            ('scripts/b', _spec('b1', ['scripts/c:not_executed'])),
+        ])
+        self.assertEqual(['scripts/a:a1', 'scripts/a:a2', 'scripts/b:b1'],
+                         list(graph))
+        self.assertEqual({'scripts/a:a1', 'scripts/b:b1'},
+                         graph['scripts/a:a2'].depends_on)
+        self.assertEqual(set(), graph['scripts/b:b1'].depends_on)
+        self.assertEqual(['scripts/a:a1', 'scripts/b:b1', 'scripts/a:a2'],
+                         import_graph.topological_order(graph))
+
+    def test_build_graph_cycle(self):
+        with self.assertRaises(ValueError) as context:
+            import_graph.build_graph([
+                ('scripts/a', _spec('a1', ['a2'])),
+                ('scripts/a', _spec('a2', ['a1'])),
+                ('scripts/a', _spec('a3')),
+            ])
+        self.assertIn("['scripts/a:a1', 'scripts/a:a2']",
+                      str(context.exception))
+
+    def test_run_graph_respects_dependencies(self):
+        graph = import_graph.build_graph([
+            ('scripts/a', _spec('a1')),
+            ('scripts/a', _spec('a2', ['a1'])),
+            ('scripts/a', _spec('a3')),
+        ])
+        finished = []
+        lock = threading.Lock()
+
+        def run(node):
+            if node.name == 'scripts/a:a1':
+                time.sleep(0.1)
+            with lock:
+                for dependency in node.depends_on:
+                    self.assertIn(dependency, finished)
+                finished.append(node.name)
+
+        result = import_graph.run_graph(graph, run, max_workers=2)
+        self.assertEqual(['scripts/a:a3', 'scripts/a:a1', 'scripts/a:a2'],
+                         result.succeeded)
+        self.assertEqual({}, result.failed)
+        self.assertEqual({}, result.skipped)
+
+    def test_run_graph_skips_dependents_of_failures(self):
+        graph = import_graph.build_graph([
+            ('scripts/a', _spec('a1')),
+            ('scripts/a', _spec('a2', ['a1'])),
+            ('scripts/a', _spec('a3', ['a2'])),
+            ('scripts/a', _spec('a4')),
+        ])
+
+        def run(node):
+            if node.name == 'scripts/a:a1':
+                raise ValueError('a1 failed')
+
+        result = import_graph.run_graph(graph, run, max_workers=2)
+        self.assertEqual(['scripts/a:a4'], result.succeeded)
+        self.assertEqual(['scripts/a:a1'], list(result.failed))
+        self.assertIn('a1 failed', result.failed['scripts/a:a1'])
+        self.assertEqual(
+            {
+                'scripts/a:a2': 'scripts/a:a1',
+                'scripts/a:a3': 'scripts/a:a1'
+            }, result.skipped)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -15,14 +15,76 @@
 Tests for import_executor.py.
 """
 
+import itertools
 import unittest
 from unittest import mock
 
+import requests
+
 from app.service import import_service
+from test import utils
 
 _CLIENT = 'app.service.import_service.ImportServiceClient'
 
 
+class FakeImportService:
+    """Serves GetImportLog requests from an in-memory log that advances the
+    state of an import on every request.
+
+    Attributes:
+        logs: List of log entries.
+        states: States the import with ID 'id1' goes through, one per request.
+        support_filters: Whether importName and pageToken are accepted.
+        requests: List of requests received.
+        entries_returned: Number of entries returned for each request.
+    """
+
+    def __init__(self, states, support_filters=True, num_other_logs=100):
+        self.logs = [{
+            'id': f'other{i}',
+            'importName': f'other_import{i}',
+            'userEmail': 'curator_email',
+            'state': 'SUCCESSFUL',
+            'version': 0
+        } for i in range(num_other_logs)]
+        self.logs.append({
+            'id': 'id1',
+            'importName': 'import_name',
+            'userEmail': 'curator_email',
+            'state': 'QUEUED',
+            'version': 0
+        })
+        self.states = list(states)
+        self.support_filters = support_filters
+        self.requests = []
+        self.entries_returned = []
+        self.version = 0
+
+    def post(self, url, json):
+        assert url.endswith('/GetImportLog'), url
+        self.requests.append(json)
+        if not self.support_filters and set(json) != {'userEmail'}:
+            field = next(field for field in json if field != 'userEmail')
+            return utils.ResponseMock(400, text=f'Cannot find field: {field}')
+        if self.states:
+            self.version += 1
+            self.logs[-1]['state'] = self.states.pop(0)
+            self.logs[-1]['version'] = self.version
+        since = int(json.get('pageToken', -1))
+        entries = [
+            dict(log)
+            for log in self.logs
+            if log['userEmail'] == json['userEmail'] and
+            json.get('importName', log['importName']) == log['importName'] and
+            log['version'] > since
+        ]
+        self.entries_returned.append(len(entries))
+        response = {'entry': entries}
+        if self.support_filters:
+            response['nextPageToken'] = str(self.version)
+        return utils.ResponseMock(200, response)
+
+
 class ImportServiceTest(unittest.TestCase):
 
     @mock.patch('google.cloud.storage.Client', mock.MagicMock)
@@ -111,6 +173,93 @@ class ImportServiceTest(unittest.TestCase):
                           'curator_email',
                           timeout=1)
 
+    @mock.patch('time.sleep')
+    def test_block_on_import_fake_service(self, sleep):
+        service = FakeImportService(['QUEUED', 'RUNNING', 'RUNNING', 'RUNNING'])
+        self.importer.iap = service
+        # Finishes on the fifth poll, after the scripted states run out.
+        service.states.append('SUCCESSFUL')
+        log = self.importer._block_on_import('id1', 'import_name',
+                                             'curator_email')
+        self.assertEqual('SUCCESSFUL', log['state'])
+        self.assertEqual(5, len(service.requests))
+
+        # Only the logs of the import are requested, then only the updated
+        # ones.
+        self.assertEqual(
+            {
+                'userEmail': 'curator_email',
+                'importName': 'import_name'
+            }, service.requests[0])
+        self.assertEqual('1', service.requests[1]['pageToken'])
+        self.assertEqual([1] * 5, service.entries_returned)
+
+        # The intervals are drawn from the upper half of growing windows
+        # capped at _SLEEP_DURATION.
+        sleeps = [call.args[0] for call in sleep.call_args_list]
+        self.assertEqual(4, len(sleeps))
+        for attempt, duration in enumerate(sleeps, start=1):
+            window = min(
+                import_service.ImportServiceClient._SLEEP_DURATION,
+                import_service.ImportServiceClient._INITIAL_SLEEP_DURATION *
+                2**(attempt - 1))
+            self.assertGreaterEqual(duration, window / 2)
+            self.assertLessEqual(duration, window)
+
+    @mock.patch('time.sleep')
+    def test_block_on_import_unchanged_log_kept(self, _):
+        service = FakeImportService(['RUNNING'])
+        self.importer.iap = service
+        with mock.patch('time.time', side_effect=itertools.count(0, 10)):
+            with self.assertRaises(
+                    import_service.ImportTimeoutError) as context:
+                self.importer._block_on_import('id1',
+                                               'import_name',
+                                               'curator_email',
+                                               timeout=30)
+        # The import did not change after the first poll, so nothing else
+        # was returned and the last known state is reported.
+        self.assertEqual([1, 0, 0], service.entries_returned)
+        error = context.exception
+        self.assertIsInstance(error, TimeoutError)
+        self.assertEqual('id1', error.import_id)
+        self.assertEqual(3, error.polls)
+        self.assertEqual(30, error.elapsed)
+        self.assertEqual(30, error.timeout)
+        self.assertEqual('RUNNING', error.log['state'])
+        self.assertIn('last state RUNNING', str(error))
+
+    @mock.patch('time.sleep')
+    def test_block_on_import_filters_rejected(self, _):
+        service = FakeImportService(['RUNNING', 'FAILED'],
+                                    support_filters=False)
+        self.importer.iap = service
+        with self.assertRaises(import_service.ImportFailedError):
+            self.importer._block_on_import('id1', 'import_name',
+                                           'curator_email')
+        # The rejected request is retried without the filters, which are not
+        # sent again.
+        self.assertEqual([{
+            'userEmail': 'curator_email',
+            'importName': 'import_name'
+        }, {
+            'userEmail': 'curator_email'
+        }, {
+            'userEmail': 'curator_email'
+        }], service.requests)
+        self.assertEqual([101, 101], service.entries_returned)
+
+    def test_get_import_log_other_bad_request(self):
+        """Tests that a bad request that does not name the filters is raised
+        and that the filters are kept."""
+        self.importer.iap = mock.MagicMock()
+        self.importer.iap.post.return_value = utils.ResponseMock(
+            400, text='Invalid userEmail')
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.importer.get_import_log('curator_email',
+                                         import_name='import_name')
+        self.assertTrue(self.importer._log_filters_supported)
+
     def test_get_fixed_absolute_import_name(self):
         self.assertEqual(
             'foo_bar_treasury_import',
@@ -18,6 +18,7 @@ import logging
 from unittest import mock
 
 from app import main
+from app.service import file_uploader
 from test import utils
 
 NUM_LINES_TO_CHECK = 50
@@ -30,7 +31,7 @@ CONFIGS = {
 }
 
 
-class GCSFileUploaderMock:
+class GCSFileUploaderMock(file_uploader.FileUploader):
     _REVERSE = False
 
     def __init__(self, **kwargs):
@@ -46,9 +47,17 @@ class GCSFileUploaderMock:
             NUM_LINES_TO_CHECK, GCSFileUploaderMock._REVERSE)
 
     def upload_string(self, string: str, dest: str):
+        if dest.endswith('/upload_manifest.json'):
+            return
         assert dest.endswith('/latest_version.txt')
         assert string == '2020_07_15T12_07_17_365264_07_00'
 
+    def read_string(self, dest: str):
+        return None
+
+    def get_checksums(self, dest: str):
+        return None
+
 
 @mock.patch('app.service.email_notifier.EmailNotifier', mock.MagicMock())
 @mock.patch('app.service.dashboard_api.DashboardAPI', mock.MagicMock())
@@ -0,0 +1,129 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Tests for repo_snapshot.py.
+"""
+
+import os
+import tempfile
+import time
+import unittest
+
+from app.service import repo_snapshot
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as file:
+        file.write(content)
+
+
+def _read(path):
+    with open(path) as file:
+        return file.read()
+
+
+class RepoSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = repo_snapshot.RepoSnapshotCache(
+            os.path.join(self.tmp_dir.name, 'cache'), 2)
+        self.dest_dir = os.path.join(self.tmp_dir.name, 'dest')
+        os.makedirs(self.dest_dir)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _add(self, commit_sha):
+        with self.cache.create(commit_sha) as staging_dir:
+            _write(os.path.join(staging_dir, f'repo-{commit_sha}', 'a.txt'),
+                   commit_sha)
+
+    def test_create_and_checkout(self):
+        self.assertIsNone(self.cache.latest())
+        self.assertIsNone(self.cache.checkout('sha1', self.dest_dir))
+        self._add('sha1')
+        self.assertEqual('sha1', self.cache.latest())
+        repo_dir = self.cache.checkout('sha1', self.dest_dir)
+        self.assertEqual(os.path.join(self.dest_dir, 'repo-sha1'), repo_dir)
+        self.assertEqual('sha1', _read(os.path.join(repo_dir, 'a.txt')))
+
+        # The checkout is hardlinked to the snapshot, which is kept when a
+        # file is replaced.
+        with self.cache.snapshot('sha1') as snapshot_dir:
+            self.assertTrue(
+                os.path.samefile(os.path.join(snapshot_dir, 'a.txt'),
+                                 os.path.join(repo_dir, 'a.txt')))
+        repo_snapshot.replace_file(os.path.join(repo_dir, 'a.txt'), b'changed')
+        self.assertEqual('changed', _read(os.path.join(repo_dir, 'a.txt')))
+        with self.cache.snapshot('sha1') as snapshot_dir:
+            self.assertEqual('sha1', _read(os.path.join(snapshot_dir, 'a.txt')))
+
+    def test_failed_create_is_discarded(self):
+        with self.assertRaises(ValueError):
+            with self.cache.create('sha1') as staging_dir:
+                _write(os.path.join(staging_dir, 'repo', 'a.txt'), 'a')
+                raise ValueError
+        self.assertIsNone(self.cache.latest())
+        self.assertEqual(['snapshots'], os.listdir(self.cache.cache_dir))
+
+    def test_collect_garbage(self):
+        self._add('sha1')
+        with self.cache.snapshot('sha1'):
+            time.sleep(0.01)
+            self._add('sha2')
+            time.sleep(0.01)
+            self._add('sha3')
+            # The snapshot in use survives garbage collection.
+            self.assertIsNotNone(self.cache.checkout('sha1', self.dest_dir))
+        self.cache.collect_garbage()
+        self.assertIsNone(self.cache.checkout('sha2', self.dest_dir))
+        self.assertIsNotNone(self.cache.checkout('sha3', self.dest_dir))
+
+    def test_link_tree_and_replace_file(self):
+        src = os.path.join(self.tmp_dir.name, 'src')
+        dst = os.path.join(self.tmp_dir.name, 'dst')
+        _write(os.path.join(src, 'a', 'b.txt'), 'b')
+        _write(os.path.join(src, 'c.txt'), 'c')
+        os.chmod(os.path.join(src, 'c.txt'), 0o755)
+        repo_snapshot.link_tree(src, dst)
+        self.assertEqual(
+            os.stat(os.path.join(src, 'a', 'b.txt')).st_ino,
+            os.stat(os.path.join(dst, 'a', 'b.txt')).st_ino)
+
+        repo_snapshot.replace_file(os.path.join(dst, 'c.txt'), b'new', 0o755)
+        self.assertEqual('c', _read(os.path.join(src, 'c.txt')))
+        self.assertEqual('new', _read(os.path.join(dst, 'c.txt')))
+        self.assertEqual(0o755,
+                         os.stat(os.path.join(dst, 'c.txt')).st_mode & 0o777)
+
+        # New files get the default permissions.
+        repo_snapshot.replace_file(os.path.join(dst, 'e.txt'), b'e')
+        umask = os.umask(0)
+        os.umask(umask)
+        self.assertEqual(0o666 & ~umask,
+                         os.stat(os.path.join(dst, 'e.txt')).st_mode & 0o777)
+        os.remove(os.path.join(dst, 'e.txt'))
+
+        repo_snapshot.move_file(os.path.join(dst, 'a', 'b.txt'),
+                                os.path.join(dst, 'd', 'b.txt'), dst)
+        repo_snapshot.remove_file(os.path.join(dst, 'c.txt'), dst)
+        self.assertEqual(['d'], os.listdir(dst))
+        self.assertEqual('b', _read(os.path.join(dst, 'd', 'b.txt')))
+        self.assertTrue(os.path.exists(os.path.join(src, 'a', 'b.txt')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -15,6 +15,10 @@
 Testing utilities.
 """
 
+import http.server
+import re
+import threading
+
 import requests.exceptions
 import google.api_core.exceptions
 
@@ -22,11 +26,12 @@ import google.api_core.exceptions
 class ResponseMock:
     """Mock class for request.Response."""
 
-    def __init__(self, code, data=None, raw=None, headers=None):
+    def __init__(self, code, data=None, raw=None, headers=None, text=''):
         self.status_code = code
         self.data = data
         self.raw = raw
         self.headers = headers
+        self.text = text
 
     def raise_for_status(self):
         if self.status_code != 200:
@@ -123,3 +128,115 @@ class SchedulerClientMock:
 
     def job_path(self, project, location, job):
         return f'projects/{project}/locations/{location}/jobs/{job}'
+
+
+class _FileRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the file of the LocalFileServer, honoring Range headers if
+    the server supports ranges."""
+
+    def log_message(self, *args):
+        del args
+
+    def do_GET(self):
+        server = self.server.file_server
+        content = server.content
+        with server.lock:
+            server.requests.append(self.headers.get('Range'))
+            fail = server.fail_requests > 0
+            if fail:
+                server.fail_requests -= 1
+        start, end = 0, len(content)
+        match = re.fullmatch(r'bytes=(\d+)-(\d*)',
+                             self.headers.get('Range') or '')
+        if_range = self.headers.get('If-Range')
+        if not server.send_length:
+            # Chunked transfer encoding needs HTTP/1.1.
+            self.protocol_version = 'HTTP/1.1'
+        if (server.accept_ranges and match and
+            (not if_range or if_range == server.etag)):
+            start = int(match.group(1))
+            if match.group(2):
+                end = int(match.group(2)) + 1
+            self.send_response(206)
+            self.send_header('Content-Range',
+                             f'bytes {start}-{end - 1}/{len(content)}')
+        else:
+            self.send_response(200)
+        if server.accept_ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        if server.send_length:
+            self.send_header('Content-Length', str(end - start))
+        else:
+            self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('ETag', server.etag)
+        if server.filename:
+            self.send_header('Content-Disposition',
+                             f'attachment; filename={server.filename}')
+        self.end_headers()
+        if fail:
+            # Send half of the body and drop the connection.
+            self._write(content[start:start + (end - start) // 2])
+            self.close_connection = True
+            return
+        self._write(content[start:end])
+        if not server.send_length:
+            self.wfile.write(b'0\r\n\r\n')
+
+    def _write(self, data):
+        if self.server.file_server.send_length:
+            self.wfile.write(data)
+        else:
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+
+
+class LocalFileServer:
+    """HTTP server on localhost serving a single file, for testing downloads.
+
+    Usage:
+        with LocalFileServer(b'content') as server:
+            requests.get(server.url)
+
+    Attributes:
+        content: Bytes of the file served.
+        accept_ranges: Whether range requests are supported.
+        filename: Filename sent in the Content-Disposition header. If None,
+            the header is not sent.
+        etag: ETag of the file. Range requests with an If-Range header
+            that does not match are served the whole file.
+        send_length: Whether the Content-Length header is sent. If False,
+            the body is sent with chunked transfer encoding.
+        fail_requests: Number of upcoming requests that send half of the body
+            and then drop the connection.
+        requests: List of the Range headers of the requests received, None for
+            requests without the header.
+        url: URL of the file.
+    """
+
+    def __init__(self,
+                 content: bytes,
+                 accept_ranges: bool = True,
+                 filename: str = None,
+                 etag: str = '"v1"',
+                 send_length: bool = True):
+        self.content = content
+        self.accept_ranges = accept_ranges
+        self.send_length = send_length
+        self.filename = filename
+        self.etag = etag
+        self.fail_requests = 0
+        self.requests = []
+        self.lock = threading.Lock()
+        self._httpd = http.server.ThreadingHTTPServer(('localhost', 0),
+                                                      _FileRequestHandler)
+        self._httpd.file_server = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        daemon=True)
+        self.url = f'http://localhost:{self._httpd.server_port}/file.bin'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -15,8 +15,8 @@
 Tests for app/utils.py and test/utils.py.
 """
 
+import os
 import unittest
-from unittest import mock
 import datetime
 import tempfile
 import hashlib
@@ -49,33 +49,22 @@ class AppUtilsTest(unittest.TestCase):
 
     def test_download_file(self):
         """Response does not have a Content-Disposition header."""
-        url = ('https://www.w3.org/WAI/ER/tests/xhtml/testfiles/resources/'
-               'pdf/dummy.pdf')
-        with tempfile.TemporaryDirectory() as dest_dir:
-            path = app.utils.download_file(url, dest_dir)
-            with open(path, 'rb') as file:
-                self.assertEqual('90ffd2359008d82298821d16b21778c5c39aec36',
-                                 hashlib.sha1(file.read()).hexdigest())
+        content = b'0123456789' * 1000
+        with test.utils.LocalFileServer(content) as server:
+            with tempfile.TemporaryDirectory() as dest_dir:
+                path = app.utils.download_file(server.url, dest_dir)
+                self.assertEqual('file.bin', os.path.basename(path))
+                with open(path, 'rb') as file:
+                    self.assertEqual(
+                        hashlib.sha1(content).hexdigest(),
+                        hashlib.sha1(file.read()).hexdigest())
 
     def test_download_file_timeout(self):
         """Raises requests.Timeout exception."""
-        url = ('https://www.w3.org/WAI/ER/tests/xhtml/testfiles/resources/'
-               'pdf/dummy.pdf')
-        with tempfile.TemporaryDirectory() as dest_dir:
-            self.assertRaises(requests.Timeout, app.utils.download_file, url,
-                              dest_dir, 0.000000001)
-
-    @mock.patch('requests.Response')
-    def test_get_filename(self, response):
-        response.headers.get.return_value = 'attachment; filename=FRB_H15.csv'
-        self.assertEqual('FRB_H15.csv', app.utils._get_filename(response))
-        response.headers.get.assert_called_once_with('Content-Disposition')
-
-    @mock.patch('requests.Response')
-    def test_get_filename_raise(self, response):
-        response.headers.get.return_value = 'attachment'
-        self.assertRaises(ValueError, app.utils._get_filename, response)
-        response.headers.get.assert_called_once_with('Content-Disposition')
+        with test.utils.LocalFileServer(b'0123456789') as server:
+            with tempfile.TemporaryDirectory() as dest_dir:
+                self.assertRaises(requests.Timeout, app.utils.download_file,
+                                  server.url, dest_dir, 0.000000001)
 
 
 class TestUtilsTest(unittest.TestCase):
@@ -167,6 +167,28 @@ class ValidationTest(unittest.TestCase):
                                              'scripts/us_fed')
             self.assertIn('dir/foo.py, dir/../bar.py', str(context.exception))
 
+    def test_import_spec_valid_depends_on(self):
+        spec = {
+            'import_name': 'treausry',
+            'provenance_url': 'url',
+            'provenance_description': 'description',
+            'curator_emails': 'curator',
+            'depends_on': ['rates', 'scripts/us_bls/cpi:cpi']
+        }
+        validation._is_import_spec_valid(spec, self.repo_dir, 'scripts/us_fed')
+
+        spec['depends_on'] = ['rates, cpi']
+        with self.assertRaises(ValueError) as context:
+            validation._is_import_spec_valid(spec, self.repo_dir,
+                                             'scripts/us_fed')
+        self.assertIn('is not a valid import name', str(context.exception))
+
+        spec['depends_on'] = 'rates'
+        with self.assertRaises(ValueError) as context:
+            validation._is_import_spec_valid(spec, self.repo_dir,
+                                             'scripts/us_fed')
+        self.assertIn('must be a list', str(context.exception))
+
     def test_manifest_valid_fields_absent(self):
         with self.assertRaises(ValueError) as context:
             validation.is_manifest_valid({}, self.repo_dir, 'scripts/us_fed')
@@ -0,0 +1,116 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Tests for venv_cache.py.
+"""
+
+import os
+import subprocess
+import tempfile
+import unittest
+
+from app.executor import venv_cache
+
+
+class FakeCreateVenv:
+    """Records the environments created instead of running pip."""
+
+    def __init__(self, returncode=0):
+        self.returncode = returncode
+        self.created = []
+
+    def __call__(self, requirements_paths, venv_dir, timeout, pip_cache_dir):
+        self.created.append(venv_dir)
+        os.makedirs(os.path.join(venv_dir, 'bin'))
+        return (os.path.join(venv_dir, 'bin/python3'),
+                subprocess.CompletedProcess([], self.returncode))
+
+
+class VenvCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.requirements = []
+        for i in range(3):
+            path = os.path.join(self.tmp_dir.name, f'requirements_{i}.txt')
+            with open(path, 'w') as file:
+                file.write(f'package{i}\n')
+            self.requirements.append(path)
+        self.cache_dir = os.path.join(self.tmp_dir.name, 'cache')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_requirements_key(self):
+        missing = os.path.join(self.tmp_dir.name, 'missing.txt')
+        key = venv_cache.requirements_key(self.requirements[:1])
+        self.assertEqual(
+            key, venv_cache.requirements_key([missing, self.requirements[0]]))
+        self.assertNotEqual(key,
+                            venv_cache.requirements_key(self.requirements[1:2]))
+        with open(self.requirements[0], 'a') as file:
+            file.write('another_package\n')
+        self.assertNotEqual(key,
+                            venv_cache.requirements_key(self.requirements[:1]))
+
+    def test_reuses_venv(self):
+        create_venv = FakeCreateVenv()
+        cache = venv_cache.VenvCache(self.cache_dir, 2, create_venv)
+        with cache.venv(self.requirements[:1], 10) as (interpreter, process):
+            self.assertIsNotNone(process)
+            first_interpreter = interpreter
+        with cache.venv(self.requirements[:1], 10) as (interpreter, process):
+            self.assertIsNone(process)
+            self.assertEqual(first_interpreter, interpreter)
+        self.assertEqual(1, len(create_venv.created))
+
+    def test_concurrent_use(self):
+        """Tests that a cached environment in use can be used again without
+        waiting for it to be released."""
+        create_venv = FakeCreateVenv()
+        cache = venv_cache.VenvCache(self.cache_dir, 2, create_venv)
+        with cache.venv(self.requirements[:1], 10) as (interpreter, _):
+            with cache.venv(self.requirements[:1], 10) as (other, process):
+                self.assertIsNone(process)
+                self.assertEqual(interpreter, other)
+        self.assertEqual(1, len(create_venv.created))
+
+    def test_failed_venv_is_recreated(self):
+        create_venv = FakeCreateVenv(returncode=1)
+        cache = venv_cache.VenvCache(self.cache_dir, 2, create_venv)
+        with cache.venv(self.requirements[:1], 10) as (_, process):
+            self.assertEqual(1, process.returncode)
+        create_venv.returncode = 0
+        with cache.venv(self.requirements[:1], 10) as (_, process):
+            self.assertEqual(0, process.returncode)
+        self.assertEqual(2, len(create_venv.created))
+
+    def test_collect_garbage(self):
+        create_venv = FakeCreateVenv()
+        cache = venv_cache.VenvCache(self.cache_dir, 1, create_venv)
+        with cache.venv(self.requirements[:1], 10):
+            # The environment in use survives garbage collection.
+            with cache.venv(self.requirements[1:2], 10):
+                pass
+            self.assertTrue(os.path.exists(create_venv.created[0]))
+        with cache.venv(self.requirements[2:3], 10):
+            pass
+        remaining = [
+            path for path in create_venv.created if os.path.exists(path)
+        ]
+        self.assertEqual([create_venv.created[2]], remaining)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -21,3 +21,11 @@ PROJECT_ID = 'datcom-data'
 DASHBOARD_NAMESPACE = 'import-progress-dashboard'
 # Google Cloud Storage bucket in which log messages are be stored
 LOG_BUCKET_NAME = 'dashboard-progress-logs'
+# Number of seconds the results of list queries are cached in each instance.
+# Writes made through the same instance invalidate the cache immediately.
+LIST_CACHE_TTL_SECONDS = 5
+# Maximum number of log messages cached in each instance. Log messages are
+# never modified after they are saved.
+LOG_MESSAGE_CACHE_SIZE = 4096
+# Maximum number of log messages loaded from the bucket at the same time.
+LOG_MESSAGE_MAX_WORKERS = 16
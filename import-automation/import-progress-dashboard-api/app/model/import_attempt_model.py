@@ -57,6 +57,10 @@ class ImportAttempt:
     import_inputs = 'import_inputs'
 
 
+FIELDS = frozenset(
+    name for name in vars(ImportAttempt) if not name.startswith('__'))
+
+
 class ImportAttemptStatus(enum.Enum):
     """Allowed status of an import attempt.
 
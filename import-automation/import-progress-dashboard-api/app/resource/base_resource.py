@@ -15,10 +15,34 @@
 Base class for system run, import attempt, and progress log resources.
 """
 
+import http
+
 import flask_restful
 
+from app import utils
 from app.service import validation
 
+# Header of list responses holding the token for the next page.
+NEXT_PAGE_TOKEN_HEADER = 'X-Next-Page-Token'
+
+# URL arguments of list endpoints that are not filters.
+LIST_FIELDS = (('limit', int), ('order', str, 'append'), ('page_token', str),
+               ('fields', str, 'append'))
+
+
+def add_list_fields(parser):
+    """Adds the URL arguments of list endpoints to a copy of the parser.
+
+    Args:
+        parser: A reqparse RequestParser.
+
+    Returns:
+        The copy of the parser.
+    """
+    parser = parser.copy()
+    utils.add_fields(parser, LIST_FIELDS, required=False)
+    return parser
+
 
 class BaseResource(flask_restful.Resource):
     """Base class for system run, import attempt, and progress log resources."""
@@ -42,3 +66,52 @@ class BaseResource(flask_restful.Resource):
         if not entity:
             return validation.get_not_found_error(id_field, entity_id)
         return entity
+
+    @classmethod
+    def _list_helper(cls, database, args, valid_fields, entity_name):
+        """Retrieves a page of entities that pass the filter defined by
+        the arguments from the database.
+
+        Args:
+            database: Instance of one of SystemRunDatabase,
+                ImportAttemptDatabase, and ProgressLogDatabase.
+            args: Parsed arguments as a dict. The list arguments limit, order,
+                page_token, and fields are popped and the remaining ones are
+                used as the filter.
+            valid_fields: Set of field names of the entity.
+            entity_name: Name of the kind of entity for error messages,
+                e.g., 'system run'.
+
+        Returns:
+            The list of entities each as a datastore Entity object if there is
+            no more page. If there is, (entities, OK, headers), where headers
+            maps NEXT_PAGE_TOKEN_HEADER to the token. Otherwise,
+            (error message, error code), where the error message is a string
+            and the error code is an int.
+        """
+        order = args.pop('order', ())
+        limit = args.pop('limit', None)
+        page_token = args.pop('page_token', None)
+        fields = args.pop('fields', None)
+        for field in list(args) + list(fields or ()):
+            if field not in valid_fields:
+                return (f'Field {field} is not a valid field for '
+                        f'a {entity_name}', http.HTTPStatus.BAD_REQUEST)
+        if limit is not None and limit <= 0:
+            return ('limit must be a positive integer',
+                    http.HTTPStatus.BAD_REQUEST)
+        try:
+            entities, next_page_token = database.filter_page(
+                args,
+                order=order,
+                limit=limit,
+                page_token=page_token,
+                fields=fields)
+        except ValueError:
+            return (f'Invalid page_token {page_token}',
+                    http.HTTPStatus.BAD_REQUEST)
+        if next_page_token:
+            return entities, http.HTTPStatus.OK, {
+                NEXT_PAGE_TOKEN_HEADER: next_page_token
+            }
+        return entities
@@ -15,13 +15,17 @@
 Import attempt list resource associated with the endpoint '/import_attempts'.
 """
 
+from werkzeug import exceptions
+
 from app.resource import import_attempt
+from app.resource import base_resource
 from app.service import system_run_database
 from app.service import validation
 from app.model import import_attempt_model
 from app.model import system_run_model
 
 _ATTEMPT = import_attempt_model.ImportAttempt
+_ATTEMPT_FIELDS = import_attempt_model.FIELDS
 _RUN = system_run_model.SystemRun
 
 
@@ -38,6 +42,8 @@ class ImportAttemptList(import_attempt.ImportAttempt):
             using the client.
     """
 
+    _parser = base_resource.add_list_fields(import_attempt.ImportAttempt.parser)
+
     def __init__(self, client=None):
         """Constructs an ImportAttemptList."""
         super().__init__(client)
@@ -45,9 +51,22 @@ class ImportAttemptList(import_attempt.ImportAttempt):
 
     def get(self):
         """Retrieves a list of import attempts that pass the filter defined by
-        the key-value mappings in the request body."""
-        args = import_attempt.ImportAttempt.parser.parse_args()
-        return self.database.filter(args)
+        the key-value mappings in the request body.
+
+        This endpoint accepts the same url arguments as SystemRunList.get:
+        limit, order, page_token, and fields.
+
+        Returns:
+            A list of import attempts each as a datastore Entity object
+            if successful. Otherwise, (error message, error code), where
+            the error message is a string and the error code is an int.
+        """
+        try:
+            args = ImportAttemptList._parser.parse_args(strict=True)
+        except exceptions.BadRequest as exc:
+            return exc.description, exc.code
+        return self._list_helper(self.database, args, _ATTEMPT_FIELDS,
+                                 'import attempt')
 
     def post(self):
         """Creates a new import attempt with the fields provided in the
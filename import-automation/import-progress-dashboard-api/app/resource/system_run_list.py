@@ -15,13 +15,10 @@
 System run lists, the resource associated with the endpoint '/system_runs'.
 """
 
-import http
-
-import flask
 from werkzeug import exceptions
 
-from app import utils
 from app.resource import system_run
+from app.resource import base_resource
 from app.service import validation
 from app.model import system_run_model
 
@@ -32,9 +29,7 @@ class SystemRunList(system_run.SystemRun):
 
     See SystemRun.
     """
-    _parser = system_run.SystemRun.parser.copy()
-    utils.add_fields(_parser, (('limit', int), ('order', str, 'append')),
-                     required=False)
+    _parser = base_resource.add_list_fields(system_run.SystemRun.parser)
 
     def get(self):
         """Retrieves a list of system runs that pass the filter defined by
@@ -42,12 +37,16 @@ class SystemRunList(system_run.SystemRun):
 
         The filter can only contain fields defined by SystemRun.
 
-        This endpoint accepts two url arguments: limit and order.
-        limit is an integer that specifies the maximum number of system runs
-        returned and order is a list of field names to order the returned
-        system runs by. Prepend "-" to a field name to sort it in
+        This endpoint accepts four url arguments: limit, order, page_token,
+        and fields. limit is an integer that specifies the maximum number of
+        system runs returned and order is a list of field names to order the
+        returned system runs by. Prepend "-" to a field name to sort it in
         descending order. The list can be specified by repeated keys. E.g.,
-        ?order=status&order=-time_created.
+        ?order=status&order=-time_created. If there are more system runs than
+        limit, the response has a X-Next-Page-Token header whose value can be
+        passed as page_token with the same filter, limit, and order to get the
+        next page. fields is a list of field names to return for each system
+        run, specified by repeated keys. run_id is always returned.
 
         Returns:
             A list of system runs each as a datastore Entity object
@@ -59,13 +58,8 @@ class SystemRunList(system_run.SystemRun):
             args = SystemRunList._parser.parse_args(strict=True)
         except exceptions.BadRequest as exc:
             return exc.description, exc.code
-        order = args.pop('order', ())
-        limit = args.pop('limit', None)
-        for field in args:
-            if field not in system_run_model.FIELDS:
-                return (f'Field {field} is not a valid field for a system run',
-                        http.HTTPStatus.BAD_REQUEST)
-        return self.database.filter(args, order=order, limit=limit)
+        return self._list_helper(self.database, args, system_run_model.FIELDS,
+                                 'system run')
 
     def post(self):
         """Creates a new system run with the fields provided in the
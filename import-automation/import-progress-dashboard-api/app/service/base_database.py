@@ -16,9 +16,17 @@ Base class for a Database service that stores some kind of entities using
 Google Cloud Datastore for storage.
 """
 
+import copy
+import json
+
 from google.cloud import datastore
 
+from app import configs
 from app import utils
+from app.service import query_cache
+
+# Results of filter_page shared by all database objects in the process.
+QUERY_CACHE = query_cache.QueryCache(configs.LIST_CACHE_TTL_SECONDS)
 
 
 class BaseDatabase:
@@ -114,10 +122,125 @@ class BaseDatabase:
         Returns:
             A list of entities that pass the filter each as a datastore Entity.
         """
+        entities, _ = self.filter_page(kv_dict, order=order, limit=limit)
+        return entities
+
+    def filter_page(self,
+                    kv_dict,
+                    order=(),
+                    limit=None,
+                    page_token=None,
+                    fields=None):
+        """Retrieves a page of entities based on some criteria.
+
+        See filter. Results are cached for configs.LIST_CACHE_TTL_SECONDS
+        seconds and invalidated when an entity of the same kind is saved
+        through this process. The cache keeps its own copies of the entities,
+        so the returned entities can be modified.
+
+        Args:
+            kv_dict: See filter.
+            order: See filter.
+            limit: Maximum number of entities in the page, as an int. All the
+                entities are returned if not set.
+            page_token: Token returned by a previous call with the same
+                kv_dict, order, and limit to get the next page, as a string.
+            fields: List of field names each as a string. If set, only these
+                fields and the ID field are read and returned for each
+                entity, with a projection query. As in Datastore projection
+                queries, entities missing any of the fields are skipped, and
+                a list field with a single value is returned as the value.
+
+        Returns:
+            A tuple consisting of the list of entities in the page each as
+            a datastore Entity, and the token for the next page as a string
+            or None if this is the last page.
+
+        Raises:
+            ValueError: page_token is malformed.
+        """
+        scope = self._cache_scope()
+        generation = QUERY_CACHE.generation(scope)
+        key = (json.dumps(kv_dict, sort_keys=True,
+                          default=str), tuple(order), limit, page_token,
+               tuple(fields or ()))
+        cached = QUERY_CACHE.get(scope, key)
+        if cached is not None:
+            entities, next_page_token = cached
+            return copy.deepcopy(entities), next_page_token
+
         query = self.client.query(kind=self.kind, order=order)
-        for key, value in kv_dict.items():
-            query.add_filter(key, '=', value)
-        return list(query.fetch(limit=limit))
+        for field, value in kv_dict.items():
+            query.add_filter(field, '=', value)
+        if fields:
+            projection = self._projection(kv_dict, order, fields)
+            if projection:
+                query.projection = projection
+            else:
+                query.keys_only()
+        iterator = query.fetch(limit=limit, start_cursor=page_token)
+        entities = list(iterator)
+        next_page_token = None
+        if limit and len(entities) == limit and iterator.next_page_token:
+            next_page_token = iterator.next_page_token.decode()
+        if fields:
+            entities = self._merge_projected(entities, kv_dict, fields)
+        QUERY_CACHE.put(scope,
+                        key, (copy.deepcopy(entities), next_page_token),
+                        generation=generation)
+        return entities, next_page_token
+
+    def _projection(self, kv_dict, order, fields):
+        """Returns the properties to project to read the fields.
+
+        The ID field comes from the key and the fields with an equality
+        filter, which Datastore does not project, come from kv_dict. The
+        properties the query is ordered by are projected since Datastore
+        requires it.
+        """
+        projection = [
+            field for field in fields
+            if field != self.id_field and field not in kv_dict
+        ]
+        projection.extend(field.lstrip('-') for field in order)
+        return list(dict.fromkeys(projection))
+
+    def _merge_projected(self, entities, kv_dict, fields):
+        """Returns the entities of a projection query with only the fields
+        and the ID field.
+
+        A projection query returns an entity for each value of a list
+        property, so the entities with the same key are merged and their
+        values collected into lists.
+        """
+        merged = {}
+        for entity in entities:
+            projected = merged.get(entity.key)
+            if projected is None:
+                projected = datastore.Entity(entity.key)
+                for field in fields:
+                    if field in kv_dict:
+                        projected[field] = kv_dict[field]
+                    elif field in entity:
+                        projected[field] = entity[field]
+                if self.id_field:
+                    projected[self.id_field] = entity.key.name
+                merged[entity.key] = projected
+                continue
+            for field in fields:
+                if field in kv_dict or field not in entity:
+                    continue
+                values = projected[field]
+                if not isinstance(values, list):
+                    values = [values]
+                if entity[field] not in values:
+                    values.append(entity[field])
+                projected[field] = values
+        return list(merged.values())
+
+    def _cache_scope(self):
+        """Returns the scope of the cached query results of this database."""
+        return (self.client.project, self.client.namespace, self.kind)
 
     def save(self, entity):
         """Saves the entity to Datastore.
@@ -137,4 +260,5 @@ class BaseDatabase:
         if self.id_field and self.id_field not in entity:
             entity[self.id_field] = entity.key.name
         self.client.put(entity)
+        QUERY_CACHE.invalidate(self._cache_scope())
         return entity
@@ -16,20 +16,89 @@ Storage service for storing progress log messages in
 a Google Cloud Storage bucket.
 """
 
+import collections
+import concurrent.futures
+import threading
+
+from app import configs
 from app import utils
 
 
+class MessageCache:
+    """Least recently used cache of log messages.
+
+    Messages are keyed by the name of the bucket and the ID of the log.
+
+    Attributes:
+        max_entries: Maximum number of messages kept, as an int.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._messages = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached message, or None if it is not cached."""
+        with self._lock:
+            message = self._messages.get(key)
+            if message is not None:
+                self._messages.move_to_end(key)
+            return message
+
+    def put(self, key, message):
+        """Caches a message, dropping the least recently used one if the
+        cache is full."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._messages[key] = message
+            self._messages.move_to_end(key)
+            while len(self._messages) > self.max_entries:
+                self._messages.popitem(last=False)
+
+    def clear(self):
+        """Drops all the cached messages."""
+        with self._lock:
+            self._messages.clear()
+
+
+# Messages loaded by all LogMessageManager objects in the process.
+MESSAGE_CACHE = MessageCache(configs.LOG_MESSAGE_CACHE_SIZE)
+
+
 class LogMessageManager:
     """Storage service for storing progress log messages in a
     Google Cloud Storage bucket.
 
     Attributes:
         bucket: storage bucket object in which log messages are stored.
+        cache: MessageCache object of the loaded and saved messages.
+        max_workers: Maximum number of messages loaded at the same time
+            by load_messages, as an int.
     """
 
-    def __init__(self):
-        """Constructs a LogMessageManager."""
-        self.bucket = utils.create_storage_bucket()
+    def __init__(self,
+                 bucket=None,
+                 cache=MESSAGE_CACHE,
+                 max_workers=configs.LOG_MESSAGE_MAX_WORKERS):
+        """Constructs a LogMessageManager.
+
+        Args:
+            bucket: storage bucket object in which log messages are stored.
+                The bucket in configs.LOG_BUCKET_NAME is used if not provided.
+            cache: MessageCache object to cache the messages in.
+            max_workers: Maximum number of messages loaded at the same time
+                by load_messages, as an int.
+        """
+        if not bucket:
+            bucket = utils.create_storage_bucket()
+        self.bucket = bucket
+        self.cache = cache
+        self.max_workers = max_workers
+
+    def _cache_key(self, log_id):
+        return (self.bucket.name, log_id)
 
     def load_message(self, log_id):
         """Loads the message of a progress log from the bucket.
@@ -45,7 +114,56 @@ class LogMessageManager:
             found in the bucket. This indicates that the message has never
             been saved.
         """
-        return self.bucket.blob(log_id).download_as_string().decode('UTF-8')
+        message = self.cache.get(self._cache_key(log_id))
+        if message is None:
+            message = self.bucket.blob(log_id).download_as_string().decode(
+                'UTF-8')
+            self.cache.put(self._cache_key(log_id), message)
+        return message
+
+    def load_messages(self, log_ids):
+        """Loads the messages of a list of progress logs from the bucket.
+
+        Messages that are not cached are downloaded concurrently using up to
+        max_workers threads.
+
+        Args:
+            log_ids: List of IDs of the progress logs each as a string.
+
+        Returns:
+            A dict mapping each log ID to its message as a string.
+
+        Raises:
+            google.cloud.NotFound: See load_message.
+        """
+        messages = {}
+        missing = []
+        for log_id in log_ids:
+            message = self.cache.get(self._cache_key(log_id))
+            if message is None:
+                missing.append(log_id)
+            else:
+                messages[log_id] = message
+        missing = list(dict.fromkeys(missing))
+        if len(missing) <= 1 or self.max_workers <= 1:
+            for log_id in missing:
+                messages[log_id] = self.load_message(log_id)
+            return messages
+
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(self.max_workers, len(missing))) as pool:
+            futures = {
+                log_id: pool.submit(self.load_message, log_id)
+                for log_id in missing
+            }
+            try:
+                for log_id, future in futures.items():
+                    messages[log_id] = future.result()
+            except Exception:
+                for future in futures.values():
+                    future.cancel()
+                raise
+        return messages
 
     def save_message(self, message, log_id):
         """Saves the message of a progress log to the bucket.
@@ -58,4 +176,5 @@ class LogMessageManager:
             URI of where the message is stored in the bucket as a string.
         """
         self.bucket.blob(log_id).upload_from_string(message)
+        self.cache.put(self._cache_key(log_id), message)
         return log_id
@@ -20,6 +20,9 @@ bucket using LogMessageManager.
 from app.service import base_database
 from app.service import log_message_manager
 
+# Maximum number of keys Datastore accepts in a lookup.
+_MAX_KEYS_PER_LOOKUP = 1000
+
 
 class ProgressLogDatabase(base_database.BaseDatabase):
     """Database service for storing progress logs using Google Cloud Datastore
@@ -87,24 +90,57 @@ class ProgressLogDatabase(base_database.BaseDatabase):
                 entity['message'], entity.key.name)
         return super().save(entity)
 
-    def load_logs(self, log_ids):
-        """Loads the log messages of a set of logs from the bucket.
+    def load_logs(self, log_ids, load_content=True):
+        """Retrieves a set of logs and loads their messages from the bucket.
 
+        The logs are retrieved from Datastore in one batch and their messages
+        are loaded concurrently, see LogMessageManager.load_messages.
         The messages of the logs must have been previously saved
         using save(log, save_content=True).
 
         Args:
             log_ids: A set of log_id's specifying the progress logs whose
                 messages are to be loaded, or any iterable container.
+            load_content: Whether to load the messages of the logs from the
+                bucket, as a boolean. If False, the value of the message
+                field of each log is the URI of the message in the bucket,
+                which can be loaded later with load_messages.
+
+        Returns:
+            A list of progress logs in the order of log_ids each as a
+            datastore Entity object, or None if the log does not exist.
+
+        Raises:
+            google.cloud.NotFound: See get.
+        """
+        log_ids = list(log_ids)
+        keys = [self._get_key(log_id) for log_id in dict.fromkeys(log_ids)]
+        by_id = {}
+        for i in range(0, len(keys), _MAX_KEYS_PER_LOOKUP):
+            for log in self.client.get_multi(keys[i:i + _MAX_KEYS_PER_LOOKUP]):
+                log[self.id_field] = log.key.name
+                by_id[log.key.name] = log
+        logs = [by_id.get(log_id) for log_id in log_ids]
+        if load_content:
+            self.load_messages([log for log in logs if log])
+        return logs
+
+    def load_messages(self, logs):
+        """Loads the messages of logs retrieved with load_content=False.
+
+        Args:
+            logs: List of progress logs each as a datastore Entity object.
+                The message field of each log is replaced with the message
+                loaded from the bucket.
 
         Returns:
-            A list of progress logs whose messages are loaded from the bucket
-            each as a datastore Entity object.
+            The list of progress logs.
 
         Raises:
             google.cloud.NotFound: See get.
         """
-        logs = []
-        for log_id in log_ids:
-            logs.append(self.get(entity_id=log_id, load_content=True))
+        messages = self.message_manager.load_messages(
+            [log.key.name for log in logs])
+        for log in logs:
+            log['message'] = messages[log.key.name]
         return logs
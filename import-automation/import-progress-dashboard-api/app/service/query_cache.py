@@ -0,0 +1,117 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+In-process cache of query results with a time to live.
+
+Results are grouped by a scope, e.g., the Datastore namespace and kind of the
+queried entities, so that all the cached results of a scope can be invalidated
+when an entity in it is written. The cache is local to a process, so writes
+from other processes, e.g., other App Engine instances, are only seen after
+the results expire.
+
+Each scope has a generation that is incremented when the scope is
+invalidated. A result is only cached if the scope is still at the generation
+read before the query ran, so that a query that ran concurrently with a write
+does not cache results from before the write.
+"""
+
+import threading
+import time
+
+
+class QueryCache:
+    """In-process cache of query results with a time to live.
+
+    Attributes:
+        ttl: Number of seconds a result is kept, as a float. 0 disables the
+            cache.
+        max_entries: Maximum number of results kept per scope, as an int.
+    """
+
+    def __init__(self, ttl, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._scopes = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def generation(self, scope):
+        """Returns the generation of a scope, to be passed to put.
+
+        Args:
+            scope: See get.
+        """
+        with self._lock:
+            return self._generations.setdefault(scope, 0)
+
+    def get(self, scope, key):
+        """Returns the cached result of a query, or None if there is no
+        result or it has expired.
+
+        Args:
+            scope: Scope of the query, hashable.
+            key: Key identifying the query within the scope, hashable.
+        """
+        with self._lock:
+            entry = self._scopes.get(scope, {}).get(key)
+            if not entry:
+                return None
+            expiry, value = entry
+            if expiry <= time.monotonic():
+                del self._scopes[scope][key]
+                return None
+            return value
+
+    def put(self, scope, key, value, generation=None):
+        """Caches the result of a query.
+
+        Expired results of the scope are dropped. If the scope still has
+        max_entries results, the one that expires first is dropped.
+
+        Args:
+            scope: See get.
+            key: See get.
+            value: Result of the query.
+            generation: Generation of the scope returned by generation before
+                the query ran. The result is not cached if the scope has been
+                invalidated since. If None, the result is always cached.
+        """
+        if self.ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if (generation is not None and
+                    generation != self._generations.get(scope, 0)):
+                return
+            entries = self._scopes.setdefault(scope, {})
+            for expired in [k for k, (e, _) in entries.items() if e <= now]:
+                del entries[expired]
+            if len(entries) >= self.max_entries:
+                del entries[min(entries, key=lambda k: entries[k][0])]
+            entries[key] = (now + self.ttl, value)
+
+    def invalidate(self, scope):
+        """Drops all the cached results of a scope and increments its
+        generation."""
+        with self._lock:
+            self._scopes.pop(scope, None)
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+
+    def clear(self):
+        """Drops all the cached results and increments the generations of
+        their scopes."""
+        with self._lock:
+            for scope in set(self._scopes) | set(self._generations):
+                self._generations[scope] = self._generations.get(scope, 0) + 1
+            self._scopes.clear()
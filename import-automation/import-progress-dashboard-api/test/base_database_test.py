@@ -103,3 +103,80 @@ class BaseDatabaseTest(unittest.TestCase):
         self.assertIn(entity_1, retrieved)
         self.assertIn(entity_2, retrieved)
         self.assertEqual(2, len(retrieved))
+
+    def _save_numbered(self, count):
+        entities = []
+        for i in range(count):
+            entity = self.database.get(make_new=True)
+            entity.update({'import_name': 'name', 'number': i, 'extra': 'x'})
+            entities.append(self.database.save(entity))
+        return entities
+
+    def test_filter_page(self):
+        """Tests that pages can be retrieved with the next page tokens."""
+        self._save_numbered(5)
+        numbers = []
+        page_token = None
+        for expected_size in (2, 2, 1):
+            page, page_token = self.database.filter_page(
+                {'import_name': 'name'},
+                order=('number',),
+                limit=2,
+                page_token=page_token)
+            self.assertEqual(expected_size, len(page))
+            numbers.extend(entity['number'] for entity in page)
+        self.assertIsNone(page_token)
+        self.assertEqual([0, 1, 2, 3, 4], numbers)
+
+    def test_filter_page_fields(self):
+        """Tests that only the requested fields and the ID are returned."""
+        entities = self._save_numbered(1)
+        page, _ = self.database.filter_page({}, fields=['number'])
+        self.assertEqual([{
+            'number': 0,
+            self.id_field: entities[0][self.id_field]
+        }], page)
+
+    def test_filter_page_fields_filtered_and_ordered(self):
+        """Tests that the fields can be filtered and the query ordered by
+        fields that are not returned."""
+        entities = self._save_numbered(2)
+        page, _ = self.database.filter_page({'import_name': 'name'},
+                                            order=('-number',),
+                                            fields=['import_name'])
+        self.assertEqual([{
+            'import_name': 'name',
+            self.id_field: entity[self.id_field]
+        } for entity in reversed(entities)], page)
+
+    def test_filter_page_invalid_token(self):
+        """Tests that a malformed page token raises ValueError."""
+        self.assertRaises(ValueError,
+                          self.database.filter_page, {},
+                          limit=1,
+                          page_token='not-a-token')
+
+    def test_filter_cache_invalidated_on_save(self):
+        """Tests that filter results are cached until an entity of the same
+        kind is saved."""
+        entities = self._save_numbered(1)
+        self.assertEqual(1, len(self.database.filter({'import_name': 'name'})))
+
+        # Writing without going through the database is not seen.
+        entity = datastore.Entity(self.database._get_key('other'))
+        entity.update({'import_name': 'name', self.id_field: 'other'})
+        self.database.client.put(entity)
+        self.assertEqual(1, len(self.database.filter({'import_name': 'name'})))
+
+        self.database.save(entities[0])
+        self.assertEqual(2, len(self.database.filter({'import_name': 'name'})))
+
+    def test_filter_cache_returns_copies(self):
+        """Tests that modifying the returned entities does not modify the
+        cached results."""
+        self._save_numbered(1)
+        entity = self.database.filter({'import_name': 'name'})[0]
+        entity['number'] = 100
+        self.assertEqual(
+            0,
+            self.database.filter({'import_name': 'name'})[0]['number'])
@@ -0,0 +1,88 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Tests for log_message_manager.py.
+"""
+
+import unittest
+
+from google.cloud import exceptions
+
+from test import utils
+from app.service import log_message_manager
+
+
+class LogMessageManagerTest(unittest.TestCase):
+    """Tests for LogMessageManager."""
+
+    def setUp(self):
+        """Saves several messages to a fake bucket before every test."""
+        self.bucket = utils.FakeBucket()
+        self.cache = log_message_manager.MessageCache(100)
+        self.manager = log_message_manager.LogMessageManager(self.bucket,
+                                                             self.cache,
+                                                             max_workers=4)
+        self.messages = {f'log-{i}': f'message {i}' for i in range(10)}
+        for log_id, message in self.messages.items():
+            self.bucket.blob(log_id).upload_from_string(message)
+
+    def test_load_message_cached(self):
+        """Tests that a message is only downloaded once."""
+        self.assertEqual('message 0', self.manager.load_message('log-0'))
+        self.assertEqual('message 0', self.manager.load_message('log-0'))
+        self.assertEqual(['log-0'], self.bucket.downloads)
+
+    def test_save_message_cached(self):
+        """Tests that a saved message is loaded without downloading it."""
+        self.assertEqual('new', self.manager.save_message('hello', 'new'))
+        self.assertEqual('hello', self.manager.load_message('new'))
+        self.assertEqual([], self.bucket.downloads)
+
+    def test_load_messages(self):
+        """Tests that load_messages downloads each uncached message once."""
+        self.manager.load_message('log-0')
+        log_ids = list(self.messages) + ['log-1', 'log-2']
+        self.assertEqual(self.messages, self.manager.load_messages(log_ids))
+        self.assertCountEqual(list(self.messages), self.bucket.downloads)
+
+    def test_load_messages_not_found(self):
+        """Tests that load_messages raises NotFound if a message has never
+        been saved."""
+        self.assertRaises(exceptions.NotFound, self.manager.load_messages,
+                          ['log-0', 'does-not-exist', 'log-1'])
+
+    def test_cache_shared_by_bucket(self):
+        """Tests that managers of different buckets do not share messages."""
+        other = log_message_manager.LogMessageManager(utils.FakeBucket(),
+                                                      self.cache)
+        self.manager.load_message('log-0')
+        self.assertRaises(exceptions.NotFound, other.load_message, 'log-0')
+
+
+class MessageCacheTest(unittest.TestCase):
+    """Tests for MessageCache."""
+
+    def test_least_recently_used_dropped(self):
+        """Tests that the least recently used message is dropped when the
+        cache is full."""
+        cache = log_message_manager.MessageCache(2)
+        cache.put('a', '1')
+        cache.put('b', '2')
+        self.assertEqual('1', cache.get('a'))
+        cache.put('c', '3')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual('1', cache.get('a'))
+        self.assertEqual('3', cache.get('c'))
+        cache.clear()
+        self.assertIsNone(cache.get('a'))
@@ -95,3 +95,28 @@ class ProgressLogDatabaseTest(unittest.TestCase):
         self.assertRaises(
             exceptions.NotFound, self.database.load_logs,
             [log[_MODEL.log_id] for log in self.logs_not_save_content])
+
+    def test_load_logs_order_and_missing(self):
+        """Tests that load_logs returns the logs in the order of the IDs
+        and None for logs that do not exist."""
+        log_ids = [
+            self.logs_save_content[1][_MODEL.log_id], 'does-not-exist',
+            self.logs_save_content[0][_MODEL.log_id]
+        ]
+        loaded = self.database.load_logs(log_ids)
+        self.assertEqual('second', loaded[0][_MODEL.message])
+        self.assertIsNone(loaded[1])
+        self.assertEqual('first', loaded[2][_MODEL.message])
+        self.assertEqual(log_ids[0], loaded[0][_MODEL.log_id])
+
+    def test_load_logs_not_load_content(self):
+        """Tests that load_logs with load_content=False only retrieves the
+        metadata and that the messages can be loaded later."""
+        log_ids = [log[_MODEL.log_id] for log in self.logs_save_content]
+        loaded = self.database.load_logs(log_ids, load_content=False)
+        self.assertEqual(log_ids, [log[_MODEL.message] for log in loaded])
+        self.assertEqual(['info', 'warning'],
+                         [log[_MODEL.level] for log in loaded])
+        self.database.load_messages(loaded)
+        self.assertEqual(['first', 'second'],
+                         [log[_MODEL.message] for log in loaded])
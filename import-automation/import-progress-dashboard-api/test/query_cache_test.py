@@ -0,0 +1,74 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Tests for query_cache.py.
+"""
+
+import unittest
+from unittest import mock
+
+from app.service import query_cache
+
+
+class QueryCacheTest(unittest.TestCase):
+    """Tests for QueryCache."""
+
+    @mock.patch('time.monotonic')
+    def test_expiry(self, monotonic):
+        """Tests that results expire after the ttl."""
+        monotonic.return_value = 100
+        cache = query_cache.QueryCache(ttl=5)
+        cache.put('scope', 'key', ['result'])
+        monotonic.return_value = 104
+        self.assertEqual(['result'], cache.get('scope', 'key'))
+        monotonic.return_value = 105
+        self.assertIsNone(cache.get('scope', 'key'))
+
+    def test_invalidate(self):
+        """Tests that invalidating a scope only drops its results."""
+        cache = query_cache.QueryCache(ttl=60)
+        cache.put('scope1', 'key', 1)
+        cache.put('scope2', 'key', 2)
+        cache.invalidate('scope1')
+        self.assertIsNone(cache.get('scope1', 'key'))
+        self.assertEqual(2, cache.get('scope2', 'key'))
+        cache.clear()
+        self.assertIsNone(cache.get('scope2', 'key'))
+
+    def test_put_after_invalidate(self):
+        """Tests that a result read before an invalidation is not cached."""
+        cache = query_cache.QueryCache(ttl=60)
+        generation = cache.generation('scope')
+        cache.invalidate('scope')
+        cache.put('scope', 'key', 'stale', generation=generation)
+        self.assertIsNone(cache.get('scope', 'key'))
+        cache.put('scope', 'key', 'fresh', generation=cache.generation('scope'))
+        self.assertEqual('fresh', cache.get('scope', 'key'))
+
+    def test_max_entries(self):
+        """Tests that the result that expires first is dropped when
+        the scope is full."""
+        cache = query_cache.QueryCache(ttl=60, max_entries=2)
+        cache.put('scope', 'key1', 1)
+        cache.put('scope', 'key2', 2)
+        cache.put('scope', 'key3', 3)
+        self.assertIsNone(cache.get('scope', 'key1'))
+        self.assertEqual(2, cache.get('scope', 'key2'))
+        self.assertEqual(3, cache.get('scope', 'key3'))
+
+    def test_disabled(self):
+        """Tests that nothing is cached if ttl is 0."""
+        cache = query_cache.QueryCache(ttl=0)
+        cache.put('scope', 'key', 1)
+        self.assertIsNone(cache.get('scope', 'key'))
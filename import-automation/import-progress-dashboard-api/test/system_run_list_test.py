@@ -100,3 +100,34 @@ class SystemRunListTest(unittest.TestCase):
                              list(run[_MODEL.repo_name] for run in runs))
             self.assertEqual([2, 3, 1],
                              list(run[_MODEL.pr_number] for run in runs))
+
+    def test_page_token(self):
+        """Tests that the runs can be retrieved page by page."""
+        with main.FLASK_APP.test_request_context(
+                f'{_ENDPOINT}?limit=3&order=pr_number', json={}):
+            runs, code, headers = self.resource.get()
+            self.assertEqual(200, code)
+            self.assertEqual([0, 1, 2], [run[_MODEL.pr_number] for run in runs])
+            page_token = headers['X-Next-Page-Token']
+        with main.FLASK_APP.test_request_context(
+                f'{_ENDPOINT}?limit=3&order=pr_number&page_token={page_token}',
+                json={}):
+            runs = self.resource.get()
+            self.assertEqual([3], [run[_MODEL.pr_number] for run in runs])
+
+    def test_fields(self):
+        """Tests that only the requested fields and run_id are returned."""
+        with main.FLASK_APP.test_request_context(
+                f'{_ENDPOINT}?fields=pr_number', json={_MODEL.pr_number: 3}):
+            self.assertEqual([{
+                _MODEL.pr_number: 3,
+                _MODEL.run_id: self.runs[2][_MODEL.run_id]
+            }], self.resource.get())
+
+    def test_fields_not_exist(self):
+        """Tests that requesting a field that does not exist returns
+        BAD REQUEST."""
+        with main.FLASK_APP.test_request_context(
+                f'{_ENDPOINT}?fields=does-not-exist', json={}):
+            _, code = self.resource.get()
+            self.assertEqual(400, code)
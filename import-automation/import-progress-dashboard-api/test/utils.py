@@ -17,6 +17,7 @@ Testing utilities.
 
 import os
 import subprocess
+import threading
 from unittest import mock
 import atexit
 
@@ -46,11 +47,49 @@ class LogMessageManagerMock:
                 f'message of log {log_id} has never been saved.')
         return message
 
+    def load_messages(self, log_ids):
+        return {log_id: self.load_message(log_id) for log_id in log_ids}
+
     def save_message(self, message, log_id):
         self.data[log_id] = message
         return log_id
 
 
+class FakeBlob:
+
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+
+    def download_as_string(self):
+        with self.bucket.lock:
+            self.bucket.downloads.append(self.name)
+            data = self.bucket.data.get(self.name)
+        if data is None:
+            raise exceptions.NotFound(f'blob {self.name} does not exist.')
+        return data
+
+    def upload_from_string(self, data):
+        if isinstance(data, str):
+            data = data.encode('UTF-8')
+        with self.bucket.lock:
+            self.bucket.data[self.name] = data
+
+
+class FakeBucket:
+    """Fake storage bucket that keeps the blobs in memory and records
+    the names of the downloaded blobs."""
+
+    def __init__(self):
+        self.name = utils.get_id()
+        self.data = {}
+        self.downloads = []
+        self.lock = threading.Lock()
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+
 class DatastoreEmulator:
 
     def __init__(self):
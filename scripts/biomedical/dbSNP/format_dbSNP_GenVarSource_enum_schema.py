@@ -22,10 +22,16 @@ mcf output file.
 @file_input	input .vcf or .txt file of genetic variants
 @file_output	mcf output file recording all populations of genetic variant 
 		frequencies as enums of GenVarSourceEnum
+@num_workers	optional number of processes scanning the input file
 '''
 
+import os
 import sys
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import vcf_scanner
+
 
 def format_name(l):
     '''
@@ -63,22 +69,28 @@ def collect_freq_pop(freq_pops, set_freq_pop):
     return set_freq_pop
 
 
-def compile_freq_pop_list(file_input):
+def _collect_freq_item(item, set_freq_pop):
+    '''
+	Add the populations of a "FREQ=" INFO field to a set. Run by the workers
+	of vcf_scanner.scan_info.
+	'''
+    collect_freq_pop(item.strip('FREQ='), set_freq_pop)
+
+
+def compile_freq_pop_list(file_input, num_workers=None):
     '''
 	Compile list of all populations for genetic variant frequencies.
-	@file_input	input .vcf or .txt file of genetic variants
+	@file_input	input .vcf or .txt file of genetic variants, optionally
+			BGZF compressed
+	@num_workers	number of processes scanning the file, the number of CPUs
+			if None
 	@return		unique list of all populations recording genetic variant 
 			frequencies
 	'''
-    set_freq_pop = set()
-    f = open(file_input, mode='r')
-    for line in f:
-        line = line.strip('\r\n').split('\t')
-        values = line[7].split(';')  # extract INFO values on variant
-        for item in values:
-            if item.startswith("FREQ="):  # identify frequency values
-                set_freq_pop = collect_freq_pop(item.strip('FREQ='),
-                                                set_freq_pop)
+    set_freq_pop = vcf_scanner.scan_info(file_input,
+                                         'FREQ',
+                                         _collect_freq_item,
+                                         num_workers=num_workers)
     return list(set_freq_pop)
 
 
@@ -104,7 +116,8 @@ def write_mcf(file_output, list_freq_pop):
 def main():
     file_input = sys.argv[1]
     file_output = sys.argv[2]
-    list_freq_pop = compile_freq_pop_list(file_input)
+    num_workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    list_freq_pop = compile_freq_pop_list(file_input, num_workers)
     write_mcf(file_output, list_freq_pop)
 
 
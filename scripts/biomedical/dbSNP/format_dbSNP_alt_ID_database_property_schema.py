@@ -21,10 +21,16 @@ variant for a .vcf or .txt input file as properties of GeneticVariant.
 @file_input	input .vcf or .txt file of genetic variants
 @file_output	mcf output file recording all databases with alternative IDs for
 		genetic variants as properties of GeneticVariant
+@num_workers	optional number of processes scanning the input file
 '''
 
-import sys
+import os
 import re
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import vcf_scanner
 
 
 def make_camel_case(item):
@@ -102,22 +108,28 @@ def collect_alt_db_IDs(db_IDs, set_alt_db_IDs):
     return set_alt_db_IDs
 
 
-def compile_freq_pop_list(file_input):
+def _collect_alt_db_IDs_item(item, set_alt_db_IDs):
     '''
-	Compile list of all populations for genetic variant frequencies.
-	@file_input	input .vcf or .txt file of genetic variants
-	@return		unique list of all populations recording genetic variant 
-			frequencies
+	Add the databases of a "CLNVI=" INFO field to a set. Run by the workers
+	of vcf_scanner.scan_info.
+	'''
+    collect_alt_db_IDs(item.strip('CLNVI='), set_alt_db_IDs)
+
+
+def compile_freq_pop_list(file_input, num_workers=None):
+    '''
+	Compile list of all databases with alternative IDs for genetic variants.
+	@file_input	input .vcf or .txt file of genetic variants, optionally
+			BGZF compressed
+	@num_workers	number of processes scanning the file, the number of CPUs
+			if None
+	@return		unique list of all databases with alternative IDs for
+			genetic variants
 	'''
-    set_alt_db_IDs = set()
-    f = open(file_input, mode='r')
-    for line in f:
-        line = line.strip('\r\n').split('\t')
-        values = line[7].split(';')
-        for item in values:
-            if item.startswith("CLNVI="):
-                set_alt_db_IDs = collect_alt_db_IDs(item.strip('CLNVI='),
-                                                    set_alt_db_IDs)
+    set_alt_db_IDs = vcf_scanner.scan_info(file_input,
+                                           'CLNVI',
+                                           _collect_alt_db_IDs_item,
+                                           num_workers=num_workers)
     return list(set_alt_db_IDs)
 
 
@@ -172,7 +184,8 @@ def write_mcf(file_output, list_alt_db_IDs):
 def main():
     file_input = sys.argv[1]
     file_output = sys.argv[2]
-    list_alt_db_IDs = compile_freq_pop_list(file_input)
+    num_workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    list_alt_db_IDs = compile_freq_pop_list(file_input, num_workers)
     list_alt_db_IDs_truncated = check_database_ID_length(list_alt_db_IDs)
     write_mcf(file_output, list_alt_db_IDs_truncated)
 
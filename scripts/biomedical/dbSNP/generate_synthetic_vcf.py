@@ -0,0 +1,134 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+'''
+Name:  generate_synthetic_vcf.py
+Description: Write a synthetic dbSNP-like .vcf file with FREQ and CLNVI INFO
+fields, optionally BGZF compressed, to benchmark the schema generation scripts
+without downloading dbSNP. When run, it also times the scan of the file by
+vcf_scanner with one and with all the CPUs.
+
+@file_output	path to the .vcf file to write, BGZF compressed if it ends in
+		'.gz'
+@num_records	number of variant records to write
+'''
+
+import os
+import random
+import struct
+import sys
+import time
+import zlib
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import vcf_scanner
+
+HEADER = ('##fileformat=VCFv4.0\n'
+          '##source=generate_synthetic_vcf.py\n'
+          '##INFO=<ID=FREQ,Number=.,Type=String,Description="Allele '
+          'frequencies">\n'
+          '##INFO=<ID=CLNVI,Number=.,Type=String,Description="Variant '
+          'identifiers">\n'
+          '#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n')
+FREQ_POPS = [
+    'GnomAD', 'TOPMED', '1000Genomes', 'ALSPAC', 'TWINSUK', 'Estonian',
+    'KOREAN', 'dbGaP_PopFreq', 'GoNL', 'Qatari'
+]
+CLNVI_DBS = [
+    'OMIM_Allelic_Variant', 'Illumina_Clinical_Services_Laboratory',
+    'Leiden_Muscular_Dystrophy_(DMD)', 'UniProtKB_(protein)', 'ClinVar'
+]
+# Uncompressed size of a BGZF block, kept below the 64 KiB limit.
+_BGZF_BLOCK_SIZE = 0xff00
+_BGZF_EOF = bytes.fromhex(
+    '1f8b08040000000000ff0600424302001b0003000000000000000000')
+
+
+def _record(rng, pos):
+    info = ['RS=%d' % pos, 'VC=SNV']
+    pops = rng.sample(FREQ_POPS, rng.randint(0, 3))
+    if pops:
+        info.append('FREQ=' + '|'.join(
+            '%s:%.4f,%.4f' % (pop, rng.random(), rng.random()) for pop in pops))
+    if rng.random() < 0.2:
+        info.append('CLNVI=' + ','.join(
+            '%s:%d' % (db, rng.randint(1, 99999))
+            for db in rng.sample(CLNVI_DBS, rng.randint(1, 2))))
+    return 'NC_000001.11\t%d\trs%d\tA\tG\t.\t.\t%s\n' % (pos, pos,
+                                                         ';'.join(info))
+
+
+def _bgzf_block(data):
+    '''Return data compressed as a BGZF block.'''
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    body = compressor.compress(data) + compressor.flush()
+    # BSIZE is the total block size minus 1.
+    header = (vcf_scanner._BGZF_MAGIC +
+              struct.pack('<H',
+                          len(body) + vcf_scanner._BGZF_HEADER_SIZE + 7))
+    return header + body + struct.pack('<II', zlib.crc32(data), len(data))
+
+
+def write_synthetic_vcf(file_output, num_records, bgzf=False, seed=0):
+    '''
+	Write a synthetic .vcf file.
+
+	@file_output	path to the file to write
+	@num_records	number of variant records to write
+	@bgzf		whether to BGZF compress the file
+	@seed		seed of the random generator, the same seed writes the same
+			file
+	'''
+    rng = random.Random(seed)
+    with open(file_output, 'wb') as w:
+        buf = bytearray(HEADER.encode())
+        for pos in range(1, num_records + 1):
+            buf += _record(rng, pos).encode()
+            if bgzf:
+                while len(buf) >= _BGZF_BLOCK_SIZE:
+                    w.write(_bgzf_block(bytes(buf[:_BGZF_BLOCK_SIZE])))
+                    del buf[:_BGZF_BLOCK_SIZE]
+            elif len(buf) >= 1 << 20:
+                w.write(buf)
+                buf.clear()
+        if bgzf:
+            if buf:
+                w.write(_bgzf_block(bytes(buf)))
+            w.write(_BGZF_EOF)
+        else:
+            w.write(buf)
+
+
+def _collect_values(item, result):
+    result.add(item.split('=', 1)[1].split(':', 1)[0])
+
+
+def main():
+    file_output = sys.argv[1]
+    num_records = int(sys.argv[2])
+    write_synthetic_vcf(file_output,
+                        num_records,
+                        bgzf=file_output.endswith('.gz'))
+    for num_workers in [1, os.cpu_count()]:
+        start = time.time()
+        vcf_scanner.scan_info(file_output,
+                              'FREQ',
+                              _collect_values,
+                              num_workers=num_workers)
+        print('Scanned %s with %d workers in %.2f seconds' %
+              (file_output, num_workers, time.time() - start))
+
+
+if __name__ == "__main__":
+    main()
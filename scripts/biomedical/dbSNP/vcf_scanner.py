@@ -0,0 +1,303 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+'''
+Name:  vcf_scanner.py
+Description: Scan the INFO column of a large .vcf or .txt file of genetic
+variants in parallel.
+
+The file is split into byte ranges that are scanned by a pool of worker
+processes. Each worker collects values into its own set and the sets are
+merged. Plain files are split at arbitrary offsets. BGZF-compressed files,
+like the dbSNP .vcf.gz downloads, are split at block boundaries. A record that
+crosses the end of a range belongs to the range it starts in. Other gzip files
+are scanned by a single worker.
+
+Lines are not split into columns. The requested key is searched for in large
+chunks of lines, so that only the records that have it are processed in
+Python.
+'''
+
+import concurrent.futures
+import gzip
+import os
+import re
+import struct
+import zlib
+
+# Magic bytes of a BGZF block header: gzip with FEXTRA set, followed by the
+# fixed MTIME, XFL, OS, XLEN=6 and the 'BC' subfield of length 2.
+_BGZF_MAGIC = b'\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00'
+_GZIP_MAGIC = b'\x1f\x8b'
+_BGZF_HEADER_SIZE = 18
+# Number of bytes read at a time when looking for the next BGZF block.
+_SEARCH_SIZE = 1 << 20
+# Number of bytes of lines scanned at a time.
+_CHUNK_SIZE = 1 << 22
+# Index of the INFO column in a VCF record, i.e., number of tabs before it.
+_INFO_COL = 7
+# Bytes that can precede a field of the INFO column, '\t' and ';'.
+_INFO_DELIMITERS = b'\t;'
+_HEADER_START = ord('#')
+
+
+def file_format(path):
+    '''
+	Detect the compression of a file.
+
+	@path	path to the .vcf or .txt file
+	@return	'bgzf', 'gzip' or 'plain'
+	'''
+    with open(path, 'rb') as f:
+        header = f.read(len(_BGZF_MAGIC))
+    if header == _BGZF_MAGIC:
+        return 'bgzf'
+    if header.startswith(_GZIP_MAGIC):
+        return 'gzip'
+    return 'plain'
+
+
+def _read_bgzf_block(f, offset):
+    '''
+	Read and decompress the BGZF block at an offset.
+
+	@f	file object opened in binary mode
+	@offset	offset of the block in the file
+	@return	tuple of the decompressed data and the offset of the next block,
+		or (None, offset) at the end of the file
+	'''
+    f.seek(offset)
+    header = f.read(_BGZF_HEADER_SIZE)
+    if not header:
+        return None, offset
+    if not header.startswith(_BGZF_MAGIC):
+        raise ValueError('No BGZF block at offset %d' % offset)
+    block_size = struct.unpack('<H', header[16:18])[0] + 1
+    body = f.read(block_size - _BGZF_HEADER_SIZE)
+    data = zlib.decompress(body[:-8], -15)
+    if zlib.crc32(data) != struct.unpack('<I', body[-8:-4])[0]:
+        raise ValueError('Corrupt BGZF block at offset %d' % offset)
+    return data, offset + block_size
+
+
+def _next_bgzf_block(f, offset, file_size):
+    '''
+	Find the first BGZF block that starts at or after an offset.
+
+	@return	offset of the block, or file_size if there is none
+	'''
+    while offset < file_size:
+        f.seek(offset)
+        window = f.read(_SEARCH_SIZE + len(_BGZF_MAGIC))
+        pos = window.find(_BGZF_MAGIC)
+        while pos != -1:
+            try:
+                # Make sure the match is not inside compressed data.
+                _read_bgzf_block(f, offset + pos)
+                return offset + pos
+            except (ValueError, zlib.error, struct.error):
+                pos = window.find(_BGZF_MAGIC, pos + 1)
+        offset += _SEARCH_SIZE
+    return file_size
+
+
+def split_ranges(path, num_ranges):
+    '''
+	Split a file into byte ranges that can be scanned independently.
+
+	@path		path to the .vcf or .txt file
+	@num_ranges	maximum number of ranges
+	@return		list of (start, end) byte offsets covering the file
+	'''
+    file_size = os.path.getsize(path)
+    fmt = file_format(path)
+    if fmt == 'gzip' or num_ranges <= 1 or file_size == 0:
+        return [(0, file_size)]
+    step = max(1, file_size // num_ranges)
+    starts = [0]
+    if fmt == 'plain':
+        starts.extend(range(step, file_size, step))
+    else:
+        with open(path, 'rb') as f:
+            for offset in range(step, file_size, step):
+                start = _next_bgzf_block(f, max(offset, starts[-1] + 1),
+                                         file_size)
+                if start >= file_size:
+                    break
+                starts.append(start)
+    starts = sorted(set(starts))
+    return list(zip(starts, starts[1:] + [file_size]))
+
+
+def _plain_chunks(path, start, end):
+    '''Yield chunks of whole lines of a plain file, with the lines that
+	start in [start, end).'''
+    with open(path, 'rb') as f:
+        if start > 0:
+            # Skip the line that started in the previous range, unless the
+            # range starts exactly at the beginning of a line.
+            f.seek(start - 1)
+            start += len(f.readline()) - 1
+        offset = start
+        while offset < end:
+            chunk = f.read(min(_CHUNK_SIZE, end - offset))
+            if not chunk:
+                break
+            offset += len(chunk)
+            if not chunk.endswith(b'\n'):
+                # Finish the last line, even past the end of the range.
+                rest = f.readline()
+                offset += len(rest)
+                chunk += rest
+            yield chunk
+
+
+def _bgzf_chunks(path, start, end):
+    '''Yield chunks of whole lines of a BGZF file, with the lines that
+	start in the blocks in [start, end).'''
+    with open(path, 'rb') as f:
+        skip_partial = False
+        if start > 0:
+            # The first line belongs to the previous range unless the data
+            # before this range ends a line.
+            data, _ = _read_bgzf_block(f, _previous_block(f, start))
+            skip_partial = not data.endswith(b'\n')
+        offset = start
+        pending = []
+        pending_size = 0
+        while offset < end:
+            data, offset = _read_bgzf_block(f, offset)
+            if data is None:
+                break
+            if skip_partial:
+                newline = data.find(b'\n')
+                if newline == -1:
+                    continue
+                data = data[newline + 1:]
+                skip_partial = False
+            pending.append(data)
+            pending_size += len(data)
+            if pending_size >= _CHUNK_SIZE:
+                chunk = b''.join(pending)
+                newline = chunk.rfind(b'\n') + 1
+                yield chunk[:newline]
+                pending = [chunk[newline:]]
+                pending_size = len(pending[0])
+        if skip_partial:
+            # No line starts in this range.
+            return
+        # Finish the last line, even past the end of the range.
+        chunk = b''.join(pending)
+        while chunk and not chunk.endswith(b'\n'):
+            data, offset = _read_bgzf_block(f, offset)
+            if not data:
+                break
+            newline = data.find(b'\n')
+            chunk += data if newline == -1 else data[:newline + 1]
+        if chunk:
+            yield chunk
+
+
+def _previous_block(f, start):
+    '''Return the offset of the BGZF block that ends at start.'''
+    offset = max(0, start - (1 << 16) - _BGZF_HEADER_SIZE)
+    file_size = start
+    while True:
+        candidate = _next_bgzf_block(f, offset, file_size)
+        if candidate >= start:
+            break
+        _, next_offset = _read_bgzf_block(f, candidate)
+        if next_offset == start:
+            return candidate
+        offset = candidate + 1
+    raise ValueError('No BGZF block ends at offset %d' % start)
+
+
+def _gzip_chunks(path):
+    with gzip.open(path, 'rb') as f:
+        while True:
+            chunk = f.read(_CHUNK_SIZE)
+            if not chunk:
+                break
+            if not chunk.endswith(b'\n'):
+                chunk += f.readline()
+            yield chunk
+
+
+def _scan_range(path, fmt, start, end, key, collect):
+    '''
+	Scan the records in a byte range and collect the values of an INFO key.
+
+	Instead of splitting each line into columns, the key is searched for in
+	whole chunks of lines. A match is kept if it is in the INFO column of a
+	record, i.e., after the 7th tab of a line that is not a header line.
+
+	@return	set built by calling collect(item, result) for each INFO field
+		'KEY=value' of each record, where result is the set
+	'''
+    if fmt == 'plain':
+        chunks = _plain_chunks(path, start, end)
+    elif fmt == 'bgzf':
+        chunks = _bgzf_chunks(path, start, end)
+    else:
+        chunks = _gzip_chunks(path)
+    # A literal prefix is much faster to search for than a delimiter.
+    pattern = re.compile(re.escape(key.encode()) + rb'=[^;\t\r\n]*')
+    result = set()
+    for chunk in chunks:
+        for match in pattern.finditer(chunk):
+            pos = match.start()
+            if pos == 0 or chunk[pos - 1] not in _INFO_DELIMITERS:
+                continue
+            line_start = chunk.rfind(b'\n', 0, pos) + 1
+            if (chunk[line_start] == _HEADER_START or
+                    chunk.count(b'\t', line_start, pos) != _INFO_COL):
+                continue
+            collect(match.group().decode('utf-8'), result)
+    return result
+
+
+def scan_info(path, key, collect, num_workers=None, ranges_per_worker=4):
+    '''
+	Collect values from an INFO key of all the records of a file in parallel.
+
+	@path			path to the .vcf or .txt file, plain, gzip or BGZF
+	@key			INFO key to collect, e.g., 'FREQ'
+	@collect		function called as collect(item, result) for each
+				INFO field 'KEY=value', where result is a set to add
+				values to. It must be picklable, e.g., defined at the top
+				level of a module.
+	@num_workers		number of worker processes, the number of CPUs if
+				None
+	@ranges_per_worker	number of byte ranges per worker, to balance the
+				work
+	@return			union of the sets of all the ranges
+	'''
+    num_workers = num_workers or os.cpu_count() or 1
+    fmt = file_format(path)
+    ranges = split_ranges(path, num_workers * ranges_per_worker)
+    if num_workers == 1 or len(ranges) == 1:
+        result = set()
+        for start, end in ranges:
+            result |= _scan_range(path, fmt, start, end, key, collect)
+        return result
+    result = set()
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=num_workers) as executor:
+        futures = [
+            executor.submit(_scan_range, path, fmt, start, end, key, collect)
+            for start, end in ranges
+        ]
+        for future in futures:
+            result |= future.result()
+    return result
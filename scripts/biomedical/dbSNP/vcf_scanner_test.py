@@ -0,0 +1,111 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test for vcf_scanner.py.
+Run "python3 vcf_scanner_test.py"
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import format_dbSNP_alt_ID_database_property_schema as alt_id_schema
+import format_dbSNP_GenVarSource_enum_schema as source_schema
+import generate_synthetic_vcf
+import vcf_scanner
+
+
+def _collect_values(item, result):
+    result.add(item)
+
+
+def _scan_serially(path, key):
+    '''Return all the 'KEY=value' INFO fields of a plain file.'''
+    result = set()
+    with open(path) as f:
+        for line in f:
+            if line.startswith('#'):
+                continue
+            for item in line.strip('\r\n').split('\t')[7].split(';'):
+                if item.startswith(key + '='):
+                    result.add(item)
+    return result
+
+
+class VcfScannerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.plain = os.path.join(self.tmp_dir.name, 'test.vcf')
+        self.bgzf = os.path.join(self.tmp_dir.name, 'test.vcf.gz')
+        generate_synthetic_vcf.write_synthetic_vcf(self.plain, 5000)
+        generate_synthetic_vcf.write_synthetic_vcf(self.bgzf, 5000, bgzf=True)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_file_format(self):
+        self.assertEqual('plain', vcf_scanner.file_format(self.plain))
+        self.assertEqual('bgzf', vcf_scanner.file_format(self.bgzf))
+
+    def test_split_ranges(self):
+        ranges = vcf_scanner.split_ranges(self.bgzf, 4)
+        self.assertEqual(4, len(ranges))
+        self.assertEqual(0, ranges[0][0])
+        self.assertEqual(os.path.getsize(self.bgzf), ranges[-1][1])
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+
+    @mock.patch('vcf_scanner._CHUNK_SIZE', 1000)
+    def test_ranges_match_serial_scan(self):
+        expected = _scan_serially(self.plain, 'FREQ')
+        self.assertTrue(expected)
+        for path in [self.plain, self.bgzf]:
+            # Many small ranges, so that records cross range boundaries.
+            for num_ranges in [1, 7, 50]:
+                result = set()
+                for start, end in vcf_scanner.split_ranges(path, num_ranges):
+                    result |= vcf_scanner._scan_range(
+                        path, vcf_scanner.file_format(path), start, end, 'FREQ',
+                        _collect_values)
+                self.assertEqual(expected, result, (path, num_ranges))
+
+    def test_scan_info_in_parallel(self):
+        expected = _scan_serially(self.plain, 'CLNVI')
+        for path in [self.plain, self.bgzf]:
+            self.assertEqual(
+                expected,
+                vcf_scanner.scan_info(path,
+                                      'CLNVI',
+                                      _collect_values,
+                                      num_workers=2))
+
+    def test_schema_scripts(self):
+        # The scripts collect the same values as their serial loops did.
+        expected = set()
+        for item in _scan_serially(self.plain, 'FREQ'):
+            source_schema.collect_freq_pop(item.strip('FREQ='), expected)
+        self.assertCountEqual(
+            expected,
+            source_schema.compile_freq_pop_list(self.bgzf, num_workers=2))
+        expected = set()
+        for item in _scan_serially(self.plain, 'CLNVI'):
+            alt_id_schema.collect_alt_db_IDs(item.strip('CLNVI='), expected)
+        self.assertCountEqual(
+            expected,
+            alt_id_schema.compile_freq_pop_list(self.bgzf, num_workers=2))
+
+
+if __name__ == '__main__':
+    unittest.main()
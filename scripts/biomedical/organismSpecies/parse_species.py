@@ -20,8 +20,12 @@ Run "python3 parse_species.py --help" for usage.
 '''
 
 import re
+import shutil
+import tempfile
+import time
 from absl import app
 from absl import flags
+from absl import logging
 
 FLAGS = flags.FLAGS
 flags.DEFINE_string('database',
@@ -39,6 +43,25 @@ flags.DEFINE_string('output_mcf',
                     'The output data mcf file path.',
                     short_name='m')
 
+CODE_TO_KINGDOM = {
+    'A': 'Archaea',
+    'B': 'Bacteria',
+    'E': 'Eukaryota',
+    'V': 'Virus',
+    'O': 'OtherOrganismKingdom'
+}
+
+NAME_TYPE_MAP = {'N': 'Official', 'C': 'Common', 'S': 'Alternate'}
+
+# substitute except for  _, character, number
+NON_LEGITIMATE = re.compile(r'[\W]+')
+
+# the underline of the column headers before the real organism codes
+HEADER_UNDERLINE = '_____'
+
+# the maximum size of the mcf of the species not in DC kept in memory
+SPOOL_MAX_SIZE = 1 << 26
+
 
 def get_mcf_piece(code, info, seen_name_to_dcid):
     """
@@ -51,14 +74,6 @@ def get_mcf_piece(code, info, seen_name_to_dcid):
     info = {'Official': 'Abaeis nicippe', 'kingdom': 'E',
     'taxonID': '72259', 'Common': 'Sleepy orange butterfly'}
     """
-    CODE_TO_KINGDOM = {
-        'A': 'Archaea',
-        'B': 'Bacteria',
-        'E': 'Eukaryota',
-        'V': 'Virus',
-        'O': 'OtherOrganismKingdom'
-    }
-
     name = get_class_name(info['Official'])
 
     name_seen = False
@@ -86,18 +101,12 @@ def get_mcf_piece(code, info, seen_name_to_dcid):
         # scientific name = "Parainfluenza virus 5 (isolate Canine/CPI+)"
         name += 'Positive'
 
-    mcf_list = []
-    mcf_list.append('Node: ' + name + '\n')
-    mcf_list.append('name: "' + name + '"\n')
-    mcf_list.append('typeOf: Species' + '\n')
-    mcf_list.append(type_names)
-    mcf_list.append('ncbiTaxonID: "' + taxonID + '"\n')
-    mcf_list.append('organismTaxonomicKingdom: dcs:' +
-                    CODE_TO_KINGDOM[info['kingdom']] + '\n')
-    mcf_list.append('uniProtOrganismCode: "' + code + '"\n')
-    mcf_list.append('dcid: "bio/' + dcid + '"\n')
-
-    return ''.join(mcf_list), name_seen
+    mcf = ('Node: ' + name + '\nname: "' + name + '"\ntypeOf: Species\n' +
+           type_names + 'ncbiTaxonID: "' + taxonID +
+           '"\norganismTaxonomicKingdom: dcs:' +
+           CODE_TO_KINGDOM[info['kingdom']] + '\nuniProtOrganismCode: "' +
+           code + '"\ndcid: "bio/' + dcid + '"\n')
+    return mcf, name_seen
 
 
 def get_class_name(a_string):
@@ -106,72 +115,146 @@ def get_class_name(a_string):
     Here we use this function for instance name. Thus it allows to start with a number
     """
     joint_name = a_string.title().replace(' ', '')
-    # substitute except for  _, character, number
-    non_legitimate = re.compile(r'[\W]+')
-    class_name = non_legitimate.sub('', joint_name)
-    return class_name
+    return NON_LEGITIMATE.sub('', joint_name)
 
 
-def get_mcf(combine_lines, seen_name_to_dcid):
-    """Generate mcf list.
+def iter_record_lines(file):
+    """Yield the lines of the real and the "virtual" organism codes.
+
     Args:
-        combine_lines: a list, each contains a line from the database
-        seen_name_to_dcid: a dict mapping seen species name to dcid
-    Returns:
-        mcf_seen_list: new schema list of the species already in DC
-        mcf_list: new schema list of the species not in DC
+        file: an iterable of the lines of the database file
+    Yields:
+        the lines of the records, without the trailing newline. The real codes
+        follow the underline of the column headers in the section between the
+        second and the third separator lines of '='. The "virtual" codes are
+        the first block of lines after the fourth separator line.
     """
+    separators = 0
+    in_real = False
+    in_virtual = False
+    for line in file:
+        line = line.rstrip('\n')
+        if line.startswith('='):
+            separators += 1
+            in_real = False
+            continue
+        if separators == 2:
+            if in_real:
+                yield line
+            elif line.startswith(HEADER_UNDERLINE):
+                in_real = True
+        elif separators == 4:
+            if line:
+                in_virtual = True
+                yield line
+            elif in_virtual:
+                break
 
-    mcf_list = []
-    mcf_seen_list = []
+
+def iter_records(lines):
+    """Yield the (organism code, information map) of each record.
+
+    Args:
+        lines: an iterable of the lines of the records
+    Yields:
+        the code and the information map of each record. The same map is
+        updated for every record, so names not given by a record are those
+        of a previous record, and it must be used before the next record is
+        read.
+    """
     code = None
-    name_type_map = {'N': 'Official', 'C': 'Common', 'S': 'Alternate'}
     info = {}
     # Original data format:
     # AADNV V  648330: N=Aedes albopictus densovirus (isolate Boublik/1994)
     #                  C=AalDNV
-    for line in combine_lines:
+    for line in lines:
         if not line:
             continue
         # if line is the first line of each record such as:
         # AADNV V  648330: N=Aedes albopictus densovirus (isolate Boublik/1994)
         if line[0] != ' ':
-            # save last complete information in map
+            # the last record is complete
             if code:
-                mcf, name_seen = get_mcf_piece(code, info, seen_name_to_dcid)
-                if name_seen:
-                    mcf_seen_list.append(mcf)
-                else:
-                    mcf_list.append(mcf)
+                yield code, info
             parts = line.split('=')
             # name_code examples: 'N', 'C', 'S'
             name_code = parts[0][-1]
             # name_type examples: 'Official', 'Common', 'Alternate'
-            name_type = name_type_map[name_code]
-            info[name_type] = parts[1]
+            info[NAME_TYPE_MAP[name_code]] = parts[1]
             # part_split = ['AADNV', 'V', '648330:', 'N']
             part_split = parts[0].split()
             code = part_split[0]
-            kingdom = part_split[1]
-            info['kingdom'] = kingdom
-            ncbiTaxonID = part_split[2][:-1]
-            info['taxonID'] = ncbiTaxonID
+            info['kingdom'] = part_split[1]
+            info['taxonID'] = part_split[2][:-1]
         # if line is the second line of the record, such as
         #                  C=AalDNV
         else:
             name_code, name = line.lstrip().split('=')
-            name_type = name_type_map[name_code]
-            info[name_type] = name
-    # Last line of combine_lines is the '9ZZZZ X       1: N=root'
+            info[NAME_TYPE_MAP[name_code]] = name
+    # The last record is the '9ZZZZ X       1: N=root'
     # which is not species actually. Thus we skipped this node.
+
+
+def get_mcf(combine_lines, seen_name_to_dcid):
+    """Generate mcf list.
+    Args:
+        combine_lines: a list, each contains a line from the database
+        seen_name_to_dcid: a dict mapping seen species name to dcid
+    Returns:
+        mcf_seen_list: new schema list of the species already in DC
+        mcf_list: new schema list of the species not in DC
+    """
+    mcf_list = []
+    mcf_seen_list = []
+    for code, info in iter_records(combine_lines):
+        mcf, name_seen = get_mcf_piece(code, info, seen_name_to_dcid)
+        if name_seen:
+            mcf_seen_list.append(mcf)
+        else:
+            mcf_list.append(mcf)
     return mcf_seen_list, mcf_list
 
 
+def write_mcf(lines, seen_name_to_dcid, file):
+    """Write the mcf of the records to a file, one record at a time.
+
+    The species already in DC are written first. The others are spooled,
+    in memory up to SPOOL_MAX_SIZE characters and then in a temporary file,
+    and appended after them.
+
+    Args:
+        lines: an iterable of the lines of the records
+        seen_name_to_dcid: a dict mapping seen species name to dcid
+        file: the output file
+    Returns:
+        a tuple of the number of species already in DC and of the others.
+    """
+    num_seen = 0
+    num_unseen = 0
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE,
+                                       mode='w+') as unseen_file:
+        for code, info in iter_records(lines):
+            mcf, name_seen = get_mcf_piece(code, info, seen_name_to_dcid)
+            if name_seen:
+                if num_seen:
+                    file.write('\n')
+                file.write(mcf)
+                num_seen += 1
+            else:
+                if num_unseen:
+                    unseen_file.write('\n')
+                unseen_file.write(mcf)
+                num_unseen += 1
+        if num_seen and num_unseen:
+            file.write('\n')
+        unseen_file.seek(0)
+        shutil.copyfileobj(unseen_file, file)
+    return num_seen, num_unseen
+
+
 def main(argv):
     "Main function to read the database file and generate data mcf"
-
-    with open(FLAGS.database, 'r') as file:
-        content = file.read()
+    start_time = time.time()
     with open(FLAGS.old_mcf, 'r') as file:
         species_mcf_list = file.read().split('\n\n')
 
@@ -190,20 +273,16 @@ def main(argv):
     #  example of the species imported before in seen_name_to_dcid:
     #  'HomoSapiens': 'hs'
 
-    # content_chunks[2].split('__\n')[1] Real organism codes
-    # content_chunks[8].split('\n\n')[1] "Virtual" codes that
-    # regroup organisms at a certain taxonomic level
-    content_chunks = content.split('=======================')
-
-    real_lines = content_chunks[2].split('__\n')[1].split('\n')
-    virtual_lines = content_chunks[8].split('\n\n')[1].split('\n')
-    combine_lines = real_lines + virtual_lines
-
-    mcf_seen_list, mcf_list = get_mcf(combine_lines, seen_name_to_dcid)
+    with open(FLAGS.database, 'r') as file, \
+            open(FLAGS.output_mcf, 'w') as output:
+        num_seen, num_unseen = write_mcf(iter_record_lines(file),
+                                         seen_name_to_dcid, output)
 
-    all_mcf = '\n'.join(mcf_seen_list + mcf_list)
-    with open(FLAGS.output_mcf, 'w') as file:
-        file.write(all_mcf)
+    elapsed = time.time() - start_time
+    logging.info(
+        'Wrote %d species, %d already in DC, in %.2f seconds '
+        '(%.0f records/second)', num_seen + num_unseen, num_seen, elapsed,
+        (num_seen + num_unseen) / elapsed if elapsed else 0)
 
 
 if __name__ == '__main__':
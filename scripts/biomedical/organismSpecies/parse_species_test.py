@@ -16,6 +16,7 @@ Run "python3 parse_protein_atlas_test.py"
 """
 
 import unittest
+from io import StringIO
 import parse_species
 
 CONST_INPUT = '''=======================
@@ -100,6 +101,20 @@ class TestParseSpecies(unittest.TestCase):
 
         self.assertEqual(all_mcf, CONST_OUTPUT)
 
+    def test_write_mcf(self):
+        """Test streaming the database file to the output"""
+        seen_name_to_dcid = {'Alphabaculovirus': 'alpha'}
+        output = StringIO()
+        counts = parse_species.write_mcf(
+            parse_species.iter_record_lines(StringIO(CONST_INPUT)),
+            seen_name_to_dcid, output)
+        self.assertEqual((1, 2), counts)
+        # the species already in DC is written first
+        records = [mcf + '\n' for mcf in CONST_OUTPUT.rstrip().split('\n\n')]
+        records[2] = records[2].replace('bio/9ABAC', 'bio/alpha')
+        self.assertEqual(output.getvalue(),
+                         '\n'.join([records[2], records[0], records[1]]))
+
 
 if __name__ == '__main__':
     unittest.main()
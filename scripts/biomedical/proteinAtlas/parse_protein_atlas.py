@@ -19,6 +19,7 @@ import pandas as pd
 
 from absl import app
 from absl import flags
+from absl import logging
 
 FLAGS = flags.FLAGS
 
@@ -45,6 +46,11 @@ flags.DEFINE_string('tissue_mcf', 'HumanTissueEnum.mcf',
 
 flags.DEFINE_string('cell_mcf', 'HumanCellTypeEnum.mcf',
                     'The output HumanCellTypeEnum.mcf file path.')
+
+flags.DEFINE_string(
+    'unmapped_report', '',
+    'If set, the file path to write the genes of the database without a '
+    'protein DCID to, as a tsv with the UniProt entry lacking a DCID, if any.')
 EXPRESSION_MAP = {
     'Not detected': 'ProteinExpressionNotDetected',
     'Low': 'ProteinExpressionLow',
@@ -60,71 +66,64 @@ RELIABILITY_MAP = {
 }
 
 
-def get_gene_to_uniprot_list(file_path):
+def read_gene_to_uniprot(file_path):
     """
     Args:
         file_path for the 'gene_to_uniprot_list.txt'.
     Returns:
-        A dict mapping gene code to UniProt protein entry.
-        example: {'TSPAN6': ['O43657']}
+        A DataFrame with a row per (gene name, UniProt entry) pair, in the
+        order of the file, with columns 'Gene name' and 'UniProt'.
+        example: [['TSPAN6', 'O43657']]
     """
-    with open(file_path, 'r') as file:
-        lines = file.read().split('\n')
-    gene_to_uniprot_list = {}
-    for line in lines:
-        # line example: 'TSPAN6: O43657\n'
-        line_split = line.split(': ')
-        gene = line_split[0]
-        uniprot_list = line_split[1].split(' ')
-        gene_to_uniprot_list[gene] = uniprot_list
-    return gene_to_uniprot_list
-
-
-def get_uniprot_to_dcid(file_path):
+    # line example: 'TSPAN6: O43657'
+    df = pd.read_csv(file_path,
+                     sep=': ',
+                     header=None,
+                     names=['Gene name', 'UniProt'],
+                     dtype=str,
+                     engine='python')
+    df['UniProt'] = df['UniProt'].str.split(' ')
+    return df.explode('UniProt', ignore_index=True)
+
+
+def read_uniprot_to_dcid(file_path):
     """
     Args:
-        file_path for the 'uniprot_to_dcid.txt'.
+        file_path for the 'uniprot_to_dcid.tsv'.
     Returns:
-        A dict mapping UniProt entry to protein DCID in Data Commons.
-        example: {'O43657': 'TSN6_HUMAN'}
+        A DataFrame with columns 'UniProt' and 'dcid' mapping UniProt entry
+        to protein DCID in Data Commons.
+        example: [['O43657', 'TSN6_HUMAN']]
     """
-    with open(file_path, 'r') as file:
-        lines = file.read().split('\n')
-    uniprot_to_dcid = {}
-    for line in lines[1:-1]:
-        line_split = line.split('\t')
-        uniprot = line_split[0]
-        dcid = line_split[2]
-
-        # multiple uniprot entry maps to one entry name
-        if ',' in uniprot:
-            uniprots = uniprot.split(',')
-            for uni in uniprots:
-                uniprot_to_dcid[uni] = dcid
-        else:
-            uniprot_to_dcid[uniprot] = dcid
-    return uniprot_to_dcid
-
-
-def get_gene_to_dcid_list(gene_to_uniprot_list, uniprot_to_dcid):
+    df = pd.read_csv(file_path,
+                     sep='\t',
+                     header=0,
+                     usecols=[0, 2],
+                     names=['UniProt', 'dcid'],
+                     dtype=str)
+    # multiple uniprot entry maps to one entry name
+    df['UniProt'] = df['UniProt'].str.split(',')
+    df = df.explode('UniProt', ignore_index=True)
+    return df.drop_duplicates('UniProt', keep='last')
+
+
+def get_gene_to_dcid(gene_to_uniprot, uniprot_to_dcid):
     """
     Args:
-        gene_to_uniprot_list: a dic mapping gene to a list of UniProt entry
-        uniprot_to_dcid: a dic mapping UniProt entry to Data Commons DCID
+        gene_to_uniprot: a DataFrame from read_gene_to_uniprot
+        uniprot_to_dcid: a DataFrame from read_uniprot_to_dcid
     Returns:
-        A dict mapping gene to a list of protein DCID in Data Commons.
-        example: {'TSPAN6': ['TSN6_HUMAN']}
+        A tuple of two DataFrames:
+        - the mapping from gene name to protein DCID in Data Commons, with
+          columns 'Gene name' and 'dcid'. A gene maps to the DCIDs of its
+          UniProt entries, in the order of the entries.
+          example: [['TSPAN6', 'TSN6_HUMAN']]
+        - the (gene name, UniProt entry) pairs whose entry has no DCID.
     """
-    gene_to_dcid_list = {}
-    # This for loop generate the mapping
-    for gene in gene_to_uniprot_list:
-        # One gene can map to several UniProt entry
-        uniprot_list = gene_to_uniprot_list[gene]
-        dcid_list = []
-        for uniprot in uniprot_list:
-            dcid_list.append(uniprot_to_dcid[uniprot])
-        gene_to_dcid_list[gene] = dcid_list
-    return gene_to_dcid_list
+    merged = gene_to_uniprot.merge(uniprot_to_dcid, on='UniProt', how='left')
+    unmapped = merged['dcid'].isna()
+    return (merged.loc[~unmapped, ['Gene name', 'dcid']],
+            merged.loc[unmapped, ['Gene name', 'UniProt']])
 
 
 def get_class_name(a_string):
@@ -139,39 +138,70 @@ def get_class_name(a_string):
     return class_name
 
 
-def generate_mcf(protein_dcid, tissue, cell, expression, reliability):
-    """generate a data mcf"""
-    name = '_'.join([protein_dcid, tissue, cell])
-    mcf_list = []
-    mcf_list.append('Node: dcid:bio/' + name + '\n')
-    mcf_list.append('typeOf: HumanProteinOccurrence' + '\n')
-    mcf_list.append('name: "' + name + '"' + '\n')
-    mcf_list.append('detectedProtein: dcs:bio/' + protein_dcid + '\n')
-    mcf_list.append('humanTissue: dcs:' + tissue + '\n')
-    mcf_list.append('humanCellType: dcs:' + cell + '\n')
-    mcf_list.append('proteinExpressionScore: dcs:' + expression + '\n')
-    mcf_list.append('humanProteinOccurrenceReliability: dcs:' + reliability)
+def _map_column(column, mapping):
+    """Maps the values of a Series, raising a KeyError for unknown values."""
+    mapped = column.map(mapping)
+    unknown = column[mapped.isna()].unique()
+    if len(unknown):
+        raise KeyError(unknown[0])
+    return mapped
 
-    return ''.join(mcf_list)
 
+def get_data_mcf(df, gene_to_dcid):
+    """Generate the data mcf of the rows of the dataframe.
 
-def mcf_from_row(row, gene_to_dcid_list):
-    """Generate data mcf from each row of the dataframe"""
-    gene = row['Gene name']
-    tissue = get_class_name(row['Tissue'])
-    cell = get_class_name(row['Cell type'])
-    expression = EXPRESSION_MAP[row['Level']]
-    reliability = RELIABILITY_MAP[row['Reliability']]
-    if gene not in gene_to_dcid_list:
-        # skip case when there is no gene to dcid mapping
-        return None
-    dcid_list = gene_to_dcid_list[gene]
+    The rows are joined with the gene to DCID mapping, one row per protein,
+    and the mcf is built column-wise. Class names are only computed once per
+    distinct tissue and cell type. Rows of genes without a protein DCID are
+    skipped.
 
-    mcf_list = []
-    for protein_dcid in dcid_list:
-        mcf_list.append(
-            generate_mcf(protein_dcid, tissue, cell, expression, reliability))
-    return '\n\n'.join(mcf_list)
+    Args:
+        df: the dataframe of normal_tissue.tsv
+        gene_to_dcid: a DataFrame from get_gene_to_dcid
+    Returns:
+        A Series of the mcf of each protein occurrence, in the order of the
+        rows and of the proteins of each gene.
+    """
+    expression = _map_column(df['Level'], EXPRESSION_MAP)
+    reliability = _map_column(df['Reliability'], RELIABILITY_MAP)
+    rows = pd.DataFrame({
+        'Gene name':
+            df['Gene name'].values,
+        'tissue':
+            df['Tissue'].map({
+                t: get_class_name(t) for t in df['Tissue'].unique()
+            }).values,
+        'cell':
+            df['Cell type'].map({
+                c: get_class_name(c) for c in df['Cell type'].unique()
+            }).values,
+        'expression':
+            expression.values,
+        'reliability':
+            reliability.values,
+    })
+    # an inner merge keeps the order of the rows
+    rows = rows.merge(gene_to_dcid, on='Gene name', how='inner', sort=False)
+    protein = rows['dcid']
+    name = protein + '_' + rows['tissue'] + '_' + rows['cell']
+    return ('Node: dcid:bio/' + name + '\n'
+            'typeOf: HumanProteinOccurrence\n'
+            'name: "' + name + '"\n'
+            'detectedProtein: dcs:bio/' + protein + '\n'
+            'humanTissue: dcs:' + rows['tissue'] + '\n'
+            'humanCellType: dcs:' + rows['cell'] + '\n'
+            'proteinExpressionScore: dcs:' + rows['expression'] + '\n'
+            'humanProteinOccurrenceReliability: dcs:' + rows['reliability'])
+
+
+def write_data_mcf(mcf, file, batch_size=100000):
+    """Write the data mcf nodes to a file, joining a batch of nodes at a
+    time."""
+    for start in range(0, len(mcf), batch_size):
+        if start:
+            file.write('\n\n')
+        file.write('\n\n'.join(mcf.iloc[start:start + batch_size]))
+    file.write('\n')
 
 
 def get_tissue_enum(tissue):
@@ -202,24 +232,29 @@ def get_cell_enum(cell):
 
 def main(argv):
     "Main function to read the database file and generate data mcf"
-    database_file = FLAGS.database
-    gene_to_uniprot_list_path = FLAGS.gene_to_uniprot_list
-    uniprot_to_dcid_path = FLAGS.uniprot_to_dcid
-
-    gene_to_uniprot_list = get_gene_to_uniprot_list(gene_to_uniprot_list_path)
-    uniprot_to_dcid = get_uniprot_to_dcid(uniprot_to_dcid_path)
-    gene_to_dcid_list = get_gene_to_dcid_list(gene_to_uniprot_list,
-                                              uniprot_to_dcid)
-    tissue_atlas_path = database_file
-    df = pd.read_csv(tissue_atlas_path, sep='\t', header=[0], squeeze=True)
-
+    gene_to_uniprot = read_gene_to_uniprot(FLAGS.gene_to_uniprot_list)
+    uniprot_to_dcid = read_uniprot_to_dcid(FLAGS.uniprot_to_dcid)
+    gene_to_dcid, unmapped = get_gene_to_dcid(gene_to_uniprot, uniprot_to_dcid)
+    df = pd.read_csv(FLAGS.database, sep='\t', header=[0], dtype=str)
     df = df.dropna()
-    df['mcf'] = df.apply(lambda row: mcf_from_row(row, gene_to_dcid_list),
-                         axis=1)
-    data_mcf = '\n\n'.join(df['mcf'].dropna()) + '\n'
+
+    # report genes without a mapping, which are not imported
+    no_uniprot = pd.DataFrame({
+        'Gene name':
+            df.loc[~df['Gene name'].isin(gene_to_uniprot['Gene name']),
+                   'Gene name'].unique()
+    })
+    unmapped = unmapped[unmapped['Gene name'].isin(df['Gene name'])]
+    logging.info(
+        '%d genes have no UniProt entry, %d UniProt entries have no '
+        'DCID', len(no_uniprot), len(unmapped))
+    if FLAGS.unmapped_report:
+        pd.concat([no_uniprot, unmapped]).to_csv(FLAGS.unmapped_report,
+                                                 sep='\t',
+                                                 index=False)
 
     with open(FLAGS.data_mcf, 'w') as file:
-        file.write(data_mcf)
+        write_data_mcf(get_data_mcf(df, gene_to_dcid), file)
 
     tissues = df['Tissue'].unique()
     tissue_enum_list = pd.Series(tissues).apply(get_tissue_enum)
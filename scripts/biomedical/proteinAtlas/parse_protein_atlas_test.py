@@ -45,27 +45,62 @@ proteinExpressionScore: dcs:ProteinExpressionNotDetected
 humanProteinOccurrenceReliability: dcs:ProteinOccurrenceReliabilityApproved
 '''
 
+CONST_GENE_TO_UNIPROT = 'TSPAN6: O43657\nTNMD: Q9H2S6 P00000\nDPM1: O60762\n'
+
+CONST_UNIPROT_TO_DCID = ('yourlist:M2020\tEntry\tEntry name\n'
+                         'O43657\tO43657\tTSN6_HUMAN\n'
+                         'Q9H2S6,P11111\tQ9H2S6\tTNMD_HUMAN\n')
+
 
 class TestParseProteinAtlas(unittest.TestCase):
-    """Test the functions in parse_mint.py"""
+    """Test the functions in parse_protein_atlas.py"""
 
     def test_main(self):
         """Test in the main function"""
-        gene_to_uniprot_list = {'TSPAN6': ['O43657']}
-        uniprot_to_dcid = {'O43657': 'TSN6_HUMAN'}
-        gene_to_dcid_list = parse_protein_atlas.get_gene_to_dcid_list(
-            gene_to_uniprot_list, uniprot_to_dcid)
-        df = pd.read_csv(StringIO(CONST_INPUT),
-                         sep='\t',
-                         header=[0],
-                         squeeze=True)
+        gene_to_uniprot = pd.DataFrame({
+            'Gene name': ['TSPAN6'],
+            'UniProt': ['O43657']
+        })
+        uniprot_to_dcid = pd.DataFrame({
+            'UniProt': ['O43657'],
+            'dcid': ['TSN6_HUMAN']
+        })
+        gene_to_dcid, _ = parse_protein_atlas.get_gene_to_dcid(
+            gene_to_uniprot, uniprot_to_dcid)
+        df = pd.read_csv(StringIO(CONST_INPUT), sep='\t', header=[0])
 
         df = df.dropna()
-        df['mcf'] = df.apply(lambda row: parse_protein_atlas.mcf_from_row(
-            row, gene_to_dcid_list),
-                             axis=1)
-        data_mcf = '\n\n'.join(df['mcf'].dropna()) + '\n'
-        self.assertEqual(data_mcf, CONST_OUTPUT)
+        output = StringIO()
+        parse_protein_atlas.write_data_mcf(
+            parse_protein_atlas.get_data_mcf(df, gene_to_dcid), output)
+        self.assertEqual(output.getvalue(), CONST_OUTPUT)
+
+    def test_gene_to_dcid(self):
+        """Test the mapping from gene name to protein DCID"""
+        gene_to_uniprot = parse_protein_atlas.read_gene_to_uniprot(
+            StringIO(CONST_GENE_TO_UNIPROT))
+        uniprot_to_dcid = parse_protein_atlas.read_uniprot_to_dcid(
+            StringIO(CONST_UNIPROT_TO_DCID))
+        self.assertEqual(['O43657', 'Q9H2S6', 'P11111'],
+                         uniprot_to_dcid['UniProt'].tolist())
+        gene_to_dcid, unmapped = parse_protein_atlas.get_gene_to_dcid(
+            gene_to_uniprot, uniprot_to_dcid)
+        self.assertEqual([['TSPAN6', 'TSN6_HUMAN'], ['TNMD', 'TNMD_HUMAN']],
+                         gene_to_dcid.values.tolist())
+        self.assertEqual([['TNMD', 'P00000'], ['DPM1', 'O60762']],
+                         unmapped.values.tolist())
+
+    def test_unknown_level(self):
+        """Test that an unknown expression level is an error"""
+        df = pd.read_csv(StringIO(CONST_INPUT.replace('Not detected', 'Some')),
+                         sep='\t',
+                         header=[0])
+        gene_to_dcid = pd.DataFrame({
+            'Gene name': ['TSPAN6'],
+            'dcid': ['TSN6_HUMAN']
+        })
+        with self.assertRaises(KeyError):
+            parse_protein_atlas.get_data_mcf(df, gene_to_dcid)
 
 
 if __name__ == '__main__':
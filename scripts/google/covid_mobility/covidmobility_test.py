@@ -12,8 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import csv
+import glob
+import tempfile
 import unittest
-from .covidmobility import csv_to_mcf
+from unittest import mock
+from . import covidmobility
+from .covidmobility import csv_to_mcf, csv_to_tmcf_csv, TMCF
 from os import path
 
 
@@ -36,6 +41,56 @@ class TestCovidMobility(unittest.TestCase):
         """Tests a row with an empty date."""
         self._test_mcf_output('./tests/test4')
 
+    @mock.patch.object(covidmobility, '_WRITE_BATCH_ROWS', 1)
+    def test_sharded_output(self):
+        """Tests that the shards add up to the expected output."""
+        module_dir = path.dirname(path.realpath(__file__))
+        input_path = path.join(module_dir, 'tests/test1', "data.csv")
+        expected_path = path.join(module_dir, 'tests/test1', "expected.mcf")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # A shard of a previous output, which is removed, and a file
+            # that is not a shard, which is kept.
+            with open(path.join(tmp_dir, 'output_99.mcf'), 'w') as f:
+                f.write('Node: stale\n')
+            backup_path = path.join(tmp_dir, 'output_backup.mcf')
+            with open(backup_path, 'w') as f:
+                f.write('Node: backup\n')
+            csv_to_mcf(input_path,
+                       path.join(tmp_dir, 'output.mcf'),
+                       shard_size=1000)
+            self.assertTrue(path.exists(backup_path))
+            shards = sorted(glob.glob(path.join(tmp_dir, 'output_[0-9]*.mcf')),
+                            key=lambda p: int(p.split('_')[-1][:-4]))
+            self.assertGreater(len(shards), 1)
+            actual = ''
+            for shard in shards:
+                with open(shard) as f:
+                    actual += f.read()
+        with open(expected_path) as f:
+            self.assertEqual(actual, f.read())
+
+    def test_tmcf_csv(self):
+        """Tests the CSV and template MCF output."""
+        module_dir = path.dirname(path.realpath(__file__))
+        input_path = path.join(module_dir, 'tests/test1', "data.csv")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_path = path.join(tmp_dir, 'output.csv')
+            tmcf_path = path.join(tmp_dir, 'output.tmcf')
+            csv_to_tmcf_csv(input_path, csv_path, tmcf_path)
+            with open(tmcf_path) as f:
+                self.assertEqual(f.read(), TMCF)
+            with open(csv_path) as f:
+                rows = list(csv.reader(f))
+        self.assertEqual(['location', 'placeCategory', 'date', 'value'],
+                         rows[0])
+        self.assertEqual(
+            ['dcid:country/ARE', 'dcs:LocalBusiness', '2020-02-15', '0'],
+            rows[1])
+        # The empty value of the second row is skipped.
+        self.assertEqual([
+            'dcid:country/ARE', 'dcs:GroceryStore&Pharmacy', '2020-02-16', '4'
+        ], rows[7])
+
     def _test_mcf_output(self, dir_path: str):
         """Generates an MCF file, given an input data file.
         Compares the expected.mcf to the output.mcf file
@@ -21,12 +21,77 @@ __author__ = ["Thejesh GN (i@thejeshgn.com)"]
 DISTRICTS_MAPPING_CSV = os.path.join(os.path.dirname(__file__),
                                      "LocalGovernmentDirectory_Districts.csv")
 
+# Columns of district names, in the order they are matched in.
+DISTRICT_NAME_COLUMNS = [
+    'LGDDistrictName', 'districtLabel', 'closestDistrictLabel'
+]
+
 
 class IndiaDistrictsMapper:
     """Class for resolving various mappings for Indian districts """
 
     def __init__(self):
         self.districts_df = pd.read_csv(DISTRICTS_MAPPING_CSV, dtype=str)
+        self._name_index = None
+
+    def _get_name_index(self):
+        """
+        Builds, once, the index of district names to LGD district codes
+
+        For each state, a name maps to the district of the first column of
+        DISTRICT_NAME_COLUMNS in which exactly one district of the state has
+        that name, as in get_district_name_to_lgd_code_mapping.
+
+        Returns:
+            DataFrame with the columns LGDStateCode, name and LGDDistrictCode
+        """
+        if self._name_index is None:
+            frames = []
+            for column in DISTRICT_NAME_COLUMNS:
+                df = self.districts_df[[
+                    'LGDStateCode', column, 'LGDDistrictCode'
+                ]].dropna(subset=['LGDStateCode', column])
+                df = df.rename(columns={column: 'name'})
+                frames.append(
+                    df.drop_duplicates(subset=['LGDStateCode', 'name'],
+                                       keep=False))
+            self._name_index = pd.concat(frames).drop_duplicates(
+                subset=['LGDStateCode', 'name'], keep='first')
+        return self._name_index
+
+    def get_district_names_to_lgd_codes(self, state_names, district_names):
+        """
+        Batch version of get_district_name_to_lgd_code_mapping
+
+        The names are normalized and merged with a prebuilt index of the
+        district names, instead of being matched one by one.
+
+        Args:
+            state_names : pandas Series of Indian State or UT names
+            district_names : pandas Series of India District names, with the
+                same index as state_names
+
+        Returns:
+            pandas Series of LGD district codes with the index of the input.
+            Names that are not found are NaN.
+        """
+        state_lgd_codes = {}
+        for state_name in state_names.dropna().unique():
+            try:
+                state_lgd_codes[state_name] = (
+                    IndiaStatesMapper.get_state_name_to_lgd_code_mapping(
+                        state_name))
+            except Exception:
+                pass
+        query = pd.DataFrame({
+            'LGDStateCode': state_names.map(state_lgd_codes),
+            'name': district_names.str.lower().str.strip()
+        })
+        codes = query.merge(self._get_name_index(),
+                            on=['LGDStateCode', 'name'],
+                            how='left')['LGDDistrictCode']
+        codes.index = state_names.index
+        return codes
 
     def get_district_name_to_lgd_code_mapping(self, state_name, district_name):
         """
@@ -58,3 +58,21 @@ class TestPreprocess(unittest.TestCase):
         district_lgd_code = mapper.get_district_name_to_lgd_code_mapping(
             "telangana", "warangal")
         self.assertEqual(district_lgd_code, "522")
+
+    def test_get_district_names_to_lgd_codes(self):
+        mapper = IndiaDistrictsMapper()
+        state_names = pd.Series([
+            "Karnataka", "Assam", "tamilnadu", "telangana", "Nowhere",
+            "Karnataka"
+        ],
+                                index=[5, 4, 3, 2, 1, 0])
+        district_names = pd.Series([
+            "Bengaluru Rural ", "east karbi anglong", "thoothukudi",
+            "hanamkonda", "warangal", "nowhere"
+        ],
+                                   index=state_names.index)
+        codes = mapper.get_district_names_to_lgd_codes(state_names,
+                                                       district_names)
+        self.assertEqual(list(codes.index), list(state_names.index))
+        self.assertEqual(list(codes.iloc[:4]), ["526", "292", "594", "686"])
+        self.assertTrue(codes.iloc[4:].isna().all())
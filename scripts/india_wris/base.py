@@ -15,7 +15,6 @@
 import os
 import pandas as pd
 import json
-import re
 from india.geo.districts import IndiaDistrictsMapper
 
 
@@ -71,11 +70,30 @@ class WaterQualityBase():
 
         return df.dropna(thresh=max_na)
 
-    def _map_district_to_lgdcodes(self, mapper, state, district):
-        try:
-            return mapper.get_district_name_to_lgd_code_mapping(state, district)
-        except Exception:
-            return district
+    def _map_district_to_lgdcodes(self, mapper, df):
+        """
+        Helper method to map the districts of df to LGD District Codes.
+
+        Unique state and district name pairs are merged with the district
+        name index of the mapper. Districts that are not found keep their
+        name as code and are reported.
+
+        Returns:
+            DataFrame with the StateName, DistrictName and DistrictCode
+            columns
+        """
+        df_map = df[['StateName', 'DistrictName']].drop_duplicates().dropna()
+        codes = mapper.get_district_names_to_lgd_codes(df_map['StateName'],
+                                                       df_map['DistrictName'])
+
+        unmapped = df_map[codes.isna()]
+        if len(unmapped):
+            print('{} districts are not mapped to LGD codes:'.format(
+                len(unmapped)))
+            print(unmapped.to_string(index=False))
+
+        df_map['DistrictCode'] = codes.fillna(df_map['DistrictName'])
+        return df_map
 
     def create_dcids_in_csv(self):
         """
@@ -95,24 +113,16 @@ class WaterQualityBase():
 
         # Mapping district names to LGD Codes
         mapper = IndiaDistrictsMapper()
-        df_map = self.df[['StateName',
-                          'DistrictName']].drop_duplicates().dropna()
-
-        df_map['DistrictCode'] = df_map.apply(
-            lambda x: self._map_district_to_lgdcodes(mapper, x['StateName'], x[
-                'DistrictName']),
-            axis=1)
+        df_map = self._map_district_to_lgdcodes(mapper, self.df)
 
         # Merging LGD codes with original df and creating dcids
-        self.df = self.df.merge(df_map.drop('StateName', axis=1),
-                                on='DistrictName',
+        self.df = self.df.merge(df_map,
+                                on=['StateName', 'DistrictName'],
                                 how='left')
-        self.df['dcid'] = self.df.apply(lambda x: ''.join([
-            'india_wris/',
-            str(x['DistrictCode']), '_', ''.join(
-                re.split('\W+', x['Station Name']))
-        ]),
-                                        axis=1)
+        # Rows without a district get 'nan' as code, as str() did.
+        self.df['dcid'] = (
+            'india_wris/' + self.df['DistrictCode'].fillna('nan').astype(str) +
+            '_' + self.df['Station Name'].str.replace(r'\W+', '', regex=True))
 
         # Saving the df with codes and dcids in `csv_save_path`
         csv_save_path = os.path.join(self.module_dir,
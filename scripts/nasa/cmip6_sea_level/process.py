@@ -20,6 +20,7 @@ import os
 import sys
 
 import numpy as np
+import pandas as pd
 import xarray
 from absl import app
 from absl import flags
@@ -185,6 +186,19 @@ def to_place_dcid(location, prefix=''):
         return prefix + 'grid_1/' + str(lat) + '_' + str(lon)
 
 
+def to_place_dcids(locations, prefix=''):
+    """Vectorized to_place_dcid for a pandas Series of location IDs."""
+    locations = locations.astype('int64')
+    lat = 90 - (locations // 100000) % 1000
+    lon = (locations // 10) % 1000
+    lon = lon.where(lon <= 180, lon - 360)
+    dcids = 'grid_1/' + lat.astype(str) + '_' + lon.astype(str)
+    dcids = dcids.where(locations >= _PSMSL_ID_THRESHOLD,
+                        'psmslId/' + locations.astype(str))
+    dcids = dcids.where(locations != -1, 'Earth')
+    return prefix + dcids
+
+
 def to_contained_places(location, id2cip):
     if location == -1:
         return ''
@@ -205,6 +219,32 @@ def to_place_type(location):
         return 'dcs:GeoGridPlace_1Deg'
 
 
+def to_place_types(locations):
+    """Vectorized to_place_type for a pandas Series of location IDs."""
+    return pd.Series(np.select(
+        [locations == -1, locations < _PSMSL_ID_THRESHOLD],
+        ['dcs:Place', 'dcs:TideGaugeStation'], 'dcs:GeoGridPlace_1Deg'),
+                     index=locations.index)
+
+
+# Quantiles with a StatVar, and the prefix of the StatVar DCID.
+_QUANTILE_PREFIXES = {
+    0.0: 'Min',
+    0.1: 'Percentile10',
+    0.5: 'Median',
+    0.9: 'Percentile90',
+    1.0: 'Max',
+}
+
+# Number of locations whose StatVarObs are converted at a time.
+_LOCATION_CHUNK_SIZE = 1000
+
+_STAT_COLUMNS = [
+    'observationAbout', 'variableMeasured', 'observationDate', 'value', 'unit',
+    'measurementMethod'
+]
+
+
 def to_sv(quantile, sv_info):
     """Constructs a StatVAR DCID for a given quantile value.
     Args:
@@ -213,19 +253,8 @@ def to_sv(quantile, sv_info):
     Returns:
        Namespace-prefixed StatVar DCID.
     """
-    if quantile == 0.0:
-        prefix = 'Min'
-    elif quantile == 0.1:
-        prefix = 'Percentile10'
-    elif quantile == 0.5:
-        prefix = 'Median'
-    elif quantile == 0.9:
-        prefix = 'Percentile90'
-    elif quantile == 1.0:
-        prefix = 'Max'
-    else:
-        assert not quantile, 'Unexpected value: ' + str(quantile)
-    return 'dcid:' + prefix + '_' + sv_info[_SVID]
+    assert quantile in _QUANTILE_PREFIXES, 'Unexpected value: ' + str(quantile)
+    return 'dcid:' + _QUANTILE_PREFIXES[quantile] + '_' + sv_info[_SVID]
 
 
 def process_statvars(in_file, out_fp, added_svs):
@@ -248,30 +277,49 @@ def process_statvars(in_file, out_fp, added_svs):
 
 
 def process_stats(in_file, out_dir):
+    """Writes the StatVarObs of a NetCDF4 file to a CSV.
+
+    The dataset is opened lazily and the wanted quantiles are selected before
+    anything is read.  The data is then read, converted and written
+    _LOCATION_CHUNK_SIZE locations at a time, so memory use does not grow with
+    the number of locations.
+    """
     sv_info = parse_sv_info(in_file)
-    ds = xarray.open_dataset(in_file, engine='netcdf4')
     ncvar = sv_info[_NCVAR]
-    df = ds[ncvar].to_dataframe()
-    df = df.dropna()
-    df = df.reset_index()
-    df = df[(df['quantiles'] == 0.0) | (df['quantiles'] == 0.1) |
-            (df['quantiles'] == 0.5) | (df['quantiles'] == 0.9) |
-            (df['quantiles'] == 1.0)]
-    df['observationAbout'] = df['locations'].apply(
-        lambda x: to_place_dcid(x, 'dcid:'))
-    df['variableMeasured'] = df['quantiles'].apply(lambda x: to_sv(x, sv_info))
-    df['observationDate'] = df['years'].astype(str)
-    df['value'] = df[ncvar]
-    if _UNIT in sv_info:
-        df['unit'] = 'dcs:' + sv_info[_UNIT]
-    if _MMETHOD in sv_info:
-        df['measurementMethod'] = 'dcs:' + sv_info[_MMETHOD]
-    df = df[[
-        'observationAbout', 'variableMeasured', 'observationDate', 'value',
-        'unit', 'measurementMethod'
-    ]]
-    print(df.head())
-    df.to_csv(os.path.join(out_dir, _fname(in_file) + '.csv'), index=False)
+    with xarray.open_dataset(in_file, engine='netcdf4') as ds:
+        da = ds[ncvar]
+        # Compare as float64, so that float32 quantiles like 0.1 do not match.
+        quantiles = da['quantiles'].values.astype('float64')
+        da = da.isel(quantiles=np.flatnonzero(
+            np.isin(quantiles, list(_QUANTILE_PREFIXES))))
+        # Place DCIDs are built once per location, not once per row.
+        locations = da['locations'].to_series()
+        place_dcids = pd.Series(to_place_dcids(locations, 'dcid:').values,
+                                index=locations.values)
+        with open(os.path.join(out_dir,
+                               _fname(in_file) + '.csv'), 'w') as out_fp:
+            out_fp.write(','.join(_STAT_COLUMNS) + '\n')
+            for i in range(0, da.sizes['locations'], _LOCATION_CHUNK_SIZE):
+                df = da.isel(
+                    locations=slice(i, i +
+                                    _LOCATION_CHUNK_SIZE)).to_dataframe()
+                df = df.dropna()
+                df = df.reset_index()
+                df['observationAbout'] = df['locations'].map(place_dcids)
+                df['variableMeasured'] = (
+                    'dcid:' +
+                    df['quantiles'].astype('float64').map(_QUANTILE_PREFIXES) +
+                    '_' + sv_info[_SVID])
+                df['observationDate'] = df['years'].astype(str)
+                df['value'] = df[ncvar]
+                if _UNIT in sv_info:
+                    df['unit'] = 'dcs:' + sv_info[_UNIT]
+                if _MMETHOD in sv_info:
+                    df['measurementMethod'] = 'dcs:' + sv_info[_MMETHOD]
+                df = df[_STAT_COLUMNS]
+                if i == 0:
+                    print(df.head())
+                df.to_csv(out_fp, header=False, index=False)
 
 
 def process_places(in_file, out_dir):
@@ -282,21 +330,22 @@ def process_places(in_file, out_dir):
     df.replace([np.inf, -np.inf], np.nan, inplace=True)
     df = df.dropna()
     df = df.reset_index()
-    df['latitude'] = df['lat'].apply(lambda x: float('%.4f' % (x)))
-    df['longitude'] = df['lon'].apply(lambda x: float('%.4f' % (x)))
-    df['typeOf'] = df['locations'].apply(to_place_type)
-    df['dcid'] = df['locations'].apply(to_place_dcid)
+    df['latitude'] = df['lat'].astype('float64').round(4)
+    df['longitude'] = df['lon'].astype('float64').round(4)
+    df['typeOf'] = to_place_types(df['locations'])
+    df['dcid'] = to_place_dcids(df['locations'])
 
-    # Collect lat/lng
+    # Resolve all the lat/lngs in one batch.
     id2cip = {}
-    ll2p = latlng_recon_geojson.LatLng2Places()
-    for index, row in df.iterrows():
-        id2cip[row['dcid']] = ll2p.resolve(row['latitude'], row['longitude'])
-        if len(id2cip) % 1000 == 0:
-            print('Mapped', len(id2cip), 'lat/lngs')
-
-    df['containedInPlace'] = df['locations'].apply(
-        lambda x: to_contained_places(x, id2cip))
+    if len(df):
+        ll2p = latlng_recon_geojson.LatLng2Places()
+        id2cip = dict(
+            zip(df['dcid'], ll2p.resolve_many(df['latitude'], df['longitude'])))
+        print('Mapped', len(id2cip), 'lat/lngs')
+
+    df['containedInPlace'] = [
+        to_contained_places(x, id2cip) for x in df['locations']
+    ]
 
     df.drop(['locations', 'lat', 'lon'], axis=1, inplace=True)
     df = df[['latitude', 'longitude', 'typeOf', 'dcid', 'containedInPlace']]
@@ -19,6 +19,8 @@ import tempfile
 import sys
 import unittest
 
+import pandas as pd
+
 # Allows the following module imports to work when running as a script
 sys.path.append(
     os.path.dirname(os.path.dirname(os.path.dirname(
@@ -31,6 +33,13 @@ _TESTDIR = os.path.join(os.path.dirname(os.path.realpath(__file__)),
 
 class ProcessTest(unittest.TestCase):
 
+    def test_to_place_dcids(self):
+        locations = pd.Series([-1, 12, 1000900010, 1001800200, 1000003590])
+        self.assertEqual(list(process.to_place_dcids(locations, 'dcid:')),
+                         [process.to_place_dcid(x, 'dcid:') for x in locations])
+        self.assertEqual(list(process.to_place_types(locations)),
+                         [process.to_place_type(x) for x in locations])
+
     def test_place(self):
         self.maxDiff = None
         input_pattern = os.path.join(
@@ -25,7 +25,6 @@ import io
 import os
 import sys
 import datetime
-import time
 
 from absl import app
 from absl import flags
@@ -40,6 +39,9 @@ from country_codes import get_country_dcid
 import un_energy_codes
 import download
 
+sys.path.append(os.path.join(module_dir_, '../../..'))  # for util
+from util.counters import Counters
+
 FLAGS = flags.FLAGS
 flags.DEFINE_list('csv_data_files', [],
                   'csv files from UNData Energy datasets to process')
@@ -92,21 +94,11 @@ def _print_debug(debug_level: int, *args):
         print("[", datetime.datetime.now(), "] ", *args, file=sys.stderr)
 
 
-def _print_counters(counters, steps=None):
-    row_key = 'inputs_processed'
-    if steps is None or row_key not in counters or counters[
-            row_key] % steps == 0:
-        print('\nSTATS:')
-        for k in sorted(counters):
-            print(f"\t{k} = {counters[k]}")
-        if 'inputs_processed' in counters:
-            start_ts = counters['time_start']
-            end_ts = time.perf_counter()
-            print(
-                'Processing rate: {:.2f}'.format(counters['inputs_processed'] /
-                                                 (end_ts - start_ts)),
-                'rows/sec')
-        print('', flush=True)
+def _print_counters(counters):
+    print('\nSTATS:')
+    for k in sorted(counters):
+        print(f"\t{k} = {counters[k]}")
+    print('', flush=True)
 
 
 def _add_error_counter(counter_name: str, error_msg: str, counters):
@@ -500,19 +492,20 @@ def process(in_paths: list,
     Returns:
       Counters after processing
     """
-    counters = defaultdict(lambda: 0)
+    counters = Counters(name='un_energy',
+                        rows_key='inputs_processed',
+                        progress_steps=debug_lines)
     counters['debug_lines'] = debug_lines
     sv_map = defaultdict(lambda: 0)
     row_map = defaultdict(lambda: 0)
     sv_obs = {}
     csv_file_path = out_path + '.csv'
-    start_ts = time.perf_counter()
-    counters['time_start'] = start_ts
     # Setup the output file handles for MCF and CSV.
     output_columns = OUTPUT_CSV_COLUMNS
     if copy_input_columns:
         output_columns.extend(INPUT_CSV_COLUMNS_COPIED)
-    with open(csv_file_path, 'w', newline='') as f_out_csv:
+    with open(csv_file_path, 'w', newline='') as f_out_csv, \
+            counters.timer('process_rows'):
         csv_writer = csv.DictWriter(f_out_csv,
                                     fieldnames=OUTPUT_CSV_COLUMNS,
                                     extrasaction='ignore',
@@ -533,7 +526,7 @@ def process(in_paths: list,
                         data_row['_Row'] = line
                         _process_row(data_row, sv_map, row_map, sv_obs,
                                      csv_writer, f_out_mcf, counters)
-                        _print_counters(counters, counters['debug_lines'])
+                        counters.print_progress()
                 print(f'Processed {line} rows from data file: {in_file}')
             f_out_mcf.write('\n')
 
@@ -542,14 +535,10 @@ def process(in_paths: list,
     with open(tmcf_file_path, 'w', newline='') as f_out_tmcf:
         f_out_tmcf.write(UN_ENERGY_TMCF)
 
-    end_ts = time.perf_counter()
-    counters['time_end'] = end_ts
-    counters['time_total_seconds'] = end_ts - start_ts
-    _print_counters(counters)
+    counters['time_total_seconds'] = counters.elapsed_seconds()
     _print_counters(sv_map)
-    print(
-        'Processing rate: {:.2f}'.format(counters['inputs_processed'] /
-                                         (end_ts - start_ts)), 'rows/sec')
+    counters.print_counters()
+    counters.write_report()
     return counters
 
 
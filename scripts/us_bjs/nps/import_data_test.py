@@ -12,11 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import io
 import os
 import unittest
 import pandas as pd
 from .preprocess_data import preprocess_df
 from .import_data import save_csv
+from .nps_statvar_writer import write_sv
 
 
 class TestPreprocess(unittest.TestCase):
@@ -40,6 +42,16 @@ class TestPreprocess(unittest.TestCase):
 
         self.assertEqual(actual, expected)
 
+    def test_write_sv(self):
+        module_dir = os.path.dirname(os.path.realpath(__file__))
+        output = io.StringIO()
+        write_sv(output)
+
+        with open(os.path.join(module_dir, "nps_statvars.mcf")) as expected_f:
+            expected: str = expected_f.read()
+
+        self.assertEqual(output.getvalue(), expected)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,140 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Spec of the stat vars imported from the BJS National Prisoner Statistics.
+
+Each stat var is reported for females, males and both, from the NPS columns
+named after its column stem with the gender suffix 'F' or 'M'. The values for
+both genders are the sum of the two columns.
+
+The spec drives both the cleaned CSV, whose columns are the stat var DCIDs,
+and the stat var MCF.
+"""
+
+import collections
+
+NO_GENDER = "Both"
+POPULATIONTYPE_PERSON = "Person"
+POPULATIONTYPE_DEATH = "MortalityEvent"
+POPULATIONTYPE_INCARCERATION = "IncarcerationEvent"
+GENDERS = ["Female", "Male", NO_GENDER]
+# Suffix of the NPS columns of each gender.
+GENDER_SUFFIXES = {"Female": "F", "Male": "M"}
+RACES = [
+    "WhiteAlone", "BlackOrAfricanAmericanAlone", "HispanicOrLatino",
+    "AmericanIndianOrAlaskaNativeAlone", "AsianAlone",
+    "NativeHawaiianOrOtherPacificIslanderAlone", "TwoOrMoreRaces"
+]
+CAUSES_OF_DEATH = [
+    "JudicialExecution", "IllnessOrNaturalCause", "AIDS",
+    "IntentionalSelf-Harm(Suicide)", "Accidents(UnintentionalInjuries)",
+    "DeathDueToAnotherPerson", "Assault(Homicide)", "NPSOtherCauseOfDeath"
+]
+INCARCERATION_EVENTS = ["AdmittedToPrison", "ReleasedFromPrison"]
+JURISDICTION = "MeasuredBasedOnJurisdiction"
+CUSTODY = "MeasuredBasedOnCustody"
+
+# Properties are pairs of the part of the stat var DCID and the MCF line.
+SENTENCED_OVER_1_YEAR = [
+    ("Sentenced", "prisonSentenceStatus: dcs:Sentenced"),
+    ("MaxSentenceGreaterThan1Year", "maxPrisonSentence: [2 - Years]"),
+]
+SENTENCED_UNDER_1_YEAR = [
+    ("Sentenced", "prisonSentenceStatus: dcs:Sentenced"),
+    ("MaxSentence1YearOrLess", "maxPrisonSentence: [- 1 Years]"),
+]
+UNSENTENCED = [("Unsentenced", "prisonSentenceStatus: dcs:Unsentenced")]
+NOT_A_US_CITIZEN = [
+    ("NotAUSCitizen", "citizenship: dcs:NotAUSCitizen"),
+    ("StateOperated&FederallyOperated&PrivatelyOperated",
+     "correctionalFacilityOperator: "
+     "dcs:StateOperated&FederallyOperated&PrivatelyOperated"),
+]
+
+# Stem of the column of the total jurisdiction counts. The counts of the
+# facilities below are added to it.
+JURISDICTION_TOTAL = "JURTOT"
+# Pairs of the stem of a flag column and the stems of the columns of the
+# counts added to the total jurisdiction counts when the flag is 2, i.e.,
+# when the NPS total does not include them yet.
+JURISDICTION_TOTAL_ADDENDS = [
+    ("PVINCL", ["PVIN", "PVOTH"]),
+    ("LFINCL", ["LF"]),
+    ("LFCRINC", ["LFCRST"]),
+    ("FACINCL", ["FED", "OTHST"]),
+]
+
+StatVar = collections.namedtuple(
+    "StatVar",
+    ["column", "population_type", "properties", "measurement_qualifier"])
+
+
+def _facility(column, operator, location=None):
+    properties = [(operator, "correctionalFacilityOperator: dcs:" + operator)]
+    if location is not None:
+        properties.append(
+            (location, "correctionalFacilityLocation: dcs:" + location))
+    return StatVar(column, POPULATIONTYPE_PERSON, properties, JURISDICTION)
+
+
+# Stat vars in the order of the CSV columns and of the MCF nodes.
+STATVARS = ([
+    StatVar(JURISDICTION_TOTAL, POPULATIONTYPE_PERSON, [], JURISDICTION)
+] + [
+    StatVar(column, POPULATIONTYPE_PERSON, [(race, "race: dcs:" + race)],
+            JURISDICTION) for column, race in
+    zip(["WHITE", "BLACK", "HISP", "AIAN", "ASIAN", "NHPI", "TWORACE"], RACES)
+] + [StatVar("DTHTOT", POPULATIONTYPE_DEATH, [], JURISDICTION)] + [
+    StatVar(column, POPULATIONTYPE_DEATH,
+            [(cause, "causeOfDeath: dcs:" + cause)], JURISDICTION)
+    for column, cause in zip([
+        "DTHEXEC", "DTHILLN", "DTHAIDS", "DTHSUIC", "DTHACC", "DTHPERS",
+        "DTHHOMI", "DTHOTH"
+    ], CAUSES_OF_DEATH)
+] + [
+    StatVar(column, POPULATIONTYPE_INCARCERATION, [
+        (event, "eventType: dcs:" + event)
+    ] + SENTENCED_OVER_1_YEAR, JURISDICTION)
+    for column, event in zip(["ADTOT", "RLTOT"], INCARCERATION_EVENTS)
+] + [
+    StatVar("JURGT1", POPULATIONTYPE_PERSON, SENTENCED_OVER_1_YEAR,
+            JURISDICTION),
+    StatVar("JURLT1", POPULATIONTYPE_PERSON, SENTENCED_UNDER_1_YEAR,
+            JURISDICTION),
+    StatVar("JURUNS", POPULATIONTYPE_PERSON, UNSENTENCED, JURISDICTION),
+    _facility("PVIN", "PrivatelyOperated", "InState"),
+    _facility("PVOTH", "PrivatelyOperated", "OutOfState"),
+    _facility("LF", "LocallyOperated", "Local"),
+    _facility("FED", "FederallyOperated"),
+    _facility("OTHST", "StateOperated", "OutOfState"),
+    StatVar("NCITZTOT", POPULATIONTYPE_PERSON, NOT_A_US_CITIZEN, CUSTODY),
+    StatVar("NCITZGT1", POPULATIONTYPE_PERSON,
+            SENTENCED_OVER_1_YEAR + NOT_A_US_CITIZEN, CUSTODY),
+    StatVar("NCITZLE1", POPULATIONTYPE_PERSON,
+            SENTENCED_UNDER_1_YEAR + NOT_A_US_CITIZEN, CUSTODY),
+    StatVar("NCITZUNS", POPULATIONTYPE_PERSON, UNSENTENCED + NOT_A_US_CITIZEN,
+            CUSTODY),
+    StatVar("CUSLT18", POPULATIONTYPE_PERSON,
+            [("Under18", "age: [0 17 Years]")], CUSTODY),
+])
+
+
+def get_dcid(statvar, gender):
+    """Returns the DCID of a stat var for a gender, or for both."""
+    parts = [part for part, _ in statvar.properties]
+    if not gender == NO_GENDER:
+        parts.append(gender)
+    parts.append("Incarcerated")
+    parts = sorted(parts, key=str.lower)
+    return "_".join(["Count", statvar.population_type] + parts +
+                    [statvar.measurement_qualifier])
@@ -59,20 +59,50 @@ The CSVs have these columns:
 - unit
     - DCIDs of the units of the observations.
 
-Usage: python3 generate_csv_mcf.py
+With --parquet, the CSVs are also written as Parquet files, e.g.,
+cpi_u.parquet, which requires pyarrow or fastparquet.
+
+With --cache_dir, downloaded files are saved in the directory and reused by
+later runs.
+
+The series files of a type are downloaded concurrently, and the series IDs
+are parsed into columns at once, so that each file is transformed with a
+single merge instead of per series.
+
+Usage: python3 generate_csv_mcf.py [--parquet] [--cache_dir=DIR]
 '''
 
 import re
 import io
+import os
+import concurrent.futures
 import dataclasses
+import functools
 from typing import Set, List, Tuple, Iterable
 
+from absl import app
+from absl import flags
 import requests
 import frozendict
+import numpy as np
 import pandas as pd
 
+FLAGS = flags.FLAGS
+flags.DEFINE_string(
+    "cache_dir", None, "Directory to save downloaded files in. Files already "
+    "in it are not downloaded again.")
+flags.DEFINE_boolean(
+    "parquet", False, "Also write each CSV as a Parquet file with the same "
+    "name. Requires pyarrow or fastparquet.")
+
 _PREFIX = "https://download.bls.gov/pub/time.series/"
 
+# Maximum number of series files downloaded at the same time
+_MAX_DOWNLOAD_WORKERS = 10
+
+# Directory to cache downloaded files in, set from --cache_dir
+_cache_dir = None
+
 # From series types to lists of CSV URLs containing series of those types
 SERIES_TYPES_TO_DATA_URLS = frozendict.frozendict({
     "cpi_u": (f"{_PREFIX}/cu/cu.data.1.AllItems",
@@ -211,28 +241,40 @@ class SeriesInfo:
         if num_rows != 1:
             self._raise_validation_error(f"found {num_rows} in info_df")
         base = row["base_period"].iloc[0]
+        try:
+            return _get_unit_from_base_period(base)
+        except ValueError as e:
+            self._raise_validation_error(str(e))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_unit_from_base_period(base: str) -> Tuple[str, str]:
+    """Returns the DCID of the unit with a base period and a description
+    of the unit.
 
-        # base is described in one of three ways:
-        # "YYYY=100", e.g., "1967=100",
-        # "YYYY-YY=100", e.g., "1982-84=100", or
-        # "MONTH YYYY=100", e.g., "DECEMBER 2009=100"
-        if not re.fullmatch(r"\d{4}=100|\d{4}-\d{2}=100|[A-Z]+ \d{4}=100",
-                            base):
-            self._raise_validation_error(f"invalid base_period: {base}")
-        if " " in base:
-            month, year, _ = re.split(r"[ =]", base)
-            month = month.lower().title()
-            return (f"IndexPointBasePeriod{month}{year}Equals100",
-                    f"The reference base is {month} {year} equals 100.")
-        elif "-" in base:
-            year_start, year_end, _ = re.split(r"[-=]", base)
-            year_end = year_start[:2] + year_end
-            return (
-                f"IndexPointBasePeriod{year_start}To{year_end}Equals100",
+    Raises:
+        ValueError: The base period is invalid.
+    """
+    # base is described in one of three ways:
+    # "YYYY=100", e.g., "1967=100",
+    # "YYYY-YY=100", e.g., "1982-84=100", or
+    # "MONTH YYYY=100", e.g., "DECEMBER 2009=100"
+    if not isinstance(base, str) or not re.fullmatch(
+            r"\d{4}=100|\d{4}-\d{2}=100|[A-Z]+ \d{4}=100", base):
+        raise ValueError(f"invalid base_period: {base}")
+    if " " in base:
+        month, year, _ = re.split(r"[ =]", base)
+        month = month.lower().title()
+        return (f"IndexPointBasePeriod{month}{year}Equals100",
+                f"The reference base is {month} {year} equals 100.")
+    elif "-" in base:
+        year_start, year_end, _ = re.split(r"[-=]", base)
+        year_end = year_start[:2] + year_end
+        return (f"IndexPointBasePeriod{year_start}To{year_end}Equals100",
                 f"The reference base is {year_start} to {year_end} equals 100.")
-        year, _ = base.split("=")
-        return (f"IndexPointBasePeriod{year}Equals100",
-                f"The reference base is {year} equals 100.")
+    year, _ = base.split("=")
+    return (f"IndexPointBasePeriod{year}Equals100",
+            f"The reference base is {year} equals 100.")
 
 
 def parse_series_id(series_id: str) -> SeriesInfo:
@@ -247,6 +289,85 @@ def parse_series_id(series_id: str) -> SeriesInfo:
                       series_id=series_id)
 
 
+def parse_series_ids(series_ids: Iterable[str]) -> pd.DataFrame:
+    """Parses series IDs to a DataFrame at once, with a row per series and a
+    column per field of SeriesInfo, as well as the columns "is_us",
+    "is_monthly", "pop_type", "consumer", "mqual", and "statvar" with the
+    values of the corresponding SeriesInfo methods.
+
+    Raises:
+        ValueError: Some series ID(s) is invalid. The error is the one raised
+            by parse_series_id for the first invalid ID.
+    """
+    ids = pd.Series(list(series_ids), dtype="str").fillna("")
+    df = pd.DataFrame({
+        "survey_abbreviation": ids.str[:2],
+        "seasonal_code": ids.str[2],
+        "periodicity_code": ids.str[3],
+        "area_code": ids.str[4:8],
+        "item_code": ids.str[8:],
+        "series_id": ids,
+    })
+    lengths = ids.str.len()
+    valid = ((lengths >= 11) & (lengths <= 17) & df["survey_abbreviation"].isin(
+        ("SU", "CU", "CW")) & df["seasonal_code"].isin(
+            ("S", "U")) & df["periodicity_code"].isin(
+                ("R", "S")) & (df["area_code"].str.len() == 4))
+    if not valid.all():
+        parse_series_id(ids[~valid].iloc[0])
+    df["is_us"] = df["area_code"] == "0000"
+    df["is_monthly"] = df["periodicity_code"] == "R"
+    df["pop_type"] = "BLSItem/" + df["item_code"]
+    df["consumer"] = np.where(df["survey_abbreviation"] == "CW",
+                              "UrbanWageEarnerAndClericalWorker",
+                              "UrbanConsumer")
+    df["mqual"] = np.where(df["seasonal_code"] == "S", "BLSSeasonallyAdjusted",
+                           "BLSSeasonallyUnadjusted")
+    df["statvar"] = ("ConsumerPriceIndex_" + df["pop_type"] + "_" +
+                     df["consumer"] + "_" + df["mqual"])
+    return df
+
+
+def get_units(info_df: pd.DataFrame, targets: Set[str]) -> pd.DataFrame:
+    """Returns a DataFrame with the DCID of the unit of each series in
+    "targets" and a description of the unit, in columns "series_id",
+    "unit", and "unit_description", sorted by series ID.
+
+    Args:
+        info_df: DataFrame containing information about
+            all the series in targets.
+        targets: Set of series IDs to get the units of.
+
+    Raises:
+        ValueError: Some series(s) is not found exactly once in info_df or
+            has an invalid base period.
+    """
+    df = info_df[info_df["series_id"].isin(targets)][[
+        "series_id", "base_period"
+    ]]
+    counts = df["series_id"].value_counts()
+    for series_id in sorted(targets):
+        num_rows = counts.get(series_id, 0)
+        if num_rows != 1:
+            raise ValueError(f"{series_id}: found {num_rows} in info_df")
+    units = {}
+    for base in df["base_period"].unique():
+        try:
+            units[base] = _get_unit_from_base_period(base)
+        except ValueError as e:
+            series_id = df.loc[df["base_period"] == base, "series_id"].iloc[0]
+            raise ValueError(f"{series_id}: {e}") from e
+    df = df.sort_values("series_id")
+    return pd.DataFrame({
+        "series_id":
+            df["series_id"].values,
+        "unit":
+            df["base_period"].map(lambda base: units[base][0]).values,
+        "unit_description":
+            df["base_period"].map(lambda base: units[base][1]).values,
+    })
+
+
 def generate_unit_enums(info_df: pd.DataFrame, targets: Set[str]) -> Set[str]:
     """Returns a list of enum definitions for the units required by the series
     identified by their IDs in "targets".
@@ -256,15 +377,12 @@ def generate_unit_enums(info_df: pd.DataFrame, targets: Set[str]) -> Set[str]:
             all the series in targets.
         targets: Set of series IDs to generate unit enums for.
     """
-    generated = set()
-    for series_id in targets:
-        unit, desc = parse_series_id(series_id).get_unit(info_df)
-        generated.add((f"Node: dcid:{unit}\n"
-                       "typeOf: dcs:UnitOfMeasure\n"
-                       f"description: \"{desc}\"\n"
-                       "descriptionUrl: \"https://www.bls.gov/cpi/"
-                       "technical-notes/home.htm\"\n\n"))
-    return generated
+    units = get_units(info_df, targets)
+    return set("Node: dcid:" + units["unit"] + "\n"
+               "typeOf: dcs:UnitOfMeasure\n"
+               "description: \"" + units["unit_description"] + "\"\n"
+               "descriptionUrl: \"https://www.bls.gov/cpi/"
+               "technical-notes/home.htm\"\n\n")
 
 
 def generate_pop_type_enums(url: str, targets: Set[str]) -> Set[str]:
@@ -287,38 +405,68 @@ def generate_pop_type_enums(url: str, targets: Set[str]) -> Set[str]:
     # Make sure every series of interest has an item_code mapping, i.e., has
     # an enum defined for pop type
     df = df[["item_code", "item_name"]]
-    codes = set(df["item_code"])
-    for series_id in targets:
-        series_info = parse_series_id(series_id)
-        if series_info.item_code not in codes:
-            raise ValueError(
-                f"{series_info} does not have an item_code mapping")
-
-    generated = set()
-    for row in df.itertuples(index=False):
-        generated.add((f"Node: dcid:BLSItem/{row.item_code}\n"
-                       "typeOf: dcs:EconomicProductEnum\n"
-                       f"name: \"{row.item_name}\"\n\n"))
-    return generated
-
-
-def write_csv(urls: Iterable[str], dest: str, info_df: pd.DataFrame,
-              targets: Set[str]) -> None:
+    series_df = parse_series_ids(sorted(targets))
+    missing = series_df[~series_df["item_code"].isin(df["item_code"])]
+    if not missing.empty:
+        series_info = parse_series_id(missing["series_id"].iloc[0])
+        raise ValueError(f"{series_info} does not have an item_code mapping")
+
+    return set("Node: dcid:BLSItem/" + df["item_code"] + "\n"
+               "typeOf: dcs:EconomicProductEnum\n"
+               "name: \"" + df["item_name"] + "\"\n\n")
+
+
+def write_csv(urls: Iterable[str],
+              dest: str,
+              info_df: pd.DataFrame,
+              targets: Set[str],
+              parquet_dest: str = None,
+              max_workers: int = _MAX_DOWNLOAD_WORKERS) -> pd.DataFrame:
     """Writes out the CSV containing series of a particular type, e.g., CPI-U.
 
     Args:
-        urls: URLs to the CSVs containing the series.
+        urls: URLs to the CSVs containing the series. They are downloaded
+            concurrently.
         dest: Path to the output CSV.
         info_df: DataFrame containing information about the series.
         targets: Series to include in the output CSV.
+        parquet_dest: If given, path to also write the output to as Parquet.
+            Requires pyarrow or fastparquet.
+        max_workers: Maximum number of concurrent downloads.
+
+    Returns:
+        The DataFrame written out.
     """
-    result = pd.DataFrame()
-    for url in urls:
-        result = result.append(_generate_csv(url, info_df, targets))
+    series_df = parse_series_ids(sorted(targets))
+    series_df = series_df.merge(get_units(info_df, targets), on="series_id")
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        frames = executor.map(lambda url: _download_df(url, sep=r"\s+"), urls)
+        result = pd.concat([_transform_data(df, series_df) for df in frames],
+                           ignore_index=True)
     result.to_csv(dest, index=False)
+    if parquet_dest:
+        result.to_parquet(parquet_dest, index=False)
     return result
 
 
+def _download_text(url: str) -> str:
+    """Downloads a file and returns its content. If _cache_dir is set, the
+    file is saved there and later calls read it from there instead."""
+    cache_path = None
+    if _cache_dir:
+        cache_path = os.path.join(_cache_dir, url.rsplit("/", 1)[-1])
+        if os.path.exists(cache_path):
+            with open(cache_path) as f:
+                return f.read()
+    response = requests.get(url)
+    response.raise_for_status()
+    if cache_path:
+        with open(f"{cache_path}.tmp", "w") as f:
+            f.write(response.text)
+        os.replace(f"{cache_path}.tmp", cache_path)
+    return response.text
+
+
 def _download_df(url: str,
                  sep: str = "\t",
                  usecols: Tuple[str] = None) -> pd.DataFrame:
@@ -329,53 +477,45 @@ def _download_df(url: str,
         sep: Separators used by the CSV. Can be a regex pattern.
         usecols: Columns to keep.
     """
-    response = requests.get(url)
-    response.raise_for_status()
-    return pd.read_csv(io.StringIO(response.text),
+    return pd.read_csv(io.StringIO(_download_text(url)),
                        sep=sep,
                        dtype="str",
                        usecols=usecols).rename(columns=lambda col: col.strip())
 
 
-def _generate_csv(url: str, info_df: pd.DataFrame,
-                  targets: List[str]) -> pd.DataFrame:
-    """Returns a DataFrame containing series obtained from "url" and specified
-    by "targets".
+def _transform_data(df: pd.DataFrame, series_df: pd.DataFrame) -> pd.DataFrame:
+    """Returns a DataFrame containing the observations in "df" of the series
+    in "series_df".
 
     Args:
-        url: URL to a CSV containing some of the series in "targets".
-        info_df: DataFrame containing informatino about the series.
-        targets: Series to include in the return DataFrame.
+        df: DataFrame of a CSV containing series, with columns "series_id",
+            "year", "period", and "value".
+        series_df: DataFrame of the series to include, from parse_series_ids
+            with the columns of get_units.
 
     Returns:
         A DataFrame of five columns: "value", "date", "duration", "statvar",
-        and "unit". See module docstring for what the columns are.
+        and "unit", sorted by series ID and then in the order of "df". See
+        module docstring for what the columns are.
     """
-    df = _download_df(url, sep=r"\s+")
-    result = pd.DataFrame()
-    for series_id, group_df in df.groupby(by="series_id"):
-        if series_id not in targets:
-            continue
-        series_info = parse_series_id(series_id)
-        # "period" is the months of the observations and is of the form "MM"
-        # preceded by char 'M', e.g. "M05".
-        # "M13" and "S03" are annual averages.
-        group_df = group_df[~group_df["period"].isin(("M13", "S03"))]
-        # "year" is of the form "YYYY".
-        if series_info.is_monthly():
-            group_df.loc[:, "date"] = (group_df["year"] + "-" +
-                                       group_df["period"].str[-2:])
-            group_df.loc[:, "duration"] = "P1M"
-        else:
-            group_df.loc[:, "date"] = group_df["year"] + "-" + group_df[
-                "period"].map(lambda period: "06" if period == "S01" else "12")
-            group_df.loc[:, "duration"] = "P6M"
-        group_df.loc[:, "statvar"] = f"dcs:{series_info.get_statvar()}"
-        group_df.loc[:, "unit"] = f"dcs:{series_info.get_unit(info_df)[0]}"
+    # "period" is the months of the observations and is of the form "MM"
+    # preceded by char 'M', e.g. "M05".
+    # "M13" and "S03" are annual averages.
+    df = df[~df["period"].isin(("M13", "S03"))]
+    df = df.merge(series_df[["series_id", "is_monthly", "statvar", "unit"]],
+                  on="series_id")
+    df = df.sort_values("series_id", kind="stable")
+    # "year" is of the form "YYYY".
+    month = np.where(df["is_monthly"], df["period"].str[-2:],
+                     np.where(df["period"] == "S01", "06", "12"))
+    return pd.DataFrame({
         # "value" is the CPI values.
-        result = result.append(
-            group_df[["value", "date", "duration", "statvar", "unit"]])
-    return result
+        "value": df["value"].values,
+        "date": (df["year"] + "-" + month).values,
+        "duration": np.where(df["is_monthly"], "P1M", "P6M"),
+        "statvar": ("dcs:" + df["statvar"]).values,
+        "unit": ("dcs:" + df["unit"]).values,
+    })
 
 
 def _generate_statvar(series_id: str) -> str:
@@ -404,14 +544,8 @@ def write_statvars(dest: str, targets: Set[str]) -> None:
 def filter_series(info_df: pd.DataFrame) -> Set[str]:
     """Filters all series provided by BLS and returns only monthly series for
     the US as a whole and not parts of US."""
-    targets = set()
-    # Prioritize monthly series
-    for row in info_df.itertuples(index=False):
-        series_info = parse_series_id(row.series_id)
-        if not series_info.is_us() or not series_info.is_monthly():
-            continue
-        targets.add(row.series_id)
-    return targets
+    df = parse_series_ids(info_df["series_id"])
+    return set(df.loc[df["is_us"] & df["is_monthly"], "series_id"])
 
 
 def write_set(dest: str, to_write: List[str]) -> None:
@@ -421,8 +555,13 @@ def write_set(dest: str, to_write: List[str]) -> None:
             out.write(elem)
 
 
-def main() -> None:
+def main(argv) -> None:
     """Runs the script. See module docstring."""
+    del argv
+    global _cache_dir
+    if FLAGS.cache_dir:
+        os.makedirs(FLAGS.cache_dir, exist_ok=True)
+        _cache_dir = FLAGS.cache_dir
     unit_enums = set()
     pop_type_enums = set()
     for series_type, urls in SERIES_TYPES_TO_DATA_URLS.items():
@@ -434,10 +573,15 @@ def main() -> None:
                 SERIES_TYPES_TO_EXPENDITURE_TYPES_URLS[series_type], targets))
         unit_enums.update(generate_unit_enums(info_df, targets))
         write_statvars(f"{series_type}.mcf", targets)
-        write_csv(urls, f"{series_type}.csv", info_df, targets)
+        write_csv(
+            urls,
+            f"{series_type}.csv",
+            info_df,
+            targets,
+            parquet_dest=(f"{series_type}.parquet" if FLAGS.parquet else None))
     write_set("unit_enums.mcf", unit_enums)
     write_set("pop_type_enums.mcf", pop_type_enums)
 
 
 if __name__ == "__main__":
-    main()
+    app.run(main)
@@ -15,6 +15,8 @@
 import unittest
 import sys
 import os
+import tempfile
+from unittest import mock
 
 import pandas as pd
 
@@ -88,6 +90,52 @@ class TestGenerateCSVMCF(unittest.TestCase):
                                            'CWUR0000SEFV02')
                                   })))
 
+    def test_parse_series_ids(self):
+        df = generate_csv_mcf.parse_series_ids(
+            ['CUSR0000SA0', 'CWUS0100SEFV02'])
+        self.assertEqual(['CU', 'CW'], df['survey_abbreviation'].tolist())
+        self.assertEqual(['SA0', 'SEFV02'], df['item_code'].tolist())
+        self.assertEqual([True, False], df['is_us'].tolist())
+        self.assertEqual([True, False], df['is_monthly'].tolist())
+        self.assertEqual([
+            generate_csv_mcf.parse_series_id('CUSR0000SA0').get_statvar(),
+            generate_csv_mcf.parse_series_id('CWUS0100SEFV02').get_statvar()
+        ], df['statvar'].tolist())
+        with self.assertRaisesRegex(ValueError, 'CWUT0000SEFV02'):
+            generate_csv_mcf.parse_series_ids(['CUSR0000SA0', 'CWUT0000SEFV02'])
+
+    def test_write_csv(self):
+        info_df = pd.DataFrame({
+            'series_id': ('CUUR0000SA0', 'CUSR0000SA0'),
+            'base_period': ('1982-84=100', 'DECEMBER 2009=100')
+        })
+        data_df = pd.DataFrame({
+            'series_id': ('CUUR0000SA0', 'CUSR0000SA0', 'CUUR0000SA0',
+                          'CUUR0000SA0', 'CUUR0000SA1'),
+            'year': ('2020', '2020', '2020', '2020', '2020'),
+            'period': ('M01', 'M01', 'M02', 'M13', 'M01'),
+            'value': ('1.5', '2.5', '3.5', '4.5', '5.5')
+        })
+        with tempfile.TemporaryDirectory() as tmp_dir, mock.patch.object(
+                generate_csv_mcf, '_download_df', return_value=data_df):
+            dest = os.path.join(tmp_dir, 'cpi_u.csv')
+            result = generate_csv_mcf.write_csv(['url'], dest, info_df,
+                                                {'CUUR0000SA0', 'CUSR0000SA0'})
+            with open(dest) as f:
+                self.assertEqual(
+                    ('value,date,duration,statvar,unit\n'
+                     '2.5,2020-01,P1M,dcs:ConsumerPriceIndex_BLSItem/SA0_'
+                     'UrbanConsumer_BLSSeasonallyAdjusted,'
+                     'dcs:IndexPointBasePeriodDecember2009Equals100\n'
+                     '1.5,2020-01,P1M,dcs:ConsumerPriceIndex_BLSItem/SA0_'
+                     'UrbanConsumer_BLSSeasonallyUnadjusted,'
+                     'dcs:IndexPointBasePeriod1982To1984Equals100\n'
+                     '3.5,2020-02,P1M,dcs:ConsumerPriceIndex_BLSItem/SA0_'
+                     'UrbanConsumer_BLSSeasonallyUnadjusted,'
+                     'dcs:IndexPointBasePeriod1982To1984Equals100\n'), f.read())
+        self.assertEqual(['value', 'date', 'duration', 'statvar', 'unit'],
+                         result.columns.tolist())
+
     def test_generate_statvar(self):
         self.assertEqual(
             ('Node: dcid:ConsumerPriceIndex_BLSItem/SEFV02_'
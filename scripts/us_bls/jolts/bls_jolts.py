@@ -22,6 +22,7 @@ Download the requirements.txt via pip and execute the file with Python 3.
 
 Dataset being processed: https://download.bls.gov/pub/time.series/jt/
 """
+import concurrent.futures
 import textwrap
 from absl import app
 import pandas as pd
@@ -61,92 +62,111 @@ _CODE_MAPPINGS = {
         '929000:State and local government excluding education'  # New Code
 }
 
+# Location of the BLS JOLTS flat files.
+_BASE_URL = "https://download.bls.gov/pub/time.series/jt/"
+
+# Series descriptions are used for adjustment status and industry code.
+_SERIES_FILE = "jt.series"
+_SERIES_COLUMNS = [
+    'series_id', 'seasonal', 'industry_code', 'region_code', 'dataelement_code',
+    'ratelevel_code', 'footnote_codes', 'begin_year', 'begin_period',
+    'end_year', 'end_period'
+]
+# Read all series columns as text: codes like '000000' keep their zeros, and
+# the blank footnote column shifts the trailing, unused columns.
+_SERIES_DTYPES = str
+
+# Additional information about each data file.
+# Tuple Format: Statistical Variable name, Stat Var population,
+#   Stat Var Job Change Type If Relevant, Data file name.
+_DATA_FILES = [
+    ("NumJobOpening", "schema:JobPosting", "", "jt.data.2.JobOpenings"),
+    ("NumJobHire", "dcs:BLSWorker", "Hire", "jt.data.3.Hires"),
+    ("NumSeparation", "dcs:BLSWorker", "Separation",
+     "jt.data.4.TotalSeparations"),
+    ("NumVoluntarySeparation", "dcs:BLSWorker", "VoluntarySeparation",
+     "jt.data.5.Quits"),
+    ("NumInvoluntarySeparation", "dcs:BLSWorker", "InvoluntarySeparation",
+     "jt.data.6.LayoffsDischarges"),
+    ("NumOtherSeparation", "dcs:BLSWorker", "OtherSeparation",
+     "jt.data.7.OtherSeparations"),
+]
+_JOB_COLUMNS = ['series_id', 'year', 'period', 'value', 'footnote_codes']
+_JOB_DTYPES = {
+    'series_id': str,
+    'year': 'int64',
+    'period': str,
+    'value': 'float64',
+    'footnote_codes': str,
+}
+
+
+def _read_file(base_url, file_name, dtype):
+    """Reads a whitespace separated BLS flat file with explicit dtypes."""
+    return pd.read_csv(base_url + file_name, sep="\\s+", dtype=dtype)
+
+
+def _map_industry_code(industry_code):
+    """Maps industry code used by BLS Jolts to NAICS or BLS aggregation."""
+    assert industry_code in _CODE_MAPPINGS, f"{industry_code} not mapped!"
+    mapped_code = _CODE_MAPPINGS[industry_code]
+    if ":" in mapped_code:
+        # New Jolts code have a prepended JOLTS id.
+        return "JOLTS_" + mapped_code.split(":")[0]
+    # Just map original NAICS codes directly.
+    return mapped_code
+
 
-def generate_cleaned_dataframe():
+def generate_cleaned_dataframe(base_url=_BASE_URL):
     """Fetches and combines BLS Jolts data sources.
 
   Downloads detailed series information from the entire JOLTS dataset.
-  Each of the files is read, combined into a single dataframe, and processed.
+  Each of the files is read in parallel, combined into a single dataframe,
+  and processed with column-wise operations.
+
+  Args:
+    base_url: URL or path of the directory of the files, ending with '/'.
 
   Returns:
     jolts_df: The 6 job data categories by industry, year, and adjustment,
         as a data frame.
     schema_mapping: List of tuples that contains information for each dataset.
   """
-    # Series descriptions are used for adjustment status and industry code.
-    exp_series_columns = [
-        'series_id', 'seasonal', 'industry_code', 'region_code',
-        'dataelement_code', 'ratelevel_code', 'footnote_codes', 'begin_year',
-        'begin_period', 'end_year', 'end_period'
-    ]
-
-    series_desc = pd.read_csv(
-        "https://download.bls.gov/pub/time.series/jt/jt.series",
-        converters={'industry_code': str},
-        sep="\\s+")
-    assert len(series_desc.columns) == len(exp_series_columns)
-    assert (series_desc.columns == exp_series_columns).all()
+    with concurrent.futures.ThreadPoolExecutor(len(_DATA_FILES) + 1) as pool:
+        series_future = pool.submit(_read_file, base_url, _SERIES_FILE,
+                                    _SERIES_DTYPES)
+        data_futures = [
+            pool.submit(_read_file, base_url, file_name, _JOB_DTYPES)
+            for _, _, _, file_name in _DATA_FILES
+        ]
+        series_desc = series_future.result()
+        schema_mapping = [(schema_name, population_type, job_change_event,
+                           future.result())
+                          for (schema_name, population_type, job_change_event,
+                               _), future in zip(_DATA_FILES, data_futures)]
+    assert len(series_desc.columns) == len(_SERIES_COLUMNS)
+    assert (series_desc.columns == _SERIES_COLUMNS).all()
     series_desc = series_desc.set_index("series_id")
 
-    # Download various series datapoints
-    job_openings = pd.read_csv(
-        "https://download.bls.gov/pub/time.series/jt/jt.data.2.JobOpenings",
-        sep="\\s+")
-    job_hires = pd.read_csv(
-        "https://download.bls.gov/pub/time.series/jt/jt.data.3.Hires",
-        sep="\\s+")
-    total_seps = pd.read_csv(
-        "https://download.bls.gov/pub/time.series/jt/jt.data.4.TotalSeparations",  # pylint: disable=line-too-long
-        sep="\\s+")
-    total_quits = pd.read_csv(
-        "https://download.bls.gov/pub/time.series/jt/jt.data.5.Quits",
-        sep="\\s+")
-    total_layoffs = pd.read_csv(
-        "https://download.bls.gov/pub/time.series/jt/jt.data.6.LayoffsDischarges",  # pylint: disable=line-too-long
-        sep="\\s+")
-    total_other_seps = pd.read_csv(
-        "https://download.bls.gov/pub/time.series/jt/jt.data.7.OtherSeparations",  # pylint: disable=line-too-long
-        sep="\\s+")
-    # Additional information about each dataframe.
-    # Tuple Format: Statistical Variable name, Stat Var population,
-    #   Stat Var Job Change Type If Relevant, Dataframe for Stat Var.
-    schema_mapping = [
-        ("NumJobOpening", "schema:JobPosting", "", job_openings),
-        ("NumJobHire", "dcs:BLSWorker", "Hire", job_hires),
-        ("NumSeparation", "dcs:BLSWorker", "Separation", total_seps),
-        ("NumVoluntarySeparation", "dcs:BLSWorker", "VoluntarySeparation",
-         total_quits),
-        ("NumInvoluntarySeparation", "dcs:BLSWorker", "InvoluntarySeparation",
-         total_layoffs),
-        ("NumOtherSeparation", "dcs:BLSWorker", "OtherSeparation",
-         total_other_seps),
-    ]
     # Combine datasets into a single dataframe including origin of data.
-    jolts_df = pd.DataFrame()
-    job_columns = ['series_id', 'year', 'period', 'value', 'footnote_codes']
-
+    frames = []
     for schema_name, population_type, job_change_event, df in schema_mapping:
         # Assert columns are as expected.
-        assert len(df.columns) == len(job_columns)
-        assert (df.columns == job_columns).all()
+        assert len(df.columns) == len(_JOB_COLUMNS)
+        assert (df.columns == _JOB_COLUMNS).all()
 
-        # Add to general dataframe.
-        df = df.loc[:, job_columns]
-        df.loc[:, 'statistical_variable'] = schema_name
-        df.loc[:, 'job_change_event'] = job_change_event
-        df.loc[:, 'population_type'] = population_type
-        jolts_df = jolts_df.append(df)
+        frames.append(
+            df.assign(statistical_variable=schema_name,
+                      job_change_event=job_change_event,
+                      population_type=population_type))
+    jolts_df = pd.concat(frames)
 
     # Drop non-monthly data and throw away slice.
-    jolts_df = jolts_df.query("period != 'M13'").copy()
+    jolts_df = jolts_df[jolts_df['period'] != 'M13']
 
     # Change date to ISO format (YYYY-MM).
-    def period_year_to_iso_8601(row):
-        month = row['period'].lstrip("M")
-        year = row['year']
-        return f"{year}-{month}"
-
-    jolts_df['Date'] = jolts_df.apply(period_year_to_iso_8601, axis=1)
+    jolts_df = jolts_df.assign(Date=jolts_df['year'].astype(str) + "-" +
+                               jolts_df['period'].str.lstrip("M"))
 
     # Add relevant columns from series information.
     series_cols = ['industry_code', 'region_code', 'seasonal', 'ratelevel_code']
@@ -155,47 +175,34 @@ def generate_cleaned_dataframe():
                               right_index=True)
 
     # Drop rate data, preliminary data, and non-national data.
-    jolts_df = jolts_df.query("ratelevel_code == 'L'")
-    jolts_df = jolts_df.query("footnote_codes != 'P'")
-    jolts_df = jolts_df.query("region_code == '00'")
-
-    # Map industries.
-    def jolts_code_map(row):
-        """Maps industry code used by BLS Jolts to NAICS or BLS aggregation."""
-        industry_code = row['industry_code']
-        assert industry_code in _CODE_MAPPINGS, f"{industry_code} not mapped!"
-        mapped_code = _CODE_MAPPINGS[industry_code]
-
-        if ":" in mapped_code:
-            # New Jolts code have a prepended JOLTS id.
-            row['industry_code'] = "JOLTS_" + mapped_code.split(":")[0]
-        else:
-            # Just map original NAICS codes directly.
-            row['industry_code'] = mapped_code
-
-        return row
+    jolts_df = jolts_df[(jolts_df['ratelevel_code'] == 'L') &
+                        (jolts_df['footnote_codes'] != 'P') &
+                        (jolts_df['region_code'] == '00')]
 
-    jolts_df = jolts_df.apply(jolts_code_map, axis=1)
-
-    def row_to_stat_var(row):
-        """Maps a row of df to the Statistical Variable that describes it."""
-        base_stat_var = row['statistical_variable']
-        industry_code = row['industry_code']
-        seasonal_adjustment = row['seasonal_adjustment']
-
-        return (
-            f"dcs:{base_stat_var}_NAICS_{industry_code}_{seasonal_adjustment}")
+    # Map industries, once per distinct code.
+    industry_codes = jolts_df['industry_code'].astype('category')
+    industry_codes = industry_codes.cat.rename_categories(
+        [_map_industry_code(code) for code in industry_codes.cat.categories])
+    jolts_df = jolts_df.assign(industry_code=industry_codes.astype(str))
 
     # Build map to Statistical Variable.
-    jolts_df['seasonal_adjustment'] = jolts_df['seasonal'].apply(
-        lambda adj: "Adjusted" if adj == "S" else "Unadjusted")
-    jolts_df['StatisticalVariable'] = jolts_df.apply(row_to_stat_var, axis=1)
-    jolts_df['Value'] = jolts_df['value']
+    seasonal_adjustment = jolts_df['seasonal'].map({
+        "S": "Adjusted"
+    }).fillna("Unadjusted")
+    jolts_df = jolts_df.assign(
+        seasonal_adjustment=seasonal_adjustment,
+        StatisticalVariable=("dcs:" + jolts_df['statistical_variable'] +
+                             "_NAICS_" + jolts_df['industry_code'] + "_" +
+                             seasonal_adjustment),
+        Value=jolts_df['value'])
 
     return jolts_df, schema_mapping
 
 
-def create_statistical_variables(jolts_df, schema_mapping):
+def create_statistical_variables(
+        jolts_df,
+        schema_mapping,
+        output_path="BLSJolts_StatisticalVariables.mcf"):
     """Creates Statistical Variable nodes.
 
     A new statistical industry is needed for each of the 6 job variables
@@ -208,6 +215,7 @@ def create_statistical_variables(jolts_df, schema_mapping):
     Args:
       jolts_df: The df of BLS Jolts data created by generate_cleaned_dataframe.
       schema_mapping: The schema mapping created by generate_cleaned_dataframe.
+      output_path: Path of the statistical variables mcf file.
   """
     template_stat_var = """
   Node: dcid:{STAT_CLASS}_NAICS_{INDUSTRY}_{ADJUSTMENT}
@@ -224,7 +232,7 @@ def create_statistical_variables(jolts_df, schema_mapping):
                         ("Unadjusted", "dcs:BLSSeasonallyUnadjusted")]
 
     # Output the schema mapping to a new file.
-    with open("BLSJolts_StatisticalVariables.mcf", "w+", newline="") as f_out:
+    with open(output_path, "w+", newline="") as f_out:
         for schema_name, pop_type, job_change_event, _ in schema_mapping:
             for industry_code in list(jolts_df['industry_code'].unique()):
                 for adjusted_dcid_map, adjusted_schema in adjustment_types:
@@ -249,6 +257,15 @@ def create_statistical_variables(jolts_df, schema_mapping):
                                                 job_change_event))
 
 
+def write_csv(jolts_df, output_path):
+    """Writes the cleaned CSV of the df created by generate_cleaned_dataframe.
+  """
+    final_columns = ['Date', 'StatisticalVariable', 'Value']
+    jolts_df.loc[:, final_columns].to_csv(output_path,
+                                          index=False,
+                                          encoding="utf-8")
+
+
 def main(_):
     """ Executes the downloading, preprocessing, and outputting of
   required MCF and CSV for JOLTS data.
@@ -257,10 +274,7 @@ def main(_):
     jolts_df, schema_mapping = generate_cleaned_dataframe()
 
     # Output final cleaned CSV.
-    final_columns = ['Date', 'StatisticalVariable', 'Value']
-    jolts_df.loc[:, final_columns].to_csv("BLSJolts.csv",
-                                          index=False,
-                                          encoding="utf-8")
+    write_csv(jolts_df, "BLSJolts.csv")
 
     # Create and output Statistical Variables.
     create_statistical_variables(jolts_df, schema_mapping)
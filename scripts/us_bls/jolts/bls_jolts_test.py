@@ -0,0 +1,69 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import tempfile
+import unittest
+
+# Allows the following module imports to work when running as a script
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__)))))
+from us_bls.jolts import bls_jolts
+
+_TEST_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'test_data')
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class BLSJoltsTest(unittest.TestCase):
+
+    def test_generate_cleaned_dataframe(self):
+        jolts_df, schema_mapping = bls_jolts.generate_cleaned_dataframe(
+            _TEST_DATA_DIR + os.sep)
+        self.assertEqual(6, len(schema_mapping))
+        self.assertEqual(['23', 'JOLTS_000000', 'JOLTS_110099', 'JOLTS_929000'],
+                         sorted(jolts_df['industry_code'].unique()))
+        self.assertFalse((jolts_df['period'] == 'M13').any())
+
+    def test_output_matches_expected(self):
+        # The CSV and MCF are byte-identical to the ones written before
+        # the cleaning was vectorized.
+        jolts_df, schema_mapping = bls_jolts.generate_cleaned_dataframe(
+            _TEST_DATA_DIR + os.sep)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_path = os.path.join(tmp_dir, 'BLSJolts.csv')
+            mcf_path = os.path.join(tmp_dir,
+                                    'BLSJolts_StatisticalVariables.mcf')
+            bls_jolts.write_csv(jolts_df, csv_path)
+            bls_jolts.create_statistical_variables(jolts_df, schema_mapping,
+                                                   mcf_path)
+            self.assertEqual(
+                _read_bytes(
+                    os.path.join(_TEST_DATA_DIR, 'expected_BLSJolts.csv')),
+                _read_bytes(csv_path))
+            self.assertEqual(
+                _read_bytes(
+                    os.path.join(_TEST_DATA_DIR,
+                                 'expected_BLSJolts_StatisticalVariables.mcf')),
+                _read_bytes(mcf_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
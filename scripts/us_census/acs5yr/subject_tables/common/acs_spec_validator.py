@@ -25,6 +25,7 @@ from absl import app
 from absl import flags
 
 from .common_util import *
+from .spec_index import CompiledSpec
 
 FLAGS = flags.FLAGS
 
@@ -56,51 +57,49 @@ def find_extra_tokens(column_name_list: list,
     Returns:
       List of tokens that present in the spec but not in the columns from data source.
   """
-    ret_list = []
-    # get list of unique tokens across all columns
-    token_list = get_tokens_list_from_column_list(column_name_list, delimiter)
-
-    ret_list = get_spec_token_list(spec_dict, delimiter)['token_list']
-
-    tokens_copy = ret_list.copy()
+    # get set of unique tokens across all columns
+    column_tokens_lower = {
+        token.lower() for token in get_tokens_list_from_column_list(
+            column_name_list, delimiter)
+    }
+    column_name_set = set(column_name_list)
 
+    ret_list = []
     # ignore tokens beginning with an underscore or if token is a column name and appears in columnNameList
-    for token in tokens_copy:
+    for token in get_spec_token_list(spec_dict, delimiter)['token_list']:
         if token.startswith('_'):
-            ret_list.remove(token)
-        elif token_in_list_ignore_case(token, token_list):
-            ret_list.remove(token)
-        if delimiter in token:
-            if token in column_name_list:
-                ret_list.remove(token)
+            continue
+        if token.lower() in column_tokens_lower:
+            continue
+        if delimiter in token and token in column_name_set:
+            continue
+        ret_list.append(token)
     return ret_list
 
 
 def find_columns_with_no_properties(column_name_list: list,
                                     spec_dict: dict,
-                                    delimiter: str = '!!') -> list:
+                                    delimiter: str = '!!',
+                                    compiled_spec: CompiledSpec = None) -> list:
     """Find all columns that do not assign any property a value
     
     Args:
       column_name_list: List of all columns after dropping ignored columns.
       spec_dict: Dict obj containing configurations for the import.
       delimiter: delimiter seperating tokens within single column name string.
+      compiled_spec: CompiledSpec of spec_dict, compiled here if not passed.
     
     Returns:
       List of columns that do not assign any value to any property.
   """
+    if compiled_spec is None:
+        compiled_spec = CompiledSpec(spec_dict, delimiter)
     ret_list = []
     for column_name in column_name_list:
-        no_prop_flag = True
-        # get token list of the column
-        for token in column_name.split(delimiter):
-            for prop in spec_dict['pvs'].keys():
-                if token_in_list_ignore_case(token,
-                                             spec_dict['pvs'][prop].keys()):
-                    # clear the flag when some property gets assigned a value
-                    no_prop_flag = False
-        # if the flag has remained set across all properties
-        if no_prop_flag:
+        # if none of the tokens of the column assign a value to any property
+        if not any(
+                compiled_spec.props_for_token(token)
+                for token in column_name.split(delimiter)):
             ret_list.append(column_name)
     return ret_list
 
@@ -118,11 +117,14 @@ def find_ignore_conflicts(spec_dict: dict, delimiter: str = '!!') -> list:
   """
     ret_list = []
 
-    new_dict = copy.deepcopy(spec_dict)
-    new_dict.pop('ignoreColumns', None)
-    new_dict.pop('ignoreTokens', None)
+    # get_spec_token_list does not modify the spec, a shallow copy is enough
+    new_dict = {
+        key: value
+        for key, value in spec_dict.items()
+        if key not in ('ignoreColumns', 'ignoreTokens')
+    }
 
-    spec_tokens = get_spec_token_list(new_dict, delimiter)['token_list']
+    spec_tokens = set(get_spec_token_list(new_dict, delimiter)['token_list'])
 
     if 'ignoreColumns' in spec_dict:
         for ignore_token in spec_dict['ignoreColumns']:
@@ -137,9 +139,11 @@ def find_ignore_conflicts(spec_dict: dict, delimiter: str = '!!') -> list:
     return ret_list
 
 
-def find_missing_enum_specialisation(column_name_list: list,
-                                     spec_dict: dict,
-                                     delimiter: str = '!!') -> dict:
+def find_missing_enum_specialisation(
+        column_name_list: list,
+        spec_dict: dict,
+        delimiter: str = '!!',
+        compiled_spec: CompiledSpec = None) -> dict:
     """Check for missing entries in the enumSpecializations section of the spec
       If multiple tokens match same property, they should appear as enumspecialisation
       the token that appears later in the name should be the specialisation of one one encountered before
@@ -148,49 +152,46 @@ def find_missing_enum_specialisation(column_name_list: list,
       column_name_list: List of all columns after dropping ignored columns.
       spec_dict: Dict obj containing configurations for the import.
       delimiter: delimiter seperating tokens within single column name string.
+      compiled_spec: CompiledSpec of spec_dict, compiled here if not passed.
     
     Returns:
       Dictionary with lookup token as key value. Each token has a dict associated with following keys:
         - column: List of columns where the token appears.
         - possibleParents: List of possible values of the property that might be replacable.
   """
+    if compiled_spec is None:
+        compiled_spec = CompiledSpec(spec_dict, delimiter)
     ret_dict = {}
     for column_name in column_name_list:
         temp_dict = {}
         # populate a dictionary containing properties and all the values assigned to it
         for token in column_name.split(delimiter):
-            for prop in spec_dict['pvs'].keys():
-                if token_in_list_ignore_case(token,
-                                             spec_dict['pvs'][prop].keys()):
-                    if prop in temp_dict:
-                        temp_dict[prop].append(token)
-                    else:
-                        temp_dict[prop] = [token]
+            for prop in compiled_spec.props_for_token(token):
+                if prop in temp_dict:
+                    temp_dict[prop].append(token)
+                else:
+                    temp_dict[prop] = [token]
         # check all the columns that have multiple values assigned to a single property
         for prop in temp_dict:
             if len(temp_dict[prop]) > 1:
                 for j, prop_token in reversed(list(enumerate(temp_dict[prop]))):
                     temp_flag = True
                     # if token appears as a specialisation but it's base doesn't appear before it
-                    if 'enumSpecializations' in spec_dict:
-                        if token_in_list_ignore_case(
-                                prop_token, spec_dict['enumSpecializations']):
-                            temp_flag = False
-                            if spec_dict['enumSpecializations'][
-                                    prop_token] not in temp_dict[prop][:j]:
-                                if prop_token not in ret_dict:
-                                    ret_dict[prop_token] = {}
-                                    ret_dict[prop_token]['column'] = [
-                                        column_name
-                                    ]
-                                    ret_dict[prop_token][
-                                        'possibleParents'] = temp_dict[prop][:j]
-                                else:
-                                    ret_dict[prop_token]['column'].append(
-                                        column_name)
-                                    ret_dict[prop_token][
-                                        'possibleParents'].extend(
-                                            temp_dict[prop][:j])
+                    enum_base = compiled_spec.get_enum_specialization_base(
+                        prop_token)
+                    if enum_base is not None:
+                        temp_flag = False
+                        if enum_base not in temp_dict[prop][:j]:
+                            if prop_token not in ret_dict:
+                                ret_dict[prop_token] = {}
+                                ret_dict[prop_token]['column'] = [column_name]
+                                ret_dict[prop_token][
+                                    'possibleParents'] = temp_dict[prop][:j]
+                            else:
+                                ret_dict[prop_token]['column'].append(
+                                    column_name)
+                                ret_dict[prop_token]['possibleParents'].extend(
+                                    temp_dict[prop][:j])
                     # if the token is near the leaf but not used as a specialisation, it potentially has a base value
                     if j > 0 and temp_flag:
                         if prop_token not in ret_dict:
@@ -282,14 +283,18 @@ def find_missing_denominator_total_column(column_name_list: list,
   """
     ret_list = []
 
-    token_list = get_tokens_list_from_column_list(column_name_list, delimiter)
+    column_name_set = set(column_name_list)
+    column_tokens_lower = {
+        token.lower() for token in get_tokens_list_from_column_list(
+            column_name_list, delimiter)
+    }
 
     if 'denominators' in spec_dict:
         for total_column in spec_dict['denominators'].keys():
             if delimiter in total_column:
-                if total_column not in column_name_list:
+                if total_column not in column_name_set:
                     ret_list.append(total_column)
-            elif not token_in_list_ignore_case(total_column, token_list):
+            elif total_column.lower() not in column_tokens_lower:
                 ret_list.append(total_column)
     return ret_list
 
@@ -308,19 +313,25 @@ def find_missing_denominators(column_name_list: list,
         List of columns that appear as percentage in denominator section but are not present in the csv.
   """
     ret_list = []
+    missing_set = set()
 
-    token_list = get_tokens_list_from_column_list(column_name_list, delimiter)
+    column_name_set = set(column_name_list)
+    column_tokens_lower = {
+        token.lower() for token in get_tokens_list_from_column_list(
+            column_name_list, delimiter)
+    }
 
     if 'denominators' in spec_dict:
         for total_column in spec_dict['denominators'].keys():
             for cur_denominator in spec_dict['denominators'][total_column]:
                 if delimiter in cur_denominator:
-                    if cur_denominator not in column_name_list:
-                        if cur_denominator not in ret_list:
-                            ret_list.append(cur_denominator)
-                elif not token_in_list_ignore_case(cur_denominator, token_list):
-                    if cur_denominator not in ret_list:
-                        ret_list.append(cur_denominator)
+                    is_missing = cur_denominator not in column_name_set
+                else:
+                    is_missing = (cur_denominator.lower()
+                                  not in column_tokens_lower)
+                if is_missing and cur_denominator not in missing_set:
+                    missing_set.add(cur_denominator)
+                    ret_list.append(cur_denominator)
     return ret_list
 
 
@@ -336,15 +347,15 @@ def find_repeating_denominators(spec_dict: dict, delimiter: str = '!!') -> list:
         List of columns that appear as percentage and have multiple totals associated.
   """
     ret_list = []
-    appeared_list = []
+    appeared_set = set()
 
     if 'denominators' in spec_dict:
         for total_column in spec_dict['denominators'].keys():
             for cur_denominator in spec_dict['denominators'][total_column]:
-                if token_in_list_ignore_case(cur_denominator, appeared_list):
+                if cur_denominator.lower() in appeared_set:
                     ret_list.append(cur_denominator)
                 else:
-                    appeared_list.append(cur_denominator)
+                    appeared_set.add(cur_denominator.lower())
     return ret_list
 
 
@@ -352,7 +363,8 @@ def test_column_name_list(column_name_list: list,
                           spec_dict: dict,
                           test_list: list = ('all'),
                           raise_warnings_only: bool = False,
-                          delimiter: str = '!!') -> dict:
+                          delimiter: str = '!!',
+                          compiled_spec: CompiledSpec = None) -> dict:
     """Runs requested list of tests related to tokens and column names and returns their combined result.
 
       Args:
@@ -361,20 +373,23 @@ def test_column_name_list(column_name_list: list,
         test_list: List of tests to perform. If 'all' is present, all the possible tests are run.
         raise_warnings_only: Boolean value to surpress raising errors. Useful when running tests on individual year only.
         delimiter: delimiter seperating tokens within single column name string.
+        compiled_spec: CompiledSpec of spec_dict, compiled here if not passed.
       
       Returns:
         Dict with name of the test as key and it's result as value.
   """
     ret_dict = {}
+    if compiled_spec is None:
+        compiled_spec = CompiledSpec(spec_dict, delimiter)
 
     # remove ignore columns
     column_name_list = remove_columns_to_be_ignored(column_name_list, spec_dict,
-                                                    delimiter)
+                                                    delimiter, compiled_spec)
 
     token_list = get_tokens_list_from_column_list(column_name_list, delimiter)
 
     if 'all' in test_list or 'missing_tokens' in test_list:
-        temp_list = find_missing_tokens(token_list, spec_dict)
+        temp_list = find_missing_tokens(token_list, spec_dict, delimiter)
         ret_dict['missing_tokens'] = []
         if len(temp_list) > 0:
             print('\nWarning: Following tokens are missing in the spec')
@@ -385,7 +400,8 @@ def test_column_name_list(column_name_list: list,
             print('All tokens present in spec or ignored')
 
     if 'all' in test_list or 'column_no_pv' in test_list:
-        temp_list = find_columns_with_no_properties(column_name_list, spec_dict)
+        temp_list = find_columns_with_no_properties(column_name_list, spec_dict,
+                                                    delimiter, compiled_spec)
         ret_dict['no_pv_columns'] = []
         if len(temp_list) > 0:
             print(
@@ -418,7 +434,8 @@ def test_column_name_list(column_name_list: list,
     if 'all' in test_list or 'enum_specialisations' in test_list:
         ret_dict['enum_specializations_missing'] = {}
         temp_dict = find_missing_enum_specialisation(column_name_list,
-                                                     spec_dict)
+                                                     spec_dict, delimiter,
+                                                     compiled_spec)
         if len(temp_dict) > 0:
             print(
                 '\nWarning: Following tokens should have an enumSpecialization')
@@ -526,7 +543,8 @@ def find_extra_inferred_properties(spec_dict: dict) -> list:
 def test_spec(column_name_list: list,
               spec_dict: dict,
               test_list: list = ('all'),
-              delimiter: str = '!!') -> dict:
+              delimiter: str = '!!',
+              compiled_spec: CompiledSpec = None) -> dict:
     """Runs requested list of tests  to test the lookups present in spec and returns their combined result.
 
       Args:
@@ -534,13 +552,16 @@ def test_spec(column_name_list: list,
         spec_dict: Dict obj containing configurations for the import.
         test_list: List of tests to perform. If 'all' is present, all the possible tests are run.
         delimiter: delimiter seperating tokens within single column name string.
+        compiled_spec: CompiledSpec of spec_dict, compiled here if not passed.
       
       Returns:
         Dict with name of the test as key and it's result as value.
   """
     ret_dict = {}
+    if compiled_spec is None:
+        compiled_spec = CompiledSpec(spec_dict, delimiter)
     if 'all' in test_list or 'extra_tokens' in test_list:
-        temp_list = find_extra_tokens(column_name_list, spec_dict)
+        temp_list = find_extra_tokens(column_name_list, spec_dict, delimiter)
         ret_dict['extra_tokens'] = temp_list
         if len(temp_list) > 0:
             print('\nError: Following tokens appear in the spec but not in csv')
@@ -593,14 +614,16 @@ def run_tests_column_dict(columns_dict: dict,
         delimiter: delimiter seperating tokens within single column name string.
   """
     test_results = {}
+    # compile the spec once, to be shared by all the tests
+    compiled_spec = CompiledSpec(spec_dict, delimiter)
     for filename in columns_dict:
         if filename != 'all':
             cur_columns = columns_dict[filename]['column_list']
             columns_dict[filename]['ignored_column_list'] = ignored_columns(
-                cur_columns, spec_dict, delimiter)
+                cur_columns, spec_dict, delimiter, compiled_spec)
             columns_dict[filename][
                 'accepted_column_list'] = remove_columns_to_be_ignored(
-                    cur_columns, spec_dict, delimiter)
+                    cur_columns, spec_dict, delimiter, compiled_spec)
             columns_dict[filename][
                 'accepted_token_list'] = get_tokens_list_from_column_list(
                     columns_dict[filename]['accepted_column_list'], delimiter)
@@ -616,7 +639,8 @@ def run_tests_column_dict(columns_dict: dict,
                 print(filename)
                 print('----------------------------------------------------')
                 test_results[filename] = test_column_name_list(
-                    cur_columns, spec_dict, test_list, True, delimiter)
+                    cur_columns, spec_dict, test_list, True, delimiter,
+                    compiled_spec)
                 print('Total Number of Columns',
                       columns_dict[filename]['column_list_count'])
                 print('Total Number of Ignored Columns',
@@ -628,14 +652,15 @@ def run_tests_column_dict(columns_dict: dict,
     # if filewise outputs have not been shown or summary is requested
     if not filewise or show_summary:
         test_results['all'] = test_column_name_list(all_columns, spec_dict,
-                                                    test_list, False, delimiter)
+                                                    test_list, False, delimiter,
+                                                    compiled_spec)
     test_results['all'].update(
-        test_spec(all_columns, spec_dict, test_list, delimiter))
+        test_spec(all_columns, spec_dict, test_list, delimiter, compiled_spec))
 
     columns_dict['all']['ignored_column_list'] = ignored_columns(
-        all_columns, spec_dict, delimiter)
+        all_columns, spec_dict, delimiter, compiled_spec)
     columns_dict['all']['accepted_column_list'] = remove_columns_to_be_ignored(
-        all_columns, spec_dict, delimiter)
+        all_columns, spec_dict, delimiter, compiled_spec)
     columns_dict['all'][
         'accepted_token_list'] = get_tokens_list_from_column_list(
             columns_dict['all']['accepted_column_list'], delimiter)
@@ -23,6 +23,8 @@ import zipfile
 from absl import app
 from absl import flags
 
+from .spec_index import CompiledSpec
+
 FLAGS = flags.FLAGS
 
 flags.DEFINE_string('zip_path', None,
@@ -156,42 +158,49 @@ def column_to_be_ignored(column_name: str,
 
 def remove_columns_to_be_ignored(column_name_list: list,
                                  spec_dict: dict,
-                                 delimiter: str = '!!') -> list:
+                                 delimiter: str = '!!',
+                                 compiled_spec: CompiledSpec = None) -> list:
     """Function that removes columns to be ignored from a given list of columns.
 
     Args:
       column_name_list: The list of column name strings.
       spec_dict: Dict obj containing configurations for the import.
       delimiter: delimiter seperating tokens within single column name string.
+      compiled_spec: CompiledSpec of spec_dict, compiled here if not passed.
     
     Returns:
       A list of filtered column names, with the column names to be ignored
         removed from the input list.
   """
+    if compiled_spec is None:
+        compiled_spec = CompiledSpec(spec_dict, delimiter)
     ret_list = []
     for column_name in column_name_list:
-        if not column_to_be_ignored(column_name, spec_dict, delimiter):
+        if not compiled_spec.column_to_be_ignored(column_name):
             ret_list.append(column_name)
     return ret_list
 
 
 def ignored_columns(column_name_list: list,
                     spec_dict: dict,
-                    delimiter: str = '!!') -> list:
+                    delimiter: str = '!!',
+                    compiled_spec: CompiledSpec = None) -> list:
     """Function that returns list of columns to be ignored from a given list of columns.
 
     Args:
       column_name_list: The list of column name strings.
       spec_dict: Dict obj containing configurations for the import.
       delimiter: delimiter seperating tokens within single column name string.
+      compiled_spec: CompiledSpec of spec_dict, compiled here if not passed.
     
     Returns:
       A list of column names that will be ignored according to the spec_dict.
   """
-
+    if compiled_spec is None:
+        compiled_spec = CompiledSpec(spec_dict, delimiter)
     ret_list = []
     for column_name in column_name_list:
-        if column_to_be_ignored(column_name, spec_dict, delimiter):
+        if compiled_spec.column_to_be_ignored(column_name):
             ret_list.append(column_name)
     return ret_list
 
@@ -209,9 +218,11 @@ def get_tokens_list_from_column_list(column_name_list: list,
   """
 
     tokens = []
+    seen_tokens = set()
     for column_name in column_name_list:
         for tok in column_name.split(delimiter):
-            if tok not in tokens:
+            if tok not in seen_tokens:
+                seen_tokens.add(tok)
                 tokens.append(tok)
     return tokens
 
@@ -230,45 +241,42 @@ def get_spec_token_list(spec_dict: dict, delimiter: str = '!!') -> dict:
   """
     ret_list = []
     repeated_list = []
+    # tokens already in ret_list, for constant time lookups
+    seen_tokens = set()
+
+    def _add_token(token):
+        if token.startswith('_'):
+            return
+        if token in seen_tokens:
+            repeated_list.append(token)
+        else:
+            seen_tokens.add(token)
+            ret_list.append(token)
+
     # collect the token appears in any of the pvs
-    for prop in spec_dict['pvs'].keys():
+    for prop in spec_dict.get('pvs', {}).keys():
         for token in spec_dict['pvs'][prop]:
-            if token in ret_list and not token.startswith('_'):
-                repeated_list.append(token)
-            elif not token.startswith('_'):
-                ret_list.append(token)
+            _add_token(token)
 
     # collect the tokens appear in any of the population type
     if 'populationType' in spec_dict:
         for token in spec_dict['populationType'].keys():
-            if token in ret_list and not token.startswith('_'):
-                repeated_list.append(token)
-            elif not token.startswith('_'):
-                ret_list.append(token)
+            _add_token(token)
 
     # collect the tokens that appears in measurement
     if 'measurement' in spec_dict:
         for token in spec_dict['measurement'].keys():
-            if token in ret_list and not token.startswith('_'):
-                repeated_list.append(token)
-            elif not token.startswith('_'):
-                ret_list.append(token)
+            _add_token(token)
 
     #collect the tokens to be ignored
     if 'ignoreTokens' in spec_dict:
         for token in spec_dict['ignoreTokens']:
-            if token in ret_list and not token.startswith('_'):
-                repeated_list.append(token)
-            elif not token.startswith('_'):
-                ret_list.append(token)
+            _add_token(token)
 
     #collect the column names that appears as ignore column or if a token appears in ignoreColumns
     if 'ignoreColumns' in spec_dict:
         for token in spec_dict['ignoreColumns']:
-            if token in ret_list and not token.startswith('_'):
-                repeated_list.append(token)
-            elif not token.startswith('_'):
-                ret_list.append(token)
+            _add_token(token)
 
     #collect the tokens appears on any side of the enumspecialisation
     if 'enumSpecializations' in spec_dict:
@@ -303,12 +311,13 @@ def find_missing_tokens(token_list: list,
   Returns:
     List of tokens that are missing in the spec.
   """
-    spec_tokens = get_spec_token_list(spec_dict, delimiter)['token_list']
-    tokens_copy = token_list.copy()
-    for token in token_list:
-        if token_in_list_ignore_case(token, spec_tokens):
-            tokens_copy.remove(token)
-    return tokens_copy
+    spec_tokens_lower = {
+        token.lower()
+        for token in get_spec_token_list(spec_dict, delimiter)['token_list']
+    }
+    return [
+        token for token in token_list if token.lower() not in spec_tokens_lower
+    ]
 
 
 # assumes metadata file or data with overlays file
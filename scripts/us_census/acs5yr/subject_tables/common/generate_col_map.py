@@ -27,8 +27,10 @@ from collections import OrderedDict
 _SCRIPT_PATH = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(os.path.join(
     _SCRIPT_PATH, '../../../../../util/'))  # for statvar_dcid_generator
+sys.path.append(_SCRIPT_PATH)  # for spec_index
 
 from statvar_dcid_generator import get_statvar_dcid
+from spec_index import CompiledSpec
 
 # intitalize the logger
 logging.basicConfig(
@@ -89,6 +91,8 @@ def process_zip_file(zip_file_path,
 
     column_map = {}
     counter_dict = {}
+    # the spec is compiled once and shared by the column maps of all years
+    compiled_spec = CompiledSpec(spec_dict, delimiter)
 
     with ZipFile(zip_file_path) as zf:
         for filename in zf.namelist():
@@ -99,7 +103,7 @@ def process_zip_file(zip_file_path,
                         if index == header_row:
                             year = filename.split(f'ACSST5Y')[1][:4]
                             column_map[year] = generate_stat_var_map(
-                                spec_dict, line, delimiter)
+                                spec_dict, line, delimiter, compiled_spec)
                             break
                         continue
     ## save the column_map
@@ -110,12 +114,16 @@ def process_zip_file(zip_file_path,
     return column_map
 
 
-def generate_stat_var_map(spec_dict, column_list, delimiter='!!'):
+def generate_stat_var_map(spec_dict,
+                          column_list,
+                          delimiter='!!',
+                          compiled_spec=None):
     """Wrapper function for generateColMapBase class to generate column map.
 
   Args:
     specDict: A dictionary containing specifications for the different properties of the statistical variable.
     columnList: A list of column names for which the column map needs to be generated. This is typically the column header in the dataset.
+    compiled_spec: CompiledSpec of spec_dict, useful to share across multiple calls with the same spec.
 
   Returns:
     A dictionary mapping each column to their respective stat_var node definitions.
@@ -131,7 +139,8 @@ def generate_stat_var_map(spec_dict, column_list, delimiter='!!'):
   """
     col_map_obj = GenerateColMapBase(spec_dict=spec_dict,
                                      column_list=column_list,
-                                     delimiter=delimiter)
+                                     delimiter=delimiter,
+                                     compiled_spec=compiled_spec)
     return col_map_obj._generate_stat_vars_from_spec()
 
 
@@ -142,10 +151,15 @@ class GenerateColMapBase:
     specDict: A dictionary containing specifications for the different properties of the statistical variable.
     columnList: A list of column names for which the column map needs to be generated. This is typically the column header in the dataset.
     delimiter: The delimiting string that is used for tokenising the column name
+    compiled_spec: CompiledSpec with the token lookups of specDict
   """
 
     # TODO - add typing hints and document the format.
-    def __init__(self, spec_dict={}, column_list=[], delimiter='!!'):
+    def __init__(self,
+                 spec_dict={},
+                 column_list=[],
+                 delimiter='!!',
+                 compiled_spec=None):
         """module init"""
         self.features = spec_dict
         self.column_list = column_list
@@ -163,6 +177,9 @@ class GenerateColMapBase:
                     self.features[key] = []
                 else:
                     self.features[key] = {}
+        if compiled_spec is None:
+            compiled_spec = CompiledSpec(self.features, delimiter)
+        self.compiled_spec = compiled_spec
 
     def _find_and_replace_column_names(self, column):
         """
@@ -198,22 +215,9 @@ class GenerateColMapBase:
           "<column-name-2>": {}, .....
         }"""
         # for each column generate the definition of their respective statistical variable node
-        # TODO: This code block can be simplified to the following:
-        # if col in self.features['ignoreColumns'] or
-        # len((set(self.features['ignoreColumns']) &
-        # set(col.split(self.delimiter)) > 0:
         for col in self.column_list:
-            # TODO: Replace the type of ignore_token_count to boolean
-            ignore_token_count = 0
-            for part in col.split(self.delimiter):
-                for token in self.features['ignoreColumns']:
-                    if part == token:
-                        ignore_token_count = 1
-                    if token == col:
-                        ignore_token_count = 1
-
             # if no tokens of the columns are in ignoreColumns of the spec
-            if ignore_token_count == 0:
+            if not self.compiled_spec.column_to_be_ignored_exact(col):
                 renamed_col = self._find_and_replace_column_names(col)
                 # TODO: Before calling the column_to_statvar method,
                 # remove the base class or generalization token in the
@@ -274,18 +278,14 @@ class GenerateColMapBase:
         # TODO: To check if there are edge-cases with values not being full columns
         # associate pvs to stat_var
         for part in part_list:
-            ##  p = property and k = dictionary of substrings in column that points to a propertyValue
-            for p, k in self.features['pvs'].items():
-                ## check if the current key of dict matches with any substring from the tokens of a column name
-                for c, v in k.items():
-                    # check if column substring matches with a column token
-                    # the check is done by ignoring the case
-                    if part.lower() == c.lower():
-                        if p in stat_var:
-                            logger.warning(
-                                f"For column: {column} | Property {p} has an existing value {stat_var[p]} which is modified to value {p}"
-                            )
-                        stat_var[p] = v
+            ## p = property and v = propertyValue assigned by the token, the
+            ## lookup is done by ignoring the case
+            for p, v in self.compiled_spec.pvs_for_token(part):
+                if p in stat_var:
+                    logger.warning(
+                        f"For column: {column} | Property {p} has an existing value {stat_var[p]} which is modified to value {p}"
+                    )
+                stat_var[p] = v
 
         # Handling measurementDenominator
         if column in self.features['measurementDenominator']:
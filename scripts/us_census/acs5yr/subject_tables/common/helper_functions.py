@@ -19,7 +19,7 @@ from typing import Any
 from absl import app
 from absl import flags
 
-from common_util import *
+from .common_util import *
 
 FLAGS = flags.FLAGS
 
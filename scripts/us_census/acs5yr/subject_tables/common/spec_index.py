@@ -0,0 +1,101 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compiled form of the JSON spec with hash lookups used by the spec validator
+and the column map generator.
+"""
+
+
+class CompiledSpec:
+    """Lookup tables built once from the import configuration spec.
+
+  Case-insensitive lookups use keys folded with str.lower(), which matches the
+  behaviour of common_util.token_in_list_ignore_case.
+
+  Attributes:
+    spec_dict: Dict obj containing configurations for the import.
+    delimiter: delimiter seperating tokens within single column name string.
+    token_pvs: Dict with lowercase token as key and the list of
+      (property, value) it assigns, in the order they appear in 'pvs'.
+    token_props: Dict with lowercase token as key and the list of properties it
+      assigns a value to, in the order they appear in 'pvs'.
+    ignore_columns: Set of entries in ignoreColumns, exact case.
+    ignore_columns_lower: Set of lowercase entries in ignoreColumns.
+    ignore_full_columns_lower: Set of lowercase ignoreColumns entries that are
+      full column names, i.e. contain the delimiter.
+    enum_specializations_lower: Dict with lowercase specialisation token as key
+      and it's base as value.
+  """
+
+    def __init__(self, spec_dict: dict, delimiter: str = '!!'):
+        self.spec_dict = spec_dict
+        self.delimiter = delimiter
+
+        self.token_pvs = {}
+        self.token_props = {}
+        for prop, token_values in spec_dict.get('pvs', {}).items():
+            for token, value in token_values.items():
+                token_lower = token.lower()
+                self.token_pvs.setdefault(token_lower, []).append((prop, value))
+                props = self.token_props.setdefault(token_lower, [])
+                if prop not in props:
+                    props.append(prop)
+
+        ignore_list = spec_dict.get('ignoreColumns', [])
+        self.ignore_columns = set(ignore_list)
+        self.ignore_columns_lower = {token.lower() for token in ignore_list}
+        self.ignore_full_columns_lower = {
+            token.lower() for token in ignore_list if delimiter in token
+        }
+
+        self.enum_specializations_lower = {}
+        for token, base in spec_dict.get('enumSpecializations', {}).items():
+            self.enum_specializations_lower.setdefault(token.lower(), base)
+
+    def props_for_token(self, token: str) -> list:
+        """Returns the list of properties the token assigns a value to, ignoring case."""
+        return self.token_props.get(token.lower(), [])
+
+    def pvs_for_token(self, token: str) -> list:
+        """Returns the list of (property, value) the token assigns, ignoring case."""
+        return self.token_pvs.get(token.lower(), [])
+
+    def get_enum_specialization_base(self, token: str) -> str:
+        """Returns the base of an enumSpecialization token ignoring the case, None if not present."""
+        enum_dict = self.spec_dict.get('enumSpecializations', {})
+        if token in enum_dict:
+            return enum_dict[token]
+        return self.enum_specializations_lower.get(token.lower())
+
+    def column_to_be_ignored(self, column_name: str) -> bool:
+        """Checks if the column is to be ignored according to the spec ignoring the case.
+
+    Column is considered to be ignored if there is a full match or if
+      `ignoreColumns` contains token which is present within the column name.
+    """
+        if column_name.lower() in self.ignore_full_columns_lower:
+            return True
+        for token in column_name.split(self.delimiter):
+            if token.lower() in self.ignore_columns_lower:
+                return True
+        return False
+
+    def column_to_be_ignored_exact(self, column_name: str) -> bool:
+        """Checks if the column or any of it's tokens appear in ignoreColumns, matching the case."""
+        if column_name in self.ignore_columns:
+            return True
+        for token in column_name.split(self.delimiter):
+            if token in self.ignore_columns:
+                return True
+        return False
@@ -0,0 +1,69 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from .spec_index import CompiledSpec
+
+
+class TestCompiledSpec(unittest.TestCase):
+
+    spec = {
+        'pvs': {
+            'p1': {
+                'a': 'v1',
+                'B': 'v2'
+            },
+            'p2': {
+                'b': 'v3',
+                'c': 'v4'
+            }
+        },
+        'ignoreColumns': ['Margin of Error', 'x!!Y'],
+        'enumSpecializations': {
+            'c': 'b'
+        }
+    }
+
+    def test_token_lookups(self):
+        compiled_spec = CompiledSpec(self.spec)
+        self.assertEqual(compiled_spec.props_for_token('A'), ['p1'])
+        self.assertEqual(compiled_spec.props_for_token('b'), ['p1', 'p2'])
+        self.assertEqual(compiled_spec.props_for_token('d'), [])
+        self.assertEqual(compiled_spec.pvs_for_token('b'), [('p1', 'v2'),
+                                                            ('p2', 'v3')])
+
+    def test_enum_specialization(self):
+        compiled_spec = CompiledSpec(self.spec)
+        self.assertEqual(compiled_spec.get_enum_specialization_base('c'), 'b')
+        self.assertEqual(compiled_spec.get_enum_specialization_base('C'), 'b')
+        self.assertIsNone(compiled_spec.get_enum_specialization_base('a'))
+
+    def test_column_to_be_ignored(self):
+        compiled_spec = CompiledSpec(self.spec)
+        self.assertTrue(
+            compiled_spec.column_to_be_ignored('a!!margin of error!!b'))
+        self.assertTrue(compiled_spec.column_to_be_ignored('X!!y'))
+        self.assertFalse(compiled_spec.column_to_be_ignored('x!!y!!z'))
+        self.assertFalse(compiled_spec.column_to_be_ignored('a!!b'))
+
+        self.assertTrue(
+            compiled_spec.column_to_be_ignored_exact('a!!Margin of Error'))
+        self.assertFalse(
+            compiled_spec.column_to_be_ignored_exact('a!!margin of error'))
+        self.assertTrue(compiled_spec.column_to_be_ignored_exact('x!!Y'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -163,9 +163,9 @@ def compile_year_map(store_path: str = CONFIG_PATH_,
                     print('/'.join(cur_dataset_dict['c_dataset']),
                           'year not available and not timeseries')
 
-                if cur_dataset_dict['distribution'][
-                        0]['accessURL'] != _generate_url_prefix(
-                            link_tree, year)[:-1]:
+                if cur_dataset_dict['distribution'][0][
+                        'accessURL'] != _generate_url_prefix(link_tree,
+                                                             year)[:-1]:
                     if 'url_mismatch' not in error_dict:
                         error_dict['url_mismatch'] = []
                     error_dict['url_mismatch'].append({
@@ -176,8 +176,9 @@ def compile_year_map(store_path: str = CONFIG_PATH_,
                     })
                     print(link_tree, 'accessURL unexpected')
 
-                if cur_dataset_dict['c_geographyLink'] != generate_url_geography(
-                        link_tree, year):
+                if cur_dataset_dict[
+                        'c_geographyLink'] != generate_url_geography(
+                            link_tree, year):
                     if 'url_mismatch' not in error_dict:
                         error_dict['url_mismatch'] = []
                     error_dict['url_mismatch'].append({
@@ -196,8 +197,9 @@ def compile_year_map(store_path: str = CONFIG_PATH_,
                     })
                     print(link_tree, 'c_groupsLink unexpected')
 
-                if cur_dataset_dict['c_variablesLink'] != generate_url_variables(
-                        link_tree, year):
+                if cur_dataset_dict[
+                        'c_variablesLink'] != generate_url_variables(
+                            link_tree, year):
                     if 'url_mismatch' not in error_dict:
                         error_dict['url_mismatch'] = []
                     error_dict['url_mismatch'].append({
@@ -271,6 +273,8 @@ def fetch_dataset_config_cache(param: str,
         dataset_dict = compile_non_group_variables_map(store_path, force_fetch)
     error_dict = {}
     url_list = []
+    # URLs already added to url_list, for constant time duplicate checks.
+    url_set = set()
 
     cache_path = os.path.join(store_path, 'api_cache')
     if not os.path.exists(cache_path):
@@ -293,7 +297,8 @@ def fetch_dataset_config_cache(param: str,
                 if not os.path.exists(file_path):
                     os.makedirs(file_path, exist_ok=True)
 
-                if temp_url:
+                if temp_url and temp_url not in url_set:
+                    url_set.add(temp_url)
                     temp_dict = {}
                     temp_dict['url'] = temp_url
                     temp_dict['store_path'] = file_name
@@ -307,7 +312,8 @@ def fetch_dataset_config_cache(param: str,
                         temp_url = generate_url_group_variables(
                             dataset, group_id, year)
                         file_name = os.path.join(file_path, group_id + '.json')
-                        if temp_url not in url_list:
+                        if temp_url not in url_set:
+                            url_set.add(temp_url)
                             temp_dict = {}
                             temp_dict['url'] = temp_url
                             temp_dict['store_path'] = file_name
@@ -328,7 +334,8 @@ def fetch_dataset_config_cache(param: str,
             file_name = os.path.join(file_path, f'{param}.json')
             if not os.path.exists(file_path):
                 os.makedirs(file_path, exist_ok=True)
-            if temp_url and temp_url not in url_list:
+            if temp_url and temp_url not in url_set:
+                url_set.add(temp_url)
                 temp_dict = {}
                 temp_dict['url'] = temp_url
                 temp_dict['store_path'] = file_name
@@ -339,7 +346,8 @@ def fetch_dataset_config_cache(param: str,
                 for group_id in dataset_dict[dataset]['groups']:
                     temp_url = generate_url_group_variables(dataset, group_id)
                     file_name = os.path.join(file_path, group_id + '.json')
-                    if temp_url not in url_list:
+                    if temp_url not in url_set:
+                        url_set.add(temp_url)
                         temp_dict = {}
                         temp_dict['url'] = temp_url
                         temp_dict['store_path'] = file_name
@@ -21,6 +21,7 @@ from absl import app
 from absl import flags
 
 from census_api_config_fetcher import *
+from census_api_metadata_index import get_metadata_index
 
 FLAGS = flags.FLAGS
 
@@ -52,6 +53,21 @@ flags.DEFINE_string(
 )
 
 
+def _get_metadata_index(force_fetch: bool = False):
+    """Returns the metadata index, (re)building it from the compiled config if required.
+
+        Args:
+            force_fetch: Boolean value to force API config update rather than using the cache.
+
+        Returns:
+            CensusMetadataIndex object for the config path.
+    """
+    index = get_metadata_index(os.path.expanduser(CONFIG_PATH_))
+    if force_fetch or not index.is_built():
+        index.build(compile_groups_map(force_fetch=force_fetch))
+    return index
+
+
 def get_list_datasets(force_fetch: bool = False) -> list:
     """Extracts the list of datasets present in the API.
 
@@ -61,8 +77,7 @@ def get_list_datasets(force_fetch: bool = False) -> list:
         Returns:
             List of datasets available in the API.
     """
-    d = compile_year_map(force_fetch=force_fetch)
-    return sorted(list(d.keys()))
+    return _get_metadata_index(force_fetch).get_datasets()
 
 
 def get_dataset_years(dataset: str, force_fetch: bool = False) -> list:
@@ -75,11 +90,7 @@ def get_dataset_years(dataset: str, force_fetch: bool = False) -> list:
         Returns:
             List of available years in a dataset in the API.
     """
-    d = compile_dataset_group_years_map(force_fetch=force_fetch)
-    if dataset in d:
-        return sorted(d[dataset]['years'])
-    else:
-        return None
+    return _get_metadata_index(force_fetch).get_dataset_years(dataset)
 
 
 def get_dataset_groups(dataset: str, force_fetch: bool = False) -> list:
@@ -92,11 +103,7 @@ def get_dataset_groups(dataset: str, force_fetch: bool = False) -> list:
         Returns:
             List of available groups in a dataset available in the API.
     """
-    d = compile_dataset_group_map(force_fetch=force_fetch)
-    if dataset in d:
-        return sorted(d[dataset])
-    else:
-        return None
+    return _get_metadata_index(force_fetch).get_dataset_groups(dataset)
 
 
 def get_dataset_groups_years(dataset: str,
@@ -112,11 +119,8 @@ def get_dataset_groups_years(dataset: str,
         Returns:
             List of available years for given dataset, group available in the API.
     """
-    d = compile_dataset_group_years_map(force_fetch=force_fetch)
-    if dataset in d and group in d[dataset]['groups']:
-        return sorted(d[dataset]['groups'][group])
-    else:
-        return None
+    return _get_metadata_index(force_fetch).get_dataset_groups_years(
+        dataset, group)
 
 
 def get_dataset_summary_levels(dataset: str, force_fetch: bool = False) -> list:
@@ -154,14 +158,7 @@ def get_identifier(dataset: str, year: str, force_fetch: bool = False) -> str:
         Returns:
             Idendifier string given a dataset, year available in the API.
     """
-    d = compile_groups_map(force_fetch=force_fetch)
-    if dataset in d:
-        if 'years' in d[dataset] and year in d[dataset]['years']:
-            return d[dataset]['years'][year]['identifier']
-        else:
-            return None
-    else:
-        return None
+    return _get_metadata_index(force_fetch).get_identifier(dataset, year)
 
 
 def get_yearwise_variable_column_map(dataset: str,
@@ -179,16 +176,25 @@ def get_yearwise_variable_column_map(dataset: str,
         Returns:
             Dictionary with mapping from variable ID to variable name.
     """
+    index = _get_metadata_index(force_fetch)
     ret_dict = {}
     for year in year_list:
         ret_dict[(year)] = {}
-        temp_dict = get_variables_name(dataset,
-                                       table_id,
-                                       year,
-                                       force_fetch=force_fetch)
-        if temp_dict:
-            for var in temp_dict['variables']:
-                ret_dict[year][var] = temp_dict['variables'][var]['label']
+        labels = None
+        if not force_fetch:
+            labels = index.get_variable_labels(dataset, year, table_id)
+        if labels is None:
+            # Fetches the group variables into api_cache if missing.
+            temp_dict = get_variables_name(dataset,
+                                           table_id,
+                                           year,
+                                           force_fetch=force_fetch)
+            if temp_dict:
+                index.add_group_variables(dataset, year, table_id.upper(),
+                                          temp_dict)
+                labels = index.get_variable_labels(dataset, year, table_id)
+        if labels:
+            ret_dict[year].update(labels)
     return ret_dict
 
 
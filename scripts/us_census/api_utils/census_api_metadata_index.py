@@ -0,0 +1,303 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compiled, indexed store of the census API metadata.
+
+The compiled config files(dataset_groups.json etc.) and the per group variable
+files under api_cache are loaded once into a SQLite database stored next to the
+config. Lookups by (dataset, year, group, variable) are then answered through
+indexed queries and memoized in process.
+"""
+
+import functools
+import json
+import logging
+import os
+import sqlite3
+
+module_dir_ = os.path.dirname(os.path.realpath(__file__))
+_CONFIG_PATH = os.path.join(module_dir_, 'config_files')
+
+_INDEX_FILENAME = 'metadata_index.sqlite'
+_SOURCE_FILENAME = 'dataset_groups.json'
+# Timeseries datasets do not have a year, they are stored with an empty year.
+_NO_YEAR = ''
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS dataset_years (
+    dataset TEXT NOT NULL,
+    year TEXT NOT NULL,
+    identifier TEXT,
+    title TEXT,
+    PRIMARY KEY (dataset, year)
+);
+CREATE TABLE IF NOT EXISTS dataset_groups (
+    dataset TEXT NOT NULL,
+    year TEXT NOT NULL,
+    group_id TEXT NOT NULL,
+    title TEXT,
+    PRIMARY KEY (dataset, year, group_id)
+);
+CREATE INDEX IF NOT EXISTS dataset_groups_by_group
+    ON dataset_groups (dataset, group_id);
+CREATE TABLE IF NOT EXISTS loaded_group_variables (
+    dataset TEXT NOT NULL,
+    year TEXT NOT NULL,
+    group_id TEXT NOT NULL,
+    PRIMARY KEY (dataset, year, group_id)
+);
+CREATE TABLE IF NOT EXISTS group_variables (
+    dataset TEXT NOT NULL,
+    year TEXT NOT NULL,
+    group_id TEXT NOT NULL,
+    variable TEXT NOT NULL,
+    label TEXT,
+    PRIMARY KEY (dataset, year, group_id, variable)
+);
+"""
+
+
+def _year_key(year) -> str:
+    if year is None:
+        return _NO_YEAR
+    return str(year)
+
+
+class CensusMetadataIndex:
+    """Indexed lookups over the compiled census API config.
+
+    Attributes:
+        store_path: Path where the API config is stored.
+        index_path: Path of the SQLite database holding the index.
+    """
+
+    def __init__(self, store_path: str = _CONFIG_PATH, index_path: str = None):
+        self.store_path = os.path.abspath(os.path.expanduser(store_path))
+        if not index_path:
+            index_path = os.path.join(self.store_path, _INDEX_FILENAME)
+        self.index_path = index_path
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.index_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._memo = {}
+
+    def close(self):
+        self._conn.close()
+
+    def _source_stamp(self) -> str:
+        source_path = os.path.join(self.store_path, _SOURCE_FILENAME)
+        if not os.path.isfile(source_path):
+            return ''
+        return str(os.path.getmtime(source_path))
+
+    def is_built(self) -> bool:
+        """Checks if the index is present and in sync with the compiled config.
+
+            Returns:
+                Boolean value which is set if the index can be used as is.
+        """
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = 'source_stamp'").fetchone()
+        return row is not None and row[0] == self._source_stamp()
+
+    def build(self, groups_map: dict):
+        """Rebuilds the dataset, year and group tables of the index.
+
+            Args:
+                groups_map: Dict as returned by compile_groups_map with
+                    dataset, available years, identifier, title and groups.
+        """
+        logging.info('building census API metadata index at %s',
+                     self.index_path)
+        year_rows = []
+        group_rows = []
+        for dataset, dataset_detail in groups_map.items():
+            if 'years' in dataset_detail:
+                year_configs = dataset_detail['years'].items()
+            else:
+                year_configs = [(None, dataset_detail)]
+            for year, year_detail in year_configs:
+                year = _year_key(year)
+                year_rows.append((dataset, year, year_detail.get('identifier'),
+                                  year_detail.get('title')))
+                for group_id, group_detail in year_detail.get('groups',
+                                                              {}).items():
+                    group_rows.append(
+                        (dataset, year, group_id, group_detail.get('title')))
+
+        with self._conn:
+            self._conn.execute('DELETE FROM dataset_years')
+            self._conn.execute('DELETE FROM dataset_groups')
+            self._conn.execute('DELETE FROM loaded_group_variables')
+            self._conn.execute('DELETE FROM group_variables')
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO dataset_years VALUES (?, ?, ?, ?)',
+                year_rows)
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO dataset_groups VALUES (?, ?, ?, ?)',
+                group_rows)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('source_stamp', ?)",
+                (self._source_stamp(),))
+        self._memo = {}
+
+    def _memoized(self, key: tuple, query: str, params: tuple, row_fn):
+        if key not in self._memo:
+            self._memo[key] = row_fn(
+                self._conn.execute(query, params).fetchall())
+        return self._memo[key]
+
+    def get_datasets(self) -> list:
+        """Returns the sorted list of datasets."""
+        query = 'SELECT DISTINCT dataset FROM dataset_years ORDER BY dataset'
+        return self._memoized(('datasets',), query, (),
+                              lambda rows: [r[0] for r in rows])
+
+    def has_dataset(self, dataset: str) -> bool:
+        """Returns whether the dataset is in the index."""
+        query = 'SELECT 1 FROM dataset_years WHERE dataset = ? LIMIT 1'
+        return self._memoized(('dataset', dataset), query, (dataset,),
+                              lambda rows: bool(rows))
+
+    def get_dataset_years(self, dataset: str) -> list:
+        """Returns the sorted list of years of a dataset, None if not found.
+
+            Timeseries datasets have an empty list of years.
+        """
+        if not self.has_dataset(dataset):
+            return None
+        query = ('SELECT year FROM dataset_years '
+                 'WHERE dataset = ? AND year != ? ORDER BY year')
+        return self._memoized(('years', dataset), query, (dataset, _NO_YEAR),
+                              lambda rows: [r[0] for r in rows])
+
+    def get_identifier(self, dataset: str, year: str) -> str:
+        """Returns the identifier of a dataset for the year, None if not found."""
+        year = _year_key(year)
+        query = ('SELECT identifier FROM dataset_years '
+                 'WHERE dataset = ? AND year = ?')
+        return self._memoized(('identifier', dataset, year), query,
+                              (dataset, year), lambda rows: rows[0][0]
+                              if rows else None)
+
+    def get_dataset_groups(self, dataset: str) -> list:
+        """Returns the sorted list of groups in a dataset, None if not found."""
+        if not self.has_dataset(dataset):
+            return None
+        query = ('SELECT DISTINCT group_id FROM dataset_groups '
+                 'WHERE dataset = ? ORDER BY group_id')
+        return self._memoized(('groups', dataset), query, (dataset,),
+                              lambda rows: [r[0] for r in rows])
+
+    def get_dataset_groups_years(self, dataset: str, group: str) -> list:
+        """Returns the sorted list of years a group is available for."""
+        query = ('SELECT year FROM dataset_groups '
+                 'WHERE dataset = ? AND group_id = ? ORDER BY year')
+        return self._memoized(('group_years', dataset, group), query,
+                              (dataset, group),
+                              lambda rows: [r[0] or None for r in rows] or None)
+
+    def _group_variables_path(self, dataset: str, year: str, group: str) -> str:
+        if year:
+            return os.path.join(self.store_path, 'api_cache', dataset, year,
+                                f'{group}.json')
+        return os.path.join(self.store_path, 'api_cache', dataset,
+                            f'{group}.json')
+
+    def add_group_variables(self, dataset: str, year: str, group: str,
+                            variables_config: dict):
+        """Adds the variables of a group to the index.
+
+            Args:
+                dataset: Dataset of US census(e.g. acs/acs5/subject).
+                year: Year of the group variables.
+                group: ID of the US census group.
+                variables_config: Dict as returned by the API with
+                    'variables' key containing variable ID to it's details.
+        """
+        year = _year_key(year)
+        rows = [
+            (dataset, year, group, var, detail.get('label'))
+            for var, detail in variables_config.get('variables', {}).items()
+        ]
+        with self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO loaded_group_variables VALUES (?, ?, ?)',
+                (dataset, year, group))
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO group_variables VALUES (?, ?, ?, ?, ?)',
+                rows)
+        self._memo.pop(('variables', dataset, year, group), None)
+
+    def _load_group_variables(self, dataset: str, year: str,
+                              group: str) -> bool:
+        loaded = self._conn.execute(
+            'SELECT 1 FROM loaded_group_variables '
+            'WHERE dataset = ? AND year = ? AND group_id = ?',
+            (dataset, year, group)).fetchone()
+        if loaded:
+            return True
+        cache_file = self._group_variables_path(dataset, year, group)
+        if not os.path.isfile(cache_file):
+            return False
+        with open(cache_file, 'r') as fp:
+            variables_config = json.load(fp)
+        self.add_group_variables(dataset, year, group, variables_config)
+        return True
+
+    def get_variable_labels(self, dataset: str, year: str, group: str) -> dict:
+        """Returns variable ID to label mapping of a group for the year.
+
+            The variables are read from the api_cache on first lookup and
+            served from the index afterwards.
+
+            Args:
+                dataset: Dataset of US census(e.g. acs/acs5/subject).
+                year: Year for which the variable lookup is required.
+                group: ID of the US census group.
+
+            Returns:
+                Dict with mapping from variable ID to variable name, None if
+                the group variables are not available in the cache.
+        """
+        year = _year_key(year)
+        group = group.upper()
+        key = ('variables', dataset, year, group)
+        if key not in self._memo:
+            if not self._load_group_variables(dataset, year, group):
+                return None
+            rows = self._conn.execute(
+                'SELECT variable, label FROM group_variables '
+                'WHERE dataset = ? AND year = ? AND group_id = ?',
+                (dataset, year, group)).fetchall()
+            self._memo[key] = dict(rows)
+        return self._memo[key]
+
+    def get_variable_label(self, dataset: str, year: str, group: str,
+                           variable: str) -> str:
+        """Returns the label of a single variable, None if not found."""
+        labels = self.get_variable_labels(dataset, year, group)
+        if labels is None:
+            return None
+        return labels.get(variable)
+
+
+@functools.lru_cache(maxsize=None)
+def get_metadata_index(store_path: str = _CONFIG_PATH) -> CensusMetadataIndex:
+    """Returns the process wide metadata index for the given config path."""
+    return CensusMetadataIndex(store_path)
@@ -0,0 +1,157 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import tempfile
+import unittest
+
+from .census_api_metadata_index import *
+
+_GROUPS_MAP = {
+    'acs/acs5/subject': {
+        'years': {
+            '2018': {
+                'title': 'ACS 5 year subject 2018',
+                'identifier': 'ACSST5Y2018',
+                'groups': {
+                    'S0101': {
+                        'title': 'AGE AND SEX'
+                    },
+                    'S2702': {
+                        'title': 'HEALTH INSURANCE'
+                    }
+                }
+            },
+            '2019': {
+                'title': 'ACS 5 year subject 2019',
+                'identifier': 'ACSST5Y2019',
+                'groups': {
+                    'S0101': {
+                        'title': 'AGE AND SEX'
+                    }
+                }
+            }
+        }
+    },
+    'timeseries/healthins/sahie': {
+        'title': 'SAHIE',
+        'identifier': 'timeseriessahie',
+        'groups': {}
+    }
+}
+
+
+class TestCensusMetadataIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store_path = self.tmp_dir.name
+        with open(os.path.join(self.store_path, 'dataset_groups.json'),
+                  'w') as fp:
+            json.dump(_GROUPS_MAP, fp)
+        variables_path = os.path.join(self.store_path, 'api_cache',
+                                      'acs/acs5/subject', '2018')
+        os.makedirs(variables_path)
+        with open(os.path.join(variables_path, 'S0101.json'), 'w') as fp:
+            json.dump(
+                {
+                    'variables': {
+                        'S0101_C01_001E': {
+                            'label': 'Estimate!!Total!!Total population'
+                        },
+                        'S0101_C01_002E': {
+                            'label': 'Estimate!!Total!!Under 5 years'
+                        }
+                    }
+                }, fp)
+        self.index = CensusMetadataIndex(self.store_path)
+        self.index.build(_GROUPS_MAP)
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp_dir.cleanup()
+
+    def test_build(self):
+        self.assertTrue(self.index.is_built())
+        os.utime(os.path.join(self.store_path, 'dataset_groups.json'), (0, 0))
+        self.assertFalse(self.index.is_built())
+
+    def test_dataset_lookups(self):
+        self.assertEqual(self.index.get_datasets(),
+                         ['acs/acs5/subject', 'timeseries/healthins/sahie'])
+        self.assertEqual(self.index.get_dataset_years('acs/acs5/subject'),
+                         ['2018', '2019'])
+        self.assertEqual(
+            self.index.get_dataset_years('timeseries/healthins/sahie'), [])
+        self.assertIsNone(self.index.get_dataset_years('unknown'))
+        self.assertEqual(
+            self.index.get_dataset_groups('timeseries/healthins/sahie'), [])
+        self.assertEqual(self.index.get_dataset_groups('acs/acs5/subject'),
+                         ['S0101', 'S2702'])
+        self.assertEqual(
+            self.index.get_dataset_groups_years('acs/acs5/subject', 'S2702'),
+            ['2018'])
+        self.assertIsNone(self.index.get_dataset_groups('unknown'))
+
+    def test_identifier(self):
+        self.assertEqual(self.index.get_identifier('acs/acs5/subject', '2019'),
+                         'ACSST5Y2019')
+        self.assertEqual(self.index.get_identifier('acs/acs5/subject', 2018),
+                         'ACSST5Y2018')
+        self.assertEqual(
+            self.index.get_identifier('timeseries/healthins/sahie', None),
+            'timeseriessahie')
+        self.assertIsNone(self.index.get_identifier('acs/acs5/subject', '2010'))
+
+    def test_variable_labels(self):
+        self.assertEqual(
+            self.index.get_variable_labels('acs/acs5/subject', '2018', 's0101'),
+            {
+                'S0101_C01_001E': 'Estimate!!Total!!Total population',
+                'S0101_C01_002E': 'Estimate!!Total!!Under 5 years'
+            })
+        self.assertEqual(
+            self.index.get_variable_label('acs/acs5/subject', '2018', 'S0101',
+                                          'S0101_C01_002E'),
+            'Estimate!!Total!!Under 5 years')
+        self.assertIsNone(
+            self.index.get_variable_labels('acs/acs5/subject', '2019', 'S0101'))
+
+        self.index.add_group_variables(
+            'acs/acs5/subject', '2019', 'S0101',
+            {'variables': {
+                'S0101_C01_001E': {
+                    'label': 'Total'
+                }
+            }})
+        self.assertEqual(
+            self.index.get_variable_labels('acs/acs5/subject', '2019', 'S0101'),
+            {'S0101_C01_001E': 'Total'})
+
+    def test_index_persisted(self):
+        self.index.get_variable_labels('acs/acs5/subject', '2018', 'S0101')
+        other = CensusMetadataIndex(self.store_path)
+        self.assertTrue(other.is_built())
+        os.remove(
+            os.path.join(self.store_path, 'api_cache', 'acs/acs5/subject',
+                         '2018', 'S0101.json'))
+        self.assertEqual(
+            len(other.get_variable_labels('acs/acs5/subject', '2018', 'S0101')),
+            2)
+        other.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
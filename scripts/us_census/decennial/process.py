@@ -1,8 +1,11 @@
 """A script to clean Decennial Census Redistricting data from FTP site. """
 
+import concurrent.futures
+import contextlib
 import csv
 import glob
 import io
+import json
 import os
 import zipfile
 
@@ -16,6 +19,9 @@ flags.DEFINE_string(
     'https://www2.census.gov/programs-surveys/decennial/')
 flags.DEFINE_string('usc_output_path', 'output', 'Output directory')
 flags.DEFINE_boolean('verbose', False, 'Print debug info')
+flags.DEFINE_integer(
+    'num_workers', None, 'Number of state directories to process in '
+    'parallel. Defaults to the number of CPUs.')
 
 _YEARS = ['2000', '2010', '2020']
 _DIR_PREFIX = 'data/01-Redistricting_File--PL_94-171'
@@ -166,6 +172,8 @@ _CSV_COLUMNS = [
     'observationAbout', 'variableMeasured', 'value', 'observationDate'
 ]
 
+_MANIFEST_FILENAME = 'manifest.json'
+
 
 def _get_geo_file(zf):
     for f in zf.namelist():
@@ -180,37 +188,44 @@ def _strip(token):
     return token.strip().strip('"')
 
 
-def _slice(line, pair):
-    return _strip(line[pair[0] - 1:pair[0] - 1 + pair[1]])
+def _to_slice(pair):
+    """Converts a 1-based (start, length) pair to a slice object."""
+    return slice(pair[0] - 1, pair[0] - 1 + pair[1])
 
 
-def _index(line, idx):
-    return _strip(line[idx])
+# Fixed-width fields of the 2000/2010 geo files as slice objects, computed once.
+_GEOF_OLDER_SUMLEV_SLICE = _to_slice(_GEOF_OLDER_SUMLEV)
+_GEOF_OLDER_LOGRECNO_SLICE = _to_slice(_GEOF_OLDER_LOGRECNO)
+_GEOF_OLDER_DCID_SLICES = {
+    year: {
+        sumlev: tuple(_to_slice(pair)
+                      for pair in pairs)
+        for sumlev, pairs in sumlev_map.items()
+    } for year, sumlev_map in _GEOF_OLDER_DCID_MAP.items()
+}
 
 
 def _build_older_geomap(geof, year, is_national):
     """Builds a map from logical-record-number to DCID for 2000 and 2010."""
+    dcid_slices = _GEOF_OLDER_DCID_SLICES[year]
     geomap = {}
     for line in geof:
         line = line.strip()
 
-        logrecno = _slice(line, _GEOF_OLDER_LOGRECNO)
-        sumlev = _slice(line, _GEOF_OLDER_SUMLEV)
+        logrecno = _strip(line[_GEOF_OLDER_LOGRECNO_SLICE])
+        sumlev = _strip(line[_GEOF_OLDER_SUMLEV_SLICE])
 
         if is_national:
             if sumlev == _US_SUMLEV:
                 geomap[logrecno] = 'country/USA'
             continue
 
-        if sumlev not in _GEOF_OLDER_DCID_MAP[year]:
+        slices = dcid_slices.get(sumlev)
+        if slices is None:
             # Not an interesting summary-level
             continue
 
-        dcid_parts = ['geoId/']
-        for c in _GEOF_OLDER_DCID_MAP[year][sumlev]:
-            dcid_parts.append(_slice(line, c))
-
-        geomap[logrecno] = ''.join(dcid_parts)
+        geomap[logrecno] = 'geoId/' + ''.join(_strip(line[s]) for s in slices)
 
     return geomap
 
@@ -221,8 +236,8 @@ def _build_2020_geomap(geof, is_national):
     for line in geof:
         parts = line.strip().split('|')
 
-        logrecno = _index(parts, _GEOF_2020_LOGRECNO_COL)
-        sumlev = _index(parts, _GEOF_2020_SUMLEV_COL)
+        logrecno = _strip(parts[_GEOF_2020_LOGRECNO_COL])
+        sumlev = _strip(parts[_GEOF_2020_SUMLEV_COL])
 
         if is_national:
             # This is national file. Extract only US geo
@@ -230,16 +245,13 @@ def _build_2020_geomap(geof, is_national):
                 geomap[logrecno] = 'country/USA'
             continue
 
-        if sumlev not in _GEOF_2020_DCID_MAP:
+        cols = _GEOF_2020_DCID_MAP.get(sumlev)
+        if cols is None:
             # Not an interesting summary-level
             continue
 
         # Combine the values in the columns.
-        dcid_parts = ['geoId/']
-        for c in _GEOF_2020_DCID_MAP[sumlev]:
-            dcid_parts.append(_index(parts, c))
-
-        geomap[logrecno] = ''.join(dcid_parts)
+        geomap[logrecno] = 'geoId/' + ''.join(_strip(parts[c]) for c in cols)
 
     return geomap
 
@@ -253,25 +265,13 @@ def _build_geomap(year, geof, is_national):
         return _build_older_geomap(geof, year, is_national)
 
 
-def _generate_csv(year, dataf, csvw, geomap, verbose):
-    """Reads the data from 'dataf' for 'year' and writes cleaned-csv to 'csvw'."""
-    for line in dataf:
-        parts = line.strip().split(_DATAF_DELIM_CHAR[year])
-
-        cifsn = _index(parts, _DATAF_CIFSN_COL)
-        if cifsn not in _DATAF_STATVAR_MAP:
-            # This file does not have any StatVars!
-            return
-
-        logrecno = _index(parts, _DATAF_LOGRECNO_COL)
-        if logrecno not in geomap:
-            # This geo is not in our map.
-            continue
-
-        place_dcid = geomap[logrecno]
-
-        # This is a legit file and geo.  Select the interesting StatVar columns.
-        for var, sv in _DATAF_STATVAR_MAP[cifsn].items():
+def _compile_statvar_columns(year):
+    """Returns CIFSN value -> [(value column, 'dcid:' + stat-var DCID), ...]
+    for the data files of 'year'."""
+    columns = {}
+    for cifsn, var_map in _DATAF_STATVAR_MAP.items():
+        columns[cifsn] = []
+        for var, sv in var_map.items():
             if year == '2000' and var.startswith('H00'):
                 # No H tables in 2000.
                 continue
@@ -282,51 +282,95 @@ def _generate_csv(year, dataf, csvw, geomap, verbose):
 
             # _TABLE_COLOFFSET_MAP for P001 contains 5, which is where P0010001 starts
             val_col = _TABLE_COLOFFSET_MAP[tab] + idx - 1
+            columns[cifsn].append((val_col, 'dcid:' + sv))
+    return columns
+
 
-            if verbose:
-                print('Emitting: ', place_dcid, ' : ', sv, ' : ',
-                      _index(parts, val_col))
-            csvw.writerow([
-                'dcid:' + place_dcid, 'dcid:' + sv,
-                _index(parts, val_col), year
-            ])
+_STATVAR_COLUMNS = {year: _compile_statvar_columns(year) for year in _YEARS}
+
+
+def _generate_csv(year, dataf, csvw, geomap, verbose):
+    """Reads the data from 'dataf' for 'year' and writes cleaned-csv to 'csvw'.
+
+    Returns:
+        Number of rows written.
+    """
+    delim = _DATAF_DELIM_CHAR[year]
+    statvar_columns = _STATVAR_COLUMNS[year]
+    num_rows = 0
+    for line in dataf:
+        parts = line.strip().split(delim)
+
+        cifsn = _strip(parts[_DATAF_CIFSN_COL])
+        columns = statvar_columns.get(cifsn)
+        if columns is None:
+            # This file does not have any StatVars!
+            break
+
+        place_dcid = geomap.get(_strip(parts[_DATAF_LOGRECNO_COL]))
+        if place_dcid is None:
+            # This geo is not in our map.
+            continue
+
+        # This is a legit file and geo.  Select the interesting StatVar columns.
+        place_dcid = 'dcid:' + place_dcid
+        rows = [[place_dcid, sv, _strip(parts[val_col]), year]
+                for val_col, sv in columns]
+        if verbose:
+            for row in rows:
+                print('Emitting: ', row[0][5:], ' : ', row[1][5:], ' : ',
+                      row[2])
+        csvw.writerows(rows)
+        num_rows += len(rows)
+    return num_rows
 
 
 def _process_geodir(year, geodir, output_dir, verbose):
-    """Processes a directory for a state or US national and produces CSV."""
+    """Processes a directory for a state or US national and produces CSV.
+
+    Each zip file in the directory is opened once. The geo file is read first
+    to build the geomap, and then the data files are streamed.
+
+    Returns:
+        A dict describing the CSV part for the manifest.
+    """
 
     is_national = os.path.basename(geodir) == _US_DIRECTORY[year]
     csv_fname = os.path.join(output_dir, os.path.basename(geodir) + '.csv')
     print('Processing ', geodir, ' -> ', csv_fname)
 
-    with open(csv_fname, 'w') as csvf:
-        csvw = csv.writer(csvf)
-        csvw.writerow(_CSV_COLUMNS)
+    with contextlib.ExitStack() as stack:
+        zipfs = [
+            stack.enter_context(zipfile.ZipFile(zip_fname))
+            for zip_fname in sorted(glob.glob(os.path.join(geodir, '*.zip')))
+        ]
 
-        # First, build the geomap by finding the geo file in the directory.
+        # First, build the geomap from the geo file in the directory.
         geomap = {}
         geo_fname = ''
-        for zip_fname in glob.glob(os.path.join(geodir, '*.zip')):
-            with zipfile.ZipFile(zip_fname) as zipf:
-                geo_fname = _get_geo_file(zipf)
-                if geo_fname:
-                    # Build map out of geofile
-                    with io.TextIOWrapper(zipf.open(geo_fname, 'r'),
-                                          encoding='ISO-8859-1') as geof:
-                        geomap = _build_geomap(year, geof, is_national)
-                        if verbose:
-                            print('Geo Map:')
-                            for k, v in geomap.items():
-                                print('\t', k, ' -> ', v)
-                        break
-
-        # Next, use the geomap to process the datafiles
+        for zipf in zipfs:
+            geo_fname = _get_geo_file(zipf)
+            if geo_fname:
+                # Build map out of geofile
+                with io.TextIOWrapper(zipf.open(geo_fname, 'r'),
+                                      encoding='ISO-8859-1') as geof:
+                    geomap = _build_geomap(year, geof, is_national)
+                if verbose:
+                    print('Geo Map:')
+                    for k, v in geomap.items():
+                        print('\t', k, ' -> ', v)
+                break
         assert geo_fname, 'Did not find geo file'
         assert geomap
-        for zip_fname in glob.glob(os.path.join(geodir, '*.zip')):
-            with zipfile.ZipFile(zip_fname) as zipf:
 
-                # Build CSV out of datafiles
+        # Next, use the geomap to process the datafiles. The CSV is renamed
+        # into place once complete, so a failed run leaves no partial part.
+        num_rows = 0
+        tmp_fname = csv_fname + '.tmp'
+        with open(tmp_fname, 'w') as csvf:
+            csvw = csv.writer(csvf)
+            csvw.writerow(_CSV_COLUMNS)
+            for zipf in zipfs:
                 for data_fname in zipf.namelist():
                     if data_fname == geo_fname:
                         continue
@@ -335,26 +379,63 @@ def _process_geodir(year, geodir, output_dir, verbose):
                         continue
                     with io.TextIOWrapper(zipf.open(data_fname, 'r'),
                                           encoding='ISO-8859-1') as dataf:
-                        _generate_csv(year, dataf, csvw, geomap, verbose)
-
-
-def process(raw_data_path, output_path, verbose):
-    """Processes decennial census zip-files and produces CSV files."""
+                        num_rows += _generate_csv(year, dataf, csvw, geomap,
+                                                  verbose)
+        os.replace(tmp_fname, csv_fname)
+
+    return {
+        'year': year,
+        'geo': os.path.basename(geodir),
+        'path': os.path.join(year, os.path.basename(csv_fname)),
+        'rows': num_rows,
+    }
+
+
+def _write_manifest(output_path, parts):
+    """Writes the list of CSV parts to be merged for the import."""
+    manifest = {
+        'columns': _CSV_COLUMNS,
+        'parts': sorted(parts, key=lambda part: part['path']),
+    }
+    with open(os.path.join(output_path, _MANIFEST_FILENAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def process(raw_data_path, output_path, verbose, num_workers=None):
+    """Processes decennial census zip-files and produces CSV files.
+
+    Every state or US directory of every year is processed as a separate task
+    in a pool of 'num_workers' processes (number of CPUs if None), producing
+    one CSV part in <output_path>/<year>/. The parts are listed in
+    <output_path>/manifest.json.
+    """
+    tasks = []
     for year in _YEARS:
-        print('Processing year ' + year)
-
         year_output_dir = os.path.join(output_path, year)
         os.makedirs(year_output_dir, exist_ok=True)
 
         # Path that contains states
         parent_dir = os.path.join(raw_data_path, year, _DIR_PREFIX, '*')
-        for geodir in glob.glob(parent_dir):
+        for geodir in sorted(glob.glob(parent_dir)):
             if os.path.isdir(geodir):
-                _process_geodir(year, geodir, year_output_dir, verbose)
+                tasks.append((year, geodir, year_output_dir, verbose))
+
+    num_workers = num_workers or os.cpu_count() or 1
+    if num_workers == 1 or len(tasks) <= 1:
+        parts = [_process_geodir(*task) for task in tasks]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=min(num_workers, len(tasks))) as executor:
+            futures = [
+                executor.submit(_process_geodir, *task) for task in tasks
+            ]
+            parts = [future.result() for future in futures]
+    _write_manifest(output_path, parts)
 
 
 def main(_):
-    process(FLAGS.raw_data_path, FLAGS.usc_output_path, FLAGS.verbose)
+    process(FLAGS.raw_data_path, FLAGS.usc_output_path, FLAGS.verbose,
+            FLAGS.num_workers)
 
 
 if __name__ == '__main__':
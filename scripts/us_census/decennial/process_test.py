@@ -1,6 +1,7 @@
 """Tests for process.py"""
 
 import csv
+import json
 import os
 import tempfile
 import sys
@@ -26,6 +27,23 @@ class ProcessTest(unittest.TestCase):
                         want = wantf.read()
                         self.assertEqual(got, want)
 
+    def test_parallel_with_manifest(self):
+        self.maxDiff = None
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            process(_RAW_DATA_DIR, tmp_dir, verbose=False, num_workers=3)
+            for csv_fname in _OUT_FILES:
+                with open(os.path.join(tmp_dir, csv_fname)) as gotf:
+                    with open(os.path.join(_EXPECTED_DIR, csv_fname)) as wantf:
+                        self.assertEqual(gotf.read(), wantf.read())
+            with open(os.path.join(tmp_dir, 'manifest.json')) as f:
+                manifest = json.load(f)
+            self.assertEqual(_OUT_FILES,
+                             [part['path'] for part in manifest['parts']])
+            for part in manifest['parts']:
+                with open(os.path.join(tmp_dir, part['path'])) as f:
+                    # The header is not counted.
+                    self.assertEqual(part['rows'], len(f.readlines()) - 1)
+
 
 if __name__ == '__main__':
     unittest.main()
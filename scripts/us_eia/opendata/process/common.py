@@ -17,13 +17,13 @@ import csv
 import json
 import logging
 import re
-from collections import defaultdict
 from sys import path
 
 # For import util.alpha2_to_dcid
 path.insert(1, '../../../../')
 import util.alpha2_to_dcid as alpha2_to_dcid
 import util.name_to_alpha2 as name_to_alpha2
+from util.counters import Counters
 
 from . import category
 
@@ -110,13 +110,6 @@ def _enumify(in_str):
     return in_str.title().replace(' ', '')
 
 
-def _print_counters(counters):
-    print('\nSTATS:')
-    for k in sorted(counters):
-        print(f"\t{k} = {counters[k]}")
-    print('')
-
-
 def _find_dc_place(raw_place, is_us_place, counters):
     if raw_place.startswith('eia/'):
         return raw_place
@@ -283,17 +276,19 @@ def process(dataset, dataset_name, in_json, out_csv, out_sv_mcf, out_svg_mcf,
     sv_membership_map = {}
     # Schema-ful SV -> Raw SV
     sv_schemaful2raw = {}
-    counters = defaultdict(lambda: 0)
+    counters = Counters(name=f'eia_{dataset}',
+                        rows_key='info_lines_processed',
+                        progress_steps=100000)
     sv_map = {}
     sv_name_map = {}
-    with open(in_json) as in_fp, open(out_csv, 'w', newline='') as csv_fp:
+    with open(in_json) as in_fp, open(out_csv, 'w', newline='') as csv_fp, \
+            counters.timer('process_series'):
         csvwriter = csv.DictWriter(csv_fp, fieldnames=_COLUMNS)
         csvwriter.writeheader()
 
         for line in in_fp:
             counters['info_lines_processed'] += 1
-            if counters['info_lines_processed'] % 100000 == 99999:
-                _print_counters(counters)
+            counters.print_progress()
 
             data = json.loads(line)
 
@@ -408,4 +403,5 @@ def process(dataset, dataset_name, in_json, out_csv, out_sv_mcf, out_svg_mcf,
         out_fp.write(_TMCF_STRING)
 
     print('=== FINAL COUNTERS ===')
-    _print_counters(counters)
+    counters.print_counters()
+    counters.write_report()
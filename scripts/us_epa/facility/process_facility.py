@@ -17,6 +17,9 @@ sys.path.append(os.path.join(_SCRIPT_PATH, '../..'))  # for Crosswalk
 from us_epa.util.crosswalk import Crosswalk
 from us_epa.util import facilities_helper as fh
 
+sys.path.append(os.path.join(_SCRIPT_PATH, '../../..'))  # for util
+from util.counters import Counters
+
 FLAGS = flags.FLAGS
 
 flags.DEFINE_string(
@@ -182,6 +185,7 @@ def counters_string():
 def process(input_tables_path, output_path):
     crosswalk = Crosswalk(os.path.join(input_tables_path, _CROSSWALK_FILE))
     processed_ids = set()
+    counters = Counters(name='us_epa_facility', rows_key='rows_written')
     with open(os.path.join(output_path, _OUT_FILE_PREFIX + '.csv'), 'w') as wfp:
         # IMPORTANT: We want to escape double quote (\") if it is specified in the cell
         # value, rather than the default of using two double quotes ("")
@@ -194,7 +198,7 @@ def process(input_tables_path, output_path):
         for table in _TABLES:
             table_path = os.path.join(input_tables_path, table + '.csv')
             rows_written = 0
-            with open(table_path, 'r') as rfp:
+            with open(table_path, 'r') as rfp, counters.timer(table):
                 cr = csv.DictReader(rfp)
                 for in_row in cr:
                     ghg_id = _v(table, in_row, 'FACILITY_ID')
@@ -238,6 +242,7 @@ def process(input_tables_path, output_path):
                             _str(lng),
                     }
                     rows_written += 1
+                    counters['rows_written'] += 1
                     if rows_written % 100 == 99:
                         print('Geo Resolution Stats: \n' + counters_string())
                     cw.writerow(out_row)
@@ -247,6 +252,11 @@ def process(input_tables_path, output_path):
     with open(os.path.join(output_path, _OUT_FILE_PREFIX + '.tmcf'), 'w') as fp:
         fp.write(_gen_tmcf())
 
+    for k, v in _COUNTERS.items():
+        counters[f'geo_{k}'] = len(v)
+    counters.print_counters()
+    counters.write_report()
+
 
 def main(_):
     # Validate inputs.
@@ -0,0 +1,168 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Helpers to find and resolve duplicate EPA Parent Company ids.
+
+Ids that share a location (an address or a facility) are duplicates if their
+lowercase forms are similar. Instead of comparing all the pairs of ids at a
+location, the ids are blocked by their rarest trigrams, ignoring the legal
+suffixes, and only ids that share a blocking key are compared. Duplicates are
+merged transitively with a union-find, and each id is mapped to the preferred
+id of its group.
+"""
+
+import collections
+import difflib
+import math
+import re
+
+# Ids whose similarity ratio is greater than this are duplicates.
+SIMILARITY_THRESHOLD = 0.8
+
+# Legal suffixes at the end of a lowercase id, which are ignored in the
+# blocking keys.
+_SUFFIXES_RE = re.compile(
+    r'(?:llc|lp|inc|incorporated|corp|corporation|co|company)+$')
+_KEY_SIZE = 3
+# Fraction of the trigrams of an id, the rarest ones, used as blocking keys.
+_KEY_FRACTION = 0.5
+
+
+class UnionFind:
+    """A disjoint-set forest of company ids."""
+
+    def __init__(self):
+        self._parent = {}
+        self._size = {}
+
+    def find(self, company_id):
+        """Returns the root of the set of company_id, adding it if needed."""
+        if company_id not in self._parent:
+            self._parent[company_id] = company_id
+            self._size[company_id] = 1
+            return company_id
+        parent = self._parent
+        while parent[company_id] != company_id:
+            # Path halving.
+            parent[company_id] = parent[parent[company_id]]
+            company_id = parent[company_id]
+        return company_id
+
+    def union(self, company_id_1, company_id_2):
+        """Merges the sets of the two ids. Returns False if already merged."""
+        root_1 = self.find(company_id_1)
+        root_2 = self.find(company_id_2)
+        if root_1 == root_2:
+            return False
+        if self._size[root_1] < self._size[root_2]:
+            root_1, root_2 = root_2, root_1
+        self._parent[root_2] = root_1
+        self._size[root_1] += self._size[root_2]
+        return True
+
+    def groups(self):
+        """Returns the sets with more than one id, as sorted lists."""
+        groups = collections.defaultdict(list)
+        for company_id in self._parent:
+            groups[self.find(company_id)].append(company_id)
+        return [sorted(g) for g in groups.values() if len(g) > 1]
+
+
+def _trigrams(company_id):
+    """Returns the trigrams of the lowercase id without its legal suffixes.
+
+    Ids shorter than a trigram are their own trigram.
+    """
+    name = company_id.lower()
+    name = _SUFFIXES_RE.sub('', name) or name
+    if len(name) <= _KEY_SIZE:
+        return {name}
+    return {name[i:i + _KEY_SIZE] for i in range(len(name) - _KEY_SIZE + 1)}
+
+
+def is_similar(name_1, name_2, threshold=SIMILARITY_THRESHOLD):
+    """Returns whether the difflib ratio of two names is above threshold.
+
+    The ratio is bounded by the lengths of the names and then by the
+    characters they share, so most pairs are rejected before the matching
+    blocks are computed.
+    """
+    total = len(name_1) + len(name_2)
+    if not total:
+        return True
+    if 2.0 * min(len(name_1), len(name_2)) / total <= threshold:
+        return False
+    matcher = difflib.SequenceMatcher(a=name_1, b=name_2)
+    return (matcher.quick_ratio() > threshold and matcher.ratio() > threshold)
+
+
+def find_similar_pairs(company_ids, threshold=SIMILARITY_THRESHOLD):
+    """Returns the sorted pairs of similar ids among the ids of a location.
+
+    Each id is blocked by the rarest half of its trigrams at the location, so
+    two ids which share more than half of the trigrams of each are always
+    compared. The similarity is the ratio of the lowercase ids.
+    """
+    company_ids = sorted(company_ids)
+    trigrams = [_trigrams(company_id) for company_id in company_ids]
+    frequency = collections.Counter(t for ts in trigrams for t in ts)
+    blocks = collections.defaultdict(list)
+    for i, ts in enumerate(trigrams):
+        keys = sorted(ts, key=lambda t: (frequency[t], t))
+        for key in keys[:math.ceil(_KEY_FRACTION * len(keys))]:
+            blocks[key].append(i)
+
+    candidates = set()
+    for block in blocks.values():
+        for n, i in enumerate(block):
+            for j in block[n + 1:]:
+                candidates.add((i, j))
+
+    names = [company_id.lower() for company_id in company_ids]
+    return [(company_ids[i], company_ids[j])
+            for i, j in sorted(candidates)
+            if is_similar(names[i], names[j], threshold)]
+
+
+def resolve(union_find, company_id_count, static_mappings):
+    """Maps each duplicate id to the preferred id of its group.
+
+    The preferred id is not a key of static_mappings, then is a value of
+    static_mappings, then has the most occurrences, then is the longest, then
+    comes first alphabetically.
+
+    Args:
+        union_find: UnionFind with the duplicates merged.
+        company_id_count: dict of the number of occurrences of each id.
+        static_mappings: dict of the manual id corrections.
+
+    Returns:
+        dict from each replaced id to its replacement, sorted by id.
+    """
+
+    static_values = set(static_mappings.values())
+
+    def _rank(company_id):
+        is_static_key = company_id in static_mappings
+        is_static_value = company_id in static_values
+        count = company_id_count.get(company_id, 0)
+        return (is_static_key, not is_static_value, -count, -len(company_id),
+                company_id)
+
+    mapping = {}
+    for group in union_find.groups():
+        preferred = min(group, key=_rank)
+        for company_id in group:
+            if company_id != preferred:
+                mapping[company_id] = preferred
+    return dict(sorted(mapping.items()))
@@ -0,0 +1,82 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for dedup.py"""
+
+import unittest
+from .dedup import UnionFind
+from .dedup import find_similar_pairs
+from .dedup import is_similar
+from .dedup import resolve
+
+
+class DedupTest(unittest.TestCase):
+
+    def test_is_similar(self):
+        self.assertTrue(is_similar('exxonmobilcorp', 'exxonmobilco'))
+        self.assertFalse(is_similar('exxonmobilcorp', 'exxonmobilchemicalco'))
+        # Rejected by the lengths alone.
+        self.assertFalse(is_similar('bp', 'bpamericaproductionco'))
+
+    def test_find_similar_pairs(self):
+        company_ids = {
+            'ChevronUsaInc', 'ChevronUsa', 'CHEVRONUSAINC', 'ChevronPhillips',
+            'ShellOilCo'
+        }
+        self.assertEqual([('CHEVRONUSAINC', 'ChevronUsa'),
+                          ('CHEVRONUSAINC', 'ChevronUsaInc'),
+                          ('ChevronUsa', 'ChevronUsaInc')],
+                         find_similar_pairs(company_ids))
+        self.assertEqual([], find_similar_pairs({'ShellOilCo'}))
+
+    def test_union_find(self):
+        union_find = UnionFind()
+        self.assertTrue(union_find.union('a', 'b'))
+        self.assertTrue(union_find.union('c', 'd'))
+        self.assertTrue(union_find.union('b', 'd'))
+        self.assertFalse(union_find.union('a', 'c'))
+        union_find.find('e')
+        self.assertEqual([['a', 'b', 'c', 'd']], union_find.groups())
+
+    def test_resolve(self):
+        union_find = UnionFind()
+        union_find.union('AbcInc', 'AbcLLC')
+        union_find.union('AbcLLC', 'AbcCorp')
+        union_find.union('XyzCo', 'XyzCorp')
+        union_find.union('AlcoaCorp', 'AlcoaInc')
+        union_find.union('AlcoaInc', 'AlcoaUsaCorp')
+        company_id_count = {
+            'AbcInc': 2,
+            'AbcLLC': 2,
+            'AbcCorp': 1,
+            'XyzCo': 3,
+            'XyzCorp': 3,
+            'AlcoaCorp': 5,
+            'AlcoaInc': 1,
+        }
+        # The replacement of the static correction wins over the
+        # occurrences, also against ids merged with it by similarity.
+        static_mappings = {'AlcoaCorp': 'AlcoaInc'}
+        company_id_count['AlcoaUsaCorp'] = 3
+        self.assertEqual(
+            {
+                'AbcCorp': 'AbcInc',
+                'AbcLLC': 'AbcInc',
+                'AlcoaCorp': 'AlcoaInc',
+                'AlcoaUsaCorp': 'AlcoaInc',
+                'XyzCo': 'XyzCorp',
+            }, resolve(union_find, company_id_count, static_mappings))
+
+
+if __name__ == '__main__':
+    unittest.main()
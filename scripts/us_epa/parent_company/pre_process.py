@@ -18,10 +18,8 @@ import pathlib
 import sys
 
 import csv
-import difflib
 import json
 import pandas as pd
-import re
 
 from absl import app
 from absl import flags
@@ -30,6 +28,7 @@ from absl import flags
 _SCRIPT_PATH = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(os.path.join(_SCRIPT_PATH, "../.."))
 from us_epa.util import facilities_helper as fh
+from us_epa.parent_company import dedup
 from us_epa.parent_company import static_corrections as sc
 
 flags.DEFINE_string("input_download_path", "tmp_data", "Input directory")
@@ -46,9 +45,6 @@ _TABLE = "V_PARENT_COMPANY_INFO"
 
 _EPA_FACILITY_GHG_ID = "epaGhgrpFacilityId"
 
-# Mapping which contains the company id duplicates.
-_DUPLICATE_MAPPING = {}
-
 
 def _str(v):
     if not v:
@@ -56,119 +52,30 @@ def _str(v):
     return '"' + v + '"'
 
 
-def _str_matching_replace(s):
-    s = s.replace('LLC', '')
-    s = s.replace('Corp', '')
-    s = s.replace('Inc', '')
-    s = s.replace('LP', '')
-
-    # Ends with "Co"
-    s = re.sub('Co$', '', s)
-    return s
-
-
-def _add_to_duplicate_mapping(company_id_1, company_id_2, company_id_count):
-
-    # If (company_id_1, company_id_2) exist already (in either direction),
-    # then no point continuing.
-    if ((company_id_1 in _DUPLICATE_MAPPING and
-         company_id_2 == _DUPLICATE_MAPPING[company_id_1]) or
-        (company_id_2 in _DUPLICATE_MAPPING and
-         company_id_1 == _DUPLICATE_MAPPING[company_id_2])):
-
-        return
-
-    # Determine whether company_id_1 should point to company_id_2 or the other
-    # way round.
-    # The primary criteria is:
-    #   1. The id with appears fewer times should be replaced.
-    #   2. If they are tied on the occurences, then replace the shorter id.
-    key = company_id_1
-    val = company_id_2
-    comp_count = company_id_count[company_id_2]
-
-    if ((company_id_count[company_id_1] > comp_count) or
-        ((company_id_count[company_id_1] == comp_count) and
-         (len(company_id_1) >= len(company_id_2)))):
-        key = company_id_2
-        val = company_id_1
-        comp_count = company_id_count[company_id_1]
-
-    # A previous mapping might already exist for 'key'. If so, only update the
-    # mapping if the company_id being pointed to occurs less frequently than the
-    # the 'value'.
-    existing_company = val
-    existing_count = comp_count
-    if key in _DUPLICATE_MAPPING:
-        existing_company = _DUPLICATE_MAPPING[key]
-        existing_count = company_id_count[existing_company]
-
-    # Only update if the company_id being mapped to has a greater count than
-    # the existing_count (for a different company id).
-    if ((comp_count >= existing_count) or
-        ((comp_count == existing_count) and
-         (len(val) >= len(existing_company)))):
-        _DUPLICATE_MAPPING[key] = val
-
-
-def _add_static_duplicates(static_mappings, company_id_count):
+def _add_static_duplicates(static_mappings, union_find, company_id_count):
     for k, v in static_mappings.items():
-        if k not in company_id_count:
-            company_id_count[k] = 0
-        if v not in company_id_count:
-            company_id_count[v] = 1
-
-        _add_to_duplicate_mapping(k, v, company_id_count)
+        # The replacements count once even if they are not in the table.
+        company_id_count.setdefault(k, 0)
+        company_id_count.setdefault(v, 1)
+        union_find.union(k, v)
 
 
-def _insert_overlaps(loc_map, company_id_count):
+def _insert_overlaps(loc_map, union_find):
     count_dupe_loc = 0
     loc_id_contained_count = 0
-    for a, v in loc_map.items():
-        v = list(v)
+    for v in loc_map.values():
         if len(v) > 1:
             count_dupe_loc += 1
-            id_match_found = False
-
-            id_pairs = {}
-            for i in range(len(v)):
-                for j in range(i + 1, len(v)):
-                    # Determine the SequenceMatcher ratio between the two ids.
-                    v_i = v[i]
-                    v_j = v[j]
-                    m1 = v_i.lower()
-                    m2 = v_j.lower()
-                    seq1 = difflib.SequenceMatcher(a=_str_matching_replace(m1),
-                                                   b=_str_matching_replace(m2))
-                    seq2 = difflib.SequenceMatcher(a=m1, b=m2)
-
-                    diff_score = max(seq1.ratio(), seq2.ratio())
-                    id_pairs.update({(v_i, v_j): diff_score})
-
-                    # If the score is > 80%, then add the duplicate relationship
-                    if (diff_score > 0.8):
-                        id_match_found = True
-                        _add_to_duplicate_mapping(v_i, v_j, company_id_count)
-
-            if id_match_found:
+            pairs = dedup.find_similar_pairs(v)
+            for v_i, v_j in pairs:
+                union_find.union(v_i, v_j)
+
+            if pairs:
                 loc_id_contained_count += 1
 
     return (count_dupe_loc, loc_id_contained_count)
 
 
-def _resolve_multiple_indirections():
-    # For multiple re-directions, map the final replacement ID for each of the
-    # IDs being replaced.
-    for k, v in _DUPLICATE_MAPPING.items():
-        v_loc = v
-        while (1):
-            if v_loc in _DUPLICATE_MAPPING.keys():
-                v_loc = _DUPLICATE_MAPPING[v_loc]
-            else:
-                _DUPLICATE_MAPPING[k] = v_loc
-                break
-
-
 def preprocess(input_table_path, existing_facilities_file):
     # Get the existing facility ids in a set.
     existing_facilities_path = os.path.join(input_table_path,
@@ -188,7 +95,8 @@ def preprocess(input_table_path, existing_facilities_file):
 
     # Enter all static mappings.
     print("First inserting static mappings...")
-    _add_static_duplicates(sc.company_id_mappings, company_id_count)
+    union_find = dedup.UnionFind()
+    _add_static_duplicates(sc.company_id_mappings, union_find, company_id_count)
 
     print("Reading Table Info data...")
     with open(input_table, "r") as rfp:
@@ -240,15 +148,14 @@ def preprocess(input_table_path, existing_facilities_file):
 
     print("Determining Address duplicates...")
     (count_dupe_addr,
-     address_id_contained_count) = _insert_overlaps(address_map,
-                                                    company_id_count)
+     address_id_contained_count) = _insert_overlaps(address_map, union_find)
     print("Determining Facility duplicates...")
     (count_dupe_facility,
-     facility_id_contained_count) = _insert_overlaps(facility_map,
-                                                     company_id_count)
+     facility_id_contained_count) = _insert_overlaps(facility_map, union_find)
 
-    print("Resolving duplicate indirections..")
-    _resolve_multiple_indirections()
+    print("Resolving duplicate groups...")
+    duplicate_mapping = dedup.resolve(union_find, company_id_count,
+                                      sc.company_id_mappings)
 
     # Write.
     print("Writing to file...")
@@ -259,8 +166,12 @@ def preprocess(input_table_path, existing_facilities_file):
                                 escapechar="\\")
         writer.writeheader()
 
-        for k, v in dict(sorted(_DUPLICATE_MAPPING.items())).items():
-            d = {"Id": k, "MappedTo": v, "Occurences": company_id_count[v]}
+        for k, v in duplicate_mapping.items():
+            d = {
+                "Id": k,
+                "MappedTo": v,
+                "Occurences": company_id_count.get(v, 0)
+            }
             writer.writerow(d)
             num_rows_written += 1
 
@@ -271,10 +182,10 @@ def preprocess(input_table_path, existing_facilities_file):
     print("Unique Facilities: ", len(relevant_facility_ids))
     print("Unique Company Names: ", len(unique_company_names))
 
-    print("Duplicate Keys: ", len(_DUPLICATE_MAPPING))
+    print("Duplicate Keys: ", len(duplicate_mapping))
     print("Unique (before) Company Ids: ", len(unique_company_ids))
     print("Unique (after) Company Ids: ",
-          len(unique_company_ids) - len(_DUPLICATE_MAPPING))
+          len(unique_company_ids) - len(duplicate_mapping))
     print("****************")
     print("duplicate address = ", count_dupe_addr)
     print("duplicate address, id match found = ", address_id_contained_count)
@@ -20,6 +20,7 @@ import sys
 import csv
 import datacommons
 import json
+import numpy as np
 import pandas as pd
 
 from absl import app
@@ -201,33 +202,71 @@ def _get_county(company_id, zip, year):
     return county
 
 
-# Returns a mapping from a key to value.
-# key: (company_id, StatVar, Obs Period, Obs Date)
-# value: a map of all elements in the Key and the observed Value multiplied by
-#   the percentage ownership.
-def _get_key_val_for_svobs(facility_id, stat_var, facility_comp_ownership,
-                           svobs_series):
-    key_val = {}
-    for svo_dict in svobs_series:
-        for dt, v in svo_dict['val'].items():
-            if (facility_id, dt) in facility_comp_ownership:
-                for company_id, percentage in facility_comp_ownership[(
-                        facility_id, dt)].items():
-                    key = (company_id, stat_var, svo_dict['observationPeriod'],
-                           dt)
-                    if key not in key_val:
-                        key_val[key] = {}
-                    key_val.update({
-                        key: {
-                            _PARENT_COMPANY_DCID: company_id,
-                            _SV_MEASURED: stat_var,
-                            _OBSERVATION_PERIOD: svo_dict['observationPeriod'],
-                            _OBSERVATION_DATE: dt,
-                            _SVO_VAL: v * float(percentage) / 100
-                        }
-                    })
-
-    return key_val
+# Resolves the counties of all the zips of the input table at once, so that
+# _get_county() does not query the DC API one zip at a time.
+def _prefetch_counties(input_table):
+    zips = set()
+    with open(input_table, "r") as rfp:
+        for in_row in csv.DictReader(rfp):
+            zip_code = fh.v(_TABLE,
+                            in_row,
+                            "PARENT_CO_ZIP",
+                            table_prefix=_TABLE_PREFIX)[:5]
+            if zip_code and zip_code != "00000":
+                zips.add("zip/" + zip_code)
+    fh.get_county_candidates_batch(zips)
+
+
+# Returns a table of the facility observations with one row per facility,
+# StatVar, Obs Period, Obs Date and the observed Value.
+def _facility_svobs_frame(facility_svo_dict):
+    columns = {
+        _EPA_FACILITY_GHG_ID: [],
+        _SV_MEASURED: [],
+        _OBSERVATION_PERIOD: [],
+        _OBSERVATION_DATE: [],
+        _SVO_VAL: [],
+    }
+    for facility_id, sv_dict in facility_svo_dict.items():
+        for sv, svobs in sv_dict.items():
+            if not svobs:
+                continue
+            for svo_dict in svobs['sourceSeries']:
+                num_obs = len(svo_dict['val'])
+                columns[_EPA_FACILITY_GHG_ID].extend([facility_id] * num_obs)
+                columns[_SV_MEASURED].extend([sv] * num_obs)
+                columns[_OBSERVATION_PERIOD].extend(
+                    [svo_dict['observationPeriod']] * num_obs)
+                columns[_OBSERVATION_DATE].extend(svo_dict['val'].keys())
+                columns[_SVO_VAL].extend(svo_dict['val'].values())
+    svobs_df = pd.DataFrame(columns)
+    svobs_df[_SVO_VAL] = svobs_df[_SVO_VAL].astype(float)
+
+    # If several source series of a facility have an observation for the same
+    # date, the one of the last series is used.
+    keys = [
+        _EPA_FACILITY_GHG_ID, _SV_MEASURED, _OBSERVATION_PERIOD,
+        _OBSERVATION_DATE
+    ]
+    if svobs_df.duplicated(keys).any():
+        svobs_df[_SVO_VAL] = svobs_df.groupby(
+            keys, sort=False)[_SVO_VAL].transform('last')
+        svobs_df = svobs_df.drop_duplicates(keys)
+    return svobs_df
+
+
+# Returns a table of the (facility ID, year) to {company_id: percentage}
+# mapping with one row per facility, year and company.
+def _ownership_frame(facility_company_ownership):
+    rows = [(facility_id, year, company_id, float(percentage))
+            for (facility_id,
+                 year), companies in facility_company_ownership.items()
+            for company_id, percentage in companies.items()]
+    return pd.DataFrame(rows,
+                        columns=[
+                            _EPA_FACILITY_GHG_ID, _OBSERVATION_DATE,
+                            _PARENT_COMPANY_DCID, _PERCENT_OWNERSHIP
+                        ])
 
 
 # Read from the EpaParentCompanyOwnership.csv file generated while processing
@@ -295,6 +334,7 @@ def process_companies(input_table_path, existing_facilities_file,
         facility_ids = set(
             pd.read_csv(existing_facilities_path)[_EPA_FACILITY_GHG_ID].values)
         input_table = os.path.join(input_table_path, _TABLE + ".csv")
+        _prefetch_counties(input_table)
         rows_written = 0
         with open(input_table, "r") as rfp:
             cr = csv.DictReader(rfp)
@@ -409,57 +449,36 @@ def process_companies(input_table_path, existing_facilities_file,
 
 
 def process_svobs(svobs_path, facility_company_ownership, facility_svo_dict):
-    # Create a map where key: (company_id, statVar, obsPeriod, year)
-    # and value: the svobs value multiplied by the percentage ownership.
-    # Note that the same key may appear more than once. This happens when the
-    # company and year combination applies to multiple companies. Therefore, we
-    # add the (value * percentage) across all the multiple facilities, for the
-    # same key.
-    company_svo_dict = {}
-    for facility_id, sv_dict in facility_svo_dict.items():
-        for sv, svobs in sv_dict.items():
-            if not svobs:
-                continue
-
-            # Construct a key comprising the Company ID, SV, Year and
-            # Obs Period. A company may own several facilities in a given year
-            # and the same SV may be present for those facilities in the same
-            # year. Therefore, we need to sum the values of the observations.
-            key_val = _get_key_val_for_svobs(facility_id, sv,
-                                             facility_company_ownership,
-                                             svobs['sourceSeries'])
-            for (k, v) in key_val.items():
-                if k not in company_svo_dict:
-                    company_svo_dict[k] = {
-                        _PARENT_COMPANY_DCID: v[_PARENT_COMPANY_DCID],
-                        _SV_MEASURED: v[_SV_MEASURED],
-                        _OBSERVATION_PERIOD: v[_OBSERVATION_PERIOD],
-                        _OBSERVATION_DATE: v[_OBSERVATION_DATE],
-                        _SVO_VAL: 0
-                    }
-                company_svo_dict[k][_SVO_VAL] += v[_SVO_VAL]
+    # The facility observations are joined with the ownership on the facility
+    # and year, and each value is multiplied by the percentage ownership.
+    # A company may own several facilities in a given year and the same SV may
+    # be present for those facilities in the same year. Therefore, the values
+    # are summed for each (company_id, statVar, obsPeriod, year).
+    company_svobs = _facility_svobs_frame(facility_svo_dict).merge(
+        _ownership_frame(facility_company_ownership),
+        on=[_EPA_FACILITY_GHG_ID, _OBSERVATION_DATE])
+    company_svobs[_SVO_VAL] = (company_svobs[_SVO_VAL] *
+                               company_svobs[_PERCENT_OWNERSHIP] / 100)
+
+    # The rows are in the order in which the keys first appear, and the values
+    # are summed in the order of the facilities.
+    keys = [
+        _PARENT_COMPANY_DCID, _SV_MEASURED, _OBSERVATION_PERIOD,
+        _OBSERVATION_DATE
+    ]
+    groups = company_svobs.groupby(keys, sort=False).ngroup().values
+    values = np.zeros(groups.max() + 1 if len(groups) else 0)
+    np.add.at(values, groups, company_svobs[_SVO_VAL].values)
+    company_svobs = company_svobs.drop_duplicates(keys).assign(
+        **{_SVO_VAL: values})
 
     out_path = os.path.join(svobs_path, _OUT_SVOBS_FILE_PREFIX)
     with open(out_path + ".csv", "w") as svofp:
-        writer = csv.DictWriter(svofp,
-                                _SVOBS_CLEAN_CSV_HDR,
-                                doublequote=False,
-                                escapechar="\\")
-        writer.writeheader()
-
-        num_rows = 0
-        for k, v in company_svo_dict.items():
-            if num_rows % 1000 == 0:
-                print("processed %d rows" % num_rows)
-            out_row = {
-                _PARENT_COMPANY_DCID: v[_PARENT_COMPANY_DCID],
-                _SV_MEASURED: v[_SV_MEASURED],
-                _OBSERVATION_PERIOD: v[_OBSERVATION_PERIOD],
-                _SVO_VAL: v[_SVO_VAL],
-                _OBSERVATION_DATE: v[_OBSERVATION_DATE]
-            }
-            writer.writerow(out_row)
-            num_rows += 1
+        writer = csv.writer(svofp, doublequote=False, escapechar="\\")
+        writer.writerow(_SVOBS_CLEAN_CSV_HDR)
+        writer.writerows(
+            zip(*[company_svobs[c].tolist() for c in _SVOBS_CLEAN_CSV_HDR]))
+        print("Produced %d rows" % len(company_svobs))
 
     with open(out_path + ".tmcf", "w") as fp:
         fp.write(_gen_svobs_tmcf())
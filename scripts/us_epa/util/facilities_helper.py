@@ -26,6 +26,10 @@ from requests.structures import CaseInsensitiveDict
 from requests.exceptions import HTTPError
 
 _COUNTY_CANDIDATES_CACHE = {}
+# Maximum number of property values returned by a DC API query.
+_DC_API_LIMIT = 100
+# Number of zctas per query for their county candidates.
+_ZCTA_BATCH_SIZE = 20
 
 
 def v(table, row, col, table_prefix=""):
@@ -125,6 +129,38 @@ def get_county_candidates(zcta):
     return candidate_lists
 
 
+def get_county_candidates_batch(zctas, batch_size=_ZCTA_BATCH_SIZE):
+    """Returns the county candidates of many zctas, as get_county_candidates().
+
+       The zctas which are not cached are queried in batches. The API limits
+       the number of values of a query, so the zctas of a batch which reaches
+       the limit are queried one at a time.
+
+       Returns: map of each zcta to its two candidate county lists.
+    """
+    missing = sorted(set(z for z in zctas if z not in _COUNTY_CANDIDATES_CACHE))
+    for i in range(0, len(missing), batch_size):
+        batch = missing[i:i + batch_size]
+        candidates = {z: [] for z in batch}
+        for prop in ['containedInPlace', 'geoOverlaps']:
+            resp = datacommons.get_property_values(batch,
+                                                   prop,
+                                                   out=True,
+                                                   value_type='County',
+                                                   limit=_DC_API_LIMIT)
+            if sum(len(v) for v in resp.values()) >= _DC_API_LIMIT:
+                candidates = None
+                break
+            for z in batch:
+                candidates[z].append(sorted(resp.get(z, [])))
+        if candidates is None:
+            for z in batch:
+                get_county_candidates(z)
+        else:
+            _COUNTY_CANDIDATES_CACHE.update(candidates)
+    return {z: _COUNTY_CANDIDATES_CACHE[z] for z in zctas}
+
+
 def _dc_sv_query(dc_api_url, data_string, svs=set()):
     headers = CaseInsensitiveDict()
     headers["Content-Type"] = "application/json"
@@ -0,0 +1,180 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Counters, stage timers and throughput stats for import scripts.
+
+Counters behaves like the `defaultdict(lambda: 0)` most processing scripts
+already pass around, so existing `counters['foo'] += 1` call sites keep working.
+On top of that it tracks time spent per stage, rows/sec for a chosen counter
+and peak memory, prints periodic progress lines and writes a JSON run report.
+
+Typical usage:
+
+    counters = Counters(name='my_import', rows_key='rows_processed')
+    with counters.timer('read'):
+        for row in reader:
+            counters['rows_processed'] += 1
+            counters.print_progress()
+    counters.print_counters()
+    counters.write_report()
+
+When run by the import executor, the environment variable RUN_REPORT_ENV holds
+the path where the executor expects the report. write_report() without a path
+writes there, and is a no-op when the variable is not set.
+"""
+
+import contextlib
+import json
+import os
+import resource
+import sys
+import time
+
+# Environment variable with the path for the JSON run report.
+# Keep in sync with import-automation/executor/app/executor/import_executor.py
+RUN_REPORT_ENV = 'DC_IMPORT_RUN_REPORT'
+
+
+def peak_rss_mb() -> float:
+    """Returns the peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        # ru_maxrss is in bytes on macOS and in KB on Linux.
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+class Counters(dict):
+    """Dict of counters with stage timers and throughput stats.
+
+    Missing keys read as 0, like a `defaultdict(lambda: 0)`.
+
+    Attributes:
+        name: Name of the run, added to the report.
+        rows_key: Counter used to compute rows/sec and to trigger progress
+            lines.
+        progress_steps: Print a progress line every progress_steps rows of
+            rows_key. 0 disables the periodic progress lines.
+        start_time: time.perf_counter() value when the counters were created.
+        stage_seconds: Dict of stage name to total seconds spent in it.
+    """
+
+    def __init__(self,
+                 name: str = '',
+                 rows_key: str = None,
+                 progress_steps: int = 0,
+                 output=None):
+        super().__init__()
+        self.name = name
+        self.rows_key = rows_key
+        self.progress_steps = progress_steps
+        self.start_time = time.perf_counter()
+        self.stage_seconds = {}
+        self._output = output
+        self._last_progress_rows = 0
+
+    def __missing__(self, key):
+        return 0
+
+    def add(self, key: str, value=1):
+        """Increments the counter key by value."""
+        self[key] += value
+
+    @contextlib.contextmanager
+    def timer(self, stage: str):
+        """Context manager that adds the time spent within it to the stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds[stage] = (self.stage_seconds.get(stage, 0) +
+                                         time.perf_counter() - start)
+
+    def elapsed_seconds(self) -> float:
+        """Returns seconds elapsed since the counters were created."""
+        return time.perf_counter() - self.start_time
+
+    def rows_per_sec(self, key: str = None) -> float:
+        """Returns the rate of the counter key (default rows_key) per second."""
+        key = key or self.rows_key
+        elapsed = self.elapsed_seconds()
+        if not key or elapsed <= 0:
+            return 0.0
+        return self[key] / elapsed
+
+    def _print(self, *args):
+        print(*args, file=self._output or sys.stdout)
+
+    def print_counters(self):
+        """Prints all counters, stage times, rate and peak memory."""
+        self._print('\nSTATS:')
+        for k in sorted(self):
+            self._print(f'\t{k} = {self[k]}')
+        for stage in sorted(self.stage_seconds):
+            self._print(
+                f'\ttime_{stage}_seconds = {self.stage_seconds[stage]:.2f}')
+        if self.rows_key:
+            self._print(f'Processing rate: {self.rows_per_sec():.2f} rows/sec')
+        self._print(f'Peak RSS: {peak_rss_mb():.1f} MB')
+        self._print('')
+        (self._output or sys.stdout).flush()
+
+    def print_progress(self) -> bool:
+        """Prints a progress line if progress_steps rows were processed.
+
+        Returns:
+            True if a progress line was printed.
+        """
+        if not self.progress_steps or not self.rows_key:
+            return False
+        rows = self[self.rows_key]
+        if rows - self._last_progress_rows < self.progress_steps:
+            return False
+        self._last_progress_rows = rows
+        self._print(f'[{self.name or "progress"}] {self.rows_key}={rows} '
+                    f'elapsed={self.elapsed_seconds():.1f}s '
+                    f'rate={self.rows_per_sec():.2f} rows/sec '
+                    f'peak_rss={peak_rss_mb():.1f}MB')
+        (self._output or sys.stdout).flush()
+        return True
+
+    def report(self) -> dict:
+        """Returns the run report as a JSON serializable dict."""
+        return {
+            'name': self.name,
+            'counters': {
+                k: self[k] for k in sorted(self)
+            },
+            'stage_seconds': dict(self.stage_seconds),
+            'elapsed_seconds': self.elapsed_seconds(),
+            'rows_key': self.rows_key,
+            'rows_per_sec': self.rows_per_sec(),
+            'peak_rss_mb': peak_rss_mb(),
+        }
+
+    def write_report(self, path: str = None) -> str:
+        """Writes the run report as JSON.
+
+        Args:
+            path: Path of the report file. Defaults to the path in the
+                RUN_REPORT_ENV environment variable.
+
+        Returns:
+            Path of the report written, None if no path was available.
+        """
+        path = path or os.environ.get(RUN_REPORT_ENV)
+        if not path:
+            return None
+        with open(path, 'w') as fp:
+            json.dump(self.report(), fp, indent=2, default=str)
+        return path
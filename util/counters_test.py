@@ -0,0 +1,81 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for util/counters.py"""
+
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from util import counters
+
+
+class CountersTest(unittest.TestCase):
+
+    def test_missing_keys_read_as_zero(self):
+        c = counters.Counters()
+        self.assertEqual(c['missing'], 0)
+        c['rows'] += 2
+        c.add('rows')
+        c.add('bytes', 10)
+        self.assertEqual(c, {'rows': 3, 'bytes': 10})
+
+    def test_timer(self):
+        c = counters.Counters()
+        with c.timer('read'):
+            pass
+        with c.timer('read'):
+            pass
+        self.assertIn('read', c.stage_seconds)
+        self.assertGreaterEqual(c.stage_seconds['read'], 0)
+
+    def test_print_progress(self):
+        output = io.StringIO()
+        c = counters.Counters(name='test',
+                              rows_key='rows',
+                              progress_steps=10,
+                              output=output)
+        printed = 0
+        for _ in range(25):
+            c['rows'] += 1
+            if c.print_progress():
+                printed += 1
+        self.assertEqual(printed, 2)
+        self.assertIn('[test] rows=20', output.getvalue())
+
+    def test_write_report(self):
+        c = counters.Counters(name='test', rows_key='rows')
+        c['rows'] += 5
+        with c.timer('write'):
+            pass
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'report.json')
+            with mock.patch.dict(os.environ, {counters.RUN_REPORT_ENV: path}):
+                self.assertEqual(c.write_report(), path)
+            with open(path) as fp:
+                report = json.load(fp)
+        self.assertEqual(report['name'], 'test')
+        self.assertEqual(report['counters'], {'rows': 5})
+        self.assertIn('write', report['stage_seconds'])
+        self.assertGreater(report['peak_rss_mb'], 0)
+
+    def test_write_report_without_path(self):
+        with mock.patch.dict(os.environ, clear=True):
+            self.assertIsNone(counters.Counters().write_report())
+
+
+if __name__ == '__main__':
+    unittest.main()
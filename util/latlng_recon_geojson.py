@@ -18,7 +18,9 @@ See latlng_recon_geojson_test.py for usage example.
 
 import datacommons as dc
 import json
+import numpy as np
 from shapely import geometry
+from shapely import prepared
 
 _WORLD = 'Earth'
 _USA = 'country/USA'
@@ -45,6 +47,38 @@ def _get_continent_map(countries):
     return dc.get_property_values(countries, 'containedInPlace')
 
 
+def _first_containing(geojsons, lats, lons, todo):
+    """Returns the first place in geojsons that contains each point.
+
+    Args:
+        geojsons: Map of place DCID to its geometry.
+        lats: numpy array of latitudes.
+        lons: numpy array of longitudes.
+        todo: numpy boolean array of the points to look up.
+
+    Returns:
+        numpy object array with the place DCID of each point, or None.
+    """
+    places = np.full(len(lats), None, dtype=object)
+    todo = todo.copy()
+    for p, gj in geojsons.items():
+        if not todo.any():
+            break
+        # Only test the points in the bounding box of the place.
+        min_lon, min_lat, max_lon, max_lat = gj.bounds
+        candidates = np.flatnonzero(todo & (lons >= min_lon) &
+                                    (lons <= max_lon) & (lats >= min_lat) &
+                                    (lats <= max_lat))
+        if not len(candidates):
+            continue
+        prepared_gj = prepared.prep(gj)
+        for i in candidates:
+            if prepared_gj.contains(geometry.Point(lons[i], lats[i])):
+                places[i] = p
+                todo[i] = False
+    return places
+
+
 class LatLng2Places:
     """Helper class to map lat/lng to DC places using GeoJSON files.
 
@@ -79,3 +113,27 @@ class LatLng2Places:
             cip.append(country)
             cip.extend(self._continent_map[country])
         return cip
+
+    def resolve_many(self, lats, lons):
+        """Given lists of lats and longs returns, for each point, the list of
+        place DCIDs that contain it, like resolve does.
+
+        Each GeoJSON is only tested against the points in its bounding box,
+        which makes this much faster than calling resolve for each point.
+        """
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        countries = _first_containing(self._country_geojsons, lats, lons,
+                                      np.ones(len(lats), dtype=bool))
+        states = _first_containing(self._us_state_geojsons, lats, lons,
+                                   countries == _USA)
+        result = []
+        for country, state in zip(countries, states):
+            cip = []
+            if state:
+                cip.append(state)
+            if country:
+                cip.append(country)
+                cip.extend(self._continent_map[country])
+            result.append(cip)
+        return result
@@ -60,6 +60,20 @@ class LatlngReconGeojsonTest(unittest.TestCase):
         # Bi-rite creamery in SF exists in neither.
         self.assertEqual(ll2p.resolve(37.762, -122.426), [])
 
+    @mock.patch('util.latlng_recon_geojson._get_geojsons')
+    @mock.patch('util.latlng_recon_geojson._get_continent_map')
+    def test_resolve_many(self, mock_cmap, mock_gj):
+        mock_cmap.return_value = {'country/USA': ['northamerica']}
+        mock_gj.side_effect = _mock_get_gj
+
+        ll2p = latlng_recon_geojson.LatLng2Places()
+        lats = [37.391, 37.419, 37.762, 37.391]
+        lons = [-122.081, -122.079, -122.426, -122.081]
+        self.assertEqual(
+            ll2p.resolve_many(lats, lons),
+            [ll2p.resolve(lat, lon) for lat, lon in zip(lats, lons)])
+        self.assertEqual(ll2p.resolve_many([], []), [])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,65 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Micro-benchmark of util.mcf_template_filler.
+
+Compares the compiled Filler with legacy_fill of the tests, which validates,
+prunes and formats the template on every call as Filler did before templates
+were compiled.
+
+Usage: python3 -m util.mcf_template_filler_benchmark --num_dicts=100000
+"""
+
+import io
+import timeit
+
+from absl import app
+from absl import flags
+
+from util import mcf_template_filler
+from util.mcf_template_filler_test import (OBS_TEMPLATE, POP_TEMPLATE,
+                                           REQUIRED_VARS, legacy_fill,
+                                           make_dicts)
+
+FLAGS = flags.FLAGS
+flags.DEFINE_integer('num_dicts', 100000, 'Number of dicts to fill in.')
+flags.DEFINE_integer('repeat', 3, 'Number of times to repeat each run.')
+
+TEMPLATE = POP_TEMPLATE + OBS_TEMPLATE
+
+
+def main(_):
+    dicts = make_dicts(FLAGS.num_dicts)
+
+    def run_legacy():
+        out = io.StringIO()
+        for template_dict in dicts:
+            out.write(legacy_fill(TEMPLATE, REQUIRED_VARS, template_dict))
+        return out.getvalue()
+
+    def run_compiled():
+        out = io.StringIO()
+        mcf_template_filler.Filler(TEMPLATE,
+                                   REQUIRED_VARS).fill_many(dicts, out)
+        return out.getvalue()
+
+    assert run_legacy() == run_compiled()
+    legacy = min(timeit.repeat(run_legacy, number=1, repeat=FLAGS.repeat))
+    compiled = min(timeit.repeat(run_compiled, number=1, repeat=FLAGS.repeat))
+    print('legacy:   %.3fs (%.0f dicts/s)' % (legacy, len(dicts) / legacy))
+    print('compiled: %.3fs (%.0f dicts/s)' % (compiled, len(dicts) / compiled))
+    print('speedup:  %.1fx' % (legacy / compiled))
+
+
+if __name__ == '__main__':
+    app.run(main)
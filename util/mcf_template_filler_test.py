@@ -18,6 +18,8 @@
 # pylint: disable=missing-function-docstring
 
 from __future__ import absolute_import
+import io
+import re
 import unittest
 
 from util import mcf_template_filler
@@ -56,6 +58,65 @@ measuredProperty: dcs:{mprop}
 measuredValue: {mval}
 """
 
+REQUIRED_VARS = ('geo_id', 'year', 'mprop', 'mval')
+
+
+def legacy_fill(template, required_vars, template_dict):
+    """Fills in a template by validating, pruning and formatting it on
+    every call, as Filler did before templates were compiled."""
+    template_copy = []
+    for line in template.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        matches = re.findall(r'\{(.*?)\}', line)
+        if not matches:
+            template_copy.append(line)
+            continue
+        if not (line.startswith(('Node: ', 'observedNode: ')) or
+                re.fullmatch(r'\{p[0-9]\}:\s\{v[0-9]\}', line)):
+            assert (len(
+                set(matches)) == 1), 'Line should have only 1 var:\n%s' % line
+        write_line = True
+        for template_var in matches:
+            if template_var in template_dict:
+                if not isinstance(template_dict[template_var], (int, float)):
+                    assert template_dict[
+                        template_var], 'Non-truthy value: %s' % template_var
+            elif template_var not in required_vars:
+                if line.startswith(('Node: ', 'observedNode: ')):
+                    line = line.replace('{%s}' % template_var, '')
+                else:
+                    write_line = False
+                    break
+            else:
+                raise ValueError('Required variable %s missing in line %s.' %
+                                 (template_var, line))
+        if write_line:
+            if line.startswith('Node: '):
+                line = '\n' + line
+            template_copy.append(line)
+    return '%s\n' % '\n'.join(template_copy).format_map(template_dict)
+
+
+def make_dicts(num_dicts):
+    """Returns dicts for POP_TEMPLATE and OBS_TEMPLATE, some of which miss
+    optional variables."""
+    dicts = []
+    for i in range(num_dicts):
+        template_dict = {
+            'geo_id': 'geoId/%02d' % (i % 56),
+            'naics_code': str(11 + i % 90),
+            'tax_status': 'ExemptFromTax',
+            'year': str(2000 + i % 20),
+            'mprop': 'count',
+            'mval': i,
+        }
+        if i % 3:
+            template_dict['operation_type'] = 'Manufacturer'
+        dicts.append(template_dict)
+    return dicts
+
 
 class MCFTemplateFillerTest(unittest.TestCase):
 
@@ -208,6 +269,45 @@ location: dcid:badPlace
         with self.assertRaises(ValueError):
             mcf_template_filler.Filler(POP_TEMPLATE + bad_node)
 
+    def test_multiple_vars_in_line(self):
+        bad_line = """
+Node: Pop_{geo_id}
+location: dcid:{geo_id}_{naics_code}
+"""
+        with self.assertRaises(ValueError):
+            mcf_template_filler.Filler(bad_line)
+
+        pv_line = """
+Node: Pop_{geo_id}
+{p1}: {v1}
+"""
+        templater = mcf_template_filler.Filler(pv_line)
+        self.assertEqual(
+            '\nNode: Pop_05\nage: dcs:Years5\n',
+            templater.fill({
+                'geo_id': '05',
+                'p1': 'age',
+                'v1': 'dcs:Years5'
+            }))
+        self.assertEqual('\nNode: Pop_05\n', templater.fill({'geo_id': '05'}))
+
+    def test_fill_many(self):
+        templater = mcf_template_filler.Filler(POP_TEMPLATE + OBS_TEMPLATE,
+                                               required_vars=REQUIRED_VARS)
+        dicts = make_dicts(10)
+        out = io.StringIO()
+        self.assertEqual(10, templater.fill_many(dicts, out))
+        self.assertEqual(''.join(templater.fill(d) for d in dicts),
+                         out.getvalue())
+
+    def test_same_as_legacy_fill(self):
+        template = POP_TEMPLATE + OBS_TEMPLATE
+        templater = mcf_template_filler.Filler(template, REQUIRED_VARS)
+        for template_dict in make_dicts(6):
+            self.assertEqual(
+                legacy_fill(template, REQUIRED_VARS, template_dict),
+                templater.fill(template_dict))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -40,3 +40,9 @@ class ShardingWriter:
             self._fptr = None
             self._nbytes = 0
             self._shard_id += 1
+
+    def close(self):
+        """Close the current sharded file, if any."""
+        if self._fptr:
+            self._fptr.close()
+            self._fptr = None
@@ -13,7 +13,8 @@
 # limitations under the License.
 """A utility to generate dcid for statistical variables."""
 
-import copy
+import bisect
+import functools
 import re
 import os
 import sys
@@ -30,6 +31,12 @@ from soc_codes_names import SOC_MAP
 #pylint: enable=import-error
 
 # Global constants
+# Occupation names of SOCv2018 codes as used in dcids.
+_SOC_NAMES = {code: 'SOC' + name for code, name in SOC_MAP.items()}
+
+# Maximum number of distinct statistical variables whose dcids are cached.
+_STATVAR_DCID_CACHE_SIZE = 65536
+
 # Regex to match the quantity notations - [value quantity], [quantity value]
 # Example matches: [2 Person], [Person 2]
 _QUANTITY_REGEX_1 = re.compile(
@@ -48,10 +55,10 @@ _QUANTITY_RANGE_REGEX_2 = re.compile(r'\[(?P<quantity>[A-Za-z_/\d]+) '
                                      r'(?P<upper_limit>-|-?\d+(\.\d+)?)\]')
 
 # These are the default properties ignored during dcid generation
-_DEFAULT_IGNORE_PROPS = ('unit', 'Node', 'memberOf', 'typeOf',
-                         'constraintProperties', 'name', 'description',
-                         'descriptionUrl', 'label', 'url', 'alternateName',
-                         'scalingFactor')
+_DEFAULT_IGNORE_PROPS = frozenset(
+    ('unit', 'Node', 'memberOf', 'typeOf', 'constraintProperties', 'name',
+     'description', 'descriptionUrl', 'label', 'url', 'alternateName',
+     'scalingFactor'))
 
 # Regex to match prefixes to be removed from constraints. The regex checks for
 # specific prefixes followed by an upper case letter or underscore. This helps
@@ -120,6 +127,12 @@ _NAICS_CODE_REGEX = re.compile(r'(\d+-\d+|\d+)')
 # Example matches: 53-56, 11-21
 _NAICS_RANGE_REGEX = re.compile(r'(?P<lower_limit>\d+)-(?P<upper_limit>\d+)')
 
+# Codes in _NAICS_MAP that can be part of a range, as sorted ints, so that the
+# industries in a range are found without scanning every code in it. Codes
+# with leading zeros like '00' are only matched as single codes.
+_NAICS_RANGE_CODES = sorted(
+    int(code) for code in _NAICS_MAP if str(int(code)) == code)
+
 # Certain properties have text prepended, appended or replaced in the dcid to
 # improve readability. For example, p='householderRace', v='AsianAlone' is
 # changed to v='HouseholderRaceAsianAlone'. The initial map was picked from
@@ -289,6 +302,7 @@ _LEGACY_MAP = {
 }
 
 
+@functools.lru_cache(maxsize=4096)
 def _capitalize_process(word: str) -> str:
     """Capitalizes, removes namespaces, measurement constraint prefixes and
     underscores from a word.
@@ -392,13 +406,13 @@ def _naics_code_to_name(naics_val: str) -> str:
         upper_limit = int(m_dict['upper_limit'])
 
         prev_str = None  # To ensure the same industry is not added twice
-        for code in range(lower_limit, upper_limit + 1):
-            code_str = str(code)
-            if code_str in _NAICS_MAP and prev_str != _NAICS_MAP[code_str]:
-                industry_str = industry_str + _NAICS_MAP[code_str]
-                prev_str = _NAICS_MAP[code_str]
-            else:
-                continue
+        start = bisect.bisect_left(_NAICS_RANGE_CODES, lower_limit)
+        end = bisect.bisect_right(_NAICS_RANGE_CODES, upper_limit)
+        for code in _NAICS_RANGE_CODES[start:end]:
+            industry = _NAICS_MAP[str(code)]
+            if prev_str != industry:
+                industry_str = industry_str + industry
+                prev_str = industry
 
         return industry_str
 
@@ -438,17 +452,13 @@ def _soc_code_to_name(soc_val: str) -> str:
         if the code is not in the SOC_MAP. Returns None if the string is empty.
     """
     if soc_val:
-        processed_str = soc_val
-
         # Remove namespaces
         soc_val_ns_removed = soc_val[soc_val.find(':') + 1:]
 
         # Strip SOCv2018/ to get the code
         soc_code = soc_val_ns_removed.replace('SOCv2018/', '')
 
-        if soc_code in SOC_MAP:
-            processed_str = 'SOC' + SOC_MAP[soc_code]
-        return processed_str
+        return _SOC_NAMES.get(soc_code, soc_val)
     return None
 
 
@@ -527,6 +537,7 @@ def _generate_boolean_value_name(prop: str, value: str) -> str:
     return None
 
 
+@functools.lru_cache(maxsize=4096)
 def _process_constraint_property(prop: str, value: str) -> str:
     """Processes constraint property, value and returns a name that can be used
     in dcid generation.
@@ -612,7 +623,10 @@ def get_statvar_dcid(stat_var_dict: dict, ignore_props: list = None) -> str:
           generation process, these properties will not be considered.
 
     Returns:
-        A string representing the dcid of the statistical variable.
+        A string representing the dcid of the statistical variable. Dcids are
+        cached by the properties and values that are not ignored, so
+        generating the dcid of a statistical variable seen before is cheap.
+        Use get_statvar_dcids for a batch of statistical variables.
 
     Caveats:
         1. Currently, there is no support for renaming ICD10 cause of death
@@ -630,6 +644,62 @@ def get_statvar_dcid(stat_var_dict: dict, ignore_props: list = None) -> str:
              the same dcid. The _PREPEND_APPEND_REPLACE_MAP can be modified to
              disambiguate in this case.
     """
+    return get_statvar_dcids([stat_var_dict], ignore_props)[0]
+
+
+def get_statvar_dcids(stat_var_dicts, ignore_props: list = None) -> list:
+    """Generates the dcids of a sequence of statistical variables.
+
+    Statistical variables that only differ in ignored properties share the
+    same cached dcid, so this is cheap for rows with few distinct variables.
+
+    Args:
+        stat_var_dicts: An iterable of dictionaries, see get_statvar_dcid.
+        ignore_props: See get_statvar_dcid.
+
+    Returns:
+        A list of the dcids as strings, in the order of stat_var_dicts.
+    """
+    if ignore_props is None:
+        ig_p = _DEFAULT_IGNORE_PROPS
+    else:
+        ig_p = _DEFAULT_IGNORE_PROPS.union(ignore_props)
+    dcids = []
+    for stat_var_dict in stat_var_dicts:
+        key = _statvar_key(stat_var_dict, ig_p)
+        try:
+            dcids.append(_cached_statvar_dcid(key))
+        except TypeError:
+            # Statistical variables with unhashable values are not cached.
+            dcids.append(_generate_statvar_dcid(dict(key)))
+    return dcids
+
+
+def _statvar_key(stat_var_dict: dict, ignore_props) -> tuple:
+    """Returns the properties of a statistical variable that are not ignored,
+    as a tuple of (property, value) tuples sorted by property."""
+    return tuple(
+        sorted((prop, value)
+               for prop, value in stat_var_dict.items()
+               if prop not in ignore_props))
+
+
+@functools.lru_cache(maxsize=_STATVAR_DCID_CACHE_SIZE)
+def _cached_statvar_dcid(key: tuple) -> str:
+    """Returns the dcid of a statistical variable given its _statvar_key."""
+    return _generate_statvar_dcid(dict(key))
+
+
+def _generate_statvar_dcid(svd: dict) -> str:
+    """Generates the dcid of a statistical variable.
+
+    Args:
+        svd: A dictionary with property: value of the statistical variable
+          without the ignored properties. It is modified during generation.
+
+    Returns:
+        A string representing the dcid of the statistical variable.
+    """
 
     # TODO: Renaming cause of death properties
     # TODO: Renaming DEA drug names
@@ -645,16 +715,6 @@ def get_statvar_dcid(stat_var_dict: dict, ignore_props: list = None) -> str:
 
     dcid_list = []
     denominator_suffix = ''
-    svd = copy.deepcopy(stat_var_dict)
-
-    if ignore_props is None:
-        ig_p = _DEFAULT_IGNORE_PROPS
-    else:
-        ig_p = copy.deepcopy(ignore_props)
-        ig_p.extend(_DEFAULT_IGNORE_PROPS)
-
-    for prop in ig_p:
-        svd.pop(prop, None)
 
     # measurementQualifier is added as a prefix
     add_prop_to_list('measurementQualifier', svd, dcid_list)
@@ -586,6 +586,47 @@ class TestStatVarDcidGenerator(unittest.TestCase):
         for val in soc_values:
             self.assertTrue(alphanumeric_regex.fullmatch(val) is not None)
 
+    def test_get_statvar_dcids(self):
+        statvar_dicts = [{
+            'typeOf': 'dcs:StatisticalVariable',
+            'populationType': 'dcs:Person',
+            'measuredProperty': 'dcs:count',
+            'statType': 'dcs:measuredValue',
+            'age': '[25 34 Years]',
+            'name': f'Person aged 25 to 34, row {i}'
+        } for i in range(3)]
+        statvar_dicts.append({
+            'populationType': 'Establishment',
+            'measuredProperty': 'count',
+            'naics': 'NAICS/1011-1013',
+            'statType': 'measuredValue'
+        })
+        original = [dict(d) for d in statvar_dicts]
+        dcids = statvar_dcid_generator.get_statvar_dcids(statvar_dicts)
+        self.assertEqual(['Count_Person_25To34Years'] * 3 + [
+            'Count_Establishment_NAICSNaturalResourcesMiningConstruction'
+            'Manufacturing'
+        ], dcids)
+        self.assertEqual(
+            [statvar_dcid_generator.get_statvar_dcid(d) for d in statvar_dicts],
+            dcids)
+        self.assertEqual(original, statvar_dicts)
+
+    def test_cached_by_props_not_ignored(self):
+        statvar_dcid_generator._cached_statvar_dcid.cache_clear()
+        statvar_dicts = [{
+            'populationType': 'Person',
+            'measuredProperty': 'count',
+            'gender': 'Female',
+            'description': f'Row {i}'
+        } for i in range(10)]
+        dcids = statvar_dcid_generator.get_statvar_dcids(
+            statvar_dicts, ignore_props=['gender'])
+        self.assertEqual(['Count_Person'] * 10, dcids)
+        cache_info = statvar_dcid_generator._cached_statvar_dcid.cache_info()
+        self.assertEqual(1, cache_info.misses)
+        self.assertEqual(9, cache_info.hits)
+
 
 if __name__ == '__main__':
     unittest.main()